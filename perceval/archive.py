@@ -27,6 +27,7 @@ import logging
 import os
 import pickle
 import sqlite3
+import threading
 import uuid
 
 from grimoirelab_toolkit.datetime import (datetime_utcnow,
@@ -56,6 +57,15 @@ class Archive:
     initialized calling to `init_metadata` method after creating
     a new archive.
 
+    Archives also keep a checkpoint of the fetch process that
+    generated them. A checkpoint that was not marked as finished
+    means the process was interrupted, so the archive can be
+    resumed. When `resumed` is set, clients replay the raw items
+    already stored in the archive instead of fetching them again.
+
+    Archives can be shared by several threads of the same process;
+    the access to the storage file is serialized.
+
     :param archive_path: path where this archive is stored
 
     :raises ArchiveError: when the archive does not exist or is invalid
@@ -63,6 +73,7 @@ class Archive:
 
     ARCHIVE_TABLE = "archive"
     METADATA_TABLE = "metadata"
+    CHECKPOINT_TABLE = "checkpoint"
 
     # Table structure
     ARCHIVE_CREATE_STMT = "CREATE TABLE " + ARCHIVE_TABLE + " ( " \
@@ -81,6 +92,12 @@ class Archive:
                            "backend_params BLOB, " \
                            "created_on TEXT)"
 
+    CHECKPOINT_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + CHECKPOINT_TABLE + " ( " \
+                             "id INTEGER PRIMARY KEY CHECK (id = 0), " \
+                             "data BLOB, " \
+                             "finished INTEGER NOT NULL, " \
+                             "updated_on TEXT)"
+
     def __init__(self, archive_path):
         if not os.path.exists(archive_path):
             raise ArchiveError(cause="archive %s does not exist" % (archive_path))
@@ -92,11 +109,16 @@ class Archive:
         self.category = None
         self.backend_params = None
         self.created_on = None
+        self.checkpoint = None
+        self.finished = None
+        self.resumed = False
 
-        self._db = sqlite3.connect(self.archive_path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.archive_path, check_same_thread=False)
 
         self._verify_archive()
         self._load_metadata()
+        self._load_checkpoint()
 
     def __del__(self):
         conn = getattr(self, '_db', None)
@@ -127,15 +149,16 @@ class Archive:
                     backend_params_dumped, created_on_dumped,)
 
         try:
-            cursor = self._db.cursor()
-            insert_stmt = "INSERT INTO " + self.METADATA_TABLE + " "\
-                          "(origin, backend_name, backend_version, " \
-                          "category, backend_params, created_on) " \
-                          "VALUES (?, ?, ?, ?, ?, ?)"
-            cursor.execute(insert_stmt, metadata)
-
-            self._db.commit()
-            cursor.close()
+            with self._lock:
+                cursor = self._db.cursor()
+                insert_stmt = "INSERT INTO " + self.METADATA_TABLE + " "\
+                              "(origin, backend_name, backend_version, " \
+                              "category, backend_params, created_on) " \
+                              "VALUES (?, ?, ?, ?, ?, ?)"
+                cursor.execute(insert_stmt, metadata)
+
+                self._db.commit()
+                cursor.close()
         except sqlite3.DatabaseError as e:
             msg = "metadata initialization error; cause: %s" % str(e)
             raise ArchiveError(cause=msg)
@@ -172,15 +195,20 @@ class Archive:
         logger.debug("Archiving %s with %s %s %s in %s",
                      hashcode, uri, payload, headers, self.archive_path)
 
+        # Resumed archives may receive again data that was not replayed,
+        # like errors; in that case, the new data replaces the old one
+        insert_cmd = "INSERT OR REPLACE INTO " if self.resumed else "INSERT INTO "
+
         try:
-            cursor = self._db.cursor()
-            insert_stmt = "INSERT INTO " + self.ARCHIVE_TABLE + " (" \
-                          "id, hashcode, uri, payload, headers, data) " \
-                          "VALUES(?,?,?,?,?,?)"
-            cursor.execute(insert_stmt, (None, hashcode, uri,
-                                         payload_dump, headers_dump, data_dump))
-            self._db.commit()
-            cursor.close()
+            with self._lock:
+                cursor = self._db.cursor()
+                insert_stmt = insert_cmd + self.ARCHIVE_TABLE + " (" \
+                    "id, hashcode, uri, payload, headers, data) " \
+                    "VALUES(?,?,?,?,?,?)"
+                cursor.execute(insert_stmt, (None, hashcode, uri,
+                                             payload_dump, headers_dump, data_dump))
+                self._db.commit()
+                cursor.close()
         except sqlite3.IntegrityError as e:
             msg = "data storage error; cause: duplicated entry %s" % hashcode
             raise ArchiveError(cause=msg)
@@ -209,16 +237,16 @@ class Archive:
         logger.debug("Retrieving entry %s with %s %s %s in %s",
                      hashcode, uri, payload, headers, self.archive_path)
 
-        self._db.row_factory = sqlite3.Row
-
         try:
-            cursor = self._db.cursor()
-            select_stmt = "SELECT data " \
-                          "FROM " + self.ARCHIVE_TABLE + " " \
-                          "WHERE hashcode = ?"
-            cursor.execute(select_stmt, (hashcode,))
-            row = cursor.fetchone()
-            cursor.close()
+            with self._lock:
+                self._db.row_factory = sqlite3.Row
+                cursor = self._db.cursor()
+                select_stmt = "SELECT data " \
+                              "FROM " + self.ARCHIVE_TABLE + " " \
+                              "WHERE hashcode = ?"
+                cursor.execute(select_stmt, (hashcode,))
+                row = cursor.fetchone()
+                cursor.close()
         except sqlite3.DatabaseError as e:
             msg = "data retrieval error; cause: %s" % str(e)
             raise ArchiveError(cause=msg)
@@ -231,6 +259,47 @@ class Archive:
 
         return found
 
+    def store_checkpoint(self, checkpoint, finished=False):
+        """Store the checkpoint of the fetch process.
+
+        Only the last checkpoint is kept in the archive. It is a
+        dict with the state of the process, like the number of
+        items generated so far or the date of the last one.
+
+        :param checkpoint: dict with the state of the fetch process
+        :param finished: whether the fetch process finished
+
+        :raises ArchiveError: when an error occurs storing the checkpoint
+        """
+        updated_on = datetime_to_utc(datetime_utcnow()).isoformat()
+        checkpoint_dump = pickle.dumps(checkpoint, 0)
+
+        try:
+            with self._lock:
+                cursor = self._db.cursor()
+                cursor.execute(self.CHECKPOINT_CREATE_STMT)
+                insert_stmt = "INSERT OR REPLACE INTO " + self.CHECKPOINT_TABLE + " (" \
+                              "id, data, finished, updated_on) " \
+                              "VALUES(0,?,?,?)"
+                cursor.execute(insert_stmt, (checkpoint_dump, int(finished), updated_on))
+                self._db.commit()
+                cursor.close()
+        except sqlite3.DatabaseError as e:
+            msg = "checkpoint storage error; cause: %s" % str(e)
+            raise ArchiveError(cause=msg)
+
+        self.checkpoint = checkpoint
+        self.finished = finished
+
+        logger.debug("Checkpoint %s stored in %s; finished: %s",
+                     checkpoint, self.archive_path, finished)
+
+    @property
+    def resumable(self):
+        """Whether the fetch process of this archive was interrupted."""
+
+        return self.finished is False
+
     @classmethod
     def create(cls, archive_path):
         """Create a brand new archive.
@@ -251,6 +320,7 @@ class Archive:
         cursor = conn.cursor()
         cursor.execute(cls.METADATA_CREATE_STMT)
         cursor.execute(cls.ARCHIVE_CREATE_STMT)
+        cursor.execute(cls.CHECKPOINT_CREATE_STMT)
         conn.commit()
 
         cursor.close()
@@ -327,6 +397,27 @@ class Archive:
 
         logger.debug("Metadata of archive %s loaded", self.archive_path)
 
+    def _load_checkpoint(self):
+        """Load the checkpoint from the archive file"""
+
+        cursor = self._db.cursor()
+        select_stmt = "SELECT data, finished " \
+                      "FROM " + self.CHECKPOINT_TABLE + " " \
+                      "LIMIT 1"
+
+        try:
+            cursor.execute(select_stmt)
+            row = cursor.fetchone()
+        except sqlite3.OperationalError:
+            # Archives created by older versions don't have checkpoints
+            row = None
+        finally:
+            cursor.close()
+
+        if row:
+            self.checkpoint = pickle.loads(row[0])
+            self.finished = bool(row[1])
+
     def _count_table_rows(self, table_name):
         """Fetch the number of rows in a table"""
 
@@ -437,7 +528,38 @@ class ArchiveManager:
 
         return archives
 
-    def _search_archives(self, origin, backend_name, category, archived_after):
+    def search_resumable(self, origin, backend_name, category):
+        """Search the last interrupted archive.
+
+        Get the most recent archive which stores data based on the given
+        parameters and whose fetch process was interrupted before it
+        finished. The archive is returned ready to be resumed.
+
+        :param origin: data origin
+        :param backend_name: backed used to fetch data
+        :param category: type of the items fetched by the backend
+
+        :returns: an `Archive` object or `None` when no archive
+            can be resumed
+        """
+        archives = self._search_archives(origin, backend_name, category,
+                                         str_to_datetime('1970-01-01'),
+                                         resumable=True)
+        archives = sorted(archives, key=lambda x: x[1])
+
+        if not archives:
+            return None
+
+        archive = Archive(archives[-1][0])
+        archive.resumed = True
+
+        logger.debug("Archive %s will be resumed from checkpoint %s",
+                     archive.archive_path, archive.checkpoint)
+
+        return archive
+
+    def _search_archives(self, origin, backend_name, category, archived_after,
+                         resumable=False):
         """Search archives using filters."""
 
         for archive_path in self._search_files():
@@ -451,6 +573,9 @@ class ArchiveManager:
                 archive.category == category and \
                 archive.created_on >= archived_after
 
+            if resumable:
+                match = match and archive.resumable
+
             if not match:
                 continue
 
@@ -26,12 +26,16 @@
 
 import argparse
 import collections
+import concurrent.futures
 import hashlib
 import importlib
+import itertools
 import json
 import logging
+import multiprocessing
 import os
 import pkgutil
+import queue as queue_module
 import sys
 
 from grimoirelab_toolkit.introspect import find_signature_parameters
@@ -40,6 +44,7 @@ from grimoirelab_toolkit.datetime import (datetime_utcnow,
                                           unixtime_to_datetime)
 from .archive import Archive, ArchiveManager
 from .errors import ArchiveError, BackendError, BackendCommandArgumentParserError
+from .index import ItemsIndex
 from ._version import __version__
 
 
@@ -48,6 +53,10 @@ logger = logging.getLogger(__name__)
 
 ARCHIVES_DEFAULT_PATH = '~/.perceval/archives/'
 DEFAULT_SEARCH_FIELD = 'item_id'
+CHECKPOINT_INTERVAL = 100
+ARCHIVE_CHUNK_SIZE = 100
+ARCHIVE_QUEUE_SIZE = 2
+ARCHIVE_QUEUE_TIMEOUT = 0.1
 
 OriginUniqueField = collections.namedtuple('OriginUniqueField', 'name type')
 
@@ -92,6 +101,20 @@ class Backend:
     the summary also includes some extra fields, which can be used by any
     backend to include fetch-specific information.
 
+    When items are archived, the fetch process stores a checkpoint in
+    the archive every `CHECKPOINT_INTERVAL` items. If the archive was
+    resumed after an interruption, the raw data already archived is
+    replayed and the items generated up to the last item returned
+    before the checkpoint are not returned again, so the collection
+    restarts where it was left. Items that were updated after the
+    checkpoint are returned anyway. Items not returned again are
+    counted as replayed in the summary.
+
+    When an index of items is set in `items_index`, the fetch process
+    only returns those items that are new or were updated since the
+    last time they were indexed. Items that did not change are counted
+    as skipped in the summary.
+
     Backends also produce a set of search fields, exposed in the
     `search_fields` attribute of each item returned by a call to :func:`fetch`.
     These contain the `item_id`, as well as any number of backend-specific
@@ -197,8 +220,10 @@ class Backend:
         self._origin = origin
         self.tag = tag if tag else origin
         self.archive = archive or None
+        self.items_index = None
         self.blacklist_ids = blacklist_ids or None
         self._summary = None
+        self._checkpoint = None
         self._ssl_verify = ssl_verify
 
     @property
@@ -226,6 +251,19 @@ class Backend:
 
         self._archive = obj
 
+    @property
+    def items_index(self):
+        return self._items_index
+
+    @items_index.setter
+    def items_index(self, obj):
+        if obj and not isinstance(obj, ItemsIndex):
+            msg = "obj is not an instance of ItemsIndex. %s object given" \
+                % (str(type(obj)))
+            raise ValueError(msg)
+
+        self._items_index = obj
+
     @property
     def categories(self):
         """See :data:`CATEGORIES`."""
@@ -307,20 +345,65 @@ class Backend:
             cause = "classified fields filtering is not compatible with archiving items"
             raise BackendError(cause=cause)
 
-        if self.archive:
+        checkpoint = {}
+
+        if self.archive and self.archive.resumed:
+            checkpoint = self.archive.checkpoint or {}
+            logger.info("Resuming fetch process from checkpoint %s", checkpoint)
+
+        self._checkpoint = checkpoint
+
+        if self.archive and not self.archive.resumed:
             self.archive.init_metadata(self.origin, self.__class__.__name__, self.version, category,
                                        kwargs)
+            self._store_checkpoint(0)
 
         self.client = self._init_client()
 
-        for item in self.fetch_items(category, **kwargs):
-            if filter_classified:
-                item = self.filter_classified_data(item)
+        replaying = bool(checkpoint.get('last_uuid', None)) and \
+            checkpoint.get('max_updated_on', None) is not None
+        nitems = 0
 
-            metadata_item = self.metadata(item, filter_classified=filter_classified)
-            self.summary.update(metadata_item)
+        try:
+            for item in self.fetch_items(category, **kwargs):
+                nitems += 1
 
-            yield metadata_item
+                if filter_classified:
+                    item = self.filter_classified_data(item)
+
+                metadata_item = self.metadata(item, filter_classified=filter_classified)
+
+                # Items returned before the checkpoint are not returned again;
+                # they are not newer than the ones returned and they come up
+                # to the last item returned
+                if replaying:
+                    replaying = metadata_item['uuid'] != checkpoint['last_uuid']
+                    if metadata_item['updated_on'] <= checkpoint['max_updated_on']:
+                        self.summary.replayed += 1
+                        replaying = replaying and self.summary.replayed < checkpoint['items']
+                        continue
+
+                if self.items_index and not self.items_index.is_updated(metadata_item):
+                    self.summary.skipped += 1
+                else:
+                    self.summary.update(metadata_item)
+
+                    yield metadata_item
+
+                    if self.items_index:
+                        self.items_index.add(metadata_item)
+
+                if self.archive and nitems % CHECKPOINT_INTERVAL == 0:
+                    self._store_checkpoint(nitems)
+        finally:
+            if self.items_index:
+                self.items_index.flush()
+
+        if self.summary.replayed:
+            logger.info("%s items replayed from the checkpoint", self.summary.replayed)
+
+        if self.archive:
+            self._store_checkpoint(nitems, finished=True)
 
     def fetch_from_archive(self):
         """Fetch the questions from an archive.
@@ -553,6 +636,32 @@ class Backend:
         """
         raise NotImplementedError
 
+    def _store_checkpoint(self, nitems, finished=False):
+        """Store the state of the fetch process in the archive.
+
+        Besides the number of items generated, the checkpoint keeps
+        the UUID of the last item returned and the maximum update
+        time of the items returned, so a resumed process can find
+        where it was left even when the data changed in the meantime.
+        Values of the checkpoint this process was resumed from are
+        kept until new items are returned.
+        """
+        previous = self._checkpoint or {}
+
+        max_updated_on = previous.get('max_updated_on', None)
+        if self.summary.max_updated_on:
+            ts = self.summary.max_updated_on.timestamp()
+            max_updated_on = ts if max_updated_on is None else max(max_updated_on, ts)
+
+        checkpoint = {
+            'items': nitems,
+            'last_uuid': self.summary.last_uuid or previous.get('last_uuid', None),
+            'last_updated_on': self.summary.last_updated_on or previous.get('last_updated_on', None),
+            'max_updated_on': max_updated_on,
+            'last_offset': self.summary.last_offset or previous.get('last_offset', None)
+        }
+        self.archive.store_checkpoint(checkpoint, finished=finished)
+
     def _skip_item(self, item):
         if not self.origin_unique_field:
             return False
@@ -703,6 +812,15 @@ class BackendCommandArgumentParser:
             raise AttributeError("fetch-archive and no-archive arguments are not compatible")
         if self._archive and parsed_args.fetch_archive and not parsed_args.category:
             raise AttributeError("fetch-archive needs a category to work with")
+        if self._archive and parsed_args.resume and \
+                (parsed_args.fetch_archive or parsed_args.no_archive):
+            raise AttributeError("resume is not compatible with fetch-archive and no-archive arguments")
+        if self._archive and parsed_args.resume and not parsed_args.category:
+            raise AttributeError("resume needs a category to work with")
+        if self._archive and parsed_args.fetch_archive and parsed_args.delta_index:
+            raise AttributeError("fetch-archive and delta-index arguments are not compatible")
+        if self._archive and parsed_args.archive_workers is not None and parsed_args.archive_workers < 1:
+            raise AttributeError("archive-workers must be greater than 0")
 
         # Set aliases
         for alias, arg in self.aliases.items():
@@ -738,6 +856,12 @@ class BackendCommandArgumentParser:
                            help="fetch data from the archives")
         group.add_argument('--archived-since', dest='archived_since', default='1970-01-01',
                            help="retrieve items archived since the given date")
+        group.add_argument('--resume', dest='resume', action='store_true',
+                           help="resume the last interrupted fetch process; keep the archive on errors")
+        group.add_argument('--archive-workers', dest='archive_workers', type=int, default=None,
+                           help="number of processes used to retrieve items from archives")
+        group.add_argument('--unordered-archives', dest='unordered_archives', action='store_true',
+                           help="return archived items as soon as they are retrieved, in any order")
 
     def _set_output_arguments(self):
         """Activate output arguments parsing"""
@@ -748,6 +872,8 @@ class BackendCommandArgumentParser:
                            help="output file")
         group.add_argument('--json-line', dest='json_line', action='store_true',
                            help="produce a JSON line for each output item")
+        group.add_argument('--delta-index', dest='delta_index', default=None,
+                           help="only produce new or updated items, tracking them in this index file")
 
 
 class BackendCommand:
@@ -793,19 +919,30 @@ class BackendCommand:
 
         If `fetch-archive` parameter was given as an argument during
         the initialization of the instance, the items will be retrieved
-        using the archive manager.
+        using the archive manager. When `resume` is given, the last
+        interrupted fetch process is resumed. When `delta-index` is
+        given, only new or updated items are written.
         """
         backend_args = vars(self.parsed_args)
         category = backend_args.pop('category', None)
         filter_classified = backend_args.pop('filter_classified', False)
         fetch_archive = self.archive_manager and self.parsed_args.fetch_archive
         archived_since = backend_args.pop('archived_since', None)
+        resume = backend_args.pop('resume', False)
+        archive_workers = backend_args.pop('archive_workers', None)
+        unordered_archives = backend_args.pop('unordered_archives', False)
+        delta_index = backend_args.pop('delta_index', None)
+        items_index = ItemsIndex(delta_index) if delta_index else None
 
         with BackendItemsGenerator(self.BACKEND, backend_args, category,
                                    filter_classified=filter_classified,
                                    manager=self.archive_manager,
                                    fetch_archive=fetch_archive,
-                                   archived_after=archived_since) as big:
+                                   archived_after=archived_since,
+                                   resume=resume,
+                                   items_index=items_index,
+                                   archive_workers=archive_workers,
+                                   unordered_archives=unordered_archives) as big:
             try:
                 for item in big.items:
                     if self.json_line:
@@ -913,23 +1050,41 @@ class BackendItemsGenerator:
     :param manager: archive manager where the items will be retrieved
     :param fetch_archive: If enabled, items are fetched from archives
     :param archived_after: return items archived after this date
+    :param resume: If enabled, the last interrupted fetch process
+        stored in the archive manager is resumed; if there is none,
+        a new one starts. The archive is not removed on errors, so
+        it can be resumed later.
+    :param items_index: index used to return only new or updated
+        items; not supported when fetching items from archives
+    :param archive_workers: number of processes used to fetch items
+        from archives; when it is greater than one, archives are
+        processed in parallel
+    :param unordered_archives: when archives are processed in parallel,
+        return the items of each archive as soon as they are available
+        instead of following the creation order of the archives
     """
     def __init__(self, backend_class, backend_args, category,
                  filter_classified=False, manager=None,
-                 fetch_archive=False, archived_after=None):
+                 fetch_archive=False, archived_after=None,
+                 resume=False, items_index=None,
+                 archive_workers=None, unordered_archives=False):
         init_args = find_signature_parameters(backend_class.__init__,
                                               backend_args)
 
         if not fetch_archive:
-            archive = manager.create_archive() if manager else None
-            init_args['archive'] = archive
+            init_args['archive'] = None
             self.backend = backend_class(**init_args)
+            self.backend.archive = _init_archive(self.backend, manager, category, resume)
+            self.backend.items_index = items_index
             items = self.__fetch(backend_args, category,
                                  filter_classified=filter_classified,
-                                 manager=manager)
+                                 manager=manager, resume=resume)
         else:
             self.backend = backend_class(**init_args)
-            items = self.__fetch_from_archive(category, manager, archived_after)
+            items = self.__fetch_from_archive(category, manager, archived_after,
+                                              init_args=init_args,
+                                              workers=archive_workers,
+                                              ordered=not unordered_archives)
 
         self.items = items
 
@@ -947,13 +1102,13 @@ class BackendItemsGenerator:
         return self.backend.summary
 
     def __fetch(self, backend_args, category, filter_classified=False,
-                manager=None):
+                manager=None, resume=False):
         """Fetch items using the given backend.
 
         Generator to get items using the backend. When an archive manager
         is given, this function will store the fetched items in an `Archive`.
         If an exception is raised, this archive will be removed to avoid
-        corrupted archives.
+        corrupted archives, unless `resume` is set.
 
         The parameters needed to get the items are given using the
         `backend_args` dict parameter.
@@ -964,6 +1119,7 @@ class BackendItemsGenerator:
         :param filter_classified: remove classified fields from the resulting
             items
         :param manager: archive manager needed to store the items
+        :param resume: keep the archive when an exception is raised
 
         :returns: a generator of items
         """
@@ -980,21 +1136,30 @@ class BackendItemsGenerator:
             for item in items:
                 yield item
         except Exception as e:
-            if manager:
+            if manager and not resume:
                 archive_path = self.backend.archive.archive_path
                 manager.remove_archive(archive_path)
             raise e
 
-    def __fetch_from_archive(self, category, manager, archived_after):
+    def __fetch_from_archive(self, category, manager, archived_after,
+                             init_args=None, workers=None, ordered=True):
         """Fetch items from an archive manager.
 
         Generator to get the items of a category (previously fetched
         by the backend) from an archive manager. Only those items
         archived after the given date will be returned.
 
+        When `workers` is greater than one, archives are processed
+        in parallel by a pool of processes, each one running its own
+        instance of the backend.
+
         :param category: category of the items to retrieve
         :param manager: archive manager where the items will be retrieved
         :param archived_after: return items archived after this date
+        :param init_args: arguments needed to initialize the backend
+        :param workers: number of processes used to fetch the items
+        :param ordered: return the items following the creation
+            order of the archives
 
         :returns: a generator of archived items
         """
@@ -1003,6 +1168,11 @@ class BackendItemsGenerator:
                                    category,
                                    archived_after)
 
+        if workers and workers > 1:
+            yield from _fetch_from_archives_parallel(self.backend, init_args, filepaths,
+                                                     workers, ordered=ordered)
+            return
+
         for filepath in filepaths:
             self.backend.archive = Archive(filepath)
             items = self.backend.fetch_from_archive()
@@ -1024,12 +1194,16 @@ class Summary:
     Furthermore, for backends using offsets, the corresponding summary
     contains the minimum, maximum and last offsets retrieved.
 
+    Items generated before the checkpoint of a resumed fetch are
+    counted apart as replayed; they are not part of the total.
+
     Finally, the summary also includes some extra fields, which can
     be used by any backend to include fetch-specific information.
     """
     def __init__(self):
         self.fetched = 0
         self.skipped = 0
+        self.replayed = 0
         self.min_updated_on = None
         self.max_updated_on = None
         self.last_updated_on = None
@@ -1097,7 +1271,7 @@ def uuid(*args):
 
 
 def fetch(backend_class, backend_args, category, filter_classified=False,
-          manager=None):
+          manager=None, resume=False, items_index=None):
     """Fetch items using the given backend.
 
     Generator to get items using the given backend class. When
@@ -1105,6 +1279,13 @@ def fetch(backend_class, backend_args, category, filter_classified=False,
     the fetched items in an `Archive`. If an exception is raised,
     this archive will be removed to avoid corrupted archives.
 
+    When `resume` is set, the last interrupted fetch process stored
+    in the archive manager is resumed and the archive is kept when
+    an exception is raised, so it can be resumed later.
+
+    When an `items_index` is given, only new or updated items
+    are returned.
+
     The parameters needed to initialize the `backend` class and
     get the items are given using `backend_args` dict parameter.
 
@@ -1114,15 +1295,19 @@ def fetch(backend_class, backend_args, category, filter_classified=False,
        If None, it will use the default backend category
     :param filter_classified: remove classified fields from the resulting items
     :param manager: archive manager needed to store the items
+    :param resume: resume the last interrupted fetch process
+    :param items_index: index used to return only new or updated items
 
     :returns: a generator of items
     """
     init_args = find_signature_parameters(backend_class.__init__,
                                           backend_args)
-    archive = manager.create_archive() if manager else None
-    init_args['archive'] = archive
+    init_args['archive'] = None
 
     backend = backend_class(**init_args)
+    archive = _init_archive(backend, manager, category, resume)
+    backend.archive = archive
+    backend.items_index = items_index
 
     if category:
         backend_args['category'] = category
@@ -1137,14 +1322,14 @@ def fetch(backend_class, backend_args, category, filter_classified=False,
         for item in items:
             yield item
     except Exception as e:
-        if manager:
+        if manager and not resume:
             archive_path = archive.archive_path
             manager.remove_archive(archive_path)
         raise e
 
 
 def fetch_from_archive(backend_class, backend_args, manager,
-                       category, archived_after):
+                       category, archived_after, workers=None, ordered=True):
     """Fetch items from an archive manager.
 
     Generator to get the items of a category (previously fetched
@@ -1154,11 +1339,21 @@ def fetch_from_archive(backend_class, backend_args, manager,
     The parameters needed to initialize `backend` and get the
     items are given using `backend_args` dict parameter.
 
+    When `workers` is greater than one, archives are processed in
+    parallel by a pool of processes. Items are returned following
+    the creation order of the archives unless `ordered` is unset;
+    in that case, the items of each archive are returned as soon
+    as the archive is processed. Like in the sequential mode,
+    archives that raise an `ArchiveError` are ignored.
+
     :param backend_class: backend class to retrive items
     :param backend_args: dict of arguments needed to retrieve the items
     :param manager: archive manager where the items will be retrieved
     :param category: category of the items to retrieve
     :param archived_after: return items archived after this date
+    :param workers: number of processes used to retrieve the items
+    :param ordered: return the items following the creation
+        order of the archives
 
     :returns: a generator of archived items
     """
@@ -1171,6 +1366,11 @@ def fetch_from_archive(backend_class, backend_args, manager,
                                category,
                                archived_after)
 
+    if workers and workers > 1:
+        yield from _fetch_from_archives_parallel(backend, init_args, filepaths,
+                                                 workers, ordered=ordered)
+        return
+
     for filepath in filepaths:
         backend.archive = Archive(filepath)
         items = backend.fetch_from_archive()
@@ -1182,6 +1382,143 @@ def fetch_from_archive(backend_class, backend_args, manager,
             logger.warning("Ignoring %s archive due to: %s", filepath, str(e))
 
 
+def _fetch_from_archives_parallel(backend, init_args, filepaths, workers, ordered=True):
+    """Fetch items from a list of archives using a pool of processes.
+
+    Each archive is processed by a new instance of the backend created
+    in one of the processes of the pool. The items are sent back in
+    chunks of `ARCHIVE_CHUNK_SIZE` items through a bounded queue per
+    archive, so a process waits while its queue is full. To limit
+    memory usage, only a few archives are processed ahead of the
+    items returned. The summary of the whole process is stored in
+    the given backend.
+    """
+    backend._summary = Summary()
+    backend_class = backend.__class__
+    filepaths = iter(filepaths)
+    max_pending = 2 * workers
+
+    with multiprocessing.Manager() as sync_manager, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        stop = sync_manager.Event()
+        started = sync_manager.Queue()
+        pending = collections.OrderedDict()
+
+        def submit(nfiles):
+            for filepath in itertools.islice(filepaths, nfiles):
+                chunks = sync_manager.Queue(maxsize=ARCHIVE_QUEUE_SIZE)
+                future = executor.submit(_fetch_archive_items, backend_class,
+                                         init_args, filepath, chunks, started, stop)
+                pending[filepath] = (future, chunks)
+
+        def wait_for(queue, futures):
+            while True:
+                try:
+                    return queue.get(timeout=ARCHIVE_QUEUE_TIMEOUT)
+                except queue_module.Empty:
+                    for future in futures:
+                        if future.done() and future.exception():
+                            raise future.exception()
+
+        submit(max_pending)
+
+        try:
+            while pending:
+                if ordered:
+                    filepath = next(iter(pending))
+                else:
+                    futures = [future for future, _ in pending.values()]
+                    filepath = wait_for(started, futures)
+
+                future, chunks = pending[filepath]
+
+                while True:
+                    items, error = wait_for(chunks, [future])
+
+                    if items is None:
+                        break
+
+                    for item in items:
+                        backend.summary.update(item)
+                        yield item
+
+                    if error:
+                        break
+
+                del pending[filepath]
+                submit(1)
+
+                if error:
+                    logger.warning("Ignoring %s archive due to: %s", filepath, error)
+        finally:
+            stop.set()
+            for future, _ in pending.values():
+                future.cancel()
+
+
+def _fetch_archive_items(backend_class, init_args, filepath, chunks, started, stop):
+    """Fetch the items stored in an archive.
+
+    Function run by the processes of the pool when archives are
+    fetched in parallel. Once the process starts, the path of the
+    archive is put on `started`. The items are put on `chunks` in
+    lists of `ARCHIVE_CHUNK_SIZE` items, together with the cause of
+    the error, if any, that stopped the process. The last chunk is
+    `None`. The process stops when `stop` is set.
+    """
+    def put(items, error=None):
+        while not stop.is_set():
+            try:
+                chunks.put((items, error), timeout=ARCHIVE_QUEUE_TIMEOUT)
+                return True
+            except queue_module.Full:
+                continue
+        return False
+
+    started.put(filepath)
+
+    backend = backend_class(**init_args)
+    items = []
+
+    try:
+        backend.archive = Archive(filepath)
+        for item in backend.fetch_from_archive():
+            items.append(item)
+
+            if len(items) >= ARCHIVE_CHUNK_SIZE:
+                if not put(items):
+                    return
+                items = []
+    except ArchiveError as e:
+        put(items, str(e))
+        return
+
+    if items:
+        put(items)
+    put(None)
+
+
+def _init_archive(backend, manager, category, resume):
+    """Get the archive where the items of a backend will be stored.
+
+    When `resume` is set, the last interrupted archive of the backend
+    is returned, if any. Otherwise, a new archive is created.
+    """
+    if not manager:
+        return None
+
+    archive = None
+
+    if resume:
+        archive = manager.search_resumable(backend.origin,
+                                           backend.__class__.__name__,
+                                           category)
+    if not archive:
+        archive = manager.create_archive()
+
+    return archive
+
+
 def find_backends(top_package):
     """Find available backends.
 
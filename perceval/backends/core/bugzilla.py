@@ -25,7 +25,9 @@
 #
 
 import csv
+import concurrent.futures
 import datetime
+import html.parser
 import logging
 import re
 
@@ -39,12 +41,14 @@ from ...backend import (Backend,
                         BackendCommandArgumentParser)
 from ...client import HttpClient
 from ...errors import BackendError, ParseError
-from ...utils import DEFAULT_DATETIME, xml_to_dict
+from ...utils import DEFAULT_DATETIME, iter_xml_to_dict, map_concurrently
 
 CATEGORY_BUG = "bug"
 MAX_BUGS = 200  # Maximum number of bugs per query
 MAX_BUGS_CSV = 10000  # Maximum number of bugs per CSV query
 
+EMPTY_ACTIVITY_REGEX = re.compile("No changes have been made to this (?:bug|issue) yet.")
+
 logger = logging.getLogger(__name__)
 
 
@@ -63,8 +67,11 @@ class Bugzilla(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param fetch_workers: number of threads used to fetch the
+        activity of the bugs concurrently; when it is set, the next
+        page of the list of bugs is also requested in advance
     """
-    version = '1.0.0'
+    version = '1.2.1'
 
     CATEGORIES = [CATEGORY_BUG]
     EXTRA_SEARCH_FIELDS = {
@@ -74,7 +81,7 @@ class Bugzilla(Backend):
 
     def __init__(self, url, user=None, password=None,
                  max_bugs=MAX_BUGS, max_bugs_csv=MAX_BUGS_CSV,
-                 tag=None, archive=None, ssl_verify=True):
+                 tag=None, archive=None, ssl_verify=True, fetch_workers=None):
         origin = url
 
         super().__init__(origin, tag=tag, archive=archive, ssl_verify=ssl_verify)
@@ -84,6 +91,7 @@ class Bugzilla(Backend):
         self.max_bugs_csv = max_bugs_csv
         self.client = None
         self.max_bugs = max(1, max_bugs)
+        self.fetch_workers = fetch_workers
 
     def fetch(self, category=CATEGORY_BUG, from_date=DEFAULT_DATETIME):
         """Fetch the bugs from the repository.
@@ -118,26 +126,16 @@ class Bugzilla(Backend):
         logger.info("Looking for bugs: '%s' updated from '%s'",
                     self.url, str(from_date))
 
-        buglist = [bug for bug in self.__fetch_buglist(from_date)]
-
         nbugs = 0
-        tbugs = len(buglist)
-
-        for i in range(0, tbugs, self.max_bugs):
-            chunk = buglist[i:i + self.max_bugs]
-            bugs_ids = [b['bug_id'] for b in chunk]
 
-            logger.info("Fetching bugs: %s/%s", i, tbugs)
-            bugs = self.__fetch_and_parse_bugs_details(bugs_ids)
+        for bugs_ids in self.__fetch_bugs_ids(from_date):
+            logger.info("Fetching bugs: %s-%s", nbugs, nbugs + len(bugs_ids))
 
-            for bug in bugs:
-                bug_id = bug['bug_id'][0]['__text__']
-                bug['activity'] = self.__fetch_and_parse_bug_activity(bug_id)
+            for bug in self.__fetch_bugs(bugs_ids):
                 nbugs += 1
                 yield bug
 
-        logger.info("Fetch process completed: %s/%s bugs fetched",
-                    nbugs, tbugs)
+        logger.info("Fetch process completed: %s bugs fetched", nbugs)
 
     @classmethod
     def has_archiving(cls):
@@ -211,7 +209,8 @@ class Bugzilla(Backend):
 
         This method returns a generator which parses the given XML,
         producing an iterator of dictionaries. Each dictionary stores
-        the information related to a parsed bug.
+        the information related to a parsed bug. Bugs are returned as
+        soon as they are parsed, without building the whole XML tree.
 
         If the given XML is invalid or does not contains any bug, the
         method will raise a ParseError exception.
@@ -223,15 +222,16 @@ class Bugzilla(Backend):
         :raises ParseError: raised when an error occurs parsing
             the given XML stream
         """
-        bugs = xml_to_dict(raw_xml)
+        nbugs = 0
+
+        for bug in iter_xml_to_dict(raw_xml, 'bug'):
+            nbugs += 1
+            yield bug
 
-        if 'bug' not in bugs:
+        if not nbugs:
             cause = "No bugs found. XML stream seems to be invalid."
             raise ParseError(cause=cause)
 
-        for bug in bugs['bug']:
-            yield bug
-
     @staticmethod
     def parse_bug_activity(raw_html):
         """Parse a Bugzilla bug activity HTML stream.
@@ -251,8 +251,7 @@ class Bugzilla(Backend):
             the given HTML stream
         """
         def is_activity_empty(bs):
-            EMPTY_ACTIVITY = "No changes have been made to this (?:bug|issue) yet."
-            tag = bs.find(text=re.compile(EMPTY_ACTIVITY))
+            tag = bs.find(text=EMPTY_ACTIVITY_REGEX)
             return tag is not None
 
         def find_activity_table(bs):
@@ -276,37 +275,49 @@ class Bugzilla(Backend):
             s = ' '.join(strings)
             return s
 
-        # Parsing starts here
-        bs = bs4.BeautifulSoup(raw_html, 'html.parser')
+        def parse_cells(raw_html):
+            bs = bs4.BeautifulSoup(raw_html, 'html.parser')
+
+            if is_activity_empty(bs):
+                return []
 
-        if is_activity_empty(bs):
-            fields = []
-        else:
             activity_tb = find_activity_table(bs)
             remove_tags(activity_tb)
-            fields = activity_tb.find_all('td')
 
-        while fields:
+            return [(td.get('rowspan'), format_text(td))
+                    for td in activity_tb.find_all('td')]
+
+        # Parsing starts here. The activity table is extracted
+        # by a scanner; when the page is not regular enough for it,
+        # the whole page is parsed with BeautifulSoup.
+        cells = _BugActivityScanner().scan(raw_html)
+
+        if cells is None:
+            cells = parse_cells(raw_html)
+
+        i = 0
+        ncells = len(cells)
+
+        while i < ncells:
             # First two fields: 'Who' and 'When'.
-            who = fields.pop(0)
-            when = fields.pop(0)
+            who = cells[i]
+            when = cells[i + 1]
+            i += 2
 
             # The attribute 'rowspan' of 'who' field tells how many
             # changes were made on the same date.
-            n = int(who.get('rowspan'))
+            n = int(who[0])
 
             # Next fields are split into chunks of three elements:
             # 'What', 'Removed' and 'Added'. These chunks share
             # 'Who' and 'When' values.
             for _ in range(n):
-                what = fields.pop(0)
-                removed = fields.pop(0)
-                added = fields.pop(0)
-                event = {'Who': format_text(who),
-                         'When': format_text(when),
-                         'What': format_text(what),
-                         'Removed': format_text(removed),
-                         'Added': format_text(added)}
+                event = {'Who': who[1],
+                         'When': when[1],
+                         'What': cells[i][1],
+                         'Removed': cells[i + 1][1],
+                         'Added': cells[i + 2][1]}
+                i += 3
                 yield event
 
     def _init_client(self, from_archive=False):
@@ -316,21 +327,63 @@ class Bugzilla(Backend):
                               max_bugs_csv=self.max_bugs_csv,
                               archive=self.archive, from_archive=from_archive, ssl_verify=self.ssl_verify)
 
-    def __fetch_buglist(self, from_date):
-        buglist = self.__fetch_and_parse_buglist_page(from_date)
+    def __fetch_bugs_ids(self, from_date):
+        # Chunks of ids are generated as soon as they are
+        # available on the list of bugs
+        bugs_ids = []
+
+        for bug in self.__fetch_buglist(from_date):
+            bugs_ids.append(bug['bug_id'])
+
+            if len(bugs_ids) == self.max_bugs:
+                yield bugs_ids
+                bugs_ids = []
+
+        if bugs_ids:
+            yield bugs_ids
+
+    def __fetch_bugs(self, bugs_ids):
+        bugs = list(self.__fetch_and_parse_bugs_details(bugs_ids))
 
-        while buglist:
-            bug = buglist.pop(0)
-            last_date = bug['changeddate']
+        # The activity of the bugs is requested one page per bug;
+        # these pages can be fetched by several threads.
+        activities = map_concurrently(self.__fetch_and_parse_bug_activity,
+                                      [bug['bug_id'][0]['__text__'] for bug in bugs],
+                                      workers=self.fetch_workers)
+
+        for bug, activity in zip(bugs, activities):
+            bug['activity'] = activity
             yield bug
 
-            # Bugzilla does not support pagination. Due to this,
-            # the next list of bugs is requested adding one second
-            # to the last date obtained.
-            if not buglist:
-                from_date = str_to_datetime(last_date)
+    def __fetch_buglist(self, from_date):
+        # When several workers are available, the next page of
+        # the list is requested while the current one is processed.
+        prefetch = self.fetch_workers is not None and self.fetch_workers > 1
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+        try:
+            buglist = self.__fetch_and_parse_buglist_page(from_date)
+
+            while buglist:
+                # Bugzilla does not support pagination. Due to this,
+                # the next list of bugs is requested adding one second
+                # to the last date obtained.
+                from_date = str_to_datetime(buglist[-1]['changeddate'])
                 from_date += datetime.timedelta(seconds=1)
-                buglist = self.__fetch_and_parse_buglist_page(from_date)
+
+                if executor:
+                    next_buglist = executor.submit(self.__fetch_and_parse_buglist_page,
+                                                   from_date)
+
+                yield from buglist
+
+                if executor:
+                    buglist = next_buglist.result()
+                else:
+                    buglist = self.__fetch_and_parse_buglist_page(from_date)
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
 
     def __fetch_and_parse_buglist_page(self, from_date):
         logger.debug("Fetching and parsing buglist page from %s", str(from_date))
@@ -350,6 +403,193 @@ class Bugzilla(Backend):
         return [event for event in activity]
 
 
+class _BugActivityScanner(html.parser.HTMLParser):
+    """Scanner of the table of activity of a Bugzilla bug.
+
+    This scanner extracts the cells of the table of activity from
+    a HTML page without building its tree. It follows the rules of
+    the 'html.parser' builder of BeautifulSoup, so the text of each
+    cell is the same that `Bugzilla.parse_bug_activity` obtains from
+    the tree: the stripped strings of the cell, where the contents of
+    'a', 'i' and 'span' tags are taken as a single string.
+
+    When the page contains constructions that the scanner does not
+    follow, like cells inside those tags or scripts inside cells,
+    `scan` returns `None`. The same happens when the table of
+    activity is not found.
+    """
+    INLINE_TAGS = frozenset(['a', 'i', 'span'])
+    UNSUPPORTED_TAGS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+    PRESERVE_WHITESPACE_TAGS = frozenset(['pre', 'textarea'])
+    EMPTY_ELEMENT_TAGS = frozenset(['area', 'base', 'basefont', 'bgsound', 'br',
+                                    'col', 'command', 'embed', 'frame', 'hr',
+                                    'image', 'img', 'input', 'isindex', 'keygen',
+                                    'link', 'menuitem', 'meta', 'nextid', 'param',
+                                    'source', 'spacer', 'track', 'wbr'])
+    ASCII_SPACES = ' \n\t\x0c\r'
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+
+        # Each open element is a list with its tag and its state
+        self._stack = []
+        self._data = []
+        self._tables = []
+        self._inline = None
+        self._ninline = 0
+        self._npreserve = 0
+        self._empty = False
+        self._irregular = False
+
+    def scan(self, raw_html):
+        """Scan a HTML page looking for the cells of the activity table.
+
+        :param raw_html: HTML string to scan
+
+        :returns: a list of tuples with the 'rowspan' attribute and
+            the text of each cell; an empty list when the bug does not
+            have activity; `None` when the cells could not be extracted
+        """
+        self.feed(raw_html)
+        self.close()
+        self._flush()
+
+        if self._empty:
+            return []
+        if self._irregular:
+            return None
+
+        for table in self._tables:
+            if table['nheaders'] is None:
+                # Table without rows
+                return None
+            if table['nheaders'] == 5:
+                return [(cell['rowspan'], self._format_text(cell['strings']))
+                        for cell in table['cells']]
+
+        return None
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+
+        if tag in self.EMPTY_ELEMENT_TAGS:
+            return
+
+        parent = self._stack[-1] if self._stack else None
+        state = None
+
+        if tag == 'table':
+            state = {'nheaders': None, 'cells': []}
+            self._tables.append(state)
+        elif tag == 'tr':
+            # Headers are only counted on the first row of each table
+            state = {'tables': []}
+            for elem in self._stack:
+                if elem[0] == 'table' and elem[1]['nheaders'] is None:
+                    elem[1]['nheaders'] = 0
+                    state['tables'].append(elem[1])
+        elif tag == 'th':
+            if parent and parent[0] == 'tr':
+                for table in parent[1]['tables']:
+                    table['nheaders'] += 1
+        elif tag == 'td':
+            if self._ninline:
+                self._irregular = True
+            values = dict((k, v if v is not None else '') for k, v in attrs)
+            state = {'rowspan': values.get('rowspan', None), 'strings': []}
+            for elem in self._stack:
+                if elem[0] == 'table':
+                    elem[1]['cells'].append(state)
+        elif tag in self.INLINE_TAGS:
+            if not self._ninline:
+                self._inline = []
+            self._ninline += 1
+        elif tag in self.UNSUPPORTED_TAGS:
+            if any(elem[0] == 'td' for elem in self._stack):
+                self._irregular = True
+        elif tag in self.PRESERVE_WHITESPACE_TAGS:
+            self._npreserve += 1
+
+        self._stack.append([tag, state])
+
+    def handle_endtag(self, tag):
+        self._flush()
+
+        for pos in range(len(self._stack) - 1, -1, -1):
+            if self._stack[pos][0] == tag:
+                break
+        else:
+            return
+
+        while len(self._stack) > pos:
+            name, _ = self._stack.pop()
+
+            if name in self.INLINE_TAGS:
+                self._ninline -= 1
+                if not self._ninline:
+                    self._add_string(''.join(self._inline))
+                    self._inline = None
+            elif name in self.PRESERVE_WHITESPACE_TAGS:
+                self._npreserve -= 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in self.EMPTY_ELEMENT_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+        self._check_empty(data)
+
+    def handle_decl(self, decl):
+        self._flush()
+        self._check_empty(decl)
+
+    def handle_pi(self, data):
+        self._flush()
+        self._check_empty(data)
+
+    def unknown_decl(self, data):
+        self._flush()
+        self._check_empty(data)
+        if any(elem[0] == 'td' for elem in self._stack):
+            self._irregular = True
+
+    def _check_empty(self, data):
+        if EMPTY_ACTIVITY_REGEX.search(data):
+            self._empty = True
+
+    def _flush(self):
+        if not self._data:
+            return
+
+        data = ''.join(self._data)
+        self._data = []
+
+        if not self._npreserve and not data.strip(self.ASCII_SPACES):
+            data = '\n' if '\n' in data else ' '
+        else:
+            self._check_empty(data)
+
+        if self._ninline:
+            self._inline.append(data)
+        else:
+            self._add_string(data)
+
+    def _add_string(self, string):
+        for elem in self._stack:
+            if elem[0] == 'td':
+                elem[1]['strings'].append(string)
+
+    @staticmethod
+    def _format_text(strings):
+        strings = [s.strip().strip(' \n\t') for s in strings if s.strip()]
+        return ' '.join(strings)
+
+
 class BugzillaCommand(BackendCommand):
     """Class to run Bugzilla backend from the command line."""
 
@@ -373,6 +613,9 @@ class BugzillaCommand(BackendCommand):
         group.add_argument('--max-bugs-csv', dest='max_bugs_csv',
                            type=int, default=MAX_BUGS_CSV,
                            help="Maximum number of bugs requested on CSV queries")
+        group.add_argument('--fetch-workers', dest='fetch_workers',
+                           type=int, default=None,
+                           help="Number of threads used to fetch data concurrently")
 
         # Required arguments
         parser.parser.add_argument('url',
@@ -24,6 +24,7 @@
 #     Harshal Mittal <harshalmittal4@gmail.com>
 #
 
+import concurrent.futures
 import json
 import logging
 
@@ -37,7 +38,7 @@ from ...backend import (Backend,
                         BackendCommandArgumentParser)
 from ...client import HttpClient
 from ...errors import BaseError, BackendError
-from ...utils import DEFAULT_DATETIME
+from ...utils import DEFAULT_DATETIME, map_concurrently
 
 
 logger = logging.getLogger(__name__)
@@ -64,8 +65,11 @@ class BugzillaREST(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param fetch_workers: number of threads used to fetch the contents
+        of the bugs concurrently; when it is set, the next page of
+        bugs is also requested in advance
     """
-    version = '1.0.0'
+    version = '1.1.0'
 
     CATEGORIES = [CATEGORY_BUG]
     EXTRA_SEARCH_FIELDS = {
@@ -74,7 +78,8 @@ class BugzillaREST(Backend):
     }
 
     def __init__(self, url, user=None, password=None, api_token=None, api_key=None,
-                 max_bugs=MAX_BUGS, tag=None, archive=None, ssl_verify=True):
+                 max_bugs=MAX_BUGS, tag=None, archive=None, ssl_verify=True,
+                 fetch_workers=None):
         origin = url
 
         super().__init__(origin, tag=tag, archive=archive, ssl_verify=ssl_verify)
@@ -84,6 +89,7 @@ class BugzillaREST(Backend):
         self.api_token = api_token
         self.api_key = api_key
         self.max_bugs = max(1, max_bugs)
+        self.fetch_workers = fetch_workers
         self.client = None
 
     def fetch(self, category=CATEGORY_BUG, from_date=DEFAULT_DATETIME):
@@ -185,36 +191,65 @@ class BugzillaREST(Backend):
         max_contents = min(MAX_CONTENTS, self.max_bugs)
         offset = 0
 
-        while True:
-            logger.debug("Fetching and parsing bugs from: %s, offset: %s, limit: %s ",
-                         str(from_date), offset, self.max_bugs)
-            raw_bugs = self.client.bugs(from_date=from_date, offset=offset,
-                                        max_bugs=self.max_bugs)
+        # When several workers are available, the next page of
+        # bugs is requested while the current one is processed.
+        prefetch = self.fetch_workers is not None and self.fetch_workers > 1
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1) if prefetch else None
 
-            data = json.loads(raw_bugs)
-            buglist = data['bugs']
-
-            tbugs = len(buglist)
-
-            if tbugs == 0:
-                break
-
-            for i in range(0, tbugs, max_contents):
-                chunk = buglist[i:i + max_contents]
-                bug_ids = [b['id'] for b in chunk]
-
-                comments = self.__fetch_and_parse_comments(*bug_ids)
-                histories = self.__fetch_and_parse_histories(*bug_ids)
-                attachments = self.__fetch_and_parse_attachments(*bug_ids)
-
-                for bug in chunk:
-                    bug_id = str(bug['id'])
-                    bug['comments'] = comments[bug_id]
-                    bug['history'] = histories[bug_id]
-                    bug['attachments'] = attachments[bug_id]
-                    yield bug
-
-            offset += self.max_bugs
+        try:
+            buglist = self.__fetch_and_parse_bugs_page(from_date, offset)
+
+            while buglist:
+                offset += self.max_bugs
+
+                if executor:
+                    next_buglist = executor.submit(self.__fetch_and_parse_bugs_page,
+                                                   from_date, offset)
+
+                chunks = [buglist[i:i + max_contents]
+                          for i in range(0, len(buglist), max_contents)]
+
+                # Comments, histories and attachments of each chunk
+                # are independent requests; they can run concurrently
+                # while their results are consumed in order.
+                calls = []
+                for chunk in chunks:
+                    bug_ids = [b['id'] for b in chunk]
+                    calls.append((self.__fetch_and_parse_comments, bug_ids))
+                    calls.append((self.__fetch_and_parse_histories, bug_ids))
+                    calls.append((self.__fetch_and_parse_attachments, bug_ids))
+
+                contents = map_concurrently(lambda call: call[0](*call[1]), calls,
+                                            workers=self.fetch_workers)
+
+                for chunk in chunks:
+                    comments = next(contents)
+                    histories = next(contents)
+                    attachments = next(contents)
+
+                    for bug in chunk:
+                        bug_id = str(bug['id'])
+                        bug['comments'] = comments[bug_id]
+                        bug['history'] = histories[bug_id]
+                        bug['attachments'] = attachments[bug_id]
+                        yield bug
+
+                if executor:
+                    buglist = next_buglist.result()
+                else:
+                    buglist = self.__fetch_and_parse_bugs_page(from_date, offset)
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+    def __fetch_and_parse_bugs_page(self, from_date, offset):
+        logger.debug("Fetching and parsing bugs from: %s, offset: %s, limit: %s ",
+                     str(from_date), offset, self.max_bugs)
+        raw_bugs = self.client.bugs(from_date=from_date, offset=offset,
+                                    max_bugs=self.max_bugs)
+
+        data = json.loads(raw_bugs)
+        return data['bugs']
 
     def __fetch_and_parse_comments(self, *bug_ids):
         logger.debug("Fetching and parsing comments")
@@ -516,6 +551,9 @@ class BugzillaRESTCommand(BackendCommand):
                            help="Maximum number of bugs requested on the same query")
         group.add_argument('--api-key', dest='api_key',
                            help="Bugzilla API key")
+        group.add_argument('--fetch-workers', dest='fetch_workers',
+                           type=int, default=None,
+                           help="Number of threads used to fetch data concurrently")
 
         # Required arguments
         parser.parser.add_argument('url',
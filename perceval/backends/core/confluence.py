@@ -38,7 +38,8 @@ from ...backend import (Backend,
                         BackendCommandArgumentParser,
                         DEFAULT_SEARCH_FIELD)
 from ...client import HttpClient
-from ...utils import DEFAULT_DATETIME
+from ...errors import ArchiveError
+from ...utils import DEFAULT_DATETIME, map_concurrently
 
 CATEGORY_HISTORICAL_CONTENT = "historical content"
 MAX_CONTENTS = 200
@@ -67,14 +68,16 @@ class Confluence(Backend):
     :param user: Confluence user name. It is required for Confluence Cloud,
                  optional for Confluence Data Center and server editions 7.9 and later
     :param api_token: Confluence user's personal access token or api token
+    :param fetch_workers: number of threads used to fetch the versions
+        of the contents concurrently
     """
-    version = '1.0.0'
+    version = '1.1.0'
 
     CATEGORIES = [CATEGORY_HISTORICAL_CONTENT]
 
     def __init__(self, url, tag=None, archive=None, ssl_verify=True,
                  spaces=None, max_contents=MAX_CONTENTS,
-                 user=None, api_token=None):
+                 user=None, api_token=None, fetch_workers=None):
         origin = url
 
         super().__init__(origin, tag=tag, archive=archive, ssl_verify=ssl_verify)
@@ -84,6 +87,7 @@ class Confluence(Backend):
         self.max_contents = max_contents
         self.user = user
         self.api_token = api_token
+        self.fetch_workers = fetch_workers
 
     def search_fields(self, item):
         """Add search fields to an item.
@@ -174,8 +178,9 @@ class Confluence(Backend):
         for content in contents:
             cid = content['id']
             content_url = urijoin(self.origin, content['_links']['webui'])
+            latest = content.get('version', {}).get('number', None)
 
-            hcs = self.__fetch_historical_contents(cid, from_date)
+            hcs = self.__fetch_historical_contents(cid, from_date, latest)
 
             for hc in hcs:
                 hc['content_url'] = content_url
@@ -289,52 +294,113 @@ class Confluence(Backend):
             for cs in self.parse_contents_summary(page):
                 yield cs
 
-    def __fetch_historical_contents(self, cid, from_date):
+    def __fetch_historical_contents(self, cid, from_date, latest=None):
+        """Fetch the versions of a content updated since `from_date`.
+
+        When the number of the latest version is known, only the
+        versions from the first one updated since `from_date` are
+        fetched, concurrently when `fetch_workers` is set. Otherwise,
+        versions are fetched one by one until the latest is found.
+        """
         logger.debug("Fetching historical contents of %s content", cid)
 
-        fetching = True
+        if latest is None:
+            hcs = self.__fetch_versions_until_latest(cid)
+        else:
+            hcs = self.__fetch_versions(cid, from_date, latest)
+
+        try:
+            for hc in hcs:
+                # Removed or private contents stop the fetching process
+                if hc is None:
+                    break
+
+                # if 'when' attribute is not present, the historical content is skipped
+                if 'when' not in hc['version']:
+                    logger.debug("Content %s v%s skipped due to missing 'when' attribute",
+                                 hc['id'], str(hc['version']['number']))
+                    continue
+
+                # Return those versions that were created after 'from_date'
+                when = str_to_datetime(hc['version']['when'])
+                if when >= from_date:
+                    yield hc
+                else:
+                    logger.debug("Content %s v%s updated before %s; skipped",
+                                 hc['id'], str(hc['version']['number']), str(from_date))
+        finally:
+            hcs.close()
+
+    def __fetch_versions_until_latest(self, cid):
         version = 1
 
-        while fetching:
-            logger.debug("Fetching and parsing historical content #%s for %s ",
-                         str(version), cid)
+        while True:
+            hc = self.__fetch_historical_content(cid, version)
+            yield hc
 
-            try:
-                raw_hc = self.client.historical_content(cid, version)
-            except requests.exceptions.HTTPError as e:
-                code = e.response.status_code
+            # Check whether it retrieved the latest version
+            if hc is None or hc['history']['latest']:
+                break
+            version += 1
 
-                # Common problems found: removed and private contents
-                if code not in (404, 500):
-                    raise e
+    def __fetch_versions(self, cid, from_date, latest):
+        fetched = {}
+        first = self.__search_first_version(cid, from_date, latest, fetched)
 
-                logger.warning("Error retrieving content %s v#%s; skipping",
-                               cid, version)
-                logger.warning("Exception: %s", str(e))
-                break
+        def fetch_version(version):
+            if version in fetched:
+                return fetched[version]
+            return self.__fetch_historical_content(cid, version)
 
-            hc = self.parse_historical_content(raw_hc)
+        return map_concurrently(fetch_version, range(first, latest + 1),
+                                workers=self.fetch_workers)
 
-            # if 'when' attribute is not present, the historical content is skipped
-            if 'when' not in hc['version']:
-                logger.debug("Content %s v%s skipped due to missing 'when' attribute",
-                             hc['id'], str(hc['version']['number']))
+    def __search_first_version(self, cid, from_date, latest, fetched):
+        """Search the first version of a content updated since `from_date`.
 
-                fetching = not hc['history']['latest']
-                version += 1
-                continue
+        Versions are sorted by date, so the search is done by bisection.
+        Versions without date or that could not be retrieved are taken
+        as updated ones, to be processed later. The versions fetched
+        during the search are stored in `fetched`.
+        """
+        first = 1
+        last = latest
 
-            # Return those versions that were created after 'from_date'
-            when = str_to_datetime(hc['version']['when'])
-            if when >= from_date:
-                yield hc
+        if from_date <= DEFAULT_DATETIME:
+            return first
+
+        while first < last:
+            version = (first + last) // 2
+
+            hc = self.__fetch_historical_content(cid, version)
+            fetched[version] = hc
+
+            if hc and 'when' in hc['version'] and str_to_datetime(hc['version']['when']) < from_date:
+                first = version + 1
             else:
-                logger.debug("Content %s v%s updated before %s; skipped",
-                             hc['id'], str(hc['version']['number']), str(from_date))
+                last = version
 
-            # Check whether it retrieved the latest version
-            fetching = not hc['history']['latest']
-            version += 1
+        return first
+
+    def __fetch_historical_content(self, cid, version):
+        logger.debug("Fetching and parsing historical content #%s for %s ",
+                     str(version), cid)
+
+        try:
+            raw_hc = self.client.historical_content(cid, version)
+        except requests.exceptions.HTTPError as e:
+            code = e.response.status_code
+
+            # Common problems found: removed and private contents
+            if code not in (404, 500):
+                raise e
+
+            logger.warning("Error retrieving content %s v#%s; skipping",
+                           cid, version)
+            logger.warning("Exception: %s", str(e))
+            return None
+
+        return self.parse_historical_content(raw_hc)
 
 
 class ConfluenceCommand(BackendCommand):
@@ -362,6 +428,9 @@ class ConfluenceCommand(BackendCommand):
         parser.parser.add_argument('--max-contents', dest='max_contents',
                                    type=int, default=MAX_CONTENTS,
                                    help="Maximum number of contents requested on the same query")
+        parser.parser.add_argument('--fetch-workers', dest='fetch_workers',
+                                   type=int, default=None,
+                                   help="Number of threads used to fetch data concurrently")
 
         return parser
 
@@ -404,6 +473,7 @@ class ConfluenceClient(HttpClient):
     VCQL = "lastModified>='%(date)s' order by lastModified"
     VCQL_SPACE = "space in (%(spaces)s) and lastModified>='%(date)s' order by lastModified"
     VEXPAND = ['body.storage', 'history', 'version']
+    VEXPAND_CONTENTS = [PANCESTORS, 'version']
     VHISTORICAL = 'historical'
 
     def __init__(self, base_url, archive=None, from_archive=False, ssl_verify=True,
@@ -436,7 +506,11 @@ class ConfluenceClient(HttpClient):
         This method returns an iterator that manages the pagination
         over contents. Take into account that the seconds of `from_date`
         parameter will be ignored because the API only works with
-        hours and minutes.
+        hours and minutes. The ancestors and the latest version of
+        each content are included in the results. When the contents
+        are read from an archive created before the latest version
+        was included, they are read as they were requested then,
+        with the ancestors only.
 
         :param from_date: fetch the contents updated since this date
         :param offset: fetch the contents starting from this offset
@@ -456,13 +530,24 @@ class ConfluenceClient(HttpClient):
         params = {
             self.PCQL: cql,
             self.PLIMIT: max_contents,
-            self.PEXPAND: self.PANCESTORS
+            self.PEXPAND: ','.join(self.VEXPAND_CONTENTS)
         }
 
         if offset:
             params[self.PSTART] = offset
 
-        for response in self._call(resource, params):
+        responses = self._call(resource, params)
+
+        if self.from_archive:
+            try:
+                yield next(responses)
+            except ArchiveError:
+                params[self.PEXPAND] = self.PANCESTORS
+                responses = self._call(resource, params)
+            except StopIteration:
+                return
+
+        for response in responses:
             yield response
 
     def historical_content(self, content_id, version):
@@ -24,20 +24,30 @@
 #     Harshal Mittal <harshalmittal4@gmail.com>
 #
 
+import concurrent.futures
+import datetime
+import heapq
 import json
 import logging
+import os
 import re
+import shlex
+import shutil
 import subprocess
+import tempfile
+import threading
 import time
 
 from grimoirelab_toolkit.datetime import datetime_to_utc
+from grimoirelab_toolkit.uris import urijoin
 
 from ...backend import (Backend,
                         BackendCommand,
                         BackendCommandArgumentParser,
                         OriginUniqueField)
+from ...client import HttpClient
 from ...errors import BackendError
-from ...utils import DEFAULT_DATETIME
+from ...utils import DEFAULT_DATETIME, map_concurrently
 
 CATEGORY_REVIEW = "review"
 
@@ -54,6 +64,14 @@ class Gerrit(Backend):
     this class the Hostname of the server must be provided. The `hostname`
     will be set as the origin of the data.
 
+    Reviews are fetched running `gerrit query` over SSH, unless the
+    URL of the REST API is given in `rest_url`. In that case, changes
+    are requested over HTTP and converted to the format of the
+    SSH queries. Take into account that this format is not fully
+    reproduced: the REST API only reports the current votes, which
+    are set as the approvals of the last patch set, and patch sets
+    do not include `sizeInsertions` and `sizeDeletions`.
+
     :param hostname: Gerrit server Hostname
     :param user: SSH user used to connect to the Gerrit server
     :param port: SSH port
@@ -63,8 +81,16 @@ class Gerrit(Backend):
     :param archive: archive to store/retrieve items
     :param blacklist_ids: exclude the reviews while fetching
     :param id_filepath: path to SSH private key
+    :param fetch_workers: number of threads used to fetch data; when
+        it is greater than one, the next pages of reviews are requested
+        while the current one is processed. Over SSH, up to 10 threads
+        are used, the default limit of sessions per connection of
+        OpenSSH servers
+    :param rest_url: URL of the REST API of the server
+        (e.g. https://gerrit.example.org/r)
+    :param password: HTTP password of `user` for the REST API
     """
-    version = '1.0.0'
+    version = '1.3.0'
 
     CATEGORIES = [CATEGORY_REVIEW]
     EXTRA_SEARCH_FIELDS = {
@@ -76,7 +102,8 @@ class Gerrit(Backend):
     def __init__(self, hostname,
                  user=None, port=PORT, max_reviews=MAX_REVIEWS,
                  disable_host_key_check=False, id_filepath=None,
-                 tag=None, archive=None, blacklist_ids=None):
+                 tag=None, archive=None, blacklist_ids=None, fetch_workers=None,
+                 rest_url=None, password=None):
         origin = hostname
 
         super().__init__(origin, tag=tag, archive=archive, blacklist_ids=blacklist_ids)
@@ -88,6 +115,9 @@ class Gerrit(Backend):
         self.blacklist_ids = blacklist_ids
         self.disable_host_key_check = disable_host_key_check
         self.archive = archive
+        self.fetch_workers = fetch_workers
+        self.rest_url = rest_url
+        self.password = password
         self.client = None
 
     def fetch(self, category=CATEGORY_REVIEW, from_date=DEFAULT_DATETIME):
@@ -119,13 +149,16 @@ class Gerrit(Backend):
         """
         from_date = kwargs['from_date']
 
-        if self.client.version[0] == 2 and self.client.version[1] == 8:
-            fetcher = self._fetch_gerrit28(from_date)
-        else:
-            fetcher = self._fetch_gerrit(from_date)
+        try:
+            if self.client.version[0] == 2 and self.client.version[1] == 8:
+                fetcher = self._fetch_gerrit28(from_date)
+            else:
+                fetcher = self._fetch_gerrit(from_date)
 
-        for review in fetcher:
-            yield review
+            for review in fetcher:
+                yield review
+        finally:
+            self.client.close()
 
     @classmethod
     def has_archiving(cls):
@@ -173,22 +206,31 @@ class Gerrit(Backend):
 
     @staticmethod
     def parse_reviews(raw_data):
-        """Parse a Gerrit reviews list."""
+        """Parse a Gerrit reviews list.
 
-        # Join isolated reviews in JSON in array for parsing
-        items_raw = "[" + raw_data.replace("\n", ",") + "]"
-        items_raw = items_raw.replace(",]", "]")
-        items = json.loads(items_raw)
+        Gerrit returns a JSON object per line: the reviews followed
+        by a summary of the query, which is discarded.
+        """
         reviews = []
 
-        for item in items:
-            if 'project' in item.keys():
+        for line in raw_data.split('\n'):
+            if not line:
+                continue
+
+            item = json.loads(line)
+
+            if 'project' in item:
                 reviews.append(item)
 
         return reviews
 
     def _init_client(self, from_archive=False):
 
+        if self.rest_url:
+            return GerritRESTClient(self.rest_url, self.user, self.password,
+                                    self.max_reviews, self.blacklist_ids,
+                                    self.archive, from_archive)
+
         return GerritClient(self.hostname, self.user, self.max_reviews,
                             self.blacklist_ids, self.disable_host_key_check,
                             self.port, self.id_filepath, self.archive,
@@ -205,31 +247,16 @@ class Gerrit(Backend):
         from_ut = datetime_to_utc(from_date)
         from_ut = from_ut.timestamp()
 
-        filter_open = "status:open"
-        filter_closed = "status:closed"
-
-        last_item_open = self.client.next_retrieve_group_item()
-        last_item_closed = self.client.next_retrieve_group_item()
-        reviews_open = self._get_reviews(last_item_open, filter_open)
-        reviews_closed = self._get_reviews(last_item_closed, filter_closed)
-        last_nreviews_open = len(reviews_open)
-        last_nreviews_closed = len(reviews_closed)
-
-        while reviews_open or reviews_closed:
-            if reviews_open and reviews_closed:
-                if reviews_open[0]['lastUpdated'] >= reviews_closed[0]['lastUpdated']:
-                    review_open = reviews_open.pop(0)
-                    review = review_open
-                else:
-                    review_closed = reviews_closed.pop(0)
-                    review = review_closed
-            elif reviews_closed:
-                review_closed = reviews_closed.pop(0)
-                review = review_closed
-            else:
-                review_open = reviews_open.pop(0)
-                review = review_open
+        reviews_open = self._fetch_reviews("status:open", from_ut=from_ut)
+        reviews_closed = self._fetch_reviews("status:closed", from_ut=from_ut)
 
+        # Both lists are sorted from the newest to the oldest review;
+        # on a tie, open reviews go first
+        reviews = heapq.merge(reviews_open, reviews_closed,
+                              key=lambda review: review['lastUpdated'],
+                              reverse=True)
+
+        for review in reviews:
             updated = review['lastUpdated']
             if updated <= from_ut:
                 logger.debug("No more updates for %s" % (self.hostname))
@@ -237,30 +264,13 @@ class Gerrit(Backend):
             else:
                 yield review
 
-            if not reviews_open and last_nreviews_open >= self.max_reviews:
-                last_item_open = self.client.next_retrieve_group_item(last_item_open, review_open)
-                reviews_open = self._get_reviews(last_item_open, filter_open)
-                last_nreviews_open = len(reviews_open)
-            if not reviews_closed and last_nreviews_closed >= self.max_reviews:
-                last_item_closed = self.client.next_retrieve_group_item(last_item_closed, review_closed)
-                reviews_closed = self._get_reviews(last_item_closed, filter_closed)
-                last_nreviews_closed = len(reviews_closed)
-
     def _fetch_gerrit(self, from_date=DEFAULT_DATETIME):
-        last_item = self.client.next_retrieve_group_item()
-        reviews = self._get_reviews(last_item)
-        last_nreviews = len(reviews)
 
         # Convert date to Unix time
         from_ut = datetime_to_utc(from_date)
         from_ut = from_ut.timestamp()
 
-        while reviews:
-            review = reviews.pop(0)
-            try:
-                last_item += 1
-            except Exception:
-                pass  # last_item is a string in old gerrits
+        for review in self._fetch_reviews(from_ut=from_ut):
             updated = review['lastUpdated']
             if updated <= from_ut:
                 logger.debug("No more updates for %s" % (self.hostname))
@@ -268,11 +278,125 @@ class Gerrit(Backend):
             else:
                 yield review
 
-            if not reviews and last_nreviews >= self.max_reviews:
-                logger.debug("GETTING MORE REVIEWS %i >= %i " % (last_nreviews, self.max_reviews))
-                last_item = self.client.next_retrieve_group_item(last_item, review)
-                reviews = self._get_reviews(last_item)
-                last_nreviews = len(reviews)
+    def _fetch_reviews(self, filter_=None, from_ut=None):
+        """Fetch the reviews, page by page, from the newest to the oldest.
+
+        Pages are requested lazily. When `fetch_workers` is greater
+        than one, the next pages are requested in the background
+        while the reviews of the current one are consumed. Pages
+        that start on an offset are requested concurrently; pages
+        that start on the sort key of the last review of the previous
+        page are requested one by one. When `from_ut` is given, no
+        pages are requested concurrently after the one that reaches
+        reviews updated on or before that Unix time.
+
+        Over SSH, the number of threads is limited to
+        `GerritClient.MAX_SESSIONS` because the commands share the
+        same connection.
+        """
+        last_item = self.client.next_retrieve_group_item()
+
+        workers = self.fetch_workers
+        if workers and isinstance(self.client, GerritClient):
+            workers = min(workers, GerritClient.MAX_SESSIONS)
+
+        if isinstance(last_item, int) and workers and workers > 1:
+            pages = self.__fetch_reviews_offsets(last_item, workers, filter_, from_ut)
+        else:
+            pages = self.__fetch_reviews_pages(last_item, filter_)
+
+        try:
+            for reviews in pages:
+                yield from reviews
+
+                if len(reviews) < self.max_reviews:
+                    break
+
+                logger.debug("GETTING MORE REVIEWS %i >= %i " % (len(reviews), self.max_reviews))
+        finally:
+            pages.close()
+
+    def __fetch_reviews_offsets(self, offset, workers, filter_=None, from_ut=None):
+        """Fetch the pages of reviews that start on an offset concurrently.
+
+        The first page is requested alone; the next ones are only
+        requested concurrently when it is full and all its reviews
+        were updated after `from_ut`. Once a page with fewer reviews
+        than `max_reviews` or with reviews updated on or before
+        `from_ut` is received, no more offsets are submitted and the
+        pages after it that were not started yet are not requested.
+        """
+        end = []
+        end_lock = threading.Lock()
+        first_page = threading.Event()
+
+        def fetch_page(page_offset):
+            with end_lock:
+                if end and page_offset > end[0]:
+                    return []
+
+            last_page = True
+
+            try:
+                reviews = self._get_reviews(page_offset, filter_)
+
+                last_page = len(reviews) < self.max_reviews
+                if not last_page and from_ut is not None:
+                    last_page = reviews[-1]['lastUpdated'] <= from_ut
+            finally:
+                if last_page:
+                    with end_lock:
+                        if not end or page_offset < end[0]:
+                            end[:] = [page_offset]
+
+                if page_offset == offset:
+                    first_page.set()
+
+            return reviews
+
+        def offsets():
+            yield offset
+
+            # Wait for the first page before submitting the next ones
+            first_page.wait()
+
+            page_offset = offset + self.max_reviews
+            while not end:
+                yield page_offset
+                page_offset += self.max_reviews
+
+        return map_concurrently(fetch_page, offsets(), workers=workers)
+
+    def __fetch_reviews_pages(self, last_item, filter_=None):
+        """Fetch the pages of reviews one after the other"""
+
+        executor = None
+        if self.fetch_workers and self.fetch_workers > 1:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        try:
+            reviews = self._get_reviews(last_item, filter_)
+
+            while True:
+                next_reviews = None
+
+                if len(reviews) >= self.max_reviews:
+                    if isinstance(last_item, int):
+                        last_item += len(reviews)
+                    last_item = self.client.next_retrieve_group_item(last_item, reviews[-1])
+
+                    if executor:
+                        next_reviews = executor.submit(self._get_reviews, last_item, filter_)
+
+                yield reviews
+
+                if next_reviews:
+                    reviews = next_reviews.result()
+                else:
+                    reviews = self._get_reviews(last_item, filter_)
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
 
     def _get_reviews(self, last_item, filter_=None):
         task_init = time.time()
@@ -290,6 +414,12 @@ class GerritClient():
     repository using the ssh API. Currently it supports <2.8 and >=2.9
     versions in incremental mode.
 
+    All the commands share the same SSH connection. The first command
+    run on the server starts a master connection (see `ControlMaster`
+    on `ssh_config`) which is used by the rest of commands until
+    the client is closed. When the master connection cannot be
+    established, each command opens its own connection.
+
     Check the next link for more info:
     https://gerrit-documentation.storage.googleapis.com/Documentation/2.12/cmd-query.html
 
@@ -308,6 +438,8 @@ class GerritClient():
     CMD_VERSION = 'version'
     MAX_RETRIES = 3  # max number of retries when a command fails
     RETRY_WAIT = 60  # number of seconds when retrying a ssh command
+    CONTROL_PERSIST = 300  # seconds the master connection lasts when it is idle
+    MAX_SESSIONS = 10  # default number of sessions per connection on OpenSSH servers
 
     def __init__(self, repository, user=None, max_reviews=MAX_REVIEWS, blacklist_reviews=None,
                  disable_host_key_check=False, port=PORT, id_filepath=None,
@@ -324,19 +456,28 @@ class GerritClient():
         self.archive = archive
         self.from_archive = from_archive
 
+        self._control_dir = None
+        self._control_path = None
+
         ssh_opts = ''
+        self.ssh_args = ['ssh']
+
         if disable_host_key_check:
             ssh_opts += "-o StrictHostKeyChecking=no "
+            self.ssh_args += ['-o', 'StrictHostKeyChecking=no']
 
         if self.id_filepath:
             ssh_opts += "-i %s " % self.id_filepath
+            self.ssh_args += ['-i', os.path.expanduser(self.id_filepath)]
 
         if self.port:
             self.gerrit_cmd = "ssh %s -p %s %s@%s" % (ssh_opts, self.port,
                                                       self.gerrit_user, self.repository)
+            self.ssh_args += ['-p', str(self.port)]
         else:
             self.gerrit_cmd = "ssh %s %s@%s" % (ssh_opts, self.gerrit_user, self.repository)
 
+        self.ssh_host = "%s@%s" % (self.gerrit_user, self.repository)
         self.gerrit_cmd += " %s " % (GerritClient.CMD_GERRIT)
 
     @property
@@ -403,6 +544,22 @@ class GerritClient():
 
         return next_item
 
+    def close(self):
+        """Close the master SSH connection, if any."""
+
+        if not self._control_dir:
+            return
+
+        if self._control_path:
+            args = self.ssh_args + ['-o', 'ControlPath=' + self._control_path,
+                                    '-O', 'exit', self.ssh_host]
+            subprocess.run(args, stdin=subprocess.DEVNULL,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        shutil.rmtree(self._control_dir, ignore_errors=True)
+        self._control_dir = None
+        self._control_path = None
+
     @staticmethod
     def sanitize_for_archive(cmd):
         """Sanitize the Gerrit command by removing username information
@@ -445,7 +602,7 @@ class GerritClient():
 
         while retries < self.MAX_RETRIES:
             try:
-                result = subprocess.check_output(cmd, shell=True)
+                result = self.__run_ssh(cmd)
                 break
             except subprocess.CalledProcessError as ex:
                 logger.error("gerrit cmd %s failed: %s", cmd, ex)
@@ -464,6 +621,64 @@ class GerritClient():
 
         return result
 
+    def __run_ssh(self, cmd):
+        """Run a gerrit command on the server using the master connection.
+
+        The command is not run by a shell. Its arguments are split
+        as a shell would do, so the server receives the same command.
+
+        The output is read line by line while it arrives, but lines
+        are buffered and only returned once the command finished
+        successfully. When it fails, the partial output is discarded,
+        so retrying the command does not return incomplete pages.
+        """
+        if not self._control_dir:
+            self.__start_master()
+
+        args = list(self.ssh_args)
+
+        if self._control_path:
+            args += ['-o', 'ControlPath=' + self._control_path]
+
+        args.append(self.ssh_host)
+        args.append(GerritClient.CMD_GERRIT)
+        args += shlex.split(cmd[len(self.gerrit_cmd):])
+
+        lines = []
+
+        with subprocess.Popen(args, stdin=subprocess.DEVNULL,
+                              stdout=subprocess.PIPE) as proc:
+            for line in proc.stdout:
+                lines.append(line)
+
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+        return b''.join(lines)
+
+    def __start_master(self):
+        """Start the master SSH connection shared by the commands"""
+
+        self._control_dir = tempfile.mkdtemp(prefix='perceval_')
+        control_path = os.path.join(self._control_dir, 'ssh')
+
+        args = self.ssh_args + ['-o', 'ControlMaster=yes',
+                                '-o', 'ControlPath=' + control_path,
+                                '-o', 'ControlPersist=%s' % self.CONTROL_PERSIST,
+                                '-f', '-N', self.ssh_host]
+
+        logger.debug("Starting SSH master connection to %s", self.repository)
+
+        result = subprocess.run(args, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.DEVNULL)
+
+        if result.returncode == 0:
+            self._control_path = control_path
+        else:
+            logger.warning("SSH master connection to %s not started; "
+                           "each command will open a new connection",
+                           self.repository)
+
     def _get_gerrit_cmd(self, last_item, filter_=None):
 
         if filter_ and filter_ not in ['status:open', 'status:closed']:
@@ -502,6 +717,218 @@ class GerritClient():
         return cmd
 
 
+class GerritRESTClient(HttpClient):
+    """Gerrit REST API client.
+
+    This class implements a client to retrieve reviews from the
+    `/changes/` endpoint of the REST API of a Gerrit server. Changes
+    are converted to the format returned by `gerrit query` over SSH,
+    so the backend processes them in the same way. The REST API only
+    reports the current votes of a change; they are set as the
+    approvals of its current patch set. The sizes of the patch sets
+    (`sizeInsertions` and `sizeDeletions`) are not available.
+
+    When `user` and `password` are given, requests are authenticated
+    and sent to the `/a/` endpoints.
+
+    Check the next link for more info:
+    https://gerrit-review.googlesource.com/Documentation/rest-api-changes.html
+
+    :param url: URL of the REST API of the server
+    :param user: user of the server
+    :param password: HTTP password of the user
+    :param max_reviews: max number of reviews per query
+    :param blacklist_reviews: exclude the reviews of this list while fetching
+    :param archive: collect issues already retrieved from an archive
+    :param from_archive: it tells whether to write/read the archive
+    """
+    VERSION_REGEX = re.compile(r'(\d+)\.(\d+).*')
+    XSSI_PREFIX = ")]}'"
+
+    # API resources
+    RAUTH = 'a'
+    RCHANGES = 'changes'
+    RVERSION = 'config/server/version'
+
+    # Resource parameters
+    PQUERY = 'q'
+    PLIMIT = 'n'
+    PSTART = 'S'
+    POPTIONS = 'o'
+
+    # Predefined values
+    VOPTIONS = ['DETAILED_ACCOUNTS', 'ALL_REVISIONS', 'ALL_COMMITS',
+                'MESSAGES', 'DETAILED_LABELS']
+
+    def __init__(self, url, user=None, password=None, max_reviews=MAX_REVIEWS,
+                 blacklist_reviews=None, archive=None, from_archive=False):
+        self.url = url
+        self.gerrit_user = user
+        self.password = password
+        self.max_reviews = max_reviews
+        self.blacklist_reviews = [] if not blacklist_reviews else blacklist_reviews
+        self._version = None
+
+        base_url = urijoin(url, self.RAUTH) if user and password else url
+
+        super().__init__(base_url, archive=archive, from_archive=from_archive)
+
+        if user and password:
+            self.session.auth = (user, password)
+
+    @property
+    def version(self):
+        """Return the Gerrit server version."""
+
+        if self._version:
+            return self._version
+
+        response = self.fetch(urijoin(self.base_url, self.RVERSION))
+        raw_data = self._parse_json(response.text)
+        logger.debug("Gerrit version: %s" % (raw_data))
+
+        # output: "2.14.6-7-g55dde9d68b"
+        m = re.match(self.VERSION_REGEX, raw_data)
+
+        if not m:
+            cause = "Invalid gerrit version %s" % raw_data
+            raise BackendError(cause=cause)
+
+        self._version = [int(m.group(1)), int(m.group(2))]
+        return self._version
+
+    def reviews(self, last_item, filter_=None):
+        """Get the reviews starting from last_item.
+
+        Reviews are returned as the output of `gerrit query`, one
+        JSON object per line.
+        """
+        if filter_ and filter_ not in ['status:open', 'status:closed']:
+            cause = "Filter not supported in gerrit %s" % (filter_)
+            raise BackendError(cause=cause)
+
+        query = filter_ if filter_ else "(status:open OR status:closed)"
+        if self.blacklist_reviews:
+            query += " AND NOT (%s)" % (' OR '.join(self.blacklist_reviews))
+
+        payload = {
+            self.PQUERY: query,
+            self.PLIMIT: self.max_reviews,
+            self.PSTART: last_item,
+            self.POPTIONS: self.VOPTIONS
+        }
+
+        logger.debug("Getting reviews with query: %s, start: %s", query, last_item)
+        # The endpoint requires the trailing slash
+        url = urijoin(self.base_url, self.RCHANGES) + '/'
+        response = self.fetch(url, payload=payload)
+        changes = self._parse_json(response.text)
+
+        lines = [json.dumps(self.change_to_review(change, self.url)) for change in changes]
+        lines.append(json.dumps({'type': 'stats', 'rowCount': len(changes)}))
+
+        return '\n'.join(lines) + '\n'
+
+    def next_retrieve_group_item(self, last_item=None, entry=None):
+        """Return the item to start from in next reviews group."""
+
+        return 0 if last_item is None else last_item
+
+    def close(self):
+        """Close the HTTP session."""
+
+        self._close_http_session()
+
+    @staticmethod
+    def change_to_review(change, url):
+        """Convert a change of the REST API to a review of `gerrit query`.
+
+        :param change: change returned by the REST API
+        :param url: URL of the server, used to build the URL of the review
+
+        :returns: a review
+        """
+        def account(info):
+            return {k: info[k] for k in ['name', 'email', 'username'] if k in info}
+
+        def timestamp(ts):
+            # Dates are UTC and have nanoseconds: '2018-03-05 14:38:31.000000000'
+            dt = datetime.datetime.strptime(ts[:19], '%Y-%m-%d %H:%M:%S')
+            return int(dt.replace(tzinfo=datetime.timezone.utc).timestamp())
+
+        review = {
+            'project': change['project'],
+            'branch': change['branch']
+        }
+        if 'topic' in change:
+            review['topic'] = change['topic']
+
+        review['id'] = change['change_id']
+        review['number'] = change['_number']
+        review['subject'] = change['subject']
+        review['owner'] = account(change['owner'])
+        review['url'] = urijoin(url, str(change['_number']))
+
+        revisions = change.get('revisions', {})
+        current = revisions.get(change.get('current_revision'), {})
+        if 'message' in current.get('commit', {}):
+            review['commitMessage'] = current['commit']['message']
+
+        review['createdOn'] = timestamp(change['created'])
+        review['lastUpdated'] = timestamp(change['updated'])
+        review['open'] = change['status'] == 'NEW'
+        review['status'] = change['status']
+
+        review['comments'] = []
+        for message in change.get('messages', []):
+            comment = {'timestamp': timestamp(message['date'])}
+            if 'author' in message:
+                comment['reviewer'] = account(message['author'])
+            comment['message'] = message['message']
+            review['comments'].append(comment)
+
+        approvals = []
+        for label, label_info in change.get('labels', {}).items():
+            for vote in label_info.get('all', []):
+                if not vote.get('value') or 'date' not in vote:
+                    continue
+                approvals.append({
+                    'type': label,
+                    'description': label,
+                    'value': str(vote['value']),
+                    'grantedOn': timestamp(vote['date']),
+                    'by': account(vote)
+                })
+        approvals.sort(key=lambda approval: approval['grantedOn'])
+
+        review['patchSets'] = []
+        for revision, revision_info in sorted(revisions.items(), key=lambda r: r[1]['_number']):
+            commit = revision_info.get('commit', {})
+            patchset = {
+                'number': revision_info['_number'],
+                'revision': revision,
+                'parents': [parent['commit'] for parent in commit.get('parents', [])],
+                'ref': revision_info['ref'],
+                'uploader': account(revision_info.get('uploader', {})),
+                'createdOn': timestamp(revision_info['created']),
+                'author': account(commit.get('author', {})),
+                'kind': revision_info.get('kind')
+            }
+            if revision == change.get('current_revision') and approvals:
+                patchset['approvals'] = approvals
+            review['patchSets'].append(patchset)
+
+        return review
+
+    def _parse_json(self, raw_data):
+        """Remove the XSSI prefix of a response and parse it"""
+
+        if raw_data.startswith(self.XSSI_PREFIX):
+            raw_data = raw_data[len(self.XSSI_PREFIX):]
+
+        return json.loads(raw_data)
+
+
 class GerritCommand(BackendCommand):
     """Class to run Gerrit backend from the command line."""
 
@@ -529,6 +956,16 @@ class GerritCommand(BackendCommand):
                            default=PORT, type=int,
                            help="Set SSH port of the Gerrit server")
         group.add_argument('--ssh-id-filepath', dest='id_filepath', help="Set SSH private key path")
+        group.add_argument('--fetch-workers', dest='fetch_workers',
+                           type=int, default=None,
+                           help="Number of threads used to fetch data concurrently; \
+                               up to 10 over SSH")
+        group.add_argument('--rest-url', dest='rest_url',
+                           help="URL of the REST API; when set, reviews are fetched using HTTP. \
+                               Approvals only include the current votes, set on the last \
+                               patch set, and patch sets do not include their sizes")
+        group.add_argument('--password', dest='password',
+                           help="HTTP password of the user for the REST API")
 
         # Required arguments
         parser.parser.add_argument('hostname',
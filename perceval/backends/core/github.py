@@ -117,8 +117,12 @@ class GitHub(Backend):
     :param sleep_time: time to sleep in case
         of connection problems
     :param ssl_verify: enable/disable SSL verification
+    :param rate_limit_db: path to the database where the rate limit
+        of the tokens is shared with other processes
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
     """
-    version = '1.0.0'
+    version = '1.2.0'
 
     CATEGORIES = [CATEGORY_ISSUE, CATEGORY_PULL_REQUEST, CATEGORY_REPO]
 
@@ -140,7 +144,8 @@ class GitHub(Backend):
                  base_url=None, tag=None, archive=None,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
                  max_retries=MAX_RETRIES, sleep_time=DEFAULT_SLEEP_TIME,
-                 max_items=MAX_CATEGORY_ITEMS_PER_PAGE, ssl_verify=True):
+                 max_items=MAX_CATEGORY_ITEMS_PER_PAGE, ssl_verify=True,
+                 rate_limit_db=None, pace_requests=False):
         if api_token is None:
             api_token = []
         origin = base_url if base_url else GITHUB_URL
@@ -160,6 +165,8 @@ class GitHub(Backend):
         self.max_retries = max_retries
         self.sleep_time = sleep_time
         self.max_items = max_items
+        self.rate_limit_db = rate_limit_db
+        self.pace_requests = pace_requests
 
         self.client = None
         self.exclude_user_data = False
@@ -308,7 +315,9 @@ class GitHub(Backend):
                             self.github_app_id, self.github_app_pk_filepath, self.base_url,
                             self.sleep_for_rate, self.min_rate_to_sleep,
                             self.sleep_time, self.max_retries, self.max_items,
-                            self.archive, from_archive, self.ssl_verify)
+                            self.archive, from_archive, self.ssl_verify,
+                            rate_limit_db=self.rate_limit_db,
+                            pace_requests=self.pace_requests)
 
     def __fetch_issues(self, from_date, to_date):
         """Fetch the issues"""
@@ -616,6 +625,10 @@ class GitHubClient(HttpClient, RateLimitHandler):
     :param archive: collect issues already retrieved from an archive
     :param from_archive: it tells whether to write/read the archive
     :param ssl_verify: enable/disable SSL verification
+    :param rate_limit_db: path to the database where the rate limit
+        of the tokens is shared with other processes
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
     """
     EXTRA_STATUS_FORCELIST = [403, 500, 502, 503]
 
@@ -656,7 +669,8 @@ class GitHubClient(HttpClient, RateLimitHandler):
     def __init__(self, owner, repository, tokens=None, github_app_id=None, github_app_pk_filepath=None,
                  base_url=None, sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
                  sleep_time=DEFAULT_SLEEP_TIME, max_retries=MAX_RETRIES,
-                 max_items=MAX_CATEGORY_ITEMS_PER_PAGE, archive=None, from_archive=False, ssl_verify=True):
+                 max_items=MAX_CATEGORY_ITEMS_PER_PAGE, archive=None, from_archive=False, ssl_verify=True,
+                 rate_limit_db=None, pace_requests=False):
         self.owner = owner
         self.repository = repository
         self.tokens = tokens
@@ -679,7 +693,9 @@ class GitHubClient(HttpClient, RateLimitHandler):
                          extra_headers=self._set_extra_headers(),
                          extra_status_forcelist=self.EXTRA_STATUS_FORCELIST,
                          archive=archive, from_archive=from_archive, ssl_verify=ssl_verify)
-        super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate, min_rate_to_sleep=min_rate_to_sleep)
+        super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate, min_rate_to_sleep=min_rate_to_sleep,
+                                         rate_limit_db=rate_limit_db,
+                                         pace_requests=pace_requests)
 
         # Choose best API token (with maximum API points remaining)
         if not self.from_archive:
@@ -996,6 +1012,7 @@ class GitHubClient(HttpClient, RateLimitHandler):
         # If we have any tokens - use best of them
         self.current_token = self.tokens[token_idx]
         self.session.headers.update({self.HAUTHORIZATION: 'token ' + self.current_token})
+        self.rate_limit_key = self.make_rate_limit_key(self.base_url, self.current_token)
         # Update rate limit data for the current token
         self._update_current_rate_limit()
 
@@ -1195,6 +1212,11 @@ class GitHubCommand(BackendCommand):
         group.add_argument('--min-rate-to-sleep', dest='min_rate_to_sleep',
                            default=MIN_RATE_LIMIT, type=int,
                            help="sleep until reset when the rate limit reaches this value")
+        group.add_argument('--rate-limit-db', dest='rate_limit_db',
+                           help="database file to share the rate limit of the tokens among processes")
+        group.add_argument('--pace-requests', dest='pace_requests',
+                           action='store_true',
+                           help="spread requests over the time left to reset the rate limit")
         # GitHub token(s)
         group.add_argument('-t', '--api-token', dest='api_token',
                            nargs='+',
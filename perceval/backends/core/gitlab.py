@@ -27,6 +27,7 @@
 import json
 import logging
 import requests
+import threading
 
 import urllib.parse
 
@@ -42,7 +43,7 @@ from ...backend import (Backend,
                         OriginUniqueField,
                         DEFAULT_SEARCH_FIELD)
 from ...client import HttpClient, RateLimitHandler
-from ...utils import DEFAULT_DATETIME
+from ...utils import DEFAULT_DATETIME, map_concurrently
 from ...errors import BackendError, HttpClientError
 
 CATEGORY_ISSUE = "issue"
@@ -63,6 +64,37 @@ DEFAULT_RETRY_AFTER_STATUS_CODES = [500, 502]
 
 TARGET_ISSUE_FIELDS = ['user_notes_count', 'award_emoji']
 
+# GraphQL query to find which notes have award emojis
+QUERY_NOTES_EMOJIS = """
+    query($project: ID!, $iid: String!, $after: String) {
+      project(fullPath: $project) {
+        %s(iid: $iid) {
+          notes(first: %s, after: $after) {
+            pageInfo {
+              hasNextPage
+              endCursor
+            }
+            nodes {
+              id
+              awardEmoji(first: 1) {
+                nodes {
+                  name
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+"""
+
+# Strategies to fetch the award emojis of the notes
+NOTE_EMOJIS_ALL = 'all'
+NOTE_EMOJIS_GRAPHQL = 'graphql'
+NOTE_EMOJIS_USER = 'user'
+NOTE_EMOJIS_NONE = 'none'
+NOTE_EMOJIS_STRATEGIES = [NOTE_EMOJIS_ALL, NOTE_EMOJIS_GRAPHQL, NOTE_EMOJIS_USER, NOTE_EMOJIS_NONE]
+
 logger = logging.getLogger(__name__)
 
 
@@ -90,8 +122,20 @@ class GitLab(Backend):
     :param extra_retry_after_status: retry HTTP requests after status (default 500 and 502). These status complete
         the ones (413, 429, 503) defined in the HttpClient class
     :param ssl_verify: enable/disable SSL verification
+    :param rate_limit_db: path to the database where the rate limit
+        of the token is shared with other processes
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
+    :param fetch_workers: number of threads used to fetch the data
+        of the merge requests concurrently
+    :param note_emojis: strategy to fetch the award emojis of the notes;
+        'all' (default) requests them for every note; 'graphql' finds
+        the notes with emojis using one GraphQL query per issue or merge
+        request and only requests the emojis of those notes, returning
+        the same data; 'user' skips system notes, so their emojis are
+        not included, and 'none' skips them for every note
     """
-    version = '1.0.0'
+    version = '1.4.0'
 
     CATEGORIES = [CATEGORY_ISSUE, CATEGORY_MERGE_REQUEST]
     ORIGIN_UNIQUE_FIELD = OriginUniqueField(name='iid', type=int)
@@ -100,12 +144,16 @@ class GitLab(Backend):
                  is_oauth_token=False, base_url=None, tag=None, archive=None,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
                  max_retries=MAX_RETRIES, sleep_time=DEFAULT_SLEEP_TIME,
-                 blacklist_ids=None, extra_retry_after_status=None, ssl_verify=True):
+                 blacklist_ids=None, extra_retry_after_status=None, ssl_verify=True,
+                 rate_limit_db=None, pace_requests=False, fetch_workers=None,
+                 note_emojis=NOTE_EMOJIS_ALL):
         origin = base_url if base_url else GITLAB_URL
         origin = urijoin(origin, owner, repository)
 
         if not api_token and is_oauth_token:
             raise BackendError(cause="is_oauth_token is True but api_token is None")
+        if note_emojis not in NOTE_EMOJIS_STRATEGIES:
+            raise BackendError(cause="unknown note emojis strategy: %s" % note_emojis)
 
         super().__init__(origin, tag=tag, archive=archive, ssl_verify=ssl_verify)
         self.base_url = base_url
@@ -118,10 +166,16 @@ class GitLab(Backend):
         self.max_retries = max_retries
         self.sleep_time = sleep_time
         self.blacklist_ids = blacklist_ids
+        self.rate_limit_db = rate_limit_db
+        self.pace_requests = pace_requests
+        self.fetch_workers = fetch_workers
+        self.note_emojis = note_emojis
         self.client = None
         self.extra_retry_after_status = DEFAULT_RETRY_AFTER_STATUS_CODES if not extra_retry_after_status \
             else extra_retry_after_status
         self._users = {}  # internal users cache
+        self._merges = {}  # merge requests cache, by 'iid' and update time
+        self._merges_lock = threading.Lock()
 
     def search_fields(self, item):
         """Add search fields to an item.
@@ -250,7 +304,9 @@ class GitLab(Backend):
                             self.is_oauth_token, self.base_url,
                             self.sleep_for_rate, self.min_rate_to_sleep,
                             self.sleep_time, self.max_retries, self.extra_retry_after_status,
-                            self.archive, from_archive, self.ssl_verify)
+                            self.archive, from_archive, self.ssl_verify,
+                            rate_limit_db=self.rate_limit_db,
+                            pace_requests=self.pace_requests)
 
     def __fetch_issues(self, from_date):
         """Fetch the issues"""
@@ -269,26 +325,29 @@ class GitLab(Backend):
                 self.__init_issue_extra_fields(issue)
 
                 issue['notes_data'] = \
-                    self.__get_issue_notes(issue_id)
+                    self.__get_notes(GitLabClient.RISSUES, issue_id)
                 issue['award_emoji_data'] = \
                     self.__get_award_emoji(GitLabClient.RISSUES, issue_id)
 
                 yield issue
 
-    def __get_issue_notes(self, issue_id):
-        """Get issue notes"""
+    def __get_notes(self, item_type, item_id):
+        """Get the notes of an issue/merge request"""
 
         notes = []
 
-        group_notes = self.client.notes(GitLabClient.RISSUES, issue_id)
+        group_notes = self.client.notes(item_type, item_id)
 
         for raw_notes in group_notes:
+            notes.extend(json.loads(raw_notes))
 
-            for note in json.loads(raw_notes):
-                note_id = note['id']
-                note['award_emoji_data'] = \
-                    self.__get_note_award_emoji(GitLabClient.RISSUES, issue_id, note_id)
-                notes.append(note)
+        awarded = None
+        if self.note_emojis == NOTE_EMOJIS_GRAPHQL and notes:
+            awarded = self.__get_awarded_notes(item_type, item_id)
+
+        for note in notes:
+            note['award_emoji_data'] = \
+                self.__get_note_award_emoji(item_type, item_id, note, awarded)
 
         return notes
 
@@ -299,69 +358,99 @@ class GitLab(Backend):
         fetch_from_date = from_date
         last_date = fetch_from_date
 
-        while not fetch_completed:
-            try:
-                for mr_item in self.__fetch_merge_requests_data(fetch_from_date):
-                    last_date = unixtime_to_datetime(self.metadata_updated_on(mr_item))
-                    yield mr_item
-            except _OutdatedMRsList:
-                fetch_from_date = last_date
-                logger.debug("MRs list is outdated. Recalculating MR list starting on %s",
-                             fetch_from_date)
-            else:
-                fetch_completed = True
+        try:
+            while not fetch_completed:
+                try:
+                    for mr_item in self.__fetch_merge_requests_data(fetch_from_date):
+                        last_date = unixtime_to_datetime(self.metadata_updated_on(mr_item))
+                        self.__expire_merges(self.metadata_updated_on(mr_item))
+                        yield mr_item
+                except _OutdatedMRsList:
+                    fetch_from_date = last_date
+                    logger.debug("MRs list is outdated. Recalculating MR list starting on %s",
+                                 fetch_from_date)
+                else:
+                    fetch_completed = True
+        finally:
+            self._merges.clear()
 
     def __fetch_merge_requests_data(self, from_date):
         merges_groups = self.client.merges(from_date=from_date)
 
         for raw_merges in merges_groups:
-            merges = json.loads(raw_merges)
-            for merge in merges:
-                merge_id = merge['iid']
+            merges = []
 
+            for merge in json.loads(raw_merges):
                 if self._skip_item(merge):
                     self.summary.skipped += 1
                     continue
+                merges.append(merge)
 
-                # The single merge_request API call returns a more
-                # complete merge request, thus we inflate it with
-                # other data (e.g., notes, emojis, versions)
-                merge_full_raw = self.client.merge(merge_id)
-                merge_full = json.loads(merge_full_raw)
-
-                # If during the fetching process a MR is updated,
-                # the current process should be canceled because the
-                # list of MRs is outdated. It is not ordered from the
-                # first updated to the last one.
-                updated_on_merge = self.metadata_updated_on(merge)
-                updated_on_merge_full = self.metadata_updated_on(merge_full)
-
-                if updated_on_merge != updated_on_merge_full:
-                    raise _OutdatedMRsList()
+            # Merge requests are inflated concurrently, but they
+            # are returned in the same order of the list
+            yield from map_concurrently(self.__fetch_merge_request,
+                                        merges, workers=self.fetch_workers)
 
-                self.__init_merge_extra_fields(merge_full)
+    def __fetch_merge_request(self, merge):
+        """Fetch the full data of a merge request.
 
-                merge_full['notes_data'] = self.__get_merge_notes(merge_id)
-                merge_full['award_emoji_data'] = self.__get_award_emoji(GitLabClient.RMERGES, merge_id)
-                merge_full['versions_data'] = self.__get_merge_versions(merge_id)
-
-                yield merge_full
-
-    def __get_merge_notes(self, merge_id):
-        """Get merge notes"""
-
-        notes = []
-
-        group_notes = self.client.notes(GitLabClient.RMERGES, merge_id)
-
-        for raw_notes in group_notes:
-            for note in json.loads(raw_notes):
-                note_id = note['id']
-                note['award_emoji_data'] = \
-                    self.__get_note_award_emoji(GitLabClient.RMERGES, merge_id, note_id)
-                notes.append(note)
+        The merge requests inflated with their notes, emojis and
+        versions are cached by their `iid` and update time. When the
+        list of merge requests is outdated and it has to be fetched
+        again, the data of those that did not change is taken from
+        the cache, saving all their API calls.
+        """
+        merge_id = merge['iid']
+        updated_on_merge = self.metadata_updated_on(merge)
+
+        with self._merges_lock:
+            merge_full, inflated = self._merges.get((merge_id, updated_on_merge),
+                                                    (None, False))
+        if inflated:
+            return merge_full
+
+        if not merge_full:
+            # The single merge_request API call returns a more
+            # complete merge request, thus we inflate it with
+            # other data (e.g., notes, emojis, versions)
+            merge_full_raw = self.client.merge(merge_id)
+            merge_full = json.loads(merge_full_raw)
+
+            # If during the fetching process a MR is updated,
+            # the current process should be canceled because the
+            # list of MRs is outdated. It is not ordered from the
+            # first updated to the last one. Its data is kept
+            # for when it is found on the new list.
+            updated_on_merge_full = self.metadata_updated_on(merge_full)
+
+            if updated_on_merge != updated_on_merge_full:
+                with self._merges_lock:
+                    self._merges[(merge_id, updated_on_merge_full)] = (merge_full, False)
+                raise _OutdatedMRsList()
+
+        self.__init_merge_extra_fields(merge_full)
+
+        merge_full['notes_data'] = self.__get_notes(GitLabClient.RMERGES, merge_id)
+        merge_full['award_emoji_data'] = self.__get_award_emoji(GitLabClient.RMERGES, merge_id)
+        merge_full['versions_data'] = self.__get_merge_versions(merge_id)
+
+        with self._merges_lock:
+            self._merges[(merge_id, updated_on_merge)] = (merge_full, True)
+
+        return merge_full
+
+    def __expire_merges(self, updated_on):
+        """Remove from the cache the merge requests updated before a date.
+
+        Merge requests are listed in ascending order of update, so
+        the ones updated before the last merge request returned
+        will not be listed again.
+        """
+        with self._merges_lock:
+            expired = [key for key in self._merges if key[1] < updated_on]
 
-        return notes
+            for key in expired:
+                del self._merges[key]
 
     def __get_merge_versions(self, merge_id):
         """Get merge versions"""
@@ -394,11 +483,53 @@ class GitLab(Backend):
 
         return emojis
 
-    def __get_note_award_emoji(self, item_type, item_id, note_id):
-        """Fetch emojis for a note of an issue/merge request"""
+    def __get_awarded_notes(self, item_type, item_id):
+        """Find the notes of an issue/merge request with award emojis.
+
+        The notes are queried with the GraphQL API, which returns
+        their emojis inline. It returns a dict that tells whether each
+        note found has emojis, or `None` when the query failed.
+        """
+        awarded = {}
 
+        try:
+            for raw_page in self.client.graphql_notes(item_type, item_id):
+                page = json.loads(raw_page)
+
+                if page.get('errors', None):
+                    logger.warning("Unable to find the notes with emojis of %s; cause: %s",
+                                   urijoin(item_type, str(item_id)), page['errors'][0]['message'])
+                    return None
+
+                for node in GitLabClient.graphql_notes_nodes(page, item_type):
+                    note_id = int(node['id'].split('/')[-1])
+                    awarded[note_id] = len(node['awardEmoji']['nodes']) > 0
+        except (requests.exceptions.HTTPError, KeyError, TypeError, ValueError) as error:
+            logger.warning("Unable to find the notes with emojis of %s; cause: %s",
+                           urijoin(item_type, str(item_id)), str(error))
+            return None
+
+        return awarded
+
+    def __get_note_award_emoji(self, item_type, item_id, note, awarded=None):
+        """Fetch emojis for a note of an issue/merge request.
+
+        Depending on the `note_emojis` strategy, the emojis are not
+        requested for system notes or for any note. In those cases,
+        the list is empty. When `awarded` tells that a note does not
+        have emojis, they are not requested either; the list is empty
+        as it would be when requested.
+        """
         emojis = []
 
+        if self.note_emojis == NOTE_EMOJIS_NONE:
+            return emojis
+        if self.note_emojis == NOTE_EMOJIS_USER and note.get('system', False):
+            return emojis
+        if awarded and awarded.get(note['id'], True) is False:
+            return emojis
+
+        note_id = note['id']
         group_emojis = self.client.note_emojis(item_type, item_id, note_id)
         try:
             for raw_emojis in group_emojis:
@@ -453,6 +584,10 @@ class GitLabClient(HttpClient, RateLimitHandler):
     :param archive: an archive to store/read fetched data
     :param from_archive: it tells whether to write/read the archive
     :param ssl_verify: enable/disable SSL verification
+    :param rate_limit_db: path to the database where the rate limit
+        of the token is shared with other processes
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
     """
     # API resources
     RISSUES = "issues"
@@ -464,6 +599,7 @@ class GitLabClient(HttpClient, RateLimitHandler):
 
     # API headers
     HAUTHORIZATION = 'Authorization'
+    HCONTENT_TYPE = 'Content-Type'
     HPRIVATE_TOKEN = 'PRIVATE-TOKEN'
     HRATE_LIMIT = "RateLimit-Remaining"
     HRATE_LIMIT_RESET = "RateLimit-Reset"
@@ -482,13 +618,15 @@ class GitLabClient(HttpClient, RateLimitHandler):
     VSORT_ASC = 'asc'
     VVIEW_SIMPLE = 'simple'
     VPER_PAGE = 100
+    VJSON = 'application/json'
 
     _users = {}       # users cache
 
     def __init__(self, owner, repository, token, is_oauth_token=False, base_url=None,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
                  sleep_time=DEFAULT_SLEEP_TIME, max_retries=MAX_RETRIES, extra_retry_after_status=None,
-                 archive=None, from_archive=False, ssl_verify=True):
+                 archive=None, from_archive=False, ssl_verify=True, rate_limit_db=None,
+                 pace_requests=False):
 
         if not token and is_oauth_token:
             raise HttpClientError(cause="is_oauth_token is True but token is None")
@@ -512,7 +650,10 @@ class GitLabClient(HttpClient, RateLimitHandler):
         super().setup_rate_limit_handler(rate_limit_header=self.HRATE_LIMIT,
                                          rate_limit_reset_header=self.HRATE_LIMIT_RESET,
                                          sleep_for_rate=sleep_for_rate,
-                                         min_rate_to_sleep=min_rate_to_sleep)
+                                         min_rate_to_sleep=min_rate_to_sleep,
+                                         rate_limit_db=rate_limit_db,
+                                         rate_limit_key=self.make_rate_limit_key(base_url, token or ''),
+                                         pace_requests=pace_requests)
 
         self._init_rate_limit()
 
@@ -621,6 +762,42 @@ class GitLabClient(HttpClient, RateLimitHandler):
 
         return self.fetch_items(path, payload)
 
+    def graphql_notes(self, item_type, item_id):
+        """Get the notes and whether they have emojis from the GraphQL API"""
+
+        node_type = 'mergeRequest' if item_type == self.RMERGES else 'issue'
+        query = QUERY_NOTES_EMOJIS % (node_type, self.VPER_PAGE)
+        variables = {
+            'project': urllib.parse.unquote(self.owner + '%2F' + self.repository),
+            'iid': str(item_id),
+            'after': None
+        }
+        headers = {self.HCONTENT_TYPE: self.VJSON}
+
+        url = self.base_url.rsplit('/', 1)[0] + '/graphql'
+
+        has_next = True
+        while has_next:
+            payload = json.dumps({'query': query, 'variables': variables}, sort_keys=True)
+            response = self.fetch(url, payload=payload, headers=headers, method=HttpClient.POST)
+
+            yield response.text
+
+            try:
+                page_info = response.json()['data']['project'][node_type]['notes']['pageInfo']
+                has_next = page_info['hasNextPage']
+                variables['after'] = page_info['endCursor']
+            except (KeyError, TypeError, ValueError):
+                has_next = False
+
+    @staticmethod
+    def graphql_notes_nodes(page, item_type):
+        """Get the list of notes from a page of the GraphQL API"""
+
+        node_type = 'mergeRequest' if item_type == GitLabClient.RMERGES else 'issue'
+
+        return page['data']['project'][node_type]['notes']['nodes']
+
     def calculate_time_to_reset(self):
         """Calculate the seconds to reset the token requests, by obtaining the different
         between the current date and the next date when the token is fully regenerated.
@@ -769,6 +946,19 @@ class GitLabCommand(BackendCommand):
                            default=MIN_RATE_LIMIT, type=int,
                            help="sleep until reset when the rate limit \
                                reaches this value")
+        group.add_argument('--rate-limit-db', dest='rate_limit_db',
+                           help="database file to share the rate limit of the token among processes")
+        group.add_argument('--pace-requests', dest='pace_requests',
+                           action='store_true',
+                           help="spread requests over the time left to reset the rate limit")
+        group.add_argument('--fetch-workers', dest='fetch_workers',
+                           type=int, default=None,
+                           help="Number of threads used to fetch data concurrently")
+        group.add_argument('--note-emojis', dest='note_emojis',
+                           choices=NOTE_EMOJIS_STRATEGIES, default=NOTE_EMOJIS_ALL,
+                           help="fetch the award emojis of all the notes, only of \
+                               the ones GraphQL reports with emojis (same output), \
+                               only of the ones written by users or of none of them")
         group.add_argument('--is-oauth-token', dest='is_oauth_token',
                            action='store_true',
                            help="Set when using OAuth2")
@@ -61,14 +61,16 @@ class Gitter(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
     """
-    version = '1.0.0'
+    version = '1.1.0'
 
     CATEGORIES = [CATEGORY_MESSAGE]
 
     def __init__(self, group=None, room=None, api_token=None, max_items=MAX_ITEMS,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
-                 tag=None, archive=None, ssl_verify=True):
+                 tag=None, archive=None, ssl_verify=True, pace_requests=False):
         origin = urijoin(GITTER_URL, group, room)
 
         super().__init__(origin, tag=tag, archive=archive, ssl_verify=ssl_verify)
@@ -78,6 +80,7 @@ class Gitter(Backend):
         self.max_items = max_items
         self.sleep_for_rate = sleep_for_rate
         self.min_rate_to_sleep = min_rate_to_sleep
+        self.pace_requests = pace_requests
         self.client = None
         self.room_id = None
 
@@ -228,7 +231,8 @@ class Gitter(Backend):
 
         return GitterClient(self.api_token, self.max_items, self.archive,
                             self.sleep_for_rate, self.min_rate_to_sleep,
-                            from_archive, self.ssl_verify)
+                            from_archive, self.ssl_verify,
+                            pace_requests=self.pace_requests)
 
 
 class GitterClient(HttpClient, RateLimitHandler):
@@ -245,6 +249,8 @@ class GitterClient(HttpClient, RateLimitHandler):
          it will be reset
     :param from_archive: it tells whether to write/read the archive
     :param ssl_verify: enable/disable SSL verification
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
     """
     # API resources
     RMESSAGES = 'chatMessages'
@@ -259,7 +265,7 @@ class GitterClient(HttpClient, RateLimitHandler):
 
     def __init__(self, api_token, max_items=MAX_ITEMS, archive=None,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
-                 from_archive=False, ssl_verify=True):
+                 from_archive=False, ssl_verify=True, pace_requests=False):
 
         base_url = GITTER_API_URL
         self.api_token = api_token
@@ -267,7 +273,8 @@ class GitterClient(HttpClient, RateLimitHandler):
 
         super().__init__(base_url, archive=archive, from_archive=from_archive,
                          ssl_verify=ssl_verify)
-        super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate, min_rate_to_sleep=min_rate_to_sleep)
+        super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate, min_rate_to_sleep=min_rate_to_sleep,
+                                         pace_requests=pace_requests)
 
     def calculate_time_to_reset(self):
         """Number of seconds to wait. They are contained in the rate limit reset header"""
@@ -379,6 +386,9 @@ class GitterCommand(BackendCommand):
         group.add_argument('--min-rate-to-sleep', dest='min_rate_to_sleep',
                            default=MIN_RATE_LIMIT, type=int,
                            help="sleep until reset when the rate limit reaches this value")
+        group.add_argument('--pace-requests', dest='pace_requests',
+                           action='store_true',
+                           help="spread requests over the time left to reset the rate limit")
 
         # Required arguments
         parser.parser.add_argument('group',
@@ -67,14 +67,18 @@ class Groupsio(MBox):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param parse_workers: number of processes used to parse the mbox files
+    :param mbox_index: path to the file where the messages of the mboxes are indexed
     """
-    version = '1.0.0'
+    version = '1.2.0'
 
     CATEGORIES = [CATEGORY_MESSAGE]
 
-    def __init__(self, group_name, dirpath, email, password, tag=None, archive=None, ssl_verify=True):
+    def __init__(self, group_name, dirpath, email, password, tag=None, archive=None, ssl_verify=True,
+                 parse_workers=None, mbox_index=None):
         url = urijoin(GROUPSIO_URL, 'g', group_name)
-        super().__init__(url, dirpath, tag=tag, archive=archive, ssl_verify=ssl_verify)
+        super().__init__(url, dirpath, tag=tag, archive=archive, ssl_verify=ssl_verify,
+                         parse_workers=parse_workers, mbox_index=mbox_index)
         self.email = email
         self.password = password
         self.group_name = group_name
@@ -349,6 +353,10 @@ class GroupsioCommand(BackendCommand):
         group = parser.parser.add_argument_group('Groupsio arguments')
         group.add_argument('--mboxes-path', dest='mboxes_path',
                            help="Path where mbox files will be stored")
+        group.add_argument('--parse-workers', dest='parse_workers', type=int,
+                           help="number of processes used to parse the mbox files")
+        group.add_argument('--mbox-index', dest='mbox_index',
+                           help="file where the position and date of the messages are indexed")
 
         # Required arguments
         parser.parser.add_argument('group_name', help="Name of the group on Groups.io")
@@ -57,14 +57,20 @@ class HyperKitty(MBox):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param parse_workers: number of processes used to parse the mbox files
+    :param mbox_index: path to the file where the messages of the mboxes are indexed
+    :param download_workers: number of threads used to download the mbox files
     """
-    version = '1.0.0'
+    version = '1.3.0'
 
     CATEGORIES = [CATEGORY_MESSAGE]
 
-    def __init__(self, url, dirpath, tag=None, archive=None, ssl_verify=True):
-        super().__init__(url, dirpath, tag=tag, archive=archive, ssl_verify=ssl_verify)
+    def __init__(self, url, dirpath, tag=None, archive=None, ssl_verify=True,
+                 parse_workers=None, mbox_index=None, download_workers=None):
+        super().__init__(url, dirpath, tag=tag, archive=archive, ssl_verify=ssl_verify,
+                         parse_workers=parse_workers, mbox_index=mbox_index)
         self.url = url
+        self.download_workers = download_workers
 
     def fetch(self, category=CATEGORY_MESSAGE, from_date=DEFAULT_DATETIME,
               to_date=DEFAULT_LAST_DATETIME):
@@ -106,7 +112,8 @@ class HyperKitty(MBox):
         logger.info("Looking for messages from '%s' since %s until %s",
                     self.url, str(from_date), str(to_date))
 
-        mailing_list = HyperKittyList(self.url, self.dirpath)
+        mailing_list = HyperKittyList(self.url, self.dirpath,
+                                      download_workers=self.download_workers)
         mailing_list.fetch(from_date=from_date, to_date=to_date)
 
         messages = self._fetch_and_parse_messages(mailing_list, from_date, to_date)
@@ -147,6 +154,7 @@ class HyperKittyList(MailingList):
     :param url: URL to the HyperKitty archiver for this list
     :param dirpath: path to the local mboxes archives
     :param ssl_verify: enable/disable SSL verification
+    :param download_workers: number of threads used to download the archives
     """
     # API resources
     REXPORT = 'export'
@@ -155,9 +163,10 @@ class HyperKittyList(MailingList):
     PSTART = 'start'
     PEND = 'end'
 
-    def __init__(self, url, dirpath, ssl_verify=True):
+    def __init__(self, url, dirpath, ssl_verify=True, download_workers=None):
         super().__init__(url, dirpath)
         self.client = HttpClient(url, ssl_verify=ssl_verify)
+        self.download_workers = download_workers
 
     def fetch(self, from_date=DEFAULT_DATETIME, to_date=DEFAULT_LAST_DATETIME):
         """Fetch the mbox files from the remote archiver.
@@ -169,6 +178,9 @@ class HyperKittyList(MailingList):
         the schema year-month. Archives are fetched from the given month
         till the current month.
 
+        Archives that did not change since the last time they were
+        downloaded are not downloaded again.
+
         :param from_date: fetch archives that store messages
             equal or after the given date; only year and month values
             are compared
@@ -194,15 +206,12 @@ class HyperKittyList(MailingList):
 
         months = months_range(from_date, to_end)
 
-        fetched = []
+        archives = []
 
         if not os.path.exists(self.dirpath):
             os.makedirs(self.dirpath)
 
-        tmbox = 0
-
         for dts in months:
-            tmbox += 1
             start, end = dts[0], dts[1]
             filename = start.strftime("%Y-%m.mbox.gz")
             filepath = os.path.join(self.dirpath, filename)
@@ -214,12 +223,11 @@ class HyperKittyList(MailingList):
                 self.PEND: end.strftime("%Y-%m-%d")
             }
 
-            success = self._download_archive(url, params, filepath)
+            archives.append((url, params, filepath))
 
-            if success:
-                fetched.append((url, filepath))
+        fetched = self._download_archives(archives, workers=self.download_workers)
 
-        logger.info("%s/%s MBoxes downloaded", len(fetched), tmbox)
+        logger.info("%s/%s MBoxes fetched", len(fetched), len(archives))
 
         return fetched
 
@@ -257,19 +265,22 @@ class HyperKittyList(MailingList):
 
         return dt
 
-    def _download_archive(self, url, params, filepath):
-        r = self.client.fetch(url, payload=params, stream=True)
+    def _download_archive(self, url, params, filepath, headers=None):
+        r = self.client.fetch(url, payload=params, headers=headers, stream=True)
+
+        if r.status_code == 304:
+            return r
 
         try:
             with open(filepath, 'wb') as fd:
                 fd.write(r.raw.read())
         except OSError as e:
             logger.warning("Ignoring %s archive due to: %s", url, str(e))
-            return False
+            return None
 
         logger.debug("%s archive downloaded and stored in %s", url, filepath)
 
-        return True
+        return r
 
 
 class HyperKittyCommand(BackendCommand):
@@ -301,6 +312,12 @@ class HyperKittyCommand(BackendCommand):
         group = parser.parser.add_argument_group('HyperKitty arguments')
         group.add_argument('--mboxes-path', dest='mboxes_path',
                            help="Path where mbox files will be stored")
+        group.add_argument('--parse-workers', dest='parse_workers', type=int,
+                           help="number of processes used to parse the mbox files")
+        group.add_argument('--mbox-index', dest='mbox_index',
+                           help="file where the position and date of the messages are indexed")
+        group.add_argument('--download-workers', dest='download_workers', type=int,
+                           help="number of threads used to download the mbox files")
 
         # Required arguments
         parser.parser.add_argument('url',
@@ -36,6 +36,8 @@ from ...backend import (Backend,
                         OriginUniqueField)
 from ...errors import BackendError
 from ...client import HttpClient
+from ...index import SQLiteIndex
+from ...utils import map_concurrently
 
 CATEGORY_BUILD = "build"
 SLEEP_TIME = 10
@@ -63,8 +65,14 @@ class Jenkins(Backend):
     :param archive: collect builds already retrieved from an archive
     :param blacklist_ids: exclude the jobs ID of this list while fetching
     :param ssl_verify: enable/disable SSL verification
+    :param fetch_workers: number of threads used to fetch the builds
+        of the jobs concurrently
+    :param builds_index: path to the file where the number of the last
+        build fetched from each job is stored; when it is set, only
+        newer builds and the ones that were running are returned.
+        See `JenkinsBuildsIndex`
     """
-    version = '1.0.0'
+    version = '1.1.0'
 
     CATEGORIES = [CATEGORY_BUILD]
     EXTRA_SEARCH_FIELDS = {
@@ -74,7 +82,7 @@ class Jenkins(Backend):
 
     def __init__(self, url, user=None, api_token=None, tag=None, archive=None,
                  detail_depth=DETAIL_DEPTH, blacklist_builds=None, sleep_time=SLEEP_TIME,
-                 blacklist_ids=None, ssl_verify=True):
+                 blacklist_ids=None, ssl_verify=True, fetch_workers=None, builds_index=None):
 
         if (user and not api_token) or (not user and api_token):
             msg = "Authentication method requires user and api_token"
@@ -90,6 +98,8 @@ class Jenkins(Backend):
         self.blacklist_ids = blacklist_ids
         self.blacklist_builds = blacklist_builds or []
         self.detail_depth = detail_depth
+        self.fetch_workers = fetch_workers
+        self.builds_index = builds_index
 
         self.client = None
 
@@ -112,6 +122,13 @@ class Jenkins(Backend):
     def fetch_items(self, category, **kwargs):
         """Fetch the contents
 
+        The builds of the jobs are fetched concurrently when
+        `fetch_workers` is set, keeping the order of the jobs.
+        When `builds_index` is set, only those builds newer than
+        the last ones fetched from each job, or that were running
+        when they were fetched, are returned; jobs without new or
+        running builds are detected with a light request.
+
         :param category: the category of items to fetch
         :param kwargs: backend arguments
 
@@ -123,39 +140,49 @@ class Jenkins(Backend):
         njobs = 0  # number of jobs with data
         tjobs = 0  # number of jobs retrieved
 
-        jobs = self.__get_jobs(self.url)
-        for job in jobs:
-            job_class = job.get('_class', None)
-            if job_class and job_class == CLASS_JOB_WORKFLOW_MULTIBRANCH:
-                job_url = job['url']
-                for nested_job in self.__get_jobs(job_url):
-                    builds = self.__get_builds(nested_job, job_url)
+        # Archives only store the requests done while fetching, so
+        # replaying them must not depend on the state of the index
+        use_index = self.builds_index and not self.client.from_archive
+        index = JenkinsBuildsIndex(self.builds_index) if use_index else None
+        last_builds = index.last_builds() if index else {}
 
-                    if builds:
-                        njobs += 1
+        def fetch_job_builds(entry):
+            job_name, job, url = entry
+            last_build, running = last_builds.get(job['url'], (None, set()))
+            builds = self.__get_job_builds(job, url, last_build, running)
+            return job_name, job, builds
 
-                    for build in builds:
-                        if f"{job['name']}:{build['id']}" in self.blacklist_builds:
-                            logger.warning(f"Skipping blacklisted build: {job['name']}:{build['id']}")
-                            continue
-                        nbuilds += 1
-                        yield build
+        jobs = self.__get_all_jobs()
+        results = map_concurrently(fetch_job_builds, jobs, workers=self.fetch_workers)
 
-                    tjobs += 1
-            else:
-                builds = self.__get_builds(job, self.url)
+        try:
+            for job_name, job, builds in results:
+                tjobs += 1
+
+                # The job did not change since the last fetch
+                if builds is None:
+                    continue
+
+                if not builds:
+                    self.summary.skipped += 1
+                    continue
 
-                if builds:
-                    njobs += 1
+                njobs += 1
+                last_build, running = last_builds.get(job['url'], (None, set()))
 
                 for build in builds:
-                    if f"{job['name']}:{build['id']}" in self.blacklist_builds:
-                        logger.warning(f"Skipping blacklisted build: {job['name']}:{build['id']}")
+                    if not self.__is_new_build(build, last_build, running):
+                        continue
+                    if f"{job_name}:{build['id']}" in self.blacklist_builds:
+                        logger.warning(f"Skipping blacklisted build: {job_name}:{build['id']}")
                         continue
                     nbuilds += 1
                     yield build
 
-                tjobs += 1
+                if index:
+                    index.store(job['url'], *self.__builds_to_index(builds, last_build, running))
+        finally:
+            results.close()
 
         logger.info("Total number of jobs: %i/%i", njobs, tjobs)
         logger.info("Total number of builds: %i", nbuilds)
@@ -210,6 +237,53 @@ class Jenkins(Backend):
 
         return jobs
 
+    def __get_all_jobs(self):
+        """Get the jobs of the server, including the nested ones.
+
+        It returns tuples with the name used to blacklist the builds
+        of the job, the job and the URL where its builds are fetched.
+        """
+        for job in self.__get_jobs(self.url):
+            job_class = job.get('_class', None)
+            if job_class and job_class == CLASS_JOB_WORKFLOW_MULTIBRANCH:
+                job_url = job['url']
+                for nested_job in self.__get_jobs(job_url):
+                    yield job['name'], nested_job, job_url
+            else:
+                yield job['name'], job, self.url
+
+    def __get_job_builds(self, job, url, last_build, running):
+        """Get the builds of a job.
+
+        When the number of the last build fetched from the job
+        is given, it returns `None` if there are no newer builds
+        and none of the builds was running.
+        """
+        if last_build is not None and not running \
+                and not self.__has_new_builds(job, url, last_build):
+            logger.debug("No new builds for job %s", job['url'])
+            return None
+
+        return self.__get_builds(job, url)
+
+    def __has_new_builds(self, job, url, last_build):
+        try:
+            raw_last_build = self.client.get_last_build(job['name'], url)
+        except requests.exceptions.HTTPError as e:
+            logger.debug("Unable to get the last build from job %s; cause: %s",
+                         job['url'], str(e))
+            return True
+
+        if not raw_last_build:
+            return False
+
+        try:
+            build = json.loads(raw_last_build).get('lastBuild', None)
+        except ValueError:
+            return True
+
+        return build is not None and build['number'] > last_build
+
     def __get_builds(self, job, url):
         builds = []
         try:
@@ -219,13 +293,11 @@ class Jenkins(Backend):
                 logger.warning(e)
                 logger.warning("Unable to fetch builds from job %s; skipping",
                                job['url'])
-                self.summary.skipped += 1
                 return builds
             else:
                 raise e
 
         if not raw_builds:
-            self.summary.skipped += 1
             return builds
 
         try:
@@ -233,16 +305,38 @@ class Jenkins(Backend):
         except ValueError:
             logger.warning("Unable to parse builds from job %s; skipping",
                            job['url'])
-            self.summary.skipped += 1
             return builds
 
         builds = builds.get('builds', [])
         if not builds:
-            self.summary.skipped += 1
             logger.debug("No builds for job %s", job['url'])
 
         return builds
 
+    @staticmethod
+    def __is_new_build(build, last_build, running):
+        """Check whether a build was not fetched or it was running"""
+
+        return last_build is None or build['number'] > last_build or \
+            build['number'] in running
+
+    @staticmethod
+    def __builds_to_index(builds, last_build, running):
+        """Get the last build and the running builds to store in the index.
+
+        The number of the last build is the highest one fetched. The
+        builds returned that are still running are stored apart, so
+        they are fetched again until they finish.
+        """
+        numbers = [build['number'] for build in builds]
+        number = max(numbers + [last_build or 0])
+
+        running = [build['number'] for build in builds
+                   if build.get('building', False) and
+                   Jenkins.__is_new_build(build, last_build, running)]
+
+        return number, running
+
     def _init_client(self, from_archive=False):
         """Init client"""
 
@@ -283,6 +377,10 @@ class JenkinsClient(HttpClient):
 
     # Resource parameters
     PDEPTH = 'depth'
+    PTREE = 'tree'
+
+    # Common values
+    VLAST_BUILD = 'lastBuild[number]'
 
     def __init__(self, url, user=None, api_token=None, blacklist_jobs=None,
                  detail_depth=DETAIL_DEPTH, sleep_time=SLEEP_TIME,
@@ -307,6 +405,22 @@ class JenkinsClient(HttpClient):
         response = self.fetch(url_jenkins, auth=self.auth)
         return response.text
 
+    def get_last_build(self, job_name, url):
+        """Retrieve the number of the last build of a job
+
+        :param job_name: name of the job
+        :param url: target url to fetch the build
+        """
+        if self.blacklist_jobs and job_name in self.blacklist_jobs:
+            logger.warning("Not getting blacklisted job: %s", job_name)
+            return
+
+        payload = {self.PTREE: self.VLAST_BUILD}
+        url_build = urijoin(url, self.RJOB, job_name, self.RAPI, self.RJSON)
+
+        response = self.fetch(url_build, payload=payload, auth=self.auth)
+        return response.text
+
     def get_builds(self, job_name, url):
         """Retrieve all builds from a job
 
@@ -324,6 +438,81 @@ class JenkinsClient(HttpClient):
         return response.text
 
 
+class JenkinsBuildsIndex(SQLiteIndex):
+    """Index of the last builds fetched from the jobs of a Jenkins server.
+
+    For each job, identified by its URL, this index keeps the number
+    of the last build fetched and the numbers of the builds that were
+    running when they were fetched, so later fetch processes can skip
+    the older builds that already finished.
+
+    The index is stored in a SQLite file, which will be created if
+    it does not exist.
+
+    :param index_path: path where the index is stored
+    :param timeout: seconds to wait for the database lock
+
+    :raises BackendError: when the index is not valid
+    """
+    INDEX_NAME = "builds index"
+    ERROR = BackendError
+
+    JOBS_TABLE = "jobs"
+    RUNNING_TABLE = "running"
+
+    JOBS_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + JOBS_TABLE + " ( " \
+                       "url TEXT PRIMARY KEY, " \
+                       "number INTEGER NOT NULL)"
+
+    RUNNING_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + RUNNING_TABLE + " ( " \
+                          "url TEXT NOT NULL, " \
+                          "number INTEGER NOT NULL, " \
+                          "PRIMARY KEY (url, number)) " \
+                          "WITHOUT ROWID"
+    CREATE_STMTS = [JOBS_CREATE_STMT, RUNNING_CREATE_STMT]
+
+    def last_builds(self):
+        """Get the last build and the running builds fetched from each job.
+
+        :returns: a dict with tuples of the number of the last build
+            and the set of numbers of the running builds, by job URL
+        """
+        cursor = self._db.cursor()
+        cursor.execute("SELECT url, number FROM " + self.JOBS_TABLE)
+        last_builds = {url: (number, set()) for url, number in cursor.fetchall()}
+
+        cursor.execute("SELECT url, number FROM " + self.RUNNING_TABLE)
+        for url, number in cursor.fetchall():
+            if url in last_builds:
+                last_builds[url][1].add(number)
+        cursor.close()
+
+        return last_builds
+
+    def store(self, job_url, number, running=None):
+        """Store the last build and the running builds fetched from a job.
+
+        The running builds stored before for the job are replaced.
+
+        :param job_url: URL of the job
+        :param number: number of the last build
+        :param running: numbers of the builds that were running
+
+        :raises BackendError: when an error occurs writing the index
+        """
+        running = running or []
+
+        with self._write() as db:
+            db.execute("INSERT OR REPLACE INTO " + self.JOBS_TABLE + " "
+                       "(url, number) VALUES (?,?)",
+                       (job_url, number))
+            db.execute("DELETE FROM " + self.RUNNING_TABLE + " WHERE url = ?",
+                       (job_url,))
+            db.executemany("INSERT INTO " + self.RUNNING_TABLE + " "
+                           "(url, number) VALUES (?,?)",
+                           [(job_url, n) for n in running])
+
+
 class JenkinsCommand(BackendCommand):
     """Class to run Jenkins backend from the command line."""
 
@@ -354,6 +543,12 @@ class JenkinsCommand(BackendCommand):
                            nargs='*', default=[],
                            help="List of builds to be blacklisted. "
                                 "Format: 'job_name:build_id'.")
+        group.add_argument('--fetch-workers', dest='fetch_workers',
+                           type=int, default=None,
+                           help="Number of threads used to fetch data concurrently")
+        group.add_argument('--builds-index', dest='builds_index',
+                           help="File to store the last build fetched from each job; "
+                                "only newer builds and the ones that were running are fetched")
 
         # Required arguments
         parser.parser.add_argument('url',
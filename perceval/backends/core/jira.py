@@ -39,7 +39,7 @@ from ...backend import (Backend,
                         BackendCommand,
                         BackendCommandArgumentParser)
 from ...client import HttpClient
-from ...utils import DEFAULT_DATETIME
+from ...utils import DEFAULT_DATETIME, map_concurrently
 
 CATEGORY_ISSUE = "issue"
 MAX_RESULTS = 100  # Maximum number of results per query
@@ -105,8 +105,10 @@ class Jira(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param fetch_workers: number of threads used to fetch pages of
+        issues and comments concurrently
     """
-    version = '1.0.0'
+    version = '1.1.0'
 
     CATEGORIES = [CATEGORY_ISSUE]
     EXTRA_SEARCH_FIELDS = {
@@ -119,7 +121,7 @@ class Jira(Backend):
     def __init__(self, url, project=None,
                  user=None, password=None, api_token=None,
                  cert=None, max_results=MAX_RESULTS,
-                 tag=None, archive=None, ssl_verify=True):
+                 tag=None, archive=None, ssl_verify=True, fetch_workers=None):
         origin = url
 
         super().__init__(origin, tag=tag, archive=archive, ssl_verify=ssl_verify)
@@ -130,6 +132,7 @@ class Jira(Backend):
         self.api_token = api_token
         self.cert = cert
         self.max_results = max_results
+        self.fetch_workers = fetch_workers
         self.client = None
 
     def fetch(self, category=CATEGORY_ISSUE, from_date=DEFAULT_DATETIME):
@@ -172,13 +175,19 @@ class Jira(Backend):
         custom_fields = filter_custom_fields(fields)
 
         for whole_page in whole_pages:
-            issues = self.parse_issues(whole_page)
-            for issue in issues:
+            issues = list(self.parse_issues(whole_page))
+
+            # Comments of the issues of the same page can be
+            # fetched concurrently
+            comments = map_concurrently(self.__get_issue_comments,
+                                        [issue['id'] for issue in issues],
+                                        workers=self.fetch_workers)
+
+            for issue, comments_data in zip(issues, comments):
                 mapping = map_custom_field(custom_fields, issue['fields'])
                 for k, v in mapping.items():
                     issue['fields'][k] = v
 
-                comments_data = self.__get_issue_comments(issue['id'])
                 issue['comments_data'] = comments_data
 
                 yield issue
@@ -252,7 +261,8 @@ class Jira(Backend):
 
         return JiraClient(self.url, self.project, self.user, self.password,
                           self.cert, self.api_token, self.max_results,
-                          self.archive, from_archive, self.ssl_verify)
+                          self.archive, from_archive, self.ssl_verify,
+                          fetch_workers=self.fetch_workers)
 
     def __get_issue_comments(self, issue_id):
         """Get issue comments"""
@@ -284,6 +294,8 @@ class JiraClient(HttpClient):
     :param archive: an archive to store/read fetched data
     :param from_archive: it tells whether to write/read the archive
     :param ssl_verify: enable/disable SSL verification
+    :param fetch_workers: number of threads used to fetch the pages
+        of issues concurrently
 
     :raises HTTPError: when an error occurs doing the request
     """
@@ -307,7 +319,7 @@ class JiraClient(HttpClient):
 
     def __init__(self, url, project, user, password, cert, api_token=None,
                  max_results=MAX_RESULTS, archive=None, from_archive=False,
-                 ssl_verify=True):
+                 ssl_verify=True, fetch_workers=None):
         super().__init__(url, archive=archive, from_archive=from_archive, ssl_verify=ssl_verify)
         self.project = project
         self.user = user
@@ -315,16 +327,22 @@ class JiraClient(HttpClient):
         self.api_token = api_token
         self.cert = cert
         self.max_results = max_results
+        self.fetch_workers = fetch_workers
 
         if not from_archive:
             self.__init_session()
 
-    def get_items(self, from_date, url, expand_fields=True):
+    def get_items(self, from_date, url, expand_fields=True, workers=None):
         """Retrieve all the items from a given date.
 
+        When `workers` is set, the pages after the first one are
+        requested concurrently, using the total number of items
+        reported by the first page. Pages are returned in order.
+
         :param url: endpoint API url
         :param from_date: obtain items updated since this date
         :param expand_fields: if True, it includes the expand fields in the payload
+        :param workers: number of threads used to fetch the pages
         """
         start_at = 0
 
@@ -338,6 +356,20 @@ class JiraClient(HttpClient):
         start_at += min(nitems, titems)
         self.__log_status(start_at, titems, url)
 
+        if workers and workers > 1 and nitems > 0:
+            yield issues
+
+            def fetch_page(offset):
+                payload = self.__build_payload(offset, from_date, expand_fields)
+                return self.fetch(url, payload=payload).text
+
+            offsets = range(start_at, titems, nitems)
+
+            for offset, issues in zip(offsets, map_concurrently(fetch_page, offsets, workers=workers)):
+                self.__log_status(offset + nitems, titems, url)
+                yield issues
+            return
+
         while issues:
             yield issues
             issues = None
@@ -356,7 +388,7 @@ class JiraClient(HttpClient):
         :param from_date: obtain issues updated since this date
         """
         url = urijoin(self.base_url, self.RESOURCE, self.VERSION_API, self.RSEARCH)
-        issues = self.get_items(from_date, url)
+        issues = self.get_items(from_date, url, workers=self.fetch_workers)
 
         return issues
 
@@ -469,6 +501,9 @@ class JiraCommand(BackendCommand):
         group.add_argument('--max-results', dest='max_results',
                            type=int, default=MAX_RESULTS,
                            help="Maximum number of results requested in the same query")
+        group.add_argument('--fetch-workers', dest='fetch_workers',
+                           type=int, default=None,
+                           help="Number of threads used to fetch data concurrently")
 
         # Required arguments
         parser.parser.add_argument('url',
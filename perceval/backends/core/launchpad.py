@@ -24,6 +24,8 @@
 
 import json
 import logging
+import threading
+
 import requests
 
 from grimoirelab_toolkit.datetime import (datetime_to_utc,
@@ -35,7 +37,7 @@ from ...backend import (Backend,
                         BackendCommandArgumentParser,
                         DEFAULT_SEARCH_FIELD)
 from ...client import HttpClient
-from ...utils import DEFAULT_DATETIME
+from ...utils import DEFAULT_DATETIME, map_concurrently
 
 CATEGORY_ISSUE = "issue"
 
@@ -62,14 +64,16 @@ class Launchpad(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param fetch_workers: number of threads used to fetch the data
+        of the issues concurrently
     """
-    version = '1.0.0'
+    version = '1.1.0'
 
     CATEGORIES = [CATEGORY_ISSUE]
 
     def __init__(self, distribution, package=None,
                  items_per_page=ITEMS_PER_PAGE, sleep_time=SLEEP_TIME,
-                 tag=None, archive=None, ssl_verify=True):
+                 tag=None, archive=None, ssl_verify=True, fetch_workers=None):
 
         origin = urijoin(LAUNCHPAD_URL, distribution)
 
@@ -78,6 +82,7 @@ class Launchpad(Backend):
         self.package = package
         self.items_per_page = items_per_page
         self.sleep_time = sleep_time
+        self.fetch_workers = fetch_workers
 
         self.client = None
         self._users = {}  # internal users cache
@@ -214,34 +219,45 @@ class Launchpad(Backend):
         return bug_link.split('/')[-1]
 
     def _fetch_issues(self, from_date):
-        """Fetch the issues from a project (distribution/package)"""
+        """Fetch the issues from a project (distribution/package).
 
+        The data, activities, messages, attachments and users of
+        the issues are fetched concurrently when `fetch_workers`
+        is set. Issues are returned in the same order they are
+        listed.
+        """
         issues_groups = self.client.issues(start=from_date)
 
-        for raw_issues in issues_groups:
+        issues = (issue
+                  for raw_issues in issues_groups
+                  for issue in json.loads(raw_issues)['entries'])
+
+        yield from map_concurrently(self.__fetch_issue, issues,
+                                    workers=self.fetch_workers)
 
-            issues = json.loads(raw_issues)['entries']
-            for issue in issues:
-                issue = self.__init_extra_issue_fields(issue)
-                issue_id = self.__extract_issue_id(issue['bug_link'])
+    def __fetch_issue(self, issue):
+        """Add the data associated to an issue"""
 
-                for field in TARGET_ISSUE_FIELDS:
+        issue = self.__init_extra_issue_fields(issue)
+        issue_id = self.__extract_issue_id(issue['bug_link'])
 
-                    if not issue[field]:
-                        continue
+        for field in TARGET_ISSUE_FIELDS:
 
-                    if field == 'bug_link':
-                        issue['bug_data'] = self.__fetch_issue_data(issue_id)
-                        issue['activity_data'] = [activity for activity in self.__fetch_issue_activities(issue_id)]
-                        issue['messages_data'] = [message for message in self.__fetch_issue_messages(issue_id)]
-                        issue['attachments_data'] = [attachment for attachment in
-                                                     self.__fetch_issue_attachments(issue_id)]
-                    elif field == 'assignee_link':
-                        issue['assignee_data'] = self.__fetch_user_data('{ASSIGNEE}', issue[field])
-                    elif field == 'owner_link':
-                        issue['owner_data'] = self.__fetch_user_data('{OWNER}', issue[field])
+            if not issue[field]:
+                continue
 
-                yield issue
+            if field == 'bug_link':
+                issue['bug_data'] = self.__fetch_issue_data(issue_id)
+                issue['activity_data'] = [activity for activity in self.__fetch_issue_activities(issue_id)]
+                issue['messages_data'] = [message for message in self.__fetch_issue_messages(issue_id)]
+                issue['attachments_data'] = [attachment for attachment in
+                                             self.__fetch_issue_attachments(issue_id)]
+            elif field == 'assignee_link':
+                issue['assignee_data'] = self.__fetch_user_data('{ASSIGNEE}', issue[field])
+            elif field == 'owner_link':
+                issue['owner_data'] = self.__fetch_user_data('{OWNER}', issue[field])
+
+        return issue
 
     def __fetch_issue_data(self, issue_id):
         """Get data associated to an issue"""
@@ -308,8 +324,6 @@ class LaunchpadClient(HttpClient):
     :param from_archive: it tells whether to write/read the archive
     :param ssl_verify: enable/disable SSL verification
     """
-    _users = {}
-
     # API resources
     RBUGS = 'bugs'
     RSOURCE = "+source"
@@ -345,6 +359,12 @@ class LaunchpadClient(HttpClient):
         self.package = package
         self.items_per_page = items_per_page
 
+        # Users cache shared among threads; each user is
+        # requested only once, even by concurrent calls
+        self._users = {}
+        self._users_locks = {}
+        self._users_lock = threading.Lock()
+
         extra_headers = self.__define_headers()
         super().__init__(LAUNCHPAD_API_URL, sleep_time=sleep_time, extra_headers=extra_headers,
                          archive=archive, from_archive=from_archive, ssl_verify=ssl_verify)
@@ -361,24 +381,28 @@ class LaunchpadClient(HttpClient):
 
         user = None
 
-        if user_name in self._users:
-            return self._users[user_name]
+        with self._users_lock:
+            user_lock = self._users_locks.setdefault(user_name, threading.Lock())
 
-        url_user = self.__get_url("~" + user_name)
+        with user_lock:
+            if user_name in self._users:
+                return self._users[user_name]
 
-        logger.info("Getting info for %s" % (url_user))
+            url_user = self.__get_url("~" + user_name)
 
-        try:
-            raw_user = self.__send_request(url_user)
-            user = raw_user
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code in [404, 410]:
-                logger.warning("Data is not available - %s", url_user)
-                user = '{}'
-            else:
-                raise e
+            logger.info("Getting info for %s" % (url_user))
+
+            try:
+                raw_user = self.__send_request(url_user)
+                user = raw_user
+            except requests.exceptions.HTTPError as e:
+                if e.response.status_code in [404, 410]:
+                    logger.warning("Data is not available - %s", url_user)
+                    user = '{}'
+                else:
+                    raise e
 
-        self._users[user_name] = user
+            self._users[user_name] = user
 
         return user
 
@@ -517,6 +541,9 @@ class LaunchpadCommand(BackendCommand):
                            help="Sleep time in case of connection lost")
         group.add_argument('--package', dest='package',
                            help="Distribution package")
+        group.add_argument('--fetch-workers', dest='fetch_workers',
+                           type=int, default=None,
+                           help="Number of threads used to fetch data concurrently")
 
         # Required arguments
         parser.parser.add_argument('distribution',
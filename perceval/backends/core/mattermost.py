@@ -78,8 +78,10 @@ class Mattermost(Backend):
     :param sleep_time: time (in seconds) to sleep in case
         of connection problems
     :param ssl_verify: enable/disable SSL verification
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
     """
-    version = '1.0.0'
+    version = '1.1.0'
 
     CATEGORIES = [CATEGORY_POST]
     EXTRA_SEARCH_FIELDS = {
@@ -90,7 +92,7 @@ class Mattermost(Backend):
     def __init__(self, url, channel, api_token, max_items=MAX_ITEMS,
                  tag=None, archive=None, team=None,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
-                 sleep_time=DEFAULT_SLEEP_TIME, ssl_verify=True):
+                 sleep_time=DEFAULT_SLEEP_TIME, ssl_verify=True, pace_requests=False):
 
         if team is not None:
             origin = urijoin(url, team, channel)
@@ -106,6 +108,7 @@ class Mattermost(Backend):
         self.sleep_for_rate = sleep_for_rate
         self.min_rate_to_sleep = min_rate_to_sleep
         self.sleep_time = sleep_time
+        self.pace_requests = pace_requests
         self.client = None
 
         self._users = {}
@@ -265,7 +268,8 @@ class Mattermost(Backend):
                                 min_rate_to_sleep=self.min_rate_to_sleep,
                                 sleep_time=self.sleep_time,
                                 archive=self.archive, from_archive=from_archive,
-                                ssl_verify=self.ssl_verify)
+                                ssl_verify=self.ssl_verify,
+                                pace_requests=self.pace_requests)
 
     def _parse_posts(self, raw_posts):
         """Parse posts and returns in order."""
@@ -313,6 +317,8 @@ class MattermostClient(HttpClient, RateLimitHandler):
     :param archive: an archive to store/read fetched data
     :param from_archive: it tells whether to write/read the archive
     :param ssl_verify: enable/disable SSL verification
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
     """
     API_URL = urijoin('%(base_url)s', 'api', 'v4', '%(entrypoint)s')
 
@@ -333,7 +339,8 @@ class MattermostClient(HttpClient, RateLimitHandler):
     def __init__(self, base_url, api_token, max_items=MAX_ITEMS,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
                  sleep_time=DEFAULT_SLEEP_TIME,
-                 archive=None, from_archive=False, ssl_verify=True):
+                 archive=None, from_archive=False, ssl_verify=True,
+                 pace_requests=False):
         self.api_token = api_token
         self.max_items = max_items
 
@@ -342,7 +349,8 @@ class MattermostClient(HttpClient, RateLimitHandler):
                          extra_headers=self._set_extra_headers(),
                          archive=archive, from_archive=from_archive, ssl_verify=ssl_verify)
         super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate,
-                                         min_rate_to_sleep=min_rate_to_sleep)
+                                         min_rate_to_sleep=min_rate_to_sleep,
+                                         pace_requests=pace_requests)
 
     def channel(self, channel):
         """Fetch the channel information"""
@@ -506,6 +514,9 @@ class MattermostCommand(BackendCommand):
         group.add_argument('--min-rate-to-sleep', dest='min_rate_to_sleep',
                            default=MIN_RATE_LIMIT, type=int,
                            help="sleep until reset when the rate limit reaches this value")
+        group.add_argument('--pace-requests', dest='pace_requests',
+                           action='store_true',
+                           help="spread requests over the time left to reset the rate limit")
         group.add_argument('--sleep-time', dest='sleep_time',
                            default=DEFAULT_SLEEP_TIME, type=int,
                            help="minimun sleeping time to avoid too many request exception")
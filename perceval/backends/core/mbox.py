@@ -26,10 +26,13 @@
 
 # Note: some of this code was taken from the MailingListStats project
 
+import collections
+import concurrent.futures
+import io
+import json
 import logging
 import mailbox
 import os
-import tempfile
 
 import gzip
 import bz2
@@ -42,6 +45,8 @@ from grimoirelab_toolkit.datetime import (InvalidDateError,
 from ...backend import (Backend,
                         BackendCommand,
                         BackendCommandArgumentParser)
+from ...errors import BackendError
+from ...index import SQLiteIndex
 from ...utils import (DEFAULT_DATETIME,
                       DEFAULT_LAST_DATETIME,
                       check_compressed_file_type,
@@ -66,20 +71,27 @@ class MBox(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param parse_workers: number of processes used to parse the mbox
+        files; when it is greater than one, files are parsed in parallel
+    :param mbox_index: path to the file where the position and date of
+        the messages of each mbox are indexed; see `MBoxIndex`
     """
-    version = '1.0.0'
+    version = '1.3.0'
 
     CATEGORIES = [CATEGORY_MESSAGE]
 
     DATE_FIELD = 'Date'
     MESSAGE_ID_FIELD = 'Message-ID'
 
-    def __init__(self, uri, dirpath, tag=None, archive=None, ssl_verify=True):
+    def __init__(self, uri, dirpath, tag=None, archive=None, ssl_verify=True,
+                 parse_workers=None, mbox_index=None):
         origin = uri
 
         super().__init__(origin, tag=tag, archive=archive, ssl_verify=ssl_verify)
         self.uri = uri
         self.dirpath = dirpath
+        self.parse_workers = parse_workers
+        self.mbox_index = mbox_index
 
     def fetch(self, category=CATEGORY_MESSAGE, from_date=DEFAULT_DATETIME, to_date=DEFAULT_LAST_DATETIME):
         """Fetch the messages from a set of mbox files.
@@ -195,127 +207,279 @@ class MBox(Backend):
             message = message_to_dict(msg)
             yield message
 
+    @staticmethod
+    def parse_mbox_stream(stream):
+        """Parse a mbox from a stream of bytes.
+
+        This method parses the contents of a mbox read from a binary
+        stream, such as the ones returned by `MBoxArchive.container`,
+        and returns an iterator of dictionaries. The stream is read
+        only once, so compressed mboxes are parsed while they are
+        decompressed. The messages are the same `parse_mbox` returns.
+
+        :param stream: binary stream with the contents of the mbox
+
+        :returns : generator of messages; each message is stored in a
+            dictionary of type `requests.structures.CaseInsensitiveDict`
+        """
+        for msg in _MBoxReader(stream):
+            message = message_to_dict(msg)
+            yield message
+
     def _init_client(self, from_archive=False):
         pass
 
     def _fetch_and_parse_messages(self, mailing_list, from_date, to_date=DEFAULT_LAST_DATETIME):
-        """Fetch and parse the messages from a mailing list"""
+        """Fetch and parse the messages from a mailing list.
+
+        When `parse_workers` is greater than one, the mboxes are parsed
+        by a pool of processes. Messages are returned in the same order
+        the mboxes are listed by the mailing list.
 
+        When `mbox_index` is set, only the messages sent between the
+        given dates are read from those mboxes that did not change
+        since they were indexed.
+        """
         from_date = datetime_to_utc(from_date)
         to_date = datetime_to_utc(to_date)
 
-        nmsgs, imsgs, tmsgs = (0, 0, 0)
+        stats = collections.Counter()
+        nmsgs = 0
+
+        if self.parse_workers and self.parse_workers > 1:
+            messages = self._parse_mboxes_parallel(mailing_list.mboxes, from_date, to_date, stats)
+        else:
+            index = MBoxIndex(self.mbox_index) if self.mbox_index else None
+            messages = (message
+                        for mbox in mailing_list.mboxes
+                        for message in self._parse_mbox_messages(mbox, from_date, to_date, stats,
+                                                                 index=index))
+
+        for message in messages:
+            nmsgs += 1
+            yield message
+
+        logger.info("Done. %s/%s messages fetched; %s ignored",
+                    nmsgs, stats['total'], stats['ignored'])
+
+    def _parse_mboxes_parallel(self, mboxes, from_date, to_date, stats):
+        """Parse a list of mboxes using a pool of processes.
 
-        for mbox in mailing_list.mboxes:
-            tmp_path = None
+        When `mbox_index` is set, each process opens the index once.
+        """
+        mboxes = iter(mboxes)
+        pending = collections.deque()
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.parse_workers,
+                                                    initializer=_init_mbox_index,
+                                                    initargs=(self.mbox_index,)) as executor:
+            def submit():
+                mbox = next(mboxes, None)
+                if mbox:
+                    future = executor.submit(_parse_mbox_messages, self.__class__,
+                                             mbox, from_date, to_date)
+                    pending.append(future)
+
+            # Only a few mboxes are parsed ahead to limit memory usage
+            for _ in range(2 * self.parse_workers):
+                submit()
 
             try:
-                tmp_path = self._copy_mbox(mbox)
+                while pending:
+                    messages, mbox_stats = pending.popleft().result()
+                    submit()
 
-                for message in self.parse_mbox(tmp_path):
-                    tmsgs += 1
+                    stats.update(mbox_stats)
 
-                    if not self._validate_message(message):
-                        imsgs += 1
-                        continue
+                    for message in messages:
+                        yield message
+            finally:
+                for future in pending:
+                    future.cancel()
 
-                    # Ignore those messages sent before from date and after to date
-                    dt = str_to_datetime(message[MBox.DATE_FIELD])
+    @classmethod
+    def _parse_mbox_messages(cls, mbox, from_date, to_date, stats, index=None):
+        """Parse the valid messages of a mbox sent between two dates"""
 
-                    if dt < from_date:
-                        logger.debug("Message %s sent before %s; skipped",
-                                     message['unixfrom'], str(from_date))
-                        tmsgs -= 1
-                        continue
+        try:
+            if index:
+                messages = cls._parse_indexed_mbox_archive(mbox, index, from_date, to_date)
+            else:
+                messages = cls._parse_mbox_archive(mbox)
 
-                    if dt > to_date:
-                        logger.debug("Message %s sent after %s; skipped",
-                                     message['unixfrom'], str(to_date))
-                        tmsgs -= 1
-                        continue
+            for message in messages:
+                stats['total'] += 1
 
-                    # Convert 'CaseInsensitiveDict' to dict
-                    message = self._casedict_to_dict(message)
+                if not cls._validate_message(message):
+                    stats['ignored'] += 1
+                    continue
 
-                    nmsgs += 1
-                    logger.debug("Message %s parsed", message['unixfrom'])
+                # Ignore those messages sent before from date and after to date
+                dt = str_to_datetime(message[MBox.DATE_FIELD])
 
-                    yield message
-            except (OSError, EOFError) as e:
-                logger.warning("Ignoring %s mbox due to: %s", mbox.filepath, str(e))
-            except Exception as e:
-                if tmp_path and os.path.exists(tmp_path):
-                    os.remove(tmp_path)
-                raise e
-            finally:
-                if tmp_path and os.path.exists(tmp_path):
-                    os.remove(tmp_path)
+                if dt < from_date:
+                    logger.debug("Message %s sent before %s; skipped",
+                                 message['unixfrom'], str(from_date))
+                    stats['total'] -= 1
+                    continue
 
-        logger.info("Done. %s/%s messages fetched; %s ignored",
-                    nmsgs, tmsgs, imsgs)
+                if dt > to_date:
+                    logger.debug("Message %s sent after %s; skipped",
+                                 message['unixfrom'], str(to_date))
+                    stats['total'] -= 1
+                    continue
 
-    def _copy_mbox(self, mbox):
-        """Copy the contents of a mbox to a temporary file"""
+                # Convert 'CaseInsensitiveDict' to dict
+                message = cls._casedict_to_dict(message)
 
-        tmp_path = tempfile.mktemp(prefix='perceval_')
+                logger.debug("Message %s parsed", message['unixfrom'])
+
+                yield message
+        except (OSError, EOFError) as e:
+            logger.warning("Ignoring %s mbox due to: %s", mbox.filepath, str(e))
+
+    @classmethod
+    def _parse_mbox_archive(cls, mbox):
+        """Parse the messages of a mbox archive reading them in place"""
 
         with mbox.container as f_in:
-            with open(tmp_path, mode='wb') as f_out:
-                for line in f_in:
-                    f_out.write(line)
-        return tmp_path
+            for message in cls.parse_mbox_stream(f_in):
+                yield message
+
+    @classmethod
+    def _parse_indexed_mbox_archive(cls, mbox, index, from_date, to_date):
+        """Parse the messages of a mbox archive using an index.
 
-    def _validate_message(self, message):
+        When the mbox did not change since it was indexed, only the
+        messages sent between the given dates and the invalid ones,
+        so they are counted as ignored, are read. Otherwise, the
+        whole mbox is parsed and indexed again.
+        """
+        stat = os.stat(mbox.filepath)
+        offsets = index.search(mbox.filepath, stat.st_size, stat.st_mtime,
+                               from_date.timestamp(), to_date.timestamp())
+
+        if offsets is None:
+            for message in cls._index_mbox_archive(mbox, index, stat):
+                yield message
+            return
+
+        if not offsets:
+            logger.debug("No messages to parse in indexed mbox %s; skipped", mbox.filepath)
+            return
+
+        with mbox.container as f_in:
+            for offset, length in offsets:
+                f_in.seek(offset)
+                stream = io.BytesIO(f_in.read(length))
+
+                for message in cls.parse_mbox_stream(stream):
+                    yield message
+
+    @classmethod
+    def _index_mbox_archive(cls, mbox, index, stat):
+        """Parse the messages of a mbox archive and index them"""
+
+        entries = []
+
+        with mbox.container as f_in:
+            for offset, length, msg in _MBoxReader(f_in).messages_with_offsets():
+                message = message_to_dict(msg)
+                entries.append((offset, length, cls._message_timestamp(message)))
+                yield message
+
+        index.store(mbox.filepath, stat.st_size, stat.st_mtime, entries)
+
+    @classmethod
+    def _message_timestamp(cls, message):
+        """Get the timestamp of a valid message or `None` otherwise"""
+
+        if not message.get(cls.MESSAGE_ID_FIELD, None) or not message.get(cls.DATE_FIELD, None):
+            return None
+
+        try:
+            return str_to_datetime(message[cls.DATE_FIELD]).timestamp()
+        except InvalidDateError:
+            return None
+
+    @classmethod
+    def _validate_message(cls, message):
         """Check if the given message has the mandatory fields"""
 
         # This check is "case insensitive" because we're
         # using 'CaseInsensitiveDict' from requests.structures
         # module to store the contents of a message.
-        if self.MESSAGE_ID_FIELD not in message:
+        if cls.MESSAGE_ID_FIELD not in message:
             logger.warning("Field 'Message-ID' not found in message %s; ignoring",
                            message['unixfrom'])
             return False
 
-        if not message[self.MESSAGE_ID_FIELD]:
+        if not message[cls.MESSAGE_ID_FIELD]:
             logger.warning("Field 'Message-ID' is empty in message %s; ignoring",
                            message['unixfrom'])
             return False
 
-        if self.DATE_FIELD not in message:
+        if cls.DATE_FIELD not in message:
             logger.warning("Field 'Date' not found in message %s; ignoring",
                            message['unixfrom'])
             return False
 
-        if not message[self.DATE_FIELD]:
+        if not message[cls.DATE_FIELD]:
             logger.warning("Field 'Date' is empty in message %s; ignoring",
                            message['unixfrom'])
             return False
 
         try:
-            str_to_datetime(message[self.DATE_FIELD])
+            str_to_datetime(message[cls.DATE_FIELD])
         except InvalidDateError:
             logger.warning("Invalid date %s in message %s; ignoring",
-                           message[self.DATE_FIELD], message['unixfrom'])
+                           message[cls.DATE_FIELD], message['unixfrom'])
             return False
 
         return True
 
-    def _casedict_to_dict(self, message):
+    @classmethod
+    def _casedict_to_dict(cls, message):
         """Convert a message in CaseInsensitiveDict to dict.
 
         This method also converts well known problematic headers,
         such as Message-ID and Date to a common name.
         """
-        message_id = message.pop(self.MESSAGE_ID_FIELD)
-        date = message.pop(self.DATE_FIELD)
+        message_id = message.pop(cls.MESSAGE_ID_FIELD)
+        date = message.pop(cls.DATE_FIELD)
 
         msg = {k: v for k, v in message.items()}
-        msg[self.MESSAGE_ID_FIELD] = message_id
-        msg[self.DATE_FIELD] = date
+        msg[cls.MESSAGE_ID_FIELD] = message_id
+        msg[cls.DATE_FIELD] = date
 
         return msg
 
 
+_mbox_index = None
+
+
+def _init_mbox_index(index_path):
+    """Open the mbox index used by a worker process, if any"""
+
+    global _mbox_index
+
+    _mbox_index = MBoxIndex(index_path) if index_path else None
+
+
+def _parse_mbox_messages(backend_class, mbox, from_date, to_date):
+    """Parse the valid messages of a mbox in a worker process.
+
+    It returns the list of messages and the statistics of the
+    parsing process.
+    """
+    stats = collections.Counter()
+    messages = backend_class._parse_mbox_messages(mbox, from_date, to_date, stats,
+                                                  index=_mbox_index)
+    messages = [message for message in messages]
+
+    return messages, stats
+
+
 class _MBox(mailbox.mbox):
     """Wrapper of `mailbox.mbox` to catch unhandled errors"""
 
@@ -328,18 +492,187 @@ class _MBox(mailbox.mbox):
         string = self._file.read(stop - self._file.tell())
         msg = self._message_factory(string.replace(mailbox.linesep, b'\n'))
 
-        try:
-            msg.set_from(from_line[5:].decode('ascii'))
-            return msg
-        except UnicodeDecodeError:
-            pass
+        return _set_message_from(msg, from_line)
 
-        try:
-            msg.set_from(from_line[5:].decode('utf-8'))
-        except UnicodeDecodeError:
-            msg.set_from(from_line[5:].decode('iso-8859-1'))
 
+class _MBoxReader:
+    """Iterator over the messages of a mbox read from a binary stream.
+
+    Messages are split on 'From ' lines following the same rules
+    `mailbox.mbox` does, so the result is the same `_MBox` returns.
+    The difference is the stream is read sequentially and only once,
+    so it is not needed to store its contents in a seekable file.
+
+    :param stream: binary stream with the contents of the mbox
+    """
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __iter__(self):
+        for _, _, msg in self.messages_with_offsets():
+            yield msg
+
+    def messages_with_offsets(self):
+        """Iterate over the messages and their positions in the stream.
+
+        For each message, it returns the offset of its 'From ' line,
+        the number of bytes until the next message starts and the
+        message itself. Parsing those bytes returns the same message.
+        """
+        from_line = None
+        lines = []
+        last_was_empty = False
+        offset = 0
+        pos = 0
+
+        for line in self.stream:
+            if line.startswith(b'From '):
+                if from_line is not None:
+                    msg = self._build_message(from_line, lines, last_was_empty)
+                    yield offset, pos - offset, msg
+                from_line = line
+                lines = []
+                last_was_empty = False
+                offset = pos
+            else:
+                if from_line is not None:
+                    lines.append(line)
+                last_was_empty = (line == mailbox.linesep)
+
+            pos += len(line)
+
+        if from_line is not None:
+            msg = self._build_message(from_line, lines, last_was_empty)
+            yield offset, pos - offset, msg
+
+    @staticmethod
+    def _build_message(from_line, lines, last_was_empty):
+        """Build a message from its 'From ' line and its contents"""
+
+        string = b''.join(lines)
+
+        # Like in mailbox.mbox, the empty line before the
+        # next 'From ' line does not belong to the message
+        if last_was_empty:
+            string = string[:-len(mailbox.linesep)]
+
+        from_line = from_line.replace(mailbox.linesep, b'')
+        msg = mailbox.mboxMessage(string.replace(mailbox.linesep, b'\n'))
+
+        return _set_message_from(msg, from_line)
+
+
+def _set_message_from(msg, from_line):
+    """Set the 'From ' line of a mbox message, trying several encodings"""
+
+    try:
+        msg.set_from(from_line[5:].decode('ascii'))
         return msg
+    except UnicodeDecodeError:
+        pass
+
+    try:
+        msg.set_from(from_line[5:].decode('utf-8'))
+    except UnicodeDecodeError:
+        msg.set_from(from_line[5:].decode('iso-8859-1'))
+
+    return msg
+
+
+class MBoxIndex(SQLiteIndex):
+    """Index of the messages stored in a set of mbox files.
+
+    For each mbox file, this index keeps the offset, the length and
+    the date of its messages. Offsets and lengths refer to the
+    uncompressed contents of the mbox. Mboxes are identified by their
+    path, size and modification time, so any change on a file makes
+    its entries invalid and the file will need to be indexed again.
+
+    The index is stored in a SQLite file, which will be created if
+    it does not exist. It can be shared among several processes.
+
+    :param index_path: path where the index is stored
+    :param timeout: seconds to wait for the database lock
+
+    :raises BackendError: when the index is not valid
+    """
+    INDEX_NAME = "mbox index"
+    ERROR = BackendError
+
+    MBOXES_TABLE = "mboxes"
+    MESSAGES_TABLE = "messages"
+
+    MBOXES_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + MBOXES_TABLE + " ( " \
+                         "filepath TEXT PRIMARY KEY, " \
+                         "size INTEGER NOT NULL, " \
+                         "mtime REAL NOT NULL)"
+
+    MESSAGES_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + MESSAGES_TABLE + " ( " \
+                           "filepath TEXT NOT NULL, " \
+                           "offset INTEGER NOT NULL, " \
+                           "length INTEGER NOT NULL, " \
+                           "date REAL, " \
+                           "PRIMARY KEY (filepath, offset)) " \
+                           "WITHOUT ROWID"
+    CREATE_STMTS = [MBOXES_CREATE_STMT, MESSAGES_CREATE_STMT]
+
+    def search(self, filepath, size, mtime, from_ts, to_ts):
+        """Search the messages of a mbox sent between two dates.
+
+        Invalid messages, which were indexed without a date, are
+        also returned.
+
+        :param filepath: path of the mbox
+        :param size: current size of the mbox
+        :param mtime: current modification time of the mbox
+        :param from_ts: minimum date of the messages, as a timestamp
+        :param to_ts: maximum date of the messages, as a timestamp
+
+        :returns: a list of (offset, length) tuples sorted by offset;
+            `None` when the mbox is not indexed or changed since
+            it was indexed
+        """
+        cursor = self._db.cursor()
+        cursor.execute("SELECT size, mtime FROM " + self.MBOXES_TABLE + " WHERE filepath = ?",
+                       (filepath,))
+        row = cursor.fetchone()
+
+        if not row or row[0] != size or row[1] != mtime:
+            cursor.close()
+            return None
+
+        select_stmt = "SELECT offset, length " \
+                      "FROM " + self.MESSAGES_TABLE + " " \
+                      "WHERE filepath = ? AND (date IS NULL OR (date >= ? AND date <= ?)) " \
+                      "ORDER BY offset"
+        cursor.execute(select_stmt, (filepath, from_ts, to_ts))
+        offsets = cursor.fetchall()
+        cursor.close()
+
+        return offsets
+
+    def store(self, filepath, size, mtime, entries):
+        """Store the messages of a mbox, replacing the previous ones.
+
+        :param filepath: path of the mbox
+        :param size: size of the mbox
+        :param mtime: modification time of the mbox
+        :param entries: list of (offset, length, date) tuples; the date
+            is a timestamp or `None` for invalid messages
+
+        :raises BackendError: when an error occurs writing the index
+        """
+        with self._write() as db:
+            db.execute("DELETE FROM " + self.MESSAGES_TABLE + " WHERE filepath = ?",
+                       (filepath,))
+            db.execute("INSERT OR REPLACE INTO " + self.MBOXES_TABLE + " "
+                       "(filepath, size, mtime) VALUES (?,?,?)",
+                       (filepath, size, mtime))
+            db.executemany("INSERT INTO " + self.MESSAGES_TABLE + " "
+                           "(filepath, offset, length, date) VALUES (?,?,?,?)",
+                           [(filepath, e[0], e[1], e[2]) for e in entries])
+
+        logger.debug("%s messages of mbox %s indexed", len(entries), filepath)
 
 
 class MBoxCommand(BackendCommand):
@@ -356,6 +689,13 @@ class MBoxCommand(BackendCommand):
                                               to_date=True,
                                               ssl_verify=True)
 
+        # Optional arguments
+        group = parser.parser.add_argument_group('MBox arguments')
+        group.add_argument('--parse-workers', dest='parse_workers', type=int,
+                           help="number of processes used to parse the mbox files")
+        group.add_argument('--mbox-index', dest='mbox_index',
+                           help="file where the position and date of the messages are indexed")
+
         # Required arguments
         parser.parser.add_argument('uri',
                                    help="URI of the mboxes, usually the URL to their mailing list")
@@ -410,9 +750,16 @@ class MailingList(object):
     This class gives access to the local mboxes archives that a
     mailing list manages.
 
+    Subclasses that download the archives from a remote archiver
+    can use `_download_archives` to keep them in sync. The state of
+    the downloaded archives is stored in the file `ARCHIVES_STATE_FILE`
+    of `dirpath`, which is not considered a mbox.
+
     :param uri: URI of the mailing lists, usually its URL address
     :param dirpath: path to the mboxes archives
     """
+    ARCHIVES_STATE_FILE = '.archives.json'
+
     def __init__(self, uri, dirpath):
         self.uri = uri
         self.dirpath = dirpath
@@ -435,9 +782,138 @@ class MailingList(object):
         else:
             for root, _, files in os.walk(self.dirpath):
                 for filename in sorted(files):
+                    if filename == self.ARCHIVES_STATE_FILE:
+                        continue
                     try:
                         location = os.path.join(root, filename)
                         archives.append(MBoxArchive(location))
                     except OSError as e:
                         logger.warning("Ignoring %s mbox due to: %s", filename, str(e))
         return archives
+
+    def _download_archives(self, archives, workers=None):
+        """Download a list of archives from the remote archiver.
+
+        Each archive is a tuple with the URL, the parameters of the
+        request and the local path. When the local copy of an archive
+        was not modified, the validators returned by the server (`ETag`
+        and `Last-Modified`) are sent on the request, so unchanged
+        archives are not downloaded again.
+
+        When `workers` is greater than one, the archives are downloaded
+        by a pool of threads.
+
+        Subclasses must implement `_download_archive`, which returns
+        the response of the server, or `None` when the archive was
+        ignored due to an error.
+
+        :param archives: list of tuples with the archives to download
+        :param workers: number of threads used to download the archives
+
+        :returns: a list of tuples, storing the links and paths of the
+            archives downloaded or already up to date
+        """
+        state = self._load_archives_state()
+        synced = set()
+        downloads = []
+
+        for url, params, filepath in archives:
+            entry = self._find_archive_state(state, filepath)
+
+            headers = {}
+            if entry and entry.get('etag', None):
+                headers['If-None-Match'] = entry['etag']
+            if entry and entry.get('last_modified', None):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+            downloads.append((url, params, filepath, headers))
+
+        def download(args):
+            url, params, filepath, headers = args
+            return self._download_archive(url, params, filepath, headers=headers)
+
+        ndownloaded = 0
+
+        if workers and workers > 1:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+            results = executor.map(download, downloads)
+        else:
+            executor = None
+            results = map(download, downloads)
+
+        try:
+            for (url, _, filepath, _), r in zip(downloads, results):
+                if r is None:
+                    continue
+
+                filename = os.path.basename(filepath)
+
+                synced.add(filepath)
+
+                if r.status_code == 304:
+                    logger.debug("%s archive not modified", url)
+                    continue
+
+                stat = os.stat(filepath)
+                state[filename] = {
+                    'etag': r.headers.get('ETag', None),
+                    'last_modified': r.headers.get('Last-Modified', None),
+                    'size': stat.st_size,
+                    'mtime': stat.st_mtime
+                }
+                ndownloaded += 1
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+            self._store_archives_state(state)
+
+        logger.debug("%s/%s archives downloaded; %s already up to date",
+                     ndownloaded, len(archives), len(synced) - ndownloaded)
+
+        return [(url, filepath) for url, _, filepath in archives if filepath in synced]
+
+    def _download_archive(self, url, params, filepath, headers=None):
+        raise NotImplementedError
+
+    def _find_archive_state(self, state, filepath):
+        """Get the state of an archive when its local copy did not change"""
+
+        entry = state.get(os.path.basename(filepath), None)
+
+        if not entry:
+            return None
+
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+
+        if stat.st_size != entry['size'] or stat.st_mtime != entry['mtime']:
+            return None
+
+        return entry
+
+    def _load_archives_state(self):
+        """Load the state of the downloaded archives"""
+
+        filepath = os.path.join(self.dirpath, self.ARCHIVES_STATE_FILE)
+
+        try:
+            with open(filepath, 'r') as fd:
+                return json.load(fd)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring state of the archives %s due to: %s", filepath, str(e))
+            return {}
+
+    def _store_archives_state(self, state):
+        """Store the state of the downloaded archives"""
+
+        filepath = os.path.join(self.dirpath, self.ARCHIVES_STATE_FILE)
+
+        try:
+            with open(filepath, 'w') as fd:
+                json.dump(state, fd, indent=4, sort_keys=True)
+        except OSError as e:
+            logger.warning("State of the archives not stored in %s due to: %s", filepath, str(e))
@@ -39,7 +39,7 @@ from ...backend import (Backend,
                         BackendCommandArgumentParser)
 from ...client import HttpClient
 from ...errors import BackendError
-from ...utils import DEFAULT_DATETIME
+from ...utils import DEFAULT_DATETIME, map_concurrently
 
 CATEGORY_PAGE = 'page'
 
@@ -75,16 +75,19 @@ class MediaWiki(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param fetch_workers: number of threads used to fetch the revisions
+        of the pages concurrently
     """
-    version = '1.0.0'
+    version = '1.1.0'
 
     CATEGORIES = [CATEGORY_PAGE]
 
-    def __init__(self, url, tag=None, archive=None, ssl_verify=True):
+    def __init__(self, url, tag=None, archive=None, ssl_verify=True, fetch_workers=None):
         origin = url
 
         super().__init__(origin, tag=tag, archive=archive, ssl_verify=ssl_verify)
         self.url = url
+        self.fetch_workers = fetch_workers
         self.client = None
 
     def fetch(self, category=CATEGORY_PAGE, from_date=DEFAULT_DATETIME, reviews_api=False):
@@ -217,36 +220,52 @@ class MediaWiki(Backend):
 
         npages = 0  # number of pages processed
         tpages = 0  # number of total pages
-        pages_done = []  # pages already retrieved in reviews API
 
         namespaces_contents = self.__get_namespaces_contents()
 
-        arvcontinue = ''  # pagination for getting revisions and their pages
-        while arvcontinue is not None:
-            raw_pages = self.client.get_pages_from_allrevisions(namespaces_contents, from_date, arvcontinue)
-            data_json = json.loads(raw_pages)
-            arvcontinue = data_json['continue']['arvcontinue'] if 'continue' in data_json else None
-            pages_json = data_json['query']['allrevisions']
-            for page in pages_json:
+        def fetch_pages():
+            pages_done = set()  # pages already retrieved in reviews API
 
-                if page['pageid'] in pages_done:
-                    logger.debug("Page %s already processed; skipped", page['pageid'])
-                    continue
+            arvcontinue = ''  # pagination for getting revisions and their pages
+            while arvcontinue is not None:
+                raw_pages = self.client.get_pages_from_allrevisions(namespaces_contents, from_date, arvcontinue)
+                data_json = json.loads(raw_pages)
+                arvcontinue = data_json['continue']['arvcontinue'] if 'continue' in data_json else None
+                pages_json = data_json['query']['allrevisions']
+                for page in pages_json:
 
-                tpages += 1
-                pages_done.append(page['pageid'])
-                page_reviews = self.__get_page_reviews(page)
+                    if page['pageid'] in pages_done:
+                        logger.debug("Page %s already processed; skipped", page['pageid'])
+                        continue
 
-                if not page_reviews:
-                    logger.warning("Revisions not found in %s [page id: %s], page skipped",
-                                   page['title'], page['pageid'])
-                    continue
+                    pages_done.add(page['pageid'])
+                    yield page
 
-                yield page_reviews
-                npages += 1
+        for page, page_reviews in self.__fetch_pages_reviews(fetch_pages()):
+            tpages += 1
+
+            if not page_reviews:
+                logger.warning("Revisions not found in %s [page id: %s], page skipped",
+                               page['title'], page['pageid'])
+                continue
+
+            yield page_reviews
+            npages += 1
 
         logger.info("Total number of pages: %i, skipped %i", tpages, tpages - npages)
 
+    def __fetch_pages_reviews(self, pages):
+        """Fetch the revisions of a stream of pages.
+
+        Revisions of different pages are requested concurrently
+        when `fetch_workers` is set. Pages are returned in the
+        same order together with their reviews.
+        """
+        def get_page_reviews(page):
+            return page, self.__get_page_reviews(page)
+
+        return map_concurrently(get_page_reviews, pages, workers=self.fetch_workers)
+
     def __get_page_reviews(self, page):
         revisions_raw = self.client.get_revisions(page['pageid'])
         page_reviews = self.__build_page_reviews(page, json.loads(revisions_raw))
@@ -261,11 +280,9 @@ class MediaWiki(Backend):
         :returns: a generator of pages
         """
 
-        def fetch_incremental_changes(namespaces_contents):
+        def fetch_recent_pages(namespaces_contents):
             # Use recent changes API to get the pages from date
-            npages = 0  # number of pages processed
-            tpages = 0  # number of total pages
-            pages_done = []  # pages already retrieved in reviews API
+            pages_done = set()  # pages already retrieved in reviews API
 
             rccontinue = ''
             hole_created = True  # To detect that incremental is not complete
@@ -301,26 +318,14 @@ class MediaWiki(Backend):
                         logger.debug("Page %s already processed; skipped", page['pageid'])
                         continue
 
-                    tpages += 1
-                    pages_done.append(page['pageid'])
-                    page_reviews = self.__get_page_reviews(page)
-
-                    if not page_reviews:
-                        logger.warning("Revisions not found in %s [page id: %s], page skipped",
-                                       page['title'], page['pageid'])
-                        continue
-
-                    yield page_reviews
-                    npages += 1
+                    pages_done.add(page['pageid'])
+                    yield page
             if hole_created:
                 logger.error("Incremental update NOT completed. Hole in history created.")
-            logger.info("Total number of pages: %i, skipped %i", tpages, tpages - npages)
 
         def fetch_all_pages(namespaces_contents):
             # Use get all pages API to get pages
-            npages = 0  # number of pages processed
-            tpages = 0  # number of total pages
-            pages_done = []  # pages already retrieved in reviews API
+            pages_done = set()  # pages already retrieved in reviews API
 
             for ns in namespaces_contents:
                 apcontinue = ''  # pagination for getting pages
@@ -343,17 +348,23 @@ class MediaWiki(Backend):
                             logger.debug("Page %s already processed; skipped", page['pageid'])
                             continue
 
-                        tpages += 1
-                        pages_done.append(page['pageid'])
-                        page_reviews = self.__get_page_reviews(page)
+                        pages_done.add(page['pageid'])
+                        yield page
 
-                        if not page_reviews:
-                            logger.warning("Revisions not found in %s [page id: %s], page skipped",
-                                           page['title'], page['pageid'])
-                            continue
+        def fetch_pages_reviews(pages):
+            npages = 0  # number of pages processed
+            tpages = 0  # number of total pages
+
+            for page, page_reviews in self.__fetch_pages_reviews(pages):
+                tpages += 1
+
+                if not page_reviews:
+                    logger.warning("Revisions not found in %s [page id: %s], page skipped",
+                                   page['title'], page['pageid'])
+                    continue
 
-                        yield page_reviews
-                        npages += 1
+                yield page_reviews
+                npages += 1
             logger.info("Total number of pages: %i, skipped %i", tpages, tpages - npages)
 
         logger.info("Looking for pages at url '%s'", self.url)
@@ -368,9 +379,9 @@ class MediaWiki(Backend):
         namespaces_contents = self.__get_namespaces_contents()
 
         if not from_date:
-            return fetch_all_pages(namespaces_contents)
+            return fetch_pages_reviews(fetch_all_pages(namespaces_contents))
         else:
-            return fetch_incremental_changes(namespaces_contents)
+            return fetch_pages_reviews(fetch_recent_pages(namespaces_contents))
 
     def __build_page_reviews(self, page, reviews):
         page['revisions'] = None
@@ -588,6 +599,9 @@ class MediaWikiCommand(BackendCommand):
         group = parser.parser.add_argument_group('MediaWiki arguments')
         group.add_argument('--reviews-api', action='store_true',
                            help="Use the experimental Reviews API in MediaWiki >= 1.27")
+        group.add_argument('--fetch-workers', dest='fetch_workers',
+                           type=int, default=None,
+                           help="Number of threads used to fetch data concurrently")
 
         # Required arguments
         parser.parser.add_argument('url',
@@ -24,9 +24,10 @@
 
 import json
 import logging
+import math
 import requests
 
-from grimoirelab_toolkit.datetime import datetime_to_utc
+from grimoirelab_toolkit.datetime import datetime_to_utc, datetime_utcnow
 from grimoirelab_toolkit.uris import urijoin
 
 from ...backend import (Backend,
@@ -71,8 +72,12 @@ class Meetup(Backend):
     :param sleep_time: time (in seconds) to sleep in case
         of connection problems
     :param ssl_verify: enable/disable SSL verification
+    :param rate_limit_db: path to the database where the rate limit
+        of the token is shared with other processes
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
     """
-    version = '1.0.0'
+    version = '1.2.0'
 
     CATEGORIES = [CATEGORY_EVENT]
     CLASSIFIED_FIELDS = [
@@ -89,7 +94,8 @@ class Meetup(Backend):
     def __init__(self, group, api_token,
                  max_items=MAX_ITEMS, tag=None, archive=None,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
-                 sleep_time=SLEEP_TIME, ssl_verify=True):
+                 sleep_time=SLEEP_TIME, ssl_verify=True, rate_limit_db=None,
+                 pace_requests=False):
         origin = MEETUP_URL
 
         super().__init__(origin, tag=tag, archive=archive, ssl_verify=ssl_verify)
@@ -99,6 +105,8 @@ class Meetup(Backend):
         self.sleep_for_rate = sleep_for_rate
         self.min_rate_to_sleep = min_rate_to_sleep
         self.sleep_time = sleep_time
+        self.rate_limit_db = rate_limit_db
+        self.pace_requests = pace_requests
 
         self.client = None
 
@@ -242,7 +250,9 @@ class Meetup(Backend):
 
         return MeetupClient(self.api_token, self.max_items,
                             self.sleep_for_rate, self.min_rate_to_sleep, self.sleep_time,
-                            self.archive, from_archive, self.ssl_verify)
+                            self.archive, from_archive, self.ssl_verify,
+                            rate_limit_db=self.rate_limit_db,
+                            pace_requests=self.pace_requests)
 
     def __fetch_and_parse_comments(self, event_id):
         logger.debug("Fetching and parsing comments from group '%s' event '%s'",
@@ -300,6 +310,11 @@ class MeetupCommand(BackendCommand):
         group.add_argument('--min-rate-to-sleep', dest='min_rate_to_sleep',
                            default=MIN_RATE_LIMIT, type=int,
                            help="sleep until reset when the rate limit reaches this value")
+        group.add_argument('--rate-limit-db', dest='rate_limit_db',
+                           help="database file to share the rate limit of the token among processes")
+        group.add_argument('--pace-requests', dest='pace_requests',
+                           action='store_true',
+                           help="spread requests over the time left to reset the rate limit")
         group.add_argument('--sleep-time', dest='sleep_time',
                            default=SLEEP_TIME, type=int,
                            help="minimun sleeping time to avoid too many request exception")
@@ -327,6 +342,10 @@ class MeetupClient(HttpClient, RateLimitHandler):
     :param archive: an archive to store/read fetched data
     :param from_archive: it tells whether to write/read the archive
     :param ssl_verify: enable/disable SSL verification
+    :param rate_limit_db: path to the database where the rate limit
+        of the token is shared with other processes
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
     """
     EXTRA_STATUS_FORCELIST = [429]
     RCOMMENTS = 'comments'
@@ -352,21 +371,36 @@ class MeetupClient(HttpClient, RateLimitHandler):
 
     def __init__(self, api_token, max_items=MAX_ITEMS,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT, sleep_time=SLEEP_TIME,
-                 archive=None, from_archive=False, ssl_verify=True):
+                 archive=None, from_archive=False, ssl_verify=True, rate_limit_db=None,
+                 pace_requests=False):
         self.api_token = api_token
         self.max_items = max_items
 
         super().__init__(MEETUP_API_URL, sleep_time=sleep_time,
                          extra_status_forcelist=self.EXTRA_STATUS_FORCELIST,
                          archive=archive, from_archive=from_archive, ssl_verify=ssl_verify)
-        super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate, min_rate_to_sleep=min_rate_to_sleep)
+        super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate, min_rate_to_sleep=min_rate_to_sleep,
+                                         rate_limit_db=rate_limit_db,
+                                         rate_limit_key=self.make_rate_limit_key(MEETUP_API_URL, api_token or ''),
+                                         pace_requests=pace_requests)
 
     def calculate_time_to_reset(self):
-        """Number of seconds to wait. They are contained in the rate limit reset header"""
+        """Number of seconds to wait before the rate limit is reset"""
 
-        time_to_reset = 0 if self.rate_limit_reset_ts < 0 else self.rate_limit_reset_ts
+        time_to_reset = self.rate_limit_reset_ts - datetime_utcnow().timestamp()
+        time_to_reset = 0 if time_to_reset < 0 else time_to_reset
         return time_to_reset
 
+    def parse_rate_limit_reset(self, value):
+        """Convert the seconds to reset sent by Meetup into an epoch.
+
+        The reset header contains the number of seconds left to reset
+        the rate limit. It is converted into an absolute time, rounded
+        up, so it can be compared among responses and shared among
+        processes.
+        """
+        return math.ceil(datetime_utcnow().timestamp()) + int(value)
+
     def events(self, group, from_date=DEFAULT_DATETIME):
         """Fetch the events pages of a given group."""
 
@@ -39,6 +39,7 @@ CATEGORY_TASK = "task"
 
 DEFAULT_SLEEP_TIME = 1
 MAX_RETRIES = 5
+MAX_PHIDS = 100  # Maximum number of PHIDs per query
 
 logger = logging.getLogger(__name__)
 
@@ -62,7 +63,7 @@ class Phabricator(Backend):
     :param ssl_verify: enable/disable SSL verification
     :param blacklist_ids: exclude the ids while fetching
     """
-    version = '1.0.0'
+    version = '1.1.0'
 
     CATEGORIES = [CATEGORY_TASK]
     ORIGIN_UNIQUE_FIELD = OriginUniqueField(name='id', type=int)
@@ -254,6 +255,11 @@ class Phabricator(Backend):
             tasks_ids = [t['id'] for t in tasks]
             tasks_trans = self.__fetch_and_parse_tasks_transactions(*tasks_ids)
 
+            # Users and projects of the whole page are fetched
+            # in batches before resolving them
+            self.__prefetch_phids(tasks, tasks_trans)
+            self.__resolve_tasks_transactions(tasks_trans)
+
             for task in tasks:
                 # Task check point
 
@@ -318,6 +324,87 @@ class Phabricator(Backend):
         raw_json = self.client.transactions(*tasks_ids)
         tasks_trans = self.parse_tasks_transactions(raw_json)
 
+        return tasks_trans
+
+    def __prefetch_phids(self, tasks, tasks_trans):
+        """Fetch the users and projects not found on the cache.
+
+        The PHIDs referenced by the tasks and their transactions
+        are collected and requested using as few queries as
+        possible. The results are stored on the cache, so they
+        are available when the tasks are resolved.
+        """
+        users_ids = set()
+        projects_ids = set()
+
+        for task in tasks:
+            users_ids.add(task['fields']['authorPHID'])
+
+            if task['fields']['ownerPHID']:
+                users_ids.add(task['fields']['ownerPHID'])
+
+            projects_ids.update(task['attachments']['projects']['projectPHIDs'])
+
+        for trans in tasks_trans.values():
+            for tt in trans:
+                users_ids.add(tt['authorPHID'])
+
+                for value in (tt['newValue'], tt['oldValue']):
+                    if not value:
+                        continue
+
+                    if tt['transactionType'] == 'reassign':
+                        users_ids.add(value)
+                    elif tt['transactionType'] == 'core:columns':
+                        projects_ids.update(e['boardPHID'] for e in value)
+                    elif tt['transactionType'] == 'core:subscribers':
+                        for e in value:
+                            if not e:
+                                continue
+                            elif e.startswith('PHID-PROJ'):
+                                projects_ids.add(e)
+                            elif e.startswith('PHID-USER'):
+                                users_ids.add(e)
+                    elif tt['transactionType'] in ['core:edit-policy', 'core:view-policy']:
+                        if value.startswith('PHID-PROJ'):
+                            projects_ids.add(value)
+                    elif tt['transactionType'] == 'core:edge':
+                        if isinstance(value, dict):
+                            value = [content['dst'] for content in value.values()
+                                     if 'dst' in content and content['dst']]
+                        if isinstance(value, list):
+                            projects_ids.update(e for e in value if e.startswith('PHID-PROJ'))
+
+        users_ids = [phid for phid in users_ids if phid not in self._users]
+        projects_ids = [phid for phid in projects_ids if phid not in self._projects]
+
+        real_users_ids = sorted(phid for phid in users_ids if phid.startswith('PHID-USER-'))
+        other_ids = sorted(set(projects_ids).union(phid for phid in users_ids
+                                                   if not phid.startswith('PHID-USER-')))
+
+        users = {}
+        for i in range(0, len(real_users_ids), MAX_PHIDS):
+            for user in self.__fetch_and_parse_users(*real_users_ids[i:i + MAX_PHIDS]):
+                users[user['phid']] = user
+
+        phids = {}
+        for i in range(0, len(other_ids), MAX_PHIDS):
+            for phid in self.__fetch_and_parse_phids(*other_ids[i:i + MAX_PHIDS]):
+                phids[phid['phid']] = phid
+
+        for user_id in users_ids:
+            user = users.get(user_id, None) or phids.get(user_id, None)
+
+            if user is None:
+                logger.warning("User %s not found on the server. Setting empty data",
+                               user_id)
+
+            self._users[user_id] = user
+
+        for project_id in projects_ids:
+            self._projects[project_id] = phids.get(project_id, None)
+
+    def __resolve_tasks_transactions(self, tasks_trans):
         for trans in tasks_trans.values():
             for tt in trans:
                 author_id = tt['authorPHID']
@@ -344,8 +431,6 @@ class Phabricator(Backend):
                     tt['oldValue_data'] = self.__resolve_project_ids(tt['oldValue'])
                     tt['newValue_data'] = self.__resolve_project_ids(tt['newValue'])
 
-        return tasks_trans
-
     def __resolve_reassign_id(self, value):
         if not value:
             return value
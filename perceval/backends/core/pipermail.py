@@ -66,14 +66,20 @@ class Pipermail(MBox):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param parse_workers: number of processes used to parse the mbox files
+    :param mbox_index: path to the file where the messages of the mboxes are indexed
+    :param download_workers: number of threads used to download the mbox files
     """
-    version = '1.0.0'
+    version = '1.3.0'
 
     CATEGORIES = [CATEGORY_MESSAGE]
 
-    def __init__(self, url, dirpath, tag=None, archive=None, ssl_verify=True):
-        super().__init__(url, dirpath, tag=tag, archive=archive, ssl_verify=ssl_verify)
+    def __init__(self, url, dirpath, tag=None, archive=None, ssl_verify=True,
+                 parse_workers=None, mbox_index=None, download_workers=None):
+        super().__init__(url, dirpath, tag=tag, archive=archive, ssl_verify=ssl_verify,
+                         parse_workers=parse_workers, mbox_index=mbox_index)
         self.url = url
+        self.download_workers = download_workers
 
     def fetch(self, category=CATEGORY_MESSAGE, from_date=DEFAULT_DATETIME):
         """Fetch the messages from the Pipermail archiver.
@@ -103,7 +109,8 @@ class Pipermail(MBox):
         logger.info("Looking for messages from '%s' since %s",
                     self.url, str(from_date))
 
-        mailing_list = PipermailList(self.url, self.dirpath, self.ssl_verify)
+        mailing_list = PipermailList(self.url, self.dirpath, self.ssl_verify,
+                                     download_workers=self.download_workers)
         mailing_list.fetch(from_date=from_date)
 
         messages = self._fetch_and_parse_messages(mailing_list, from_date)
@@ -158,6 +165,12 @@ class PipermailCommand(BackendCommand):
         group = parser.parser.add_argument_group('Pipermail arguments')
         group.add_argument('--mboxes-path', dest='mboxes_path',
                            help="Path where mbox files will be stored")
+        group.add_argument('--parse-workers', dest='parse_workers', type=int,
+                           help="number of processes used to parse the mbox files")
+        group.add_argument('--mbox-index', dest='mbox_index',
+                           help="file where the position and date of the messages are indexed")
+        group.add_argument('--download-workers', dest='download_workers', type=int,
+                           help="number of threads used to download the mbox files")
 
         # Required arguments
         parser.parser.add_argument('url',
@@ -176,11 +189,13 @@ class PipermailList(MailingList):
     :param url: URL to the Pipermail archiver for this list
     :param dirpath: path to the local mboxes archives
     :param ssl_verify: enable/disable SSL verification
+    :param download_workers: number of threads used to download the archives
     """
-    def __init__(self, url, dirpath, ssl_verify=True):
+    def __init__(self, url, dirpath, ssl_verify=True, download_workers=None):
         super().__init__(url, dirpath)
         self.url = url
         self.ssl_verify = ssl_verify
+        self.download_workers = download_workers
 
     def fetch(self, from_date=DEFAULT_DATETIME):
         """Fetch the mbox files from the remote archiver.
@@ -194,6 +209,9 @@ class PipermailList(MailingList):
         property is called, it will return the mboxes which their year
         and month are equal or after that date.
 
+        Archives that did not change since the last time they were
+        downloaded are not downloaded again.
+
         :param from_date: fetch archives that store messages
             equal or after the given date; only year and month values
             are compared
@@ -212,7 +230,7 @@ class PipermailList(MailingList):
 
         links = self._parse_archive_links(r.text)
 
-        fetched = []
+        archives = []
 
         if not os.path.exists(self.dirpath):
             os.makedirs(self.dirpath)
@@ -227,12 +245,11 @@ class PipermailList(MailingList):
                 from_date < mbox_dt):
 
                 filepath = os.path.join(self.dirpath, filename)
-                success = self._download_archive(link, filepath)
+                archives.append((link, None, filepath))
 
-                if success:
-                    fetched.append((link, filepath))
+        fetched = self._download_archives(archives, workers=self.download_workers)
 
-        logger.info("%s/%s MBoxes downloaded", len(fetched), len(links))
+        logger.info("%s/%s MBoxes fetched", len(fetched), len(links))
 
         return fetched
 
@@ -297,24 +314,29 @@ class PipermailList(MailingList):
 
         return dt
 
-    def _download_archive(self, url, filepath):
+    def _download_archive(self, url, params, filepath, headers=None):
         try:
-            r = requests.get(url, stream=True, verify=self.ssl_verify)
+            r = requests.get(url, params=params, headers=headers,
+                             stream=True, verify=self.ssl_verify)
             r.raise_for_status()
+
+            if r.status_code == 304:
+                return r
+
             self._write_archive(r, filepath)
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 403:
                 logger.warning("Ignoring %s archive due to: %s", url, str(e))
-                return False
+                return None
             else:
                 raise e
         except OSError as e:
             logger.warning("Ignoring %s archive due to: %s", url, str(e))
-            return False
+            return None
 
         logger.debug("%s archive downloaded and stored in %s", url, filepath)
 
-        return True
+        return r
 
     @staticmethod
     def _write_archive(r, filepath):
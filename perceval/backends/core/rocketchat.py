@@ -61,8 +61,10 @@ class RocketChat(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
     """
-    version = '1.0.0'
+    version = '1.1.0'
 
     CATEGORIES = [CATEGORY_MESSAGE]
     EXTRA_SEARCH_FIELDS = {
@@ -72,7 +74,7 @@ class RocketChat(Backend):
 
     def __init__(self, url, channel, user_id, api_token, max_items=MAX_ITEMS,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
-                 tag=None, archive=None, ssl_verify=True):
+                 tag=None, archive=None, ssl_verify=True, pace_requests=False):
         origin = urijoin(url, channel)
 
         super().__init__(origin, tag=tag, archive=archive, ssl_verify=ssl_verify)
@@ -84,6 +86,7 @@ class RocketChat(Backend):
         self.max_items = max_items
         self.sleep_for_rate = sleep_for_rate
         self.min_rate_to_sleep = min_rate_to_sleep
+        self.pace_requests = pace_requests
         self.client = None
 
     def fetch(self, category=CATEGORY_MESSAGE, from_date=DEFAULT_DATETIME, filter_classified=False):
@@ -223,7 +226,8 @@ class RocketChat(Backend):
 
         return RocketChatClient(self.url, self.user_id, self.api_token,
                                 self.max_items, self.sleep_for_rate,
-                                self.min_rate_to_sleep, from_archive, self.archive, self.ssl_verify)
+                                self.min_rate_to_sleep, from_archive, self.archive, self.ssl_verify,
+                                pace_requests=self.pace_requests)
 
 
 class RocketChatClient(HttpClient, RateLimitHandler):
@@ -242,6 +246,8 @@ class RocketChatClient(HttpClient, RateLimitHandler):
     :param from_archive: it tells whether to write/read the archive
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
     """
     RCHANNEL_MESSAGES = 'channels.messages'
     RCHANNEL_INFO = 'channels.info'
@@ -255,7 +261,7 @@ class RocketChatClient(HttpClient, RateLimitHandler):
 
     def __init__(self, url, user_id, api_token, max_items=MAX_ITEMS,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
-                 from_archive=False, archive=None, ssl_verify=True):
+                 from_archive=False, archive=None, ssl_verify=True, pace_requests=False):
 
         base_url = urijoin(url, API_EXTENSION)
         self.user_id = user_id
@@ -264,7 +270,8 @@ class RocketChatClient(HttpClient, RateLimitHandler):
 
         super().__init__(base_url, archive=archive, from_archive=from_archive,
                          ssl_verify=ssl_verify)
-        super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate, min_rate_to_sleep=min_rate_to_sleep)
+        super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate, min_rate_to_sleep=min_rate_to_sleep,
+                                         pace_requests=pace_requests)
 
     def calculate_time_to_reset(self):
         """Number of seconds to wait. They are contained in the rate limit reset header."""
@@ -400,5 +407,8 @@ class RocketChatCommand(BackendCommand):
         group.add_argument('--min-rate-to-sleep', dest='min_rate_to_sleep',
                            default=MIN_RATE_LIMIT, type=int,
                            help="sleep until reset when the rate limit reaches this value")
+        group.add_argument('--pace-requests', dest='pace_requests',
+                           action='store_true',
+                           help="spread requests over the time left to reset the rate limit")
 
         return parser
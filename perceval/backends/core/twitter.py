@@ -74,15 +74,17 @@ class Twitter(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
     """
-    version = '1.0.0'
+    version = '1.1.0'
 
     CATEGORIES = [CATEGORY_TWEET]
 
     def __init__(self, query, api_token, max_items=MAX_ITEMS,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
                  sleep_time=SLEEP_TIME,
-                 tag=None, archive=None, ssl_verify=True):
+                 tag=None, archive=None, ssl_verify=True, pace_requests=False):
         origin = TWITTER_URL
 
         if len(query) >= MAX_SEARCH_QUERY:
@@ -96,6 +98,7 @@ class Twitter(Backend):
         self.sleep_for_rate = sleep_for_rate
         self.min_rate_to_sleep = min_rate_to_sleep
         self.sleep_time = sleep_time
+        self.pace_requests = pace_requests
 
         self.client = None
 
@@ -238,7 +241,8 @@ class Twitter(Backend):
 
         return TwitterClient(self.api_token, self.max_items,
                              self.sleep_for_rate, self.min_rate_to_sleep, self.sleep_time,
-                             self.archive, from_archive, self.ssl_verify)
+                             self.archive, from_archive, self.ssl_verify,
+                             pace_requests=self.pace_requests)
 
 
 class TwitterClient(HttpClient, RateLimitHandler):
@@ -257,6 +261,8 @@ class TwitterClient(HttpClient, RateLimitHandler):
     :param archive: an archive to store/read fetched data
     :param from_archive: it tells whether to write/read the archive
     :param ssl_verify: enable/disable SSL verification
+    :param pace_requests: spread the requests over the time left
+        to reset the rate limit
     """
     # API headers
     HAUTHORIZATION = 'Authorization'
@@ -273,7 +279,8 @@ class TwitterClient(HttpClient, RateLimitHandler):
 
     def __init__(self, api_key, max_items=MAX_ITEMS,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT, sleep_time=SLEEP_TIME,
-                 archive=None, from_archive=False, ssl_verify=True):
+                 archive=None, from_archive=False, ssl_verify=True,
+                 pace_requests=False):
         self.api_key = api_key
         self.max_items = max_items
 
@@ -281,7 +288,8 @@ class TwitterClient(HttpClient, RateLimitHandler):
                          archive=archive, from_archive=from_archive, ssl_verify=ssl_verify)
         super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate, min_rate_to_sleep=min_rate_to_sleep,
                                          rate_limit_header=RATE_LIMIT_HEADER,
-                                         rate_limit_reset_header=RATE_LIMIT_RESET_HEADER)
+                                         rate_limit_reset_header=RATE_LIMIT_RESET_HEADER,
+                                         pace_requests=pace_requests)
 
     def calculate_time_to_reset(self):
         """Number of seconds to wait. They are contained in the rate limit reset header"""
@@ -412,6 +420,9 @@ class TwitterCommand(BackendCommand):
         group.add_argument('--min-rate-to-sleep', dest='min_rate_to_sleep',
                            default=MIN_RATE_LIMIT, type=int,
                            help="sleep until reset when the rate limit reaches this value")
+        group.add_argument('--pace-requests', dest='pace_requests',
+                           action='store_true',
+                           help="spread requests over the time left to reset the rate limit")
         group.add_argument('--sleep-time', dest='sleep_time',
                            default=SLEEP_TIME, type=int,
                            help="minimun sleeping time to avoid too many request exception")
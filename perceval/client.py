@@ -20,13 +20,17 @@
 #     Santiago Dueñas <sduenas@bitergia.com>
 #
 
+import copy
+import hashlib
 import logging
+import sqlite3
+import threading
 import time
 
 import requests
 import urllib3.util
 
-from .errors import RateLimitError
+from .errors import ArchiveError, HttpClientError, RateLimitError
 from ._version import __version__
 
 logger = logging.getLogger(__name__)
@@ -139,6 +143,8 @@ class HttpClient:
         """
         if self.from_archive:
             response = self._fetch_from_archive(url, payload, headers)
+        elif self.archive and self.archive.resumed:
+            response = self._fetch_from_resumed_archive(url, payload, headers, method, stream, auth)
         else:
             response = self._fetch_from_remote(url, payload, headers, method, stream, auth)
 
@@ -168,6 +174,29 @@ class HttpClient:
 
         return response
 
+    def _fetch_from_resumed_archive(self, url, payload, headers, method, stream, auth):
+        """Replay a response from an interrupted archive or fetch it from remote.
+
+        Errors stored in the archive are not replayed; the request
+        is sent again instead. Replayed responses are flagged with
+        the `replayed` attribute, so their headers are not taken
+        as the current state of the server (e.g., rate limits).
+        """
+        a_url, a_headers, a_payload = self.sanitize_for_archive(url,
+                                                                copy.deepcopy(headers),
+                                                                copy.deepcopy(payload))
+        try:
+            response = self.archive.retrieve(a_url, a_payload, a_headers)
+        except ArchiveError:
+            response = None
+
+        if isinstance(response, requests.Response):
+            response.replayed = True
+        else:
+            response = self._fetch_from_remote(url, payload, headers, method, stream, auth)
+
+        return response
+
     def _fetch_from_remote(self, url, payload, headers, method, stream, auth):
 
         if method == self.GET:
@@ -220,30 +249,184 @@ class HttpClient:
             self.session.keep_alive = False
 
 
+class RateLimitSharedState:
+    """Rate limit state shared among several processes.
+
+    This class stores the remaining rate limit and the reset time
+    of a set of keys (e.g., API tokens) in a SQLite database. Several
+    processes using the same tokens can share the database file to
+    consume the rate limit collectively. Every access is done within
+    an exclusive transaction, so the file lock provided by SQLite
+    coordinates the processes.
+
+    Reset values must be absolute (e.g., epoch timestamps) so they
+    can be compared among responses. Values that differ up to
+    `RESET_TOLERANCE` are considered to belong to the same window,
+    to absorb the rounding of resets computed from relative values.
+
+    :param db_path: path to the SQLite database file
+    :param timeout: seconds to wait for the database lock
+
+    :raises HttpClientError: when the database cannot be initialized
+    """
+    RATE_LIMIT_TABLE = "rate_limit"
+    RESET_TOLERANCE = 1
+
+    RATE_LIMIT_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + RATE_LIMIT_TABLE + " ( " \
+                             "key VARCHAR(256) PRIMARY KEY, " \
+                             "remaining INTEGER NOT NULL, " \
+                             "reset_ts INTEGER NOT NULL)"
+
+    DEFAULT_TIMEOUT = 60
+
+    def __init__(self, db_path, timeout=DEFAULT_TIMEOUT):
+        self.db_path = db_path
+
+        try:
+            self._db = sqlite3.connect(self.db_path, timeout=timeout,
+                                       isolation_level=None)
+            self._db.execute(self.RATE_LIMIT_CREATE_STMT)
+        except sqlite3.DatabaseError as e:
+            msg = "rate limit state %s initialization error; cause: %s" % (db_path, str(e))
+            raise HttpClientError(cause=msg)
+
+    def __del__(self):
+        conn = getattr(self, '_db', None)
+        if conn:
+            conn.close()
+
+    def update(self, key, remaining, reset_ts):
+        """Update the rate limit of a key with the values sent by the server.
+
+        When the reset time is the same that the stored one, the lowest
+        remaining value is kept because other processes might have consumed
+        part of the rate limit in the meantime. Otherwise, a new rate limit
+        window started and the given values replace the stored ones.
+
+        :param key: identifier of the rate limit (e.g., a hashed token)
+        :param remaining: remaining rate limit sent by the server
+        :param reset_ts: rate limit reset value sent by the server
+
+        :returns: a tuple with the shared remaining rate limit and
+            reset value
+
+        :raises HttpClientError: when an error occurs accessing the database
+        """
+        def _update(cursor):
+            row = self._select(cursor, key)
+
+            if row and abs(row[1] - reset_ts) <= self.RESET_TOLERANCE:
+                rate = (min(row[0], remaining), row[1])
+            else:
+                rate = (remaining, reset_ts)
+
+            self._upsert(cursor, key, *rate)
+            return rate
+
+        return self._transaction(_update)
+
+    def acquire(self, key):
+        """Consume one request from the shared rate limit of a key.
+
+        :param key: identifier of the rate limit (e.g., a hashed token)
+
+        :returns: a tuple with the remaining rate limit and reset value
+            before consuming the request; `None` when the key was never
+            updated
+
+        :raises HttpClientError: when an error occurs accessing the database
+        """
+        def _acquire(cursor):
+            row = self._select(cursor, key)
+
+            if not row:
+                return None
+
+            self._upsert(cursor, key, row[0] - 1, row[1])
+            return row[0], row[1]
+
+        return self._transaction(_acquire)
+
+    def _transaction(self, func):
+        cursor = self._db.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            result = func(cursor)
+            cursor.execute("COMMIT")
+        except sqlite3.DatabaseError as e:
+            if self._db.in_transaction:
+                cursor.execute("ROLLBACK")
+            msg = "rate limit state %s access error; cause: %s" % (self.db_path, str(e))
+            raise HttpClientError(cause=msg)
+        finally:
+            cursor.close()
+
+        return result
+
+    def _select(self, cursor, key):
+        select_stmt = "SELECT remaining, reset_ts " \
+                      "FROM " + self.RATE_LIMIT_TABLE + " " \
+                      "WHERE key = ?"
+        cursor.execute(select_stmt, (key,))
+        return cursor.fetchone()
+
+    def _upsert(self, cursor, key, remaining, reset_ts):
+        insert_stmt = "INSERT OR REPLACE INTO " + self.RATE_LIMIT_TABLE + " " \
+                      "(key, remaining, reset_ts) VALUES (?, ?, ?)"
+        cursor.execute(insert_stmt, (key, remaining, reset_ts))
+
+
 class RateLimitHandler:
     """Class to handle rate limit for HTTP clients.
 
+    When `rate_limit_db` is set, the rate limit is shared with any other
+    process using the same database file and rate limit key, so
+    concurrent clients pace themselves collectively.
+
+    By default, requests are sent as fast as possible until the rate
+    limit reaches `min_rate_to_sleep`. When `pace_requests` is set,
+    requests are spaced out to spread the remaining rate limit over
+    the time left to its reset. Responses that were retried because
+    of a 429 status or that include a `Retry-After` header increase
+    that delay, which decreases again while responses are successful.
+
+    The rate limit and pacing state is guarded by a lock, so the same
+    client can be used by several threads.
+
     :param sleep_for_rate: sleep until rate limit is reset
     :param min_rate_to_sleep: minimun rate needed to sleep until it will be rese
     :param rate_limit_header: header to know the current rate limit
     :param rate_limit_reset_header: header to know the next rate limit reset
+    :param rate_limit_db: path to the database shared among processes
+    :param rate_limit_key: identifier of the shared rate limit
+    :param pace_requests: spread the requests over the time to reset
     """
-    version = '0.2'
+    version = '0.4'
 
     MIN_RATE_LIMIT = 10
     MAX_RATE_LIMIT = 500
+    MAX_PACING_BACKOFF = 300
     RATE_LIMIT_HEADER = "X-RateLimit-Remaining"
     RATE_LIMIT_RESET_HEADER = "X-RateLimit-Reset"
 
     def setup_rate_limit_handler(self, sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
                                  rate_limit_header=RATE_LIMIT_HEADER,
-                                 rate_limit_reset_header=RATE_LIMIT_RESET_HEADER):
+                                 rate_limit_reset_header=RATE_LIMIT_RESET_HEADER,
+                                 rate_limit_db=None, rate_limit_key=None,
+                                 pace_requests=False):
         """Setup the rate limit handler.
 
         :param sleep_for_rate: sleep until rate limit is reset
         :param min_rate_to_sleep: minimun rate needed to make the fecthing process sleep
         :param rate_limit_header: header from where extract the rate limit data
         :param rate_limit_reset_header: header from where extract the rate limit reset data
+        :param rate_limit_db: path to the database where the rate limit is shared
+            among processes; when `None`, the rate limit is not shared
+        :param rate_limit_key: identifier of the shared rate limit; when `None`,
+            the base URL of the client is used
+        :param pace_requests: spread the requests over the time left to reset
+            the rate limit instead of sleeping when it is exhausted
         """
         self.rate_limit = None
         self.rate_limit_reset_ts = None
@@ -251,6 +434,20 @@ class RateLimitHandler:
         self.rate_limit_header = rate_limit_header
         self.rate_limit_reset_header = rate_limit_reset_header
 
+        if rate_limit_db:
+            self.rate_limit_state = RateLimitSharedState(rate_limit_db)
+        else:
+            self.rate_limit_state = None
+
+        if not rate_limit_key:
+            rate_limit_key = self.make_rate_limit_key(getattr(self, 'base_url', None) or '')
+        self.rate_limit_key = rate_limit_key
+
+        self.pace_requests = pace_requests
+        self.pacing_backoff = 0
+        self._last_request_ts = None
+        self._rate_limit_lock = threading.Lock()
+
         if min_rate_to_sleep > self.MAX_RATE_LIMIT:
             msg = "Minimum rate to sleep value exceeded (%d)."
             msg += "High values might cause the client to sleep forever."
@@ -263,9 +460,23 @@ class RateLimitHandler:
     def sleep_for_rate_limit(self):
         """The fetching process sleeps until the rate limit is restored or
            raises a RateLimitError exception if sleep_for_rate flag is disabled.
+
+           When pacing is enabled and the rate limit is not exhausted, the
+           process sleeps the time needed to spread the remaining requests
+           until the rate limit is reset.
         """
-        if self.rate_limit is not None and self.rate_limit <= self.min_rate_to_sleep:
-            seconds_to_reset = self.calculate_time_to_reset()
+        with self._rate_limit_lock:
+            shared = self._acquire_shared_rate_limit()
+            exhausted = self.rate_limit is not None and self.rate_limit <= self.min_rate_to_sleep
+
+            if exhausted:
+                seconds_to_reset = self.calculate_time_to_reset()
+
+        if exhausted:
+            if shared and seconds_to_reset <= 0:
+                # The shared rate limit window is over; the next
+                # response will update it for everyone
+                return
 
             if seconds_to_reset < 0:
                 logger.warning("Value of sleep for rate limit is negative, reset it to 0")
@@ -277,18 +488,46 @@ class RateLimitHandler:
                 time.sleep(seconds_to_reset)
             else:
                 raise RateLimitError(cause=cause, seconds_to_reset=seconds_to_reset)
+        elif self.pace_requests:
+            self._pace_request()
 
     def calculate_time_to_reset(self):
         """Calculate the seconds to reset the token requests."""
 
         raise NotImplementedError
 
+    def parse_rate_limit_reset(self, value):
+        """Convert the value of the rate limit reset header.
+
+        By default, the value is an absolute time (e.g., an epoch
+        timestamp) and it is returned as an integer. Clients whose
+        servers send relative values, like the seconds left to reset,
+        must override this method to return an absolute time, so it
+        can be compared among responses and shared among processes.
+
+        :param value: value of the rate limit reset header
+        """
+        return int(value)
+
     def update_rate_limit(self, response):
         """Update the rate limit and the time to reset
         from the response headers.
 
+        Responses replayed from a resumed archive are ignored
+        because their headers are outdated.
+
         :param: response: the response object
         """
+        if getattr(response, 'replayed', False):
+            logger.debug("Rate limit not updated; response replayed from the archive")
+            return
+
+        with self._rate_limit_lock:
+            self._update_rate_limit(response)
+
+    def _update_rate_limit(self, response):
+        """Update the rate limit; the caller must hold the lock"""
+
         if self.rate_limit_header in response.headers:
             self.rate_limit = int(response.headers[self.rate_limit_header])
             logger.debug("Rate limit: %s", self.rate_limit)
@@ -296,7 +535,129 @@ class RateLimitHandler:
             self.rate_limit = None
 
         if self.rate_limit_reset_header in response.headers:
-            self.rate_limit_reset_ts = int(response.headers[self.rate_limit_reset_header])
+            reset = response.headers[self.rate_limit_reset_header]
+            self.rate_limit_reset_ts = self.parse_rate_limit_reset(reset)
             logger.debug("Rate limit reset: %s", self.calculate_time_to_reset())
         else:
             self.rate_limit_reset_ts = None
+
+        if self.rate_limit_state and self.rate_limit is not None \
+                and self.rate_limit_reset_ts is not None:
+            self.rate_limit, self.rate_limit_reset_ts = \
+                self.rate_limit_state.update(self.rate_limit_key,
+                                             self.rate_limit,
+                                             self.rate_limit_reset_ts)
+            logger.debug("Shared rate limit: %s", self.rate_limit)
+
+        if self.pace_requests:
+            self._update_pacing_backoff(response)
+
+    def calculate_pacing_delay(self):
+        """Calculate the seconds to wait between two requests.
+
+        The remaining rate limit, excluding the requests reserved
+        by `min_rate_to_sleep`, is spread over the time left to
+        reset it. The backoff delay set by throttled responses is
+        added to that value.
+
+        :returns: number of seconds to wait between requests
+        """
+        delay = 0
+
+        if self.rate_limit is not None and self.rate_limit_reset_ts is not None:
+            seconds_to_reset = max(self.calculate_time_to_reset(), 0)
+            available = max(self.rate_limit - self.min_rate_to_sleep, 1)
+            delay = seconds_to_reset / available
+
+        return delay + self.pacing_backoff
+
+    def _pace_request(self):
+        """Sleep the time left to the next paced request.
+
+        The time of the request is reserved before sleeping, so
+        concurrent threads wait for consecutive slots.
+        """
+        with self._rate_limit_lock:
+            now = time.monotonic()
+            delay = self.calculate_pacing_delay()
+
+            if self._last_request_ts is not None:
+                request_ts = max(now, self._last_request_ts + delay)
+            else:
+                request_ts = now + delay
+
+            self._last_request_ts = request_ts
+
+        delay = request_ts - now
+
+        if delay > 0:
+            logger.debug("Pacing requests. Waiting %.2f secs for the next one.", delay)
+            time.sleep(delay)
+
+    def _update_pacing_backoff(self, response):
+        """Increase or decrease the pacing backoff delay.
+
+        The delay is increased when the server throttled the request,
+        either because it was retried after a 429 status or because
+        the response asks to wait using the `Retry-After` header.
+        Otherwise, the delay is halved until it vanishes.
+
+        :param response: the response object
+        """
+        throttled = False
+        retry_after = response.headers.get('Retry-After', None)
+
+        if retry_after is not None:
+            throttled = True
+            try:
+                retry_after = urllib3.util.Retry().parse_retry_after(retry_after)
+            except urllib3.exceptions.InvalidHeader:
+                retry_after = None
+
+        raw = getattr(response, 'raw', None)
+        retries = getattr(raw, 'retries', None)
+
+        if isinstance(retries, urllib3.util.Retry):
+            throttled = throttled or any(entry.status == 429 for entry in retries.history)
+
+        if throttled:
+            backoff = max(self.pacing_backoff * 2, retry_after or 1)
+            self.pacing_backoff = min(backoff, self.MAX_PACING_BACKOFF)
+            logger.debug("Request throttled; pacing backoff set to %s secs", self.pacing_backoff)
+        elif self.pacing_backoff:
+            backoff = self.pacing_backoff / 2
+            self.pacing_backoff = backoff if backoff >= 1 else 0
+
+    @staticmethod
+    def make_rate_limit_key(*args):
+        """Generate a shared rate limit key from the given values.
+
+        Values like API tokens are hashed, so they are not stored
+        in plain text in the shared database.
+
+        :param args: values that identify a rate limit
+
+        :returns: a SHA1 hash code
+        """
+        content = ':'.join(args)
+        hashcode = hashlib.sha1(content.encode('utf-8'))
+        return hashcode.hexdigest()
+
+    def _acquire_shared_rate_limit(self):
+        """Consume a request from the shared rate limit, if any.
+
+        :returns: `True` when the rate limit data was taken from the
+            shared state; `False` otherwise
+        """
+        if not self.rate_limit_state:
+            return False
+
+        rate = self.rate_limit_state.acquire(self.rate_limit_key)
+
+        if rate is None:
+            return False
+
+        self.rate_limit, self.rate_limit_reset_ts = rate
+        logger.debug("Shared rate limit: %s", self.rate_limit)
+
+        return True
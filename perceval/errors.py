@@ -50,6 +50,12 @@ class ArchiveManagerError(BaseError):
     message = "%(cause)s"
 
 
+class ItemsIndexError(BaseError):
+    """Generic error for items indexes"""
+
+    message = "%(cause)s"
+
+
 class BackendError(BaseError):
     """Generic error for backends"""
 
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import contextlib
+import hashlib
+import json
+import logging
+import sqlite3
+
+from .errors import ItemsIndexError
+
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteIndex:
+    """Base class for the indexes stored in SQLite files.
+
+    The file will be created if it does not exist and the statements
+    of `CREATE_STMTS` are run to set up its tables. Subclasses define
+    these statements, the name of the index used in the error messages
+    (`INDEX_NAME`) and the exception raised on errors (`ERROR`).
+
+    :param index_path: path where the index is stored
+    :param timeout: seconds to wait for the database lock
+
+    :raises ItemsIndexError: when the index is not valid; subclasses
+        raise the exception set in `ERROR`
+    """
+    INDEX_NAME = "index"
+    CREATE_STMTS = []
+    ERROR = ItemsIndexError
+
+    def __init__(self, index_path, timeout=60):
+        self.index_path = index_path
+
+        try:
+            self._db = sqlite3.connect(self.index_path, timeout=timeout)
+            for stmt in self.CREATE_STMTS:
+                self._db.execute(stmt)
+            self._db.commit()
+        except sqlite3.DatabaseError as e:
+            msg = "invalid %s %s; cause: %s" % (self.INDEX_NAME, self.index_path, str(e))
+            raise self.ERROR(cause=msg)
+
+    def __del__(self):
+        conn = getattr(self, '_db', None)
+        if conn:
+            conn.close()
+
+    @contextlib.contextmanager
+    def _write(self):
+        """Run the statements of the block in a transaction.
+
+        :raises ItemsIndexError: when an error occurs writing the index;
+            subclasses raise the exception set in `ERROR`
+        """
+        try:
+            with self._db:
+                yield self._db
+        except sqlite3.DatabaseError as e:
+            msg = "%s storage error; cause: %s" % (self.INDEX_NAME, str(e))
+            raise self.ERROR(cause=msg)
+
+
+class ItemsIndex(SQLiteIndex):
+    """Index of the versions of the items produced by a backend.
+
+    This class keeps track of the last version of each item produced
+    by a backend, so fetch processes can return only those items that
+    are new or were updated since the last time they were produced.
+
+    The version of an item is defined by its `updated_on` field and
+    by a hash of its data. Items whose data changes without updating
+    this field are also detected.
+
+    The index is stored in a SQLite file, which will be created if
+    it does not exist. To keep the file compact, UUIDs and hashes are
+    stored as raw bytes in a table without row ids. Changes are written
+    in batches of `BATCH_SIZE` items; call to `flush` to write the
+    pending ones.
+
+    :param index_path: path where the index is stored
+
+    :raises ItemsIndexError: when the index is not valid
+    """
+    INDEX_NAME = "items index"
+    INDEX_TABLE = "items"
+    BATCH_SIZE = 1000
+    HASH_SIZE = 8
+
+    INDEX_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + INDEX_TABLE + " ( " \
+                        "uuid BLOB PRIMARY KEY, " \
+                        "updated_on REAL NOT NULL, " \
+                        "hash BLOB NOT NULL) " \
+                        "WITHOUT ROWID"
+    CREATE_STMTS = [INDEX_CREATE_STMT]
+
+    def __init__(self, index_path):
+        self._pending = {}
+        super().__init__(index_path)
+
+    def is_updated(self, item):
+        """Check whether an item is new or was updated.
+
+        The item is compared with the version stored in the index,
+        if any. Items are not added to the index by this method;
+        use `add` for that.
+
+        :param item: a Perceval item
+
+        :returns: `True` when the item is not in the index or its
+            version is different; `False` otherwise
+        """
+        key = self._make_key(item['uuid'])
+
+        version = self._pending.get(key, None)
+        if not version:
+            version = self._retrieve(key)
+        if not version:
+            return True
+
+        return version != (item['updated_on'], self.hash_data(item['data']))
+
+    def add(self, item):
+        """Add or update the version of an item in the index.
+
+        :param item: a Perceval item
+
+        :raises ItemsIndexError: when an error occurs writing the index
+        """
+        key = self._make_key(item['uuid'])
+        self._pending[key] = (item['updated_on'], self.hash_data(item['data']))
+
+        if len(self._pending) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Write the pending versions to the index.
+
+        :raises ItemsIndexError: when an error occurs writing the index
+        """
+        if not self._pending:
+            return
+
+        insert_stmt = "INSERT OR REPLACE INTO " + self.INDEX_TABLE + " (" \
+                      "uuid, updated_on, hash) " \
+                      "VALUES(?,?,?)"
+        rows = [(key, version[0], version[1]) for key, version in self._pending.items()]
+
+        with self._write() as db:
+            db.executemany(insert_stmt, rows)
+
+        logger.debug("%s items written to index %s", len(rows), self.index_path)
+
+        self._pending = {}
+
+    @classmethod
+    def hash_data(cls, data):
+        """Generate a short hash of the data of an item.
+
+        :param data: data of the item
+
+        :returns: the hash as a bytes object
+        """
+        dump = json.dumps(data, separators=(',', ':'), sort_keys=True)
+        sha1 = hashlib.sha1(dump.encode('utf-8', errors='surrogateescape'))
+
+        return sha1.digest()[:cls.HASH_SIZE]
+
+    def _retrieve(self, key):
+        """Retrieve the version of an item from the index"""
+
+        select_stmt = "SELECT updated_on, hash " \
+                      "FROM " + self.INDEX_TABLE + " " \
+                      "WHERE uuid = ?"
+
+        cursor = self._db.cursor()
+        cursor.execute(select_stmt, (key,))
+        row = cursor.fetchone()
+        cursor.close()
+
+        return (row[0], bytes(row[1])) if row else None
+
+    @staticmethod
+    def _make_key(item_uuid):
+        """Convert a UUID into its binary form"""
+
+        try:
+            return bytes.fromhex(item_uuid)
+        except ValueError:
+            return item_uuid.encode('utf-8', errors='surrogateescape')
@@ -24,12 +24,14 @@
 #     Harshal Mittal <harshalmittal4@gmail.com>
 #
 
+import collections
+import concurrent.futures
 import datetime
 import email
+import io
 import logging
 import mailbox
 import re
-import sys
 
 import xml.etree.ElementTree
 
@@ -49,6 +51,8 @@ DEFAULT_DATETIME = datetime.datetime(1970, 1, 1, 0, 0, 0,
 DEFAULT_LAST_DATETIME = datetime.datetime(2100, 1, 1, 0, 0, 0,
                                           tzinfo=dateutil.tz.tzutc())
 
+ILLEGAL_XML_CHARS_RE = re.compile('[\x00-\x08\x0B-\x1F\x7F-\x84\x86-\x9F]')
+
 
 def check_compressed_file_type(filepath):
     """Check if filename is a compressed file supported by the tool.
@@ -105,7 +109,55 @@ def months_range(from_date, to_date):
         pos = x
 
 
-def message_to_dict(msg):
+def map_concurrently(func, iterable, workers=None):
+    """Apply a function to the elements of an iterable using threads.
+
+    This function works like the built-in `map` but the calls to
+    `func` run on a pool of `workers` threads. Results are returned
+    in the same order of the elements of `iterable`. To limit the
+    memory used, only `2 * workers` calls are run ahead of the
+    results consumed by the caller.
+
+    When `workers` is not set or it is lower than two, the calls
+    run one by one in the current thread.
+
+    Exceptions raised by `func` are raised when their result is
+    consumed; pending calls are cancelled then.
+
+    :param func: function to apply
+    :param iterable: elements to pass to the function
+    :param workers: number of threads
+
+    :returns: a generator of results
+    """
+    if not workers or workers < 2:
+        for elem in iterable:
+            yield func(elem)
+        return
+
+    elems = iter(iterable)
+    pending = collections.deque()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        def submit():
+            for elem in elems:
+                pending.append(executor.submit(func, elem))
+                return
+
+        for _ in range(2 * workers):
+            submit()
+
+        try:
+            while pending:
+                result = pending.popleft().result()
+                submit()
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def message_to_dict(msg, headers=None):
     """Convert an email message into a dictionary.
 
     This function transforms an `email.message.Message` object
@@ -118,33 +170,60 @@ def message_to_dict(msg):
     due to same headers with different case formats can appear in
     the same message.
 
+    When `headers` is given, only the headers included in this list
+    are decoded and stored in the dictionary; the rest are dropped.
+    Header names are compared without taking into account their case.
+
     :param msg: email message of type `email.message.Message`
+    :param headers: list of headers to keep; by default, all of them
 
     :returns : dictionary of type `requests.structures.CaseInsensitiveDict`
 
     :raises ParseError: when an error occurs transforming the message
         to a dictionary
     """
-    def parse_headers(msg):
-        headers = {}
+    def parse_headers(msg, message, allowed):
+        # When the same header appears several times with
+        # different cases, the stored name is the one that
+        # appeared first for the last time, and its value is
+        # the last one set for that name
+        names = set()
+        cases = {}
 
         for header, value in msg.items():
-            hv = []
+            lheader = header.lower()
+
+            if allowed is not None and lheader not in allowed:
+                continue
+
+            if header not in names:
+                names.add(header)
+                cases[lheader] = header
+            elif cases[lheader] != header:
+                continue
+
+            v = decode_header(value)
+            message[header] = v if v else None
 
-            for text, charset in email.header.decode_header(value):
-                if isinstance(text, bytes):
-                    charset = charset if charset else 'utf-8'
-                    try:
-                        text = text.decode(charset, errors='surrogateescape')
-                    except (UnicodeError, LookupError):
-                        # Try again with a 7bit encoding
-                        text = text.decode('ascii', errors='surrogateescape')
-                hv.append(text)
+    def decode_header(value):
+        # Values without encoded-words are returned
+        # untouched by 'email.header.decode_header'
+        if isinstance(value, str) and '=?' not in value:
+            return value
 
-            v = ' '.join(hv)
-            headers[header] = v if v else None
+        hv = []
 
-        return headers
+        for text, charset in email.header.decode_header(value):
+            if isinstance(text, bytes):
+                charset = charset if charset else 'utf-8'
+                try:
+                    text = text.decode(charset, errors='surrogateescape')
+                except (UnicodeError, LookupError):
+                    # Try again with a 7bit encoding
+                    text = text.decode('ascii', errors='surrogateescape')
+            hv.append(text)
+
+        return ' '.join(hv)
 
     def parse_payload(msg):
         body = {}
@@ -175,6 +254,7 @@ def message_to_dict(msg):
         return payload
 
     # The function starts here
+    allowed = {h.lower() for h in headers} if headers is not None else None
     message = requests.structures.CaseInsensitiveDict()
 
     if isinstance(msg, mailbox.mboxMessage):
@@ -183,8 +263,7 @@ def message_to_dict(msg):
         message['unixfrom'] = None
 
     try:
-        for k, v in parse_headers(msg).items():
-            message[k] = v
+        parse_headers(msg, message, allowed)
         message['body'] = parse_payload(msg)
     except UnicodeError as e:
         raise ParseError(cause=str(e))
@@ -205,23 +284,7 @@ def remove_invalid_xml_chars(raw_xml):
 
     :returns: a purged XML stream
     """
-    illegal_unichrs = [(0x00, 0x08), (0x0B, 0x1F),
-                       (0x7F, 0x84), (0x86, 0x9F)]
-
-    illegal_ranges = ['%s-%s' % (chr(low), chr(high))
-                      for (low, high) in illegal_unichrs
-                      if low < sys.maxunicode]
-
-    illegal_xml_re = re.compile('[%s]' % ''.join(illegal_ranges))
-
-    purged_xml = ''
-
-    for c in raw_xml:
-        if illegal_xml_re.search(c) is not None:
-            c = ' '
-        purged_xml += c
-
-    return purged_xml
+    return ILLEGAL_XML_CHARS_RE.sub(' ', raw_xml)
 
 
 def xml_to_dict(raw_xml):
@@ -243,31 +306,78 @@ def xml_to_dict(raw_xml):
     :raises ParseError: raised when an error occurs parsing the given
         XML stream
     """
-    def node_to_dict(node):
-        d = {}
-        d.update(node.items())
+    purged_xml = remove_invalid_xml_chars(raw_xml)
+
+    try:
+        tree = xml.etree.ElementTree.fromstring(purged_xml)
+    except xml.etree.ElementTree.ParseError as e:
+        cause = "XML stream %s" % (str(e))
+        raise ParseError(cause=cause)
+
+    d = _xml_node_to_dict(tree)
+
+    return d
+
 
-        text = getattr(node, 'text', None)
+def iter_xml_to_dict(raw_xml, tag):
+    """Convert the elements of a XML stream into dictionaries incrementally.
 
-        if text is not None:
-            d['__text__'] = text
+    This function parses a xml stream and yields, one by one, the
+    children of the root element with the given tag, converted into
+    dictionaries. Each element is converted as soon as it is parsed
+    and freed afterwards, so the whole tree is never kept in memory.
 
-        childs = {}
-        for child in node:
-            childs.setdefault(child.tag, []).append(node_to_dict(child))
+    The dictionaries are the same `xml_to_dict` stores in the list
+    of the key `tag`.
 
-        d.update(childs.items())
+    :param raw_xml: XML stream
+    :param tag: tag of the children of the root element to convert
 
-        return d
+    :returns: a generator of dicts with the XML data
 
+    :raises ParseError: raised when an error occurs parsing the given
+        XML stream
+    """
     purged_xml = remove_invalid_xml_chars(raw_xml)
 
+    events = xml.etree.ElementTree.iterparse(io.StringIO(purged_xml),
+                                             events=('start', 'end'))
+    root = None
+    depth = 0
+
     try:
-        tree = xml.etree.ElementTree.fromstring(purged_xml)
+        for event, node in events:
+            if event == 'start':
+                if root is None:
+                    root = node
+                depth += 1
+                continue
+
+            depth -= 1
+
+            if depth == 1 and node.tag == tag:
+                yield _xml_node_to_dict(node)
+                root.clear()
     except xml.etree.ElementTree.ParseError as e:
         cause = "XML stream %s" % (str(e))
         raise ParseError(cause=cause)
 
-    d = node_to_dict(tree)
+
+def _xml_node_to_dict(node):
+    """Convert a XML element and its children into a dictionary"""
+
+    d = {}
+    d.update(node.items())
+
+    text = getattr(node, 'text', None)
+
+    if text is not None:
+        d['__text__'] = text
+
+    childs = {}
+    for child in node:
+        childs.setdefault(child.tag, []).append(_xml_node_to_dict(child))
+
+    d.update(childs.items())
 
     return d
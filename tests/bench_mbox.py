@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Benchmark of the parsers of compressed mbox files.
+
+It compares the former approach, which decompressed each mbox into
+a temporary file before parsing it, with parsing the mbox while it
+is decompressed. Usage:
+
+    python3 bench_mbox.py [--messages N] [--repeat N]
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+import tempfile
+import time
+
+from perceval.backends.core.mbox import MBox, MBoxArchive
+
+
+MESSAGE_TEMPLATE = """From user{n} at example.com  Wed Dec  1 08:26:40 2010
+From: user{n} at example.com (User {n})
+Date: Wed, 01 Dec 2010 14:26:40 +0100
+Subject: [List-name] Message {n}
+Message-ID: <{n}@example.com>
+
+Hi!
+
+This is the body of the message {n}.
+{body}
+regards,
+User {n}
+
+"""
+
+
+def create_mbox(dirpath, nmessages):
+    """Create a gzip mbox with the given number of messages"""
+
+    filepath = os.path.join(dirpath, 'bench.mbox.gz')
+    body = "Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n" * 20
+
+    with gzip.open(filepath, 'wt') as f_out:
+        for n in range(nmessages):
+            f_out.write(MESSAGE_TEMPLATE.format(n=n, body=body))
+
+    return filepath
+
+
+def parse_copying(filepath):
+    """Decompress the mbox into a temporary file and parse it"""
+
+    tmp_path = tempfile.mktemp(prefix='perceval_')
+
+    try:
+        with MBoxArchive(filepath).container as f_in:
+            with open(tmp_path, mode='wb') as f_out:
+                for line in f_in:
+                    f_out.write(line)
+
+        return sum(1 for _ in MBox.parse_mbox(tmp_path))
+    finally:
+        os.remove(tmp_path)
+
+
+def parse_streaming(filepath):
+    """Parse the mbox while it is decompressed"""
+
+    with MBoxArchive(filepath).container as f_in:
+        return sum(1 for _ in MBox.parse_mbox_stream(f_in))
+
+
+def measure(func, filepath, repeat):
+    """Return the best time of several runs of a parser"""
+
+    times = []
+
+    for _ in range(repeat):
+        before = time.perf_counter()
+        func(filepath)
+        times.append(time.perf_counter() - before)
+
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=20000,
+                        help="number of messages of the mbox")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="number of runs of each parser")
+    args = parser.parse_args()
+
+    dirpath = tempfile.mkdtemp(prefix='perceval_')
+
+    try:
+        filepath = create_mbox(dirpath, args.messages)
+
+        nmsgs_copy = parse_copying(filepath)
+        nmsgs_stream = parse_streaming(filepath)
+        assert nmsgs_copy == nmsgs_stream == args.messages
+
+        copying = measure(parse_copying, filepath, args.repeat)
+        streaming = measure(parse_streaming, filepath, args.repeat)
+    finally:
+        shutil.rmtree(dirpath)
+
+    print("Messages: %s" % args.messages)
+    print("Copy to temporary file: %.3fs" % copying)
+    print("Parse in place: %.3fs" % streaming)
+    print("Speedup: %.2fx" % (copying / streaming))
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,7 @@
 #     Jesus M. Gonzalez-Barahona <jgb@gsyc.es>
 #
 
+import concurrent.futures
 import os
 import pickle
 import shutil
@@ -234,6 +235,78 @@ class TestArchive(unittest.TestCase):
         with self.assertRaisesRegex(ArchiveError, "duplicated entry"):
             archive.store(url, payload, headers, response)
 
+    @httpretty.activate
+    def test_store_duplicate_resumed(self):
+        """Test whether duplicated data replaces the old one in resumed archives"""
+
+        url = "https://example.com/tasks"
+        payload = {'task_id': 10}
+        headers = {'Accept': 'application/json'}
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+        archive.resumed = True
+
+        archive.store(url, payload, headers, 'old data')
+        archive.store(url, payload, headers, 'new data')
+
+        self.assertEqual(archive._count_table_rows('archive'), 1)
+
+        data = archive.retrieve(url, payload, headers)
+        self.assertEqual(data, 'new data')
+
+    def test_store_checkpoint(self):
+        """Test whether the checkpoint is stored and loaded"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+
+        self.assertIsNone(archive.checkpoint)
+        self.assertIsNone(archive.finished)
+        self.assertFalse(archive.resumable)
+        self.assertFalse(archive.resumed)
+
+        archive.store_checkpoint({'items': 0})
+        archive.store_checkpoint({'items': 100, 'last_uuid': 'abcd'})
+
+        self.assertDictEqual(archive.checkpoint, {'items': 100, 'last_uuid': 'abcd'})
+        self.assertEqual(archive.finished, False)
+        self.assertTrue(archive.resumable)
+        self.assertEqual(archive._count_table_rows('checkpoint'), 1)
+
+        # Load the checkpoint from the file
+        archive = Archive(archive_path)
+        self.assertDictEqual(archive.checkpoint, {'items': 100, 'last_uuid': 'abcd'})
+        self.assertTrue(archive.resumable)
+
+        archive.store_checkpoint({'items': 150}, finished=True)
+
+        archive = Archive(archive_path)
+        self.assertDictEqual(archive.checkpoint, {'items': 150})
+        self.assertEqual(archive.finished, True)
+        self.assertFalse(archive.resumable)
+
+    def test_checkpoint_old_archive(self):
+        """Test whether archives without checkpoint table can be loaded"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        Archive.create(archive_path)
+
+        conn = sqlite3.connect(archive_path)
+        conn.execute("DROP TABLE checkpoint")
+        conn.commit()
+        conn.close()
+
+        archive = Archive(archive_path)
+        self.assertIsNone(archive.checkpoint)
+        self.assertFalse(archive.resumable)
+
+        archive.store_checkpoint({'items': 10})
+
+        archive = Archive(archive_path)
+        self.assertDictEqual(archive.checkpoint, {'items': 10})
+        self.assertTrue(archive.resumable)
+
     @httpretty.activate
     def test_retrieve(self):
         """Test whether data is properly retrieved from the archive"""
@@ -256,6 +329,41 @@ class TestArchive(unittest.TestCase):
 
         self.assertEqual(data.url, response.url)
 
+    @httpretty.activate
+    def test_store_retrieve_threads(self):
+        """Test whether several threads can store and retrieve data from the archive"""
+
+        url = "https://example.com/tasks"
+        headers = {'Accept': 'application/json'}
+
+        httpretty.register_uri(httpretty.GET,
+                               url,
+                               body='{"hey": "there"}',
+                               status=200)
+        response = requests.get(url, headers=headers)
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+
+        def store_and_retrieve(task_id):
+            payload = {'task_id': task_id}
+            archive.store(url, payload, headers, response)
+            return archive.retrieve(url, payload, headers)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(store_and_retrieve, range(20)))
+
+        self.assertEqual(len(results), 20)
+        for data in results:
+            self.assertEqual(data.url, response.url)
+
+        conn = sqlite3.connect(archive_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM archive")
+        self.assertEqual(cursor.fetchone()[0], 20)
+        cursor.close()
+        conn.close()
+
     def test_retrieve_missing(self):
         """Test whether the retrieval of non archived data throws an error
 
@@ -469,6 +577,45 @@ class TestArchiveManager(unittest.TestCase):
         expected = [metadata[1]['filepath']]
         self.assertListEqual(archives, expected)
 
+    def test_search_resumable(self):
+        """Check if the last interrupted archive is returned"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        metadata = {
+            'origin': 'https://example.com',
+            'backend_name': 'git',
+            'backend_version': '0.8',
+            'category': 'commit',
+            'backend_params': {},
+        }
+
+        # No archives to resume
+        archive = manager.create_archive()
+        archive.init_metadata(**metadata)
+        archive.store_checkpoint({'items': 10}, finished=True)
+
+        resumed = manager.search_resumable('https://example.com', 'git', 'commit')
+        self.assertIsNone(resumed)
+
+        # Only the most recent interrupted archive is returned
+        interrupted = []
+        for _ in range(2):
+            archive = manager.create_archive()
+            archive.init_metadata(**metadata)
+            archive.store_checkpoint({'items': 5})
+            interrupted.append(archive.archive_path)
+
+        resumed = manager.search_resumable('https://example.com', 'git', 'commit')
+        self.assertIsInstance(resumed, Archive)
+        self.assertEqual(resumed.archive_path, interrupted[1])
+        self.assertDictEqual(resumed.checkpoint, {'items': 5})
+        self.assertTrue(resumed.resumed)
+
+        resumed = manager.search_resumable('https://example.com', 'git', 'branch')
+        self.assertIsNone(resumed)
+
     def test_search_no_match(self):
         """Check if an empty set of archives is returned when none match the criteria"""
 
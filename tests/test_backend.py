@@ -55,6 +55,7 @@ from perceval.backend import (Backend,
                               find_backends,
                               logger as backend_logger)
 from perceval.errors import ArchiveError, BackendError, BackendCommandArgumentParserError
+from perceval.index import ItemsIndex
 from perceval.utils import DEFAULT_DATETIME
 from base import TestCaseBackendArchive
 import mocked_package
@@ -239,6 +240,46 @@ class ErrorCommandBackend(CommandBackend):
             raise BackendError(cause="Unhandled exception")
 
 
+class TaggedArchiveBackend(CommandBackend):
+    """Backend which stores its tag in the archived items"""
+
+    def fetch_items(self, category, **kwargs):
+        for x in range(MockedBackend.ITEMS):
+            if self._fetch_from_archive:
+                item = self.archive.retrieve(str(x), None, None)
+            else:
+                item = {'item': x, 'category': category, 'tag': self.tag}
+                self.archive.store(str(x), None, None, item)
+            yield item
+
+
+class InterruptedCommandBackend(CommandBackend):
+    """Backend which raises an exception after fetching some items"""
+
+    INTERRUPT_AFTER = 3
+
+    def fetch_items(self, category, **kwargs):
+        for nitems, item in enumerate(super().fetch_items(category, **kwargs), start=1):
+            if self.INTERRUPT_AFTER and nitems > self.INTERRUPT_AFTER:
+                raise BackendError(cause="Unhandled exception")
+            yield item
+
+
+class NewestFirstCommandBackend(CommandBackend):
+    """Backend which returns the newest items first and may be interrupted.
+
+    Its data is not archived; it is fetched again when resumed.
+    """
+    ITEMS = [4, 3, 2, 1, 0]
+    INTERRUPT_AFTER = 3
+
+    def fetch_items(self, category, **kwargs):
+        for nitems, x in enumerate(self.ITEMS, start=1):
+            if self.INTERRUPT_AFTER and nitems > self.INTERRUPT_AFTER:
+                raise BackendError(cause="Unhandled exception")
+            yield {'item': x, 'category': category}
+
+
 class MockedBackendCommand(BackendCommand):
     """Mocked backend command class used for testing"""
 
@@ -1093,6 +1134,67 @@ class TestBackendCommandArgumentParser(unittest.TestCase):
         with self.assertRaises(AttributeError):
             _ = parser.parse(*args)
 
+    def test_parse_resume_args(self):
+        """Test if resume argument is parsed"""
+
+        args = ['--archive-path', '/tmp/archive',
+                '--resume',
+                '--category', 'mocked']
+
+        parser = BackendCommandArgumentParser(MockedBackendCommand.BACKEND,
+                                              archive=True)
+        parsed_args = parser.parse(*args)
+
+        self.assertEqual(parsed_args.resume, True)
+        self.assertEqual(parsed_args.fetch_archive, False)
+
+        parsed_args = parser.parse('--category', 'mocked')
+        self.assertEqual(parsed_args.resume, False)
+
+    def test_incompatible_resume(self):
+        """Test if resume is incompatible with fetch-archive and no-archive arguments"""
+
+        parser = BackendCommandArgumentParser(MockedBackendCommand.BACKEND,
+                                              archive=True)
+
+        with self.assertRaises(AttributeError):
+            _ = parser.parse('--resume', '--fetch-archive', '--category', 'mocked')
+
+        with self.assertRaises(AttributeError):
+            _ = parser.parse('--resume', '--no-archive', '--category', 'mocked')
+
+        with self.assertRaises(AttributeError):
+            _ = parser.parse('--resume')
+
+    def test_parse_archive_workers_args(self):
+        """Test if parallel archive arguments are parsed"""
+
+        parser = BackendCommandArgumentParser(MockedBackendCommand.BACKEND,
+                                              archive=True)
+
+        parsed_args = parser.parse('--fetch-archive', '--category', 'mocked')
+        self.assertIsNone(parsed_args.archive_workers)
+        self.assertEqual(parsed_args.unordered_archives, False)
+
+        parsed_args = parser.parse('--fetch-archive', '--category', 'mocked',
+                                   '--archive-workers', '4', '--unordered-archives')
+        self.assertEqual(parsed_args.archive_workers, 4)
+        self.assertEqual(parsed_args.unordered_archives, True)
+
+        with self.assertRaises(AttributeError):
+            _ = parser.parse('--fetch-archive', '--category', 'mocked',
+                             '--archive-workers', '0')
+
+    def test_incompatible_fetch_archive_and_delta_index(self):
+        """Test if fetch-archive and delta-index arguments are incompatible"""
+
+        args = ['--fetch-archive', '--delta-index', '/tmp/index', '--category', 'mocked']
+        parser = BackendCommandArgumentParser(MockedBackendCommand.BACKEND,
+                                              archive=True)
+
+        with self.assertRaises(AttributeError):
+            _ = parser.parse(*args)
+
     def test_fetch_archive_needs_category(self):
         """Test if fetch-archive needs a category"""
 
@@ -1756,6 +1858,149 @@ class TestBackendItemsGenerator(unittest.TestCase):
 
         self.assertEqual(len(filepaths), 0)
 
+    def test_init_items_from_archive_parallel(self):
+        """Test whether items are fetched from several archives in parallel"""
+
+        manager = ArchiveManager(self.test_path)
+
+        category = 'mock_item'
+        args = {
+            'origin': 'http://example.com/',
+            'subtype': 'mocksubtype',
+            'from-date': str_to_datetime('2015-01-01')
+        }
+
+        for tag in ['a', 'b', 'c']:
+            args['tag'] = tag
+            items = fetch(TaggedArchiveBackend, args, category, manager=manager)
+            _ = [item for item in items]
+
+        args['tag'] = 'test'
+
+        with BackendItemsGenerator(TaggedArchiveBackend, args, category,
+                                   manager=manager, fetch_archive=True,
+                                   archived_after=str_to_datetime('1970-01-01'),
+                                   archive_workers=2) as big:
+            items = [item for item in big.items]
+
+            self.assertEqual(big.summary.fetched, 15)
+            self.assertEqual(big.summary.last_uuid, uuid('http://example.com/', '4'))
+
+        tags = [item['data']['tag'] for item in items]
+        self.assertListEqual(tags, ['a'] * 5 + ['b'] * 5 + ['c'] * 5)
+
+        for item in items:
+            self.assertEqual(item['tag'], 'test')
+
+    def test_init_items_index(self):
+        """Test whether only new or updated items are returned using an index"""
+
+        index = ItemsIndex(os.path.join(self.test_path, 'myindex'))
+
+        category = 'mock_item'
+        args = {
+            'origin': 'http://example.com/',
+            'tag': 'test',
+            'subtype': 'mocksubtype',
+            'from-date': str_to_datetime('2015-01-01')
+        }
+
+        with BackendItemsGenerator(CommandBackend, args, category,
+                                   items_index=index) as big:
+            items = [item for item in big.items]
+
+            self.assertEqual(len(items), 5)
+            self.assertEqual(big.summary.fetched, 5)
+            self.assertEqual(big.summary.skipped, 0)
+
+        with BackendItemsGenerator(CommandBackend, args, category,
+                                   items_index=index) as big:
+            items = [item for item in big.items]
+
+            self.assertEqual(len(items), 0)
+            self.assertEqual(big.summary.fetched, 0)
+            self.assertEqual(big.summary.skipped, 5)
+
+        # Items updated since the last execution are returned
+        with unittest.mock.patch.object(CommandBackend, 'metadata_updated_on',
+                                        staticmethod(lambda item: 1893456000.0 + item['item'])):
+            with BackendItemsGenerator(CommandBackend, args, category,
+                                       items_index=index) as big:
+                items = [item for item in big.items]
+
+                self.assertEqual(len(items), 5)
+
+            with BackendItemsGenerator(CommandBackend, args, category,
+                                       items_index=index) as big:
+                items = [item for item in big.items]
+
+                self.assertEqual(len(items), 0)
+                self.assertEqual(big.summary.skipped, 5)
+
+    @unittest.mock.patch('perceval.backend.CHECKPOINT_INTERVAL', 2)
+    def test_init_resume(self):
+        """Test whether an interrupted fetch process is resumed"""
+
+        manager = ArchiveManager(self.test_path)
+
+        category = 'mock_item'
+        args = {
+            'origin': 'http://example.com/',
+            'tag': 'test',
+            'subtype': 'mocksubtype',
+            'from-date': str_to_datetime('2015-01-01')
+        }
+
+        # The archive is kept after the error
+        items = []
+        with self.assertRaises(BackendError):
+            big = BackendItemsGenerator(InterruptedCommandBackend, args, category,
+                                        manager=manager, resume=True)
+            for item in big.items:
+                items.append(item)
+
+        self.assertEqual(len(items), 3)
+
+        filepaths = manager.search('http://example.com/', 'InterruptedCommandBackend',
+                                   'mock_item', str_to_datetime('1970-01-01'))
+        self.assertEqual(len(filepaths), 1)
+
+        archive = Archive(filepaths[0])
+        self.assertTrue(archive.resumable)
+        self.assertEqual(archive.checkpoint['items'], 2)
+        self.assertEqual(archive.checkpoint['last_uuid'],
+                         uuid('http://example.com/', '1'))
+
+        # Items after the checkpoint are returned
+        with unittest.mock.patch.object(InterruptedCommandBackend, 'INTERRUPT_AFTER', None):
+            with BackendItemsGenerator(InterruptedCommandBackend, args, category,
+                                       manager=manager, resume=True) as big:
+                items = [item for item in big.items]
+
+                self.assertEqual(big.backend.archive.archive_path, filepaths[0])
+                self.assertEqual(big.summary.fetched, 3)
+                self.assertEqual(big.summary.skipped, 0)
+                self.assertEqual(big.summary.replayed, 2)
+                self.assertEqual(big.summary.total, 3)
+
+            self.assertEqual([item['data']['item'] for item in items], [2, 3, 4])
+
+            archive = Archive(filepaths[0])
+            self.assertFalse(archive.resumable)
+            self.assertEqual(archive.checkpoint['items'], 5)
+            self.assertEqual(archive._count_table_rows('archive'), 5)
+
+            # Nothing else to resume, so a new process starts
+            with BackendItemsGenerator(InterruptedCommandBackend, args, category,
+                                       manager=manager, resume=True) as big:
+                items = [item for item in big.items]
+
+                self.assertNotEqual(big.backend.archive.archive_path, filepaths[0])
+                self.assertEqual(big.summary.skipped, 0)
+                self.assertEqual(big.summary.replayed, 0)
+
+            self.assertEqual(len(items), 5)
+
     def test_init_no_archived_items(self):
         """Test when no archived items are available"""
 
@@ -1875,6 +2120,7 @@ class TestSummary(unittest.TestCase):
 
         self.assertEqual(summary.fetched, 0)
         self.assertEqual(summary.skipped, 0)
+        self.assertEqual(summary.replayed, 0)
         self.assertEqual(summary.total, 0)
         self.assertIsNone(summary.min_updated_on)
         self.assertIsNone(summary.max_updated_on)
@@ -2210,6 +2456,33 @@ class TestFetch(unittest.TestCase):
             }
             self.assertDictEqual(item['data'], expected)
 
+    def test_items_index(self):
+        """Test whether only new or updated items are returned using an index"""
+
+        index = ItemsIndex(os.path.join(self.test_path, 'myindex'))
+
+        category = 'mock_item'
+        args = {
+            'origin': 'http://example.com/',
+            'tag': 'test',
+            'subtype': 'mocksubtype',
+            'from-date': str_to_datetime('2015-01-01')
+        }
+
+        items = fetch(CommandBackend, args, category, items_index=index)
+        items = [item for item in items]
+        self.assertEqual(len(items), 5)
+
+        # Items interrupted before being indexed are returned again
+        items = fetch(ErrorCommandBackend, args, category, items_index=index)
+
+        with self.assertRaises(BackendError):
+            _ = [item for item in items]
+
+        items = fetch(CommandBackend, args, category, items_index=index)
+        items = [item for item in items]
+        self.assertEqual(len(items), 0)
+
     def test_remove_archive_on_error(self):
         """Test whether an archive is removed when an unhandled exception occurs"""
 
@@ -2233,6 +2506,69 @@ class TestFetch(unittest.TestCase):
 
         self.assertEqual(len(filepaths), 0)
 
+    @unittest.mock.patch('perceval.backend.CHECKPOINT_INTERVAL', 2)
+    def test_resume(self):
+        """Test whether an interrupted fetch process is resumed"""
+
+        manager = ArchiveManager(self.test_path)
+
+        category = 'mock_item'
+        args = {
+            'origin': 'http://example.com/',
+            'tag': 'test',
+            'subtype': 'mocksubtype',
+            'from-date': str_to_datetime('2015-01-01')
+        }
+
+        items = fetch(InterruptedCommandBackend, args, category,
+                      manager=manager, resume=True)
+
+        with self.assertRaises(BackendError):
+            _ = [item for item in items]
+
+        with unittest.mock.patch.object(InterruptedCommandBackend, 'INTERRUPT_AFTER', None):
+            items = fetch(InterruptedCommandBackend, args, category,
+                          manager=manager, resume=True)
+            items = [item for item in items]
+
+        self.assertEqual([item['data']['item'] for item in items], [2, 3, 4])
+
+        filepaths = manager.search('http://example.com/', 'InterruptedCommandBackend',
+                                   'mock_item', str_to_datetime('1970-01-01'))
+        self.assertEqual(len(filepaths), 1)
+
+    @unittest.mock.patch('perceval.backend.CHECKPOINT_INTERVAL', 2)
+    def test_resume_changed_data(self):
+        """Test whether items are not lost when the data changed before resuming"""
+
+        manager = ArchiveManager(self.test_path)
+
+        category = 'mock_item'
+        args = {
+            'origin': 'http://example.com/',
+            'tag': 'test',
+            'subtype': 'mocksubtype',
+            'from-date': str_to_datetime('2015-01-01')
+        }
+
+        items = fetch(NewestFirstCommandBackend, args, category,
+                      manager=manager, resume=True)
+
+        with self.assertRaises(BackendError):
+            _ = [item for item in items]
+
+        # A new item is at the beginning of the data, so the items
+        # returned before the interruption are shifted
+        with unittest.mock.patch.object(NewestFirstCommandBackend, 'INTERRUPT_AFTER', None), \
+                unittest.mock.patch.object(NewestFirstCommandBackend, 'ITEMS', [5, 4, 3, 2, 1, 0]):
+            with BackendItemsGenerator(NewestFirstCommandBackend, args, category,
+                                       manager=manager, resume=True) as big:
+                items = [item for item in big.items]
+
+                self.assertEqual(big.summary.replayed, 2)
+
+        self.assertEqual([item['data']['item'] for item in items], [5, 2, 1, 0])
+
 
 class TestFetchFromArchive(unittest.TestCase):
     """Unit tests for fetch_from_archive function"""
@@ -2401,6 +2737,127 @@ class TestFetchFromArchive(unittest.TestCase):
             self.assertEqual(item['classified_fields_filtered'], None)
 
 
+class TestFetchFromArchiveParallel(unittest.TestCase):
+    """Unit tests for fetch_from_archive function using several processes"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.manager = ArchiveManager(self.test_path)
+
+        self.args = {
+            'origin': 'http://example.com/',
+            'subtype': 'mocksubtype',
+            'from-date': str_to_datetime('2015-01-01')
+        }
+
+        for tag in ['a', 'b', 'c', 'd']:
+            self.args['tag'] = tag
+            items = fetch(TaggedArchiveBackend, self.args, 'mock_item',
+                          manager=self.manager)
+            _ = [item for item in items]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_ordered(self):
+        """Test whether items are returned following the order of the archives"""
+
+        items = fetch_from_archive(TaggedArchiveBackend, self.args, self.manager,
+                                   'mock_item', str_to_datetime('1970-01-01'),
+                                   workers=2)
+        items = [item for item in items]
+
+        self.assertEqual(len(items), 20)
+
+        tags = [item['data']['tag'] for item in items]
+        self.assertListEqual(tags, ['a'] * 5 + ['b'] * 5 + ['c'] * 5 + ['d'] * 5)
+
+        for x in range(4):
+            for y in range(5):
+                item = items[y + (x * 5)]
+                expected_uuid = uuid('http://example.com/', str(y))
+
+                self.assertEqual(item['data']['item'], y)
+                self.assertEqual(item['origin'], 'http://example.com/')
+                self.assertEqual(item['uuid'], expected_uuid)
+
+    def test_unordered(self):
+        """Test whether all the items are returned when order is not required"""
+
+        items = fetch_from_archive(TaggedArchiveBackend, self.args, self.manager,
+                                   'mock_item', str_to_datetime('1970-01-01'),
+                                   workers=3, ordered=False)
+        items = [item for item in items]
+
+        self.assertEqual(len(items), 20)
+
+        tags = sorted([item['data']['tag'] for item in items])
+        self.assertListEqual(tags, ['a'] * 5 + ['b'] * 5 + ['c'] * 5 + ['d'] * 5)
+
+        # Items of the same archive are returned together
+        for x in range(4):
+            archive_items = items[x * 5:(x + 1) * 5]
+            self.assertEqual(len({item['data']['tag'] for item in archive_items}), 1)
+            self.assertListEqual([item['data']['item'] for item in archive_items],
+                                 [0, 1, 2, 3, 4])
+
+    def test_chunks(self):
+        """Test whether the items of an archive are returned in chunks"""
+
+        with unittest.mock.patch('perceval.backend.ARCHIVE_CHUNK_SIZE', 2):
+            items = fetch_from_archive(TaggedArchiveBackend, self.args, self.manager,
+                                       'mock_item', str_to_datetime('1970-01-01'),
+                                       workers=2)
+            items = [item for item in items]
+
+        self.assertEqual(len(items), 20)
+
+        tags = [item['data']['tag'] for item in items]
+        self.assertListEqual(tags, ['a'] * 5 + ['b'] * 5 + ['c'] * 5 + ['d'] * 5)
+
+        numbers = [item['data']['item'] for item in items]
+        self.assertListEqual(numbers, [0, 1, 2, 3, 4] * 4)
+
+    def test_stop(self):
+        """Test whether the processes stop when the items are no longer consumed"""
+
+        with unittest.mock.patch('perceval.backend.ARCHIVE_CHUNK_SIZE', 1):
+            items = fetch_from_archive(TaggedArchiveBackend, self.args, self.manager,
+                                       'mock_item', str_to_datetime('1970-01-01'),
+                                       workers=2)
+            item = next(items)
+            items.close()
+
+        self.assertEqual(item['data']['tag'], 'a')
+        self.assertEqual(item['data']['item'], 0)
+
+    def test_ignore_corrupted_archive(self):
+        """Check if a corrupted archive is ignored while fetching in parallel"""
+
+        filepaths = self.manager.search('http://example.com/', 'TaggedArchiveBackend',
+                                        'mock_item', str_to_datetime('1970-01-01'))
+        self.assertEqual(len(filepaths), 4)
+
+        conn = sqlite3.connect(filepaths[1])
+        conn.execute("DELETE FROM archive")
+        conn.commit()
+        conn.close()
+
+        with self.assertLogs(backend_logger, level='WARNING') as cm:
+            items = fetch_from_archive(TaggedArchiveBackend, self.args, self.manager,
+                                       'mock_item', str_to_datetime('1970-01-01'),
+                                       workers=2)
+            items = [item for item in items]
+
+        self.assertEqual(len(items), 15)
+
+        tags = [item['data']['tag'] for item in items]
+        self.assertListEqual(tags, ['a'] * 5 + ['c'] * 5 + ['d'] * 5)
+
+        self.assertEqual(len(cm.output), 1)
+        self.assertRegex(cm.output[0], "Ignoring %s archive" % filepaths[1])
+
+
 class TestFindBackends(unittest.TestCase):
     """Unit tests for find_backends function"""
 
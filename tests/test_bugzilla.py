@@ -71,6 +71,7 @@ class TestBugzillaBackend(unittest.TestCase):
         self.assertEqual(bg.max_bugs, 5)
         self.assertIsNone(bg.client)
         self.assertTrue(bg.ssl_verify)
+        self.assertIsNone(bg.fetch_workers)
 
         # When tag is empty or None it will be set to
         # the value in the origin (URL)
@@ -85,6 +86,9 @@ class TestBugzillaBackend(unittest.TestCase):
         self.assertEqual(bg.tag, BUGZILLA_SERVER_URL)
         self.assertFalse(bg.ssl_verify)
 
+        bg = Bugzilla(BUGZILLA_SERVER_URL, fetch_workers=4)
+        self.assertEqual(bg.fetch_workers, 4)
+
     def test_has_archiving(self):
         """Test if it returns True when has_archiving is called"""
 
@@ -173,18 +177,6 @@ class TestBugzillaBackend(unittest.TestCase):
                 'order': ['changeddate'],
                 'chfieldfrom': ['1970-01-01 00:00:00']
             },
-            {
-                'ctype': ['csv'],
-                'limit': ['500'],
-                'order': ['changeddate'],
-                'chfieldfrom': ['2009-07-30 11:35:33']
-            },
-            {
-                'ctype': ['csv'],
-                'limit': ['500'],
-                'order': ['changeddate'],
-                'chfieldfrom': ['2015-08-12 18:32:11']
-            },
             {
                 'ctype': ['xml'],
                 'id': ['15', '18', '17', '20', '19'],
@@ -205,6 +197,18 @@ class TestBugzillaBackend(unittest.TestCase):
             {
                 'id': ['19']
             },
+            {
+                'ctype': ['csv'],
+                'limit': ['500'],
+                'order': ['changeddate'],
+                'chfieldfrom': ['2009-07-30 11:35:33']
+            },
+            {
+                'ctype': ['csv'],
+                'limit': ['500'],
+                'order': ['changeddate'],
+                'chfieldfrom': ['2015-08-12 18:32:11']
+            },
             {
                 'ctype': ['xml'],
                 'id': ['30', '888'],
@@ -422,6 +426,104 @@ class TestBugzillaBackend(unittest.TestCase):
         for i in range(len(expected)):
             self.assertDictEqual(requests[i].querystring, expected[i])
 
+    @httpretty.activate
+    def test_fetch_fetch_workers(self):
+        """Test whether the activity of the bugs is fetched using several threads"""
+
+        bodies_csv = [read_file('data/bugzilla/bugzilla_buglist.csv'),
+                      read_file('data/bugzilla/bugzilla_buglist_next.csv'),
+                      ""]
+        bodies_xml = [read_file('data/bugzilla/bugzilla_bugs_details.xml', mode='rb'),
+                      read_file('data/bugzilla/bugzilla_bugs_details_next.xml', mode='rb')]
+        body_activity = read_file('data/bugzilla/bugzilla_bug_activity.html', mode='rb')
+        body_activity_empty = read_file('data/bugzilla/bugzilla_bug_activity_empty.html', mode='rb')
+
+        def activity_callback(request, uri, headers):
+            bug_id = request.querystring['id'][0]
+            body = body_activity if bug_id == '888' else body_activity_empty
+            return (200, headers, body)
+
+        httpretty.register_uri(httpretty.GET,
+                               BUGZILLA_METADATA_URL,
+                               responses=[
+                                   httpretty.Response(body=read_file('data/bugzilla/bugzilla_version.xml'))
+                               ] + [
+                                   httpretty.Response(body=body) for body in bodies_xml
+                               ])
+        httpretty.register_uri(httpretty.GET,
+                               BUGZILLA_BUGLIST_URL,
+                               responses=[
+                                   httpretty.Response(body=body) for body in bodies_csv
+                               ])
+        httpretty.register_uri(httpretty.GET,
+                               BUGZILLA_BUG_ACTIVITY_URL,
+                               body=activity_callback)
+
+        bg = Bugzilla(BUGZILLA_SERVER_URL,
+                      max_bugs=5, max_bugs_csv=500,
+                      fetch_workers=3)
+        bugs = [bug for bug in bg.fetch()]
+
+        self.assertEqual(len(bugs), 7)
+
+        bug_ids = [bug['data']['bug_id'][0]['__text__'] for bug in bugs]
+        self.assertListEqual(bug_ids, ['15', '18', '17', '20', '19', '30', '888'])
+
+        for bug in bugs[:-1]:
+            self.assertEqual(len(bug['data']['activity']), 0)
+
+        self.assertEqual(len(bugs[6]['data']['activity']), 14)
+        self.assertEqual(bugs[6]['uuid'], 'b4009442d38f4241a4e22e3e61b7cd8ef5ced35c')
+
+        requested_ids = sorted(req.querystring['id'][0] for req in httpretty.latest_requests()
+                               if req.path.startswith('/show_activity.cgi'))
+        self.assertListEqual(requested_ids, sorted(bug_ids))
+
+    @httpretty.activate
+    def test_fetch_stream(self):
+        """Test whether bugs are returned before fetching the whole list of bugs"""
+
+        bodies_csv = [read_file('data/bugzilla/bugzilla_buglist.csv'),
+                      read_file('data/bugzilla/bugzilla_buglist_next.csv'),
+                      ""]
+        bodies_xml = [read_file('data/bugzilla/bugzilla_bugs_details.xml', mode='rb'),
+                      read_file('data/bugzilla/bugzilla_bugs_details_next.xml', mode='rb')]
+
+        httpretty.register_uri(httpretty.GET,
+                               BUGZILLA_METADATA_URL,
+                               responses=[
+                                   httpretty.Response(body=read_file('data/bugzilla/bugzilla_version.xml'))
+                               ] + [
+                                   httpretty.Response(body=body) for body in bodies_xml
+                               ])
+        httpretty.register_uri(httpretty.GET,
+                               BUGZILLA_BUGLIST_URL,
+                               responses=[
+                                   httpretty.Response(body=body) for body in bodies_csv
+                               ])
+        httpretty.register_uri(httpretty.GET,
+                               BUGZILLA_BUG_ACTIVITY_URL,
+                               body=read_file('data/bugzilla/bugzilla_bug_activity_empty.html', mode='rb'))
+
+        bg = Bugzilla(BUGZILLA_SERVER_URL,
+                      max_bugs=5, max_bugs_csv=500)
+        bugs = bg.fetch()
+
+        bug = next(bugs)
+        self.assertEqual(bug['data']['bug_id'][0]['__text__'], '15')
+
+        # Only the first page of the list was requested
+        buglist_requests = [req for req in httpretty.latest_requests()
+                            if req.path.startswith('/buglist.cgi')]
+        self.assertEqual(len(buglist_requests), 1)
+
+        bugs = [bug] + [bug for bug in bugs]
+        self.assertEqual(len(bugs), 7)
+
+        buglist_requests = [req for req in httpretty.latest_requests()
+                            if req.path.startswith('/buglist.cgi')]
+        self.assertEqual(len(buglist_requests), 3)
+
     @httpretty.activate
     def test_fetch_empty(self):
         """Test whether it works when no bugs are fetched"""
@@ -809,6 +911,50 @@ class TestBugzillaBackendParsers(unittest.TestCase):
             activity = Bugzilla.parse_bug_activity(raw_html)
             _ = [event for event in activity]
 
+    def test_parse_activity_cells(self):
+        """Test whether the text of the cells is formatted"""
+
+        raw_html = """
+        <table><tr><th>a</th></tr></table>
+        <table>
+          <tr><th>Who</th><th>When</th><th>What</th><th>Removed</th><th>Added</th></tr>
+          <tr>
+            <td rowspan="2"><span>jsmith@example.com</span></td>
+            <td rowspan="2">2013-06-25 11:57:23 CEST</td>
+            <td><a href="attachment.cgi?id=172">Attachment #172</a>  is obsolete</td>
+            <td>0</td><td>1 &amp; <i>more</i></td>
+          </tr>
+          <tr><td>CC</td><td> </td><td>jdoe@example.com,<br/>
+            jsmith@example.com</td></tr>
+        </table>
+        """
+
+        expected = [
+            {
+                'Who': 'jsmith@example.com',
+                'When': '2013-06-25 11:57:23 CEST',
+                'What': 'Attachment #172 is obsolete',
+                'Removed': '0',
+                'Added': '1 & more'
+            },
+            {
+                'Who': 'jsmith@example.com',
+                'When': '2013-06-25 11:57:23 CEST',
+                'What': 'CC',
+                'Removed': '',
+                'Added': 'jdoe@example.com, jsmith@example.com'
+            }
+        ]
+
+        result = [event for event in Bugzilla.parse_bug_activity(raw_html)]
+        self.assertListEqual(result, expected)
+
+        # Pages with scripts inside the cells are parsed as well
+        raw_html = raw_html.replace('<td>0</td>', '<td><script>var x = 1;</script>0</td>')
+
+        result = [event for event in Bugzilla.parse_bug_activity(raw_html)]
+        self.assertListEqual(result, expected)
+
 
 class TestBugzillaCommand(unittest.TestCase):
     """BugzillaCommand unit tests"""
@@ -828,6 +974,7 @@ class TestBugzillaCommand(unittest.TestCase):
         args = ['--backend-user', 'jsmith@example.com',
                 '--backend-password', '1234',
                 '--max-bugs', '10', '--max-bugs-csv', '5',
+                '--fetch-workers', '4',
                 '--tag', 'test',
                 '--from-date', '1970-01-01',
                 '--no-archive',
@@ -838,6 +985,7 @@ class TestBugzillaCommand(unittest.TestCase):
         self.assertEqual(parsed_args.password, '1234')
         self.assertEqual(parsed_args.max_bugs, 10)
         self.assertEqual(parsed_args.max_bugs_csv, 5)
+        self.assertEqual(parsed_args.fetch_workers, 4)
         self.assertEqual(parsed_args.tag, 'test')
         self.assertTrue(parsed_args.no_archive)
         self.assertTrue(parsed_args.ssl_verify)
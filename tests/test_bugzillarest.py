@@ -143,6 +143,7 @@ class TestBugzillaRESTBackend(unittest.TestCase):
         self.assertEqual(bg.max_bugs, 5)
         self.assertIsNone(bg.client)
         self.assertTrue(bg.ssl_verify)
+        self.assertIsNone(bg.fetch_workers)
 
         # When tag is empty or None it will be set to
         # the value in URL
@@ -157,6 +158,9 @@ class TestBugzillaRESTBackend(unittest.TestCase):
         self.assertEqual(bg.tag, BUGZILLA_SERVER_URL)
         self.assertFalse(bg.ssl_verify)
 
+        bg = BugzillaREST(BUGZILLA_SERVER_URL, fetch_workers=4)
+        self.assertEqual(bg.fetch_workers, 4)
+
     def test_has_resuming(self):
         """Test if it returns True when has_resuming is called"""
 
@@ -257,6 +261,34 @@ class TestBugzillaRESTBackend(unittest.TestCase):
         for i in range(len(expected)):
             self.assertDictEqual(http_requests[i].querystring, expected[i])
 
+    @httpretty.activate
+    def test_fetch_fetch_workers(self):
+        """Test whether the contents of the bugs are fetched using several threads"""
+
+        setup_http_server()
+
+        bg = BugzillaREST(BUGZILLA_SERVER_URL, max_bugs=2)
+        expected = [bug for bug in bg.fetch(from_date=None)]
+        expected_requests = sorted(str(sorted(req.querystring.items()))
+                                   for req in httpretty.latest_requests())
+
+        httpretty.reset()
+        setup_http_server()
+
+        bg = BugzillaREST(BUGZILLA_SERVER_URL, max_bugs=2, fetch_workers=3)
+        bugs = [bug for bug in bg.fetch(from_date=None)]
+
+        self.assertEqual(len(bugs), 3)
+
+        for bug, expected_bug in zip(bugs, expected):
+            self.assertEqual(bug['uuid'], expected_bug['uuid'])
+            self.assertDictEqual(bug['data'], expected_bug['data'])
+
+        # The same requests were sent to the server
+        fetched_requests = sorted(str(sorted(req.querystring.items()))
+                                  for req in httpretty.latest_requests())
+        self.assertListEqual(fetched_requests, expected_requests)
+
     @httpretty.activate
     def test_search_fields(self):
         """Test whether the search_fields is properly set"""
@@ -864,6 +896,7 @@ class TestBugzillaRESTCommand(unittest.TestCase):
                 '--api-token', 'abcdefg',
                 '--max-bugs', '10', '--tag', 'test',
                 '--from-date', '1970-01-01',
+                '--fetch-workers', '4',
                 '--no-archive',
                 BUGZILLA_SERVER_URL]
 
@@ -872,6 +905,7 @@ class TestBugzillaRESTCommand(unittest.TestCase):
         self.assertEqual(parsed_args.password, '1234')
         self.assertEqual(parsed_args.api_token, 'abcdefg')
         self.assertEqual(parsed_args.max_bugs, 10)
+        self.assertEqual(parsed_args.fetch_workers, 4)
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
         self.assertTrue(parsed_args.no_archive)
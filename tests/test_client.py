@@ -27,7 +27,9 @@ import os
 import shutil
 import time
 import tempfile
+import threading
 import unittest
+import unittest.mock
 
 import httpretty
 import requests
@@ -35,7 +37,8 @@ import requests
 from grimoirelab_toolkit.datetime import datetime_utcnow
 
 from perceval.archive import Archive
-from perceval.client import HttpClient, RateLimitHandler
+from perceval.client import HttpClient, RateLimitHandler, RateLimitSharedState
+from perceval.errors import HttpClientError, RateLimitError
 
 
 CLIENT_API_URL = "https://gateway.marvel.com/v1/"
@@ -58,7 +61,8 @@ class MockedClient(HttpClient, RateLimitHandler):
                  rate_limit_header=RateLimitHandler.RATE_LIMIT_HEADER,
                  rate_limit_reset_header=RateLimitHandler.RATE_LIMIT_RESET_HEADER,
                  define_calculate_time_to_reset=True,
-                 archive=None, from_archive=False, sanitize=False, ssl_verify=True):
+                 archive=None, from_archive=False, sanitize=False, ssl_verify=True,
+                 rate_limit_db=None, rate_limit_key=None, pace_requests=False):
 
         self.define_calculate_time_to_reset = define_calculate_time_to_reset
         MockedClient.sanitize = sanitize
@@ -69,7 +73,10 @@ class MockedClient(HttpClient, RateLimitHandler):
         super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate,
                                          min_rate_to_sleep=min_rate_to_sleep,
                                          rate_limit_header=rate_limit_header,
-                                         rate_limit_reset_header=rate_limit_reset_header)
+                                         rate_limit_reset_header=rate_limit_reset_header,
+                                         rate_limit_db=rate_limit_db,
+                                         rate_limit_key=rate_limit_key,
+                                         pace_requests=pace_requests)
 
     def calculate_time_to_reset(self):
         if self.define_calculate_time_to_reset:
@@ -340,6 +347,95 @@ class TestHttpClient(unittest.TestCase):
         with self.assertRaises(requests.exceptions.HTTPError):
             _ = client.fetch(CLIENT_SPIDERMAN_URL)
 
+    @httpretty.activate
+    def test_fetch_from_resumed_archive(self):
+        """Test whether archived responses are replayed when the archive is resumed"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+        archive.init_metadata(CLIENT_API_URL, 'MockedBackend', '0.1', 'mock', {})
+
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SUPERMAN_URL,
+                               body="good",
+                               status=200)
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SPIDERMAN_URL,
+                               body="bad",
+                               status=404)
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, archive=archive)
+        _ = client.fetch(CLIENT_SUPERMAN_URL)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            _ = client.fetch(CLIENT_SPIDERMAN_URL)
+
+        self.assertEqual(len(httpretty.HTTPretty.latest_requests), 2)
+
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SPIDERMAN_URL,
+                               body="good now",
+                               status=200)
+
+        archive = Archive(archive_path)
+        archive.resumed = True
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, archive=archive)
+
+        # Responses are replayed, errors are fetched again
+        response = client.fetch(CLIENT_SUPERMAN_URL)
+        self.assertEqual(response.text, "good")
+        self.assertEqual(len(httpretty.HTTPretty.latest_requests), 2)
+
+        response = client.fetch(CLIENT_SPIDERMAN_URL)
+        self.assertEqual(response.text, "good now")
+        self.assertEqual(len(httpretty.HTTPretty.latest_requests), 3)
+
+        # New responses replace the errors in the archive
+        self.assertEqual(archive._count_table_rows('archive'), 2)
+
+        response = client.fetch(CLIENT_SPIDERMAN_URL)
+        self.assertEqual(response.text, "good now")
+        self.assertEqual(len(httpretty.HTTPretty.latest_requests), 3)
+
+    @httpretty.activate
+    def test_fetch_from_resumed_archive_rate_limit(self):
+        """Test whether replayed responses do not update the rate limit"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+        archive.init_metadata(CLIENT_API_URL, 'MockedBackend', '0.1', 'mock', {})
+
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SUPERMAN_URL,
+                               body="good",
+                               status=200,
+                               forcing_headers={
+                                   'X-RateLimit-Remaining': '0',
+                                   'X-RateLimit-Reset': '100'
+                               })
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, archive=archive)
+        _ = client.fetch(CLIENT_SUPERMAN_URL)
+
+        archive = Archive(archive_path)
+        archive.resumed = True
+
+        db_path = os.path.join(self.test_path, 'rate_limit.db')
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1,
+                              archive=archive, rate_limit_db=db_path)
+
+        response = client.fetch(CLIENT_SUPERMAN_URL)
+        self.assertTrue(response.replayed)
+        self.assertEqual(len(httpretty.HTTPretty.latest_requests), 1)
+
+        # The stored rate limit is outdated so it is not used
+        client.update_rate_limit(response)
+        self.assertIsNone(client.rate_limit)
+        self.assertIsNone(client.rate_limit_reset_ts)
+        self.assertIsNone(client.rate_limit_state.acquire(client.rate_limit_key))
+
+        client.sleep_for_rate_limit()
+
     def test_sanitize_for_archive(self):
         """Test whether the default sanitize method works properly"""
 
@@ -457,6 +553,275 @@ class TestRateLimitHandler(unittest.TestCase):
 
         self.assertEqual(before, after)
 
+    @httpretty.activate
+    def test_shared_rate_limit(self):
+        """Test whether clients sharing a database consume the same rate limit"""
+
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SPIDERMAN_URL,
+                               body="",
+                               status=200,
+                               forcing_headers={
+                                   'X-RateLimit-Remaining': '20',
+                                   'X-RateLimit-Reset': '15'
+                               })
+
+        tmp_path = tempfile.mkdtemp(prefix='perceval_')
+        db_path = os.path.join(tmp_path, 'rate_limit.db')
+
+        client_a = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1,
+                                min_rate_to_sleep=17, rate_limit_db=db_path)
+        client_b = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1,
+                                min_rate_to_sleep=17, rate_limit_db=db_path)
+
+        self.assertEqual(client_a.rate_limit_key, client_b.rate_limit_key)
+
+        response = client_a.fetch(CLIENT_SPIDERMAN_URL)
+        client_a.update_rate_limit(response)
+        self.assertEqual(client_a.rate_limit, 20)
+
+        # Each client consumes one request from the shared rate limit
+        client_b.sleep_for_rate_limit()
+        self.assertEqual(client_b.rate_limit, 20)
+        client_a.sleep_for_rate_limit()
+        self.assertEqual(client_a.rate_limit, 19)
+        client_b.sleep_for_rate_limit()
+        self.assertEqual(client_b.rate_limit, 18)
+
+        # A response from the same window keeps the lowest value
+        client_b.update_rate_limit(response)
+        self.assertEqual(client_b.rate_limit, 17)
+
+        # The shared window is over so clients do not wait for it
+        client_a.sleep_for_rate_limit()
+        self.assertEqual(client_a.rate_limit, 17)
+
+        shutil.rmtree(tmp_path)
+
+    def test_shared_rate_limit_keys(self):
+        """Test whether the shared rate limit is not mixed among keys"""
+
+        tmp_path = tempfile.mkdtemp(prefix='perceval_')
+        db_path = os.path.join(tmp_path, 'rate_limit.db')
+
+        key_a = RateLimitHandler.make_rate_limit_key(CLIENT_API_URL, 'token-a')
+        key_b = RateLimitHandler.make_rate_limit_key(CLIENT_API_URL, 'token-b')
+        self.assertNotEqual(key_a, key_b)
+        self.assertNotIn('token-a', key_a)
+
+        client_a = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1,
+                                min_rate_to_sleep=10, rate_limit_db=db_path,
+                                rate_limit_key=key_a, define_calculate_time_to_reset=False)
+        client_b = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1,
+                                min_rate_to_sleep=10, rate_limit_db=db_path,
+                                rate_limit_key=key_b)
+        client_a.calculate_time_to_reset = lambda: 30
+
+        client_a.rate_limit_state.update(key_a, 10, 100)
+
+        with self.assertRaises(RateLimitError) as e:
+            client_a.sleep_for_rate_limit()
+        self.assertEqual(e.exception.seconds_to_reset, 30)
+
+        client_b.sleep_for_rate_limit()
+        self.assertIsNone(client_b.rate_limit)
+
+        shutil.rmtree(tmp_path)
+
+    def test_calculate_pacing_delay(self):
+        """Test whether the remaining rate limit is spread over the time to reset"""
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1,
+                              min_rate_to_sleep=10, pace_requests=True,
+                              define_calculate_time_to_reset=False)
+        client.calculate_time_to_reset = lambda: 60
+
+        self.assertTrue(client.pace_requests)
+        self.assertEqual(client.calculate_pacing_delay(), 0)
+
+        client.rate_limit = 40
+        client.rate_limit_reset_ts = 100
+        self.assertEqual(client.calculate_pacing_delay(), 2)
+
+        client.pacing_backoff = 4
+        self.assertEqual(client.calculate_pacing_delay(), 6)
+
+        client.calculate_time_to_reset = lambda: -5
+        self.assertEqual(client.calculate_pacing_delay(), 4)
+
+    def test_sleep_for_rate_limit_pacing(self):
+        """Test whether requests are paced when the rate limit is not exhausted"""
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1,
+                              min_rate_to_sleep=10, pace_requests=True)
+        client.calculate_pacing_delay = lambda: 0.3
+        client.rate_limit = 50
+
+        before = time.monotonic()
+        client.sleep_for_rate_limit()
+        client.sleep_for_rate_limit()
+        client.sleep_for_rate_limit()
+        after = time.monotonic()
+
+        self.assertGreaterEqual(after - before, 0.6)
+
+        # Pacing is disabled by default
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1,
+                              min_rate_to_sleep=10)
+        client.calculate_pacing_delay = lambda: 10
+        client.rate_limit = 50
+
+        before = time.monotonic()
+        client.sleep_for_rate_limit()
+        after = time.monotonic()
+
+        self.assertLess(after - before, 1)
+
+    def test_sleep_for_rate_limit_pacing_threads(self):
+        """Test whether concurrent threads are paced one after the other"""
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1,
+                              min_rate_to_sleep=10, pace_requests=True)
+        client.calculate_pacing_delay = lambda: 1
+        client.rate_limit = 50
+
+        delays = []
+        delays_lock = threading.Lock()
+
+        def sleep(secs):
+            with delays_lock:
+                delays.append(secs)
+
+        def request():
+            client.sleep_for_rate_limit()
+
+            response = requests.Response()
+            response.headers[RateLimitHandler.RATE_LIMIT_HEADER] = '50'
+            client.update_rate_limit(response)
+
+        with unittest.mock.patch('perceval.client.time.sleep', sleep):
+            threads = [threading.Thread(target=request) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        # Each thread waits for its own slot
+        self.assertEqual(len(delays), 8)
+
+        delays.sort()
+        for i, delay in enumerate(delays):
+            self.assertAlmostEqual(delay, i + 1, delta=0.5)
+
+        self.assertEqual(client.rate_limit, 50)
+
+    @httpretty.activate
+    def test_pacing_backoff(self):
+        """Test whether the backoff increases when requests are throttled"""
+
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SPIDERMAN_URL,
+                               responses=[
+                                   httpretty.Response(body="", status=429,
+                                                      forcing_headers={'Retry-After': '0'}),
+                                   httpretty.Response(body="", status=200)
+                               ])
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SUPERMAN_URL,
+                               body="",
+                               status=200,
+                               forcing_headers={
+                                   'Retry-After': '8'
+                               })
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_BATMAN_URL,
+                               body="",
+                               status=200)
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1,
+                              pace_requests=True)
+        self.assertEqual(client.pacing_backoff, 0)
+
+        response = client.fetch(CLIENT_SPIDERMAN_URL)
+        client.update_rate_limit(response)
+        self.assertEqual(client.pacing_backoff, 1)
+
+        response = client.fetch(CLIENT_SUPERMAN_URL)
+        client.update_rate_limit(response)
+        self.assertEqual(client.pacing_backoff, 8)
+
+        response = client.fetch(CLIENT_SUPERMAN_URL)
+        client.update_rate_limit(response)
+        self.assertEqual(client.pacing_backoff, 16)
+
+        expected = [8, 4, 2, 1, 0, 0]
+        for backoff in expected:
+            response = client.fetch(CLIENT_BATMAN_URL)
+            client.update_rate_limit(response)
+            self.assertEqual(client.pacing_backoff, backoff)
+
+
+class TestRateLimitSharedState(unittest.TestCase):
+    """RateLimitSharedState tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.db_path = os.path.join(self.test_path, 'rate_limit.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_update(self):
+        """Test whether the rate limit is updated using the reset window"""
+
+        state = RateLimitSharedState(self.db_path)
+
+        rate = state.update('key', 100, 1000)
+        self.assertEqual(rate, (100, 1000))
+
+        rate = state.update('key', 120, 1000)
+        self.assertEqual(rate, (100, 1000))
+
+        rate = state.update('key', 90, 1000)
+        self.assertEqual(rate, (90, 1000))
+
+        # Close reset times belong to the same window
+        rate = state.update('key', 95, 1001)
+        self.assertEqual(rate, (90, 1000))
+
+        rate = state.update('key', 5000, 2000)
+        self.assertEqual(rate, (5000, 2000))
+
+        # Data is shared with other instances
+        other = RateLimitSharedState(self.db_path)
+        rate = other.update('key', 4999, 2000)
+        self.assertEqual(rate, (4999, 2000))
+
+    def test_acquire(self):
+        """Test whether a request is consumed from the rate limit"""
+
+        state = RateLimitSharedState(self.db_path)
+        other = RateLimitSharedState(self.db_path)
+
+        self.assertIsNone(state.acquire('key'))
+
+        state.update('key', 3, 1000)
+
+        self.assertEqual(state.acquire('key'), (3, 1000))
+        self.assertEqual(other.acquire('key'), (2, 1000))
+        self.assertEqual(state.acquire('key'), (1, 1000))
+        self.assertEqual(other.acquire('key'), (0, 1000))
+        self.assertIsNone(state.acquire('unknown'))
+
+    def test_invalid_database(self):
+        """Test whether an exception is raised when the database is not valid"""
+
+        with open(self.db_path, 'w') as fd:
+            fd.write("this is not a database")
+
+        with self.assertRaises(HttpClientError):
+            RateLimitSharedState(self.db_path)
+
 
 if __name__ == "__main__":
     unittest.main(warnings='ignore')
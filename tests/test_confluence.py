@@ -26,9 +26,11 @@
 #
 
 import datetime
+import json
 import os
 import shutil
 import unittest
+import unittest.mock
 import urllib
 
 import httpretty
@@ -52,6 +54,7 @@ CONFLUENCE_HISTORICAL_CONTENT_1 = CONFLUENCE_API_URL + '/content/1'
 CONFLUENCE_HISTORICAL_CONTENT_2 = CONFLUENCE_API_URL + '/content/2'
 CONFLUENCE_HISTORICAL_CONTENT_3 = CONFLUENCE_API_URL + '/content/3'
 CONFLUENCE_HISTORICAL_CONTENT_ATT = CONFLUENCE_API_URL + '/content/att1'
+CONFLUENCE_HISTORICAL_CONTENT_4 = CONFLUENCE_API_URL + '/content/4'
 CONFLUENCE_CONTENTS_SPACE_URL = CONFLUENCE_URL + ''
 
 STATUS_CODE_SUCCESS = 200
@@ -152,6 +155,50 @@ def setup_http_server(not_handle_status_code=False):
     return http_requests
 
 
+def setup_versions_http_server(nversions):
+    """Setup a mock HTTP server with a content of `nversions` versions.
+
+    Each version of the content was created a day after the previous
+    one, starting on 2016-06-01.
+    """
+    http_requests = []
+
+    contents = json.loads(read_file('data/confluence/confluence_contents_versions.json'))
+    content = contents['results'][1]
+    content['id'] = '4'
+    content['version']['number'] = nversions
+    contents['results'] = [content]
+    del contents['_links']['next']
+
+    template = read_file('data/confluence/confluence_content_2_v1.json')
+
+    def request_callback(request, uri, headers):
+        http_requests.append(request)
+
+        if uri.startswith(CONFLUENCE_CONTENTS_URL):
+            return 200, headers, json.dumps(contents)
+
+        params = urllib.parse.parse_qs(urllib.parse.urlparse(uri).query)
+        version = int(params['version'][0])
+
+        hc = json.loads(template)
+        hc['id'] = '4'
+        hc['version']['number'] = version
+        hc['version']['when'] = '2016-06-%02dT00:00:00.000Z' % version
+        hc['history']['latest'] = (version == nversions)
+
+        return 200, headers, json.dumps(hc)
+
+    httpretty.register_uri(httpretty.GET,
+                           CONFLUENCE_CONTENTS_URL,
+                           body=request_callback)
+    httpretty.register_uri(httpretty.GET,
+                           CONFLUENCE_HISTORICAL_CONTENT_4,
+                           body=request_callback)
+
+    return http_requests
+
+
 class TestConfluenceBackend(unittest.TestCase):
     """Confluence backend tests"""
 
@@ -165,6 +212,7 @@ class TestConfluenceBackend(unittest.TestCase):
         self.assertEqual(confluence.tag, 'test')
         self.assertIsNone(confluence.client)
         self.assertTrue(confluence.ssl_verify)
+        self.assertIsNone(confluence.fetch_workers)
 
         # When tag is empty or None it will be set to
         # the value in url
@@ -228,7 +276,7 @@ class TestConfluenceBackend(unittest.TestCase):
             {
                 'cql': ["lastModified>='1970-01-01 00:00' order by lastModified"],
                 'limit': ['200'],
-                'expand': ['ancestors']
+                'expand': ['ancestors,version']
             },
             {
                 'cql': ["lastModified>='1970-01-01 00:00' order by lastModified"],
@@ -301,7 +349,7 @@ class TestConfluenceBackend(unittest.TestCase):
             {
                 'cql': ["space in (TEST) and lastModified>='1970-01-01 00:00' order by lastModified"],
                 'limit': ['200'],
-                'expand': ['ancestors']
+                'expand': ['ancestors,version']
             },
             {
                 'expand': ['body.storage,history,version'],
@@ -390,7 +438,7 @@ class TestConfluenceBackend(unittest.TestCase):
             {
                 'cql': ["lastModified>='2016-06-16 00:00' order by lastModified"],
                 'limit': ['200'],
-                'expand': ['ancestors']
+                'expand': ['ancestors,version']
             },
             {
                 # Hardcoded in JSON dataset
@@ -430,6 +478,70 @@ class TestConfluenceBackend(unittest.TestCase):
         for i in range(len(expected)):
             self.assertDictEqual(http_requests[i].querystring, expected[i])
 
+    @httpretty.activate
+    def test_fetch_versions_from_date(self):
+        """Test whether only the versions updated since the given date are fetched"""
+
+        http_requests = setup_versions_http_server(20)
+
+        from_date = datetime.datetime(2016, 6, 15, 0, 0, 0)
+
+        confluence = Confluence(CONFLUENCE_URL)
+        hcs = [hc for hc in confluence.fetch(from_date=from_date)]
+
+        self.assertListEqual([hc['data']['version']['number'] for hc in hcs],
+                             list(range(15, 21)))
+
+        # The first version is found by bisection and it is not requested again
+        versions = [int(request.querystring['version'][0]) for request in http_requests[1:]]
+        self.assertListEqual(versions, [10, 15, 13, 14, 16, 17, 18, 19, 20])
+
+        # Nothing is returned when all the versions are older
+        http_requests.clear()
+
+        from_date = datetime.datetime(2016, 7, 1, 0, 0, 0)
+        hcs = [hc for hc in confluence.fetch(from_date=from_date)]
+
+        self.assertListEqual(hcs, [])
+
+        versions = [int(request.querystring['version'][0]) for request in http_requests[1:]]
+        self.assertListEqual(versions, [10, 15, 18, 19, 20])
+
+    @httpretty.activate
+    def test_fetch_fetch_workers(self):
+        """Test whether versions are fetched concurrently keeping their order"""
+
+        http_requests = setup_versions_http_server(20)
+
+        from_date = datetime.datetime(2016, 6, 15, 0, 0, 0)
+
+        confluence = Confluence(CONFLUENCE_URL, fetch_workers=3)
+        hcs = [hc for hc in confluence.fetch(from_date=from_date)]
+
+        self.assertListEqual([hc['data']['version']['number'] for hc in hcs],
+                             list(range(15, 21)))
+
+        versions = [int(request.querystring['version'][0]) for request in http_requests[1:]]
+        self.assertListEqual(versions[:4], [10, 15, 13, 14])
+        self.assertListEqual(sorted(versions[4:]), [16, 17, 18, 19, 20])
+
+    @httpretty.activate
+    def test_fetch_fetch_workers_contents(self):
+        """Test whether the same contents are fetched using several threads"""
+
+        setup_http_server()
+
+        confluence = Confluence(CONFLUENCE_URL, max_contents=2)
+        expected = [hc for hc in confluence.fetch()]
+
+        confluence = Confluence(CONFLUENCE_URL, max_contents=2, fetch_workers=4)
+        hcs = [hc for hc in confluence.fetch()]
+
+        self.assertListEqual([hc['uuid'] for hc in hcs],
+                             [hc['uuid'] for hc in expected])
+        self.assertListEqual([hc['data'] for hc in hcs],
+                             [hc['data'] for hc in expected])
+
     @httpretty.activate
     def test_fetch_status_code_not_handled(self):
         """Test whether an exception is thrown when the API returns a HTTP status code
@@ -481,7 +593,7 @@ class TestConfluenceBackend(unittest.TestCase):
             {
                 'cql': ["lastModified>='1970-01-01 00:00' order by lastModified"],
                 'limit': ['200'],
-                'expand': ['ancestors']
+                'expand': ['ancestors,version']
             },
             {
                 'cql': ["lastModified>='1970-01-01 00:00' order by lastModified"],
@@ -522,7 +634,7 @@ class TestConfluenceBackend(unittest.TestCase):
         expected = {
             'cql': ["lastModified>='2016-07-08 00:00' order by lastModified"],
             'limit': ['200'],
-            'expand': ['ancestors']
+            'expand': ['ancestors,version']
         }
 
         self.assertEqual(len(http_requests), 1)
@@ -600,6 +712,27 @@ class TestConfluenceBackendArchive(TestCaseBackendArchive):
 
         self._test_fetch_from_archive(from_date=None)
 
+    @httpretty.activate
+    def test_fetch_from_archive_without_versions(self):
+        """Test if contents are fetched from archives that did not request their versions"""
+
+        setup_http_server()
+
+        # Archives created by older versions of the backend only
+        # expanded the ancestors of the contents
+        with unittest.mock.patch.object(ConfluenceClient, 'VEXPAND_CONTENTS',
+                                        [ConfluenceClient.PANCESTORS]):
+            items = [item for item in self.backend_write_archive.fetch()]
+
+        items_archived = [item for item in self.backend_read_archive.fetch_from_archive()]
+
+        self.assertEqual(len(items_archived), len(items))
+
+        for item, archived_item in zip(items, items_archived):
+            del item['timestamp']
+            del archived_item['timestamp']
+            self.assertEqual(item, archived_item)
+
     @httpretty.activate
     def test_fetch_empty_from_archive(self):
         """Test if nothing is returned from the archive when there are no contents"""
@@ -637,12 +770,14 @@ class TestConfluenceCommand(unittest.TestCase):
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
         self.assertIsNone(parsed_args.spaces)
         self.assertEqual(parsed_args.max_contents, 200)
+        self.assertIsNone(parsed_args.fetch_workers)
 
         args = ['http://example.com',
                 '--tag', 'test', '--no-ssl-verify',
                 '--from-date', '1970-01-01',
                 '--spaces', 'TEST', 'PERCEVAL',
-                '--max-contents', '2']
+                '--max-contents', '2',
+                '--fetch-workers', '4']
 
         parsed_args = parser.parse(*args)
         self.assertEqual(parsed_args.url, 'http://example.com')
@@ -651,6 +786,7 @@ class TestConfluenceCommand(unittest.TestCase):
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
         self.assertEqual(parsed_args.spaces, ['TEST', 'PERCEVAL'])
         self.assertEqual(parsed_args.max_contents, 2)
+        self.assertEqual(parsed_args.fetch_workers, 4)
 
 
 class TestConfluenceClient(unittest.TestCase):
@@ -688,7 +824,7 @@ class TestConfluenceClient(unittest.TestCase):
             'cql': ["lastModified>='2016-07-08 00:00' order by lastModified"],
             'start': ['10'],
             'limit': ['2'],
-            'expand': ['ancestors']
+            'expand': ['ancestors,version']
         }
 
         self.assertEqual(len(http_requests), 1)
@@ -711,7 +847,7 @@ class TestConfluenceClient(unittest.TestCase):
             {
                 'cql': ["lastModified>='1970-01-01 00:00' order by lastModified"],
                 'limit': ['2'],
-                'expand': ['ancestors']
+                'expand': ['ancestors,version']
             },
             {
                 'cql': ["lastModified>='1970-01-01 00:00' order by lastModified"],
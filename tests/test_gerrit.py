@@ -24,18 +24,26 @@
 #
 
 import datetime
+import json
 import os
 import shutil
+import tempfile
+import threading
+import time
 import unittest.mock
 
+import httpretty
+
 from perceval.backend import BackendCommandArgumentParser
 from perceval.errors import BackendError
-from perceval.utils import DEFAULT_DATETIME
+from perceval.utils import DEFAULT_DATETIME, map_concurrently
 
 from perceval.backends.core.gerrit import (CATEGORY_REVIEW, MAX_REVIEWS, PORT,
+                                           logger,
                                            Gerrit,
                                            GerritCommand,
-                                           GerritClient)
+                                           GerritClient,
+                                           GerritRESTClient)
 
 from base import TestCaseBackendArchive
 
@@ -43,12 +51,11 @@ from base import TestCaseBackendArchive
 GERRIT_REPO = "example.org"
 GERRIT_USER = "user"
 
-VERSION_UNKNOWN = 'data/gerrit/gerrit_version_unknown'
-VERSION_214 = 'data/gerrit/gerrit_version_214'
-VERSION_313 = 'data/gerrit/gerrit_version_313'
-REVIEWS_PAGE_1 = 'data/gerrit/gerrit_reviews_page_1'
-REVIEWS_PAGE_2 = 'data/gerrit/gerrit_reviews_page_2'
-REVIEWS_PAGE_3 = 'data/gerrit/gerrit_reviews_page_3'
+FAKE_GERRIT = 'data/gerrit/fake-gerrit'
+
+GERRIT_REST_URL = "https://example.org/r"
+GERRIT_REST_CHANGES_URL = GERRIT_REST_URL + "/changes/"
+GERRIT_REST_VERSION_URL = GERRIT_REST_URL + "/config/server/version"
 
 CMD_VERSION = "ssh  -p 29418 user@example.org gerrit  version "
 CMD_REVIEWS_1 = "ssh  -p 29418 user@example.org gerrit  query limit:2 " \
@@ -58,11 +65,6 @@ CMD_REVIEWS_2 = "ssh  -p 29418 user@example.org gerrit  query limit:2 " \
 CMD_REVIEWS_3 = "ssh  -p 29418 user@example.org gerrit  query limit:2 " \
                 "'(status:open OR status:closed)' --all-approvals --comments --format=JSON --start=4"
 
-RESPONSES = {CMD_VERSION: VERSION_214,
-             CMD_REVIEWS_1: REVIEWS_PAGE_1,
-             CMD_REVIEWS_2: REVIEWS_PAGE_2,
-             CMD_REVIEWS_3: REVIEWS_PAGE_3}
-
 
 def read_file(filename, mode='r'):
     with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), filename), mode) as f:
@@ -70,57 +72,64 @@ def read_file(filename, mode='r'):
     return content
 
 
-def mock_check_ouput_gerrit_3(*args, **kwargs):
-    """Mock subprocess.check_output"""
-
-    responses = {CMD_VERSION: VERSION_313,
-                 CMD_REVIEWS_1: REVIEWS_PAGE_1,
-                 CMD_REVIEWS_2: REVIEWS_PAGE_2,
-                 CMD_REVIEWS_3: REVIEWS_PAGE_3}
-
-    cmd = args[0]
-    try:
-        data = read_file(responses[cmd], 'rb')
-    except Exception:
-        data = None
-
-    return data
+def setup_fake_gerrit(test_case):
+    """Run the fake Gerrit server script instead of `ssh` during a test.
 
+    :returns: path to the file where the calls to `ssh` are logged
+    """
+    bin_path = tempfile.mkdtemp(prefix='perceval_')
+    os.symlink(os.path.join(os.path.dirname(os.path.abspath(__file__)), FAKE_GERRIT),
+               os.path.join(bin_path, 'ssh'))
+    log_path = os.path.join(bin_path, 'calls.log')
 
-def mock_check_ouput(*args, **kwargs):
-    """Mock subprocess.check_output"""
+    environ = {
+        'PATH': bin_path + os.pathsep + os.environ.get('PATH', ''),
+        'FAKE_GERRIT_LOG': log_path
+    }
+    patcher = unittest.mock.patch.dict(os.environ, environ)
+    patcher.start()
 
-    responses = {CMD_VERSION: VERSION_214,
-                 CMD_REVIEWS_1: REVIEWS_PAGE_1,
-                 CMD_REVIEWS_2: REVIEWS_PAGE_2,
-                 CMD_REVIEWS_3: REVIEWS_PAGE_3}
+    test_case.addCleanup(patcher.stop)
+    test_case.addCleanup(shutil.rmtree, bin_path)
 
-    cmd = args[0]
-    try:
-        data = read_file(responses[cmd], 'rb')
-    except Exception:
-        data = None
+    return log_path
 
-    return data
 
+def setup_rest_server(url=GERRIT_REST_URL):
+    """Register the REST API of a Gerrit server with two pages of changes"""
 
-def mock_check_ouput_version_unknown(*args, **kwargs):
-    """Mock subprocess.check_output"""
+    pages = {
+        '0': read_file('data/gerrit/gerrit_rest_changes_page_1'),
+        '2': read_file('data/gerrit/gerrit_rest_changes_page_2')
+    }
 
-    data = read_file(VERSION_UNKNOWN, 'rb')
+    def request_callback(request, uri, headers):
+        body = pages.get(request.querystring['S'][0], ")]}'\n[]\n")
+        return 200, headers, body
 
-    return data
+    httpretty.register_uri(httpretty.GET,
+                           url + "/config/server/version",
+                           body=read_file('data/gerrit/gerrit_rest_version'),
+                           status=200)
+    httpretty.register_uri(httpretty.GET,
+                           url + "/changes/",
+                           body=request_callback)
 
 
-def mock_check_ouput_empty_review(*args, **kwargs):
-    """Mock subprocess.check_output"""
+def read_ssh_calls(log_path):
+    """Read the arguments of the calls to `ssh`"""
 
-    return None
+    with open(log_path) as f:
+        calls = [json.loads(line) for line in f]
+    return calls
 
 
 class TestGerritBackend(unittest.TestCase):
     """Gerrit backend tests """
 
+    def setUp(self):
+        self.ssh_log = setup_fake_gerrit(self)
+
     def test_initialization(self):
         """Test whether attributes are initializated"""
 
@@ -132,6 +141,9 @@ class TestGerritBackend(unittest.TestCase):
         self.assertEqual(gerrit.tag, 'test')
         self.assertIsNone(gerrit.client)
         self.assertIsNone(gerrit.blacklist_ids)
+        self.assertIsNone(gerrit.fetch_workers)
+        self.assertIsNone(gerrit.rest_url)
+        self.assertIsNone(gerrit.password)
 
         gerrit = Gerrit(GERRIT_REPO, GERRIT_USER,
                         port=1000, max_reviews=100,
@@ -163,12 +175,9 @@ class TestGerritBackend(unittest.TestCase):
 
         self.assertEqual(Gerrit.has_resuming(), False)
 
-    @unittest.mock.patch('subprocess.check_output', mock_check_ouput)
     def test_fetch(self):
         """Test fetch method"""
 
-        mock_check_ouput.side_effect = mock_check_ouput
-
         gerrit = Gerrit(GERRIT_REPO, user=GERRIT_USER, port=29418, max_reviews=2)
         reviews = [review for review in gerrit.fetch(from_date=None)]
 
@@ -205,12 +214,9 @@ class TestGerritBackend(unittest.TestCase):
         self.assertEqual(review['data']['owner']['username'], "jayprakash12345")
         self.assertEqual(len(review['data']['patchSets']), 3)
 
-    @unittest.mock.patch('subprocess.check_output', mock_check_ouput)
     def test_serch_fields(self):
         """Test whether the search_fields is properly set"""
 
-        mock_check_ouput.side_effect = mock_check_ouput
-
         gerrit = Gerrit(GERRIT_REPO, user=GERRIT_USER, port=29418, max_reviews=2)
         reviews = [review for review in gerrit.fetch(from_date=None)]
 
@@ -252,12 +258,9 @@ class TestGerritBackend(unittest.TestCase):
         self.assertEqual(review['data']['id'], 'I9992907ef53f122b54ef2c64146da513477db025')
         self.assertEqual(review['data']['id'], review['search_fields']['review_hash'])
 
-    @unittest.mock.patch('subprocess.check_output', mock_check_ouput)
     def test_fetch_from_date(self):
         """Test fetch method with from date"""
 
-        mock_check_ouput.side_effect = mock_check_ouput
-
         gerrit = Gerrit(GERRIT_REPO, user=GERRIT_USER, port=29418, max_reviews=2)
         from_date = datetime.datetime(2018, 3, 5)
         reviews = [review for review in gerrit.fetch(from_date=from_date)]
@@ -289,6 +292,302 @@ class TestGerritBackend(unittest.TestCase):
         self.assertEqual(review['data']['owner']['username'], "elukey")
         self.assertEqual(len(review['data']['patchSets']), 2)
 
+    def test_fetch_ssh_connection(self):
+        """Test whether the commands share the same SSH connection"""
+
+        gerrit = Gerrit(GERRIT_REPO, user=GERRIT_USER, port=29418, max_reviews=2)
+        reviews = [review for review in gerrit.fetch(from_date=None)]
+
+        self.assertEqual(len(reviews), 5)
+
+        calls = read_ssh_calls(self.ssh_log)
+        self.assertEqual(len(calls), 6)
+
+        # The master connection is started first
+        master = calls[0]
+        self.assertIn('ControlMaster=yes', master)
+        self.assertIn('-N', master)
+        control_path = master[master.index('ControlMaster=yes') + 2]
+        self.assertTrue(control_path.startswith('ControlPath='))
+
+        # Commands use the master connection and are not run by a shell
+        expected = ['-p', '29418', '-o', control_path, 'user@example.org',
+                    'gerrit', 'query', 'limit:2', '(status:open OR status:closed)',
+                    '--all-approvals', '--comments', '--format=JSON']
+        self.assertListEqual(calls[1], ['-p', '29418', '-o', control_path,
+                                        'user@example.org', 'gerrit', 'version'])
+        self.assertListEqual(calls[2], expected + ['--start=0'])
+        self.assertListEqual(calls[3], expected + ['--start=2'])
+        self.assertListEqual(calls[4], expected + ['--start=4'])
+
+        # The master connection is closed at the end
+        self.assertListEqual(calls[5], ['-p', '29418', '-o', control_path,
+                                        '-O', 'exit', 'user@example.org'])
+        self.assertFalse(os.path.exists(control_path[len('ControlPath='):]))
+
+    @unittest.mock.patch.dict(os.environ, {'FAKE_GERRIT_NO_MASTER': '1'})
+    def test_fetch_ssh_no_master(self):
+        """Test whether reviews are fetched when the master connection cannot be started"""
+
+        gerrit = Gerrit(GERRIT_REPO, user=GERRIT_USER, port=29418, max_reviews=2)
+
+        with self.assertLogs(logger, level='WARNING') as cm:
+            reviews = [review for review in gerrit.fetch(from_date=None)]
+            self.assertRegex(cm.output[0], "SSH master connection to example.org not started")
+
+        self.assertEqual(len(reviews), 5)
+
+        calls = read_ssh_calls(self.ssh_log)
+        self.assertEqual(len(calls), 5)
+        self.assertListEqual(calls[1], ['-p', '29418', 'user@example.org', 'gerrit', 'version'])
+
+        for call in calls[1:]:
+            self.assertNotIn('-o', call)
+
+    @unittest.mock.patch.dict(os.environ, {'FAKE_GERRIT_VERSION': 'gerrit_version_28'})
+    def test_fetch_gerrit28(self):
+        """Test whether open and closed reviews are merged on Gerrit 2.8"""
+
+        gerrit = Gerrit(GERRIT_REPO, user=GERRIT_USER, port=29418, max_reviews=2)
+        reviews = [review for review in gerrit.fetch(from_date=None)]
+
+        # Reviews are sorted from the newest to the oldest; on a tie,
+        # open reviews go first
+        numbers = [review['data']['number'] for review in reviews]
+        self.assertListEqual(numbers, ['1', '4', '2', '5', '3'])
+
+        queries = [call[call.index('gerrit') + 1:] for call in read_ssh_calls(self.ssh_log)
+                   if 'query' in call]
+        expected = [
+            ['query', 'limit:2', 'status:open', '--all-approvals', '--comments', '--format=JSON'],
+            ['query', 'limit:2', 'status:closed', '--all-approvals', '--comments', '--format=JSON'],
+            ['query', 'limit:2', 'status:open', '--all-approvals', '--comments', '--format=JSON',
+             'resume_sortkey:o2'],
+            ['query', 'limit:2', 'status:closed', '--all-approvals', '--comments', '--format=JSON',
+             'resume_sortkey:c2']
+        ]
+        self.assertListEqual(queries, expected)
+
+        # Reviews are not requested once they are older than from_date
+        from_date = datetime.datetime.utcfromtimestamp(1520259500)
+        reviews = [review for review in gerrit.fetch(from_date=from_date)]
+
+        numbers = [review['data']['number'] for review in reviews]
+        self.assertListEqual(numbers, ['1', '4'])
+
+        # Pages are the same when they are requested in advance
+        gerrit = Gerrit(GERRIT_REPO, user=GERRIT_USER, port=29418, max_reviews=2,
+                        fetch_workers=2)
+        reviews = [review for review in gerrit.fetch(from_date=None)]
+
+        numbers = [review['data']['number'] for review in reviews]
+        self.assertListEqual(numbers, ['1', '4', '2', '5', '3'])
+
+    def test_fetch_fetch_workers(self):
+        """Test whether the next pages of reviews are requested in advance"""
+
+        gerrit = Gerrit(GERRIT_REPO, user=GERRIT_USER, port=29418, max_reviews=2)
+        expected = [review for review in gerrit.fetch(from_date=None)]
+        ncalls = len(read_ssh_calls(self.ssh_log))
+
+        gerrit = Gerrit(GERRIT_REPO, user=GERRIT_USER, port=29418, max_reviews=2,
+                        fetch_workers=2)
+        reviews = gerrit.fetch(from_date=None)
+
+        # The next pages are requested while the first one is consumed
+        fetched = [next(reviews)]
+        timeout = time.time() + 10
+
+        while time.time() < timeout:
+            starts = [call[-1] for call in read_ssh_calls(self.ssh_log)[ncalls:] if 'query' in call]
+            if '--start=2' in starts:
+                break
+            time.sleep(0.01)
+
+        self.assertIn('--start=0', starts)
+        self.assertIn('--start=2', starts)
+
+        fetched += [review for review in reviews]
+
+        self.assertListEqual([review['uuid'] for review in fetched],
+                             [review['uuid'] for review in expected])
+        self.assertListEqual([review['data'] for review in fetched],
+                             [review['data'] for review in expected])
+
+        # Each page is requested once; some pages after the last
+        # one might be requested in advance too
+        starts = [call[-1] for call in read_ssh_calls(self.ssh_log)[ncalls:] if 'query' in call]
+        self.assertEqual(len(starts), len(set(starts)))
+        self.assertTrue({'--start=0', '--start=2', '--start=4'} <= set(starts))
+        self.assertTrue(set(starts) <= {'--start=%s' % n for n in range(0, 14, 2)})
+
+    def test_fetch_fetch_workers_max_sessions(self):
+        """Test whether the number of threads is limited over SSH"""
+
+        gerrit = Gerrit(GERRIT_REPO, user=GERRIT_USER, port=29418, max_reviews=2,
+                        fetch_workers=20)
+
+        with unittest.mock.patch('perceval.backends.core.gerrit.map_concurrently',
+                                 wraps=map_concurrently) as mocked:
+            reviews = [review for review in gerrit.fetch(from_date=None)]
+
+        self.assertEqual(len(reviews), 5)
+        self.assertEqual(mocked.call_args[1]['workers'], GerritClient.MAX_SESSIONS)
+
+    @httpretty.activate
+    def test_fetch_rest(self):
+        """Test whether reviews are fetched using the REST API"""
+
+        setup_rest_server()
+
+        gerrit = Gerrit(GERRIT_REPO, max_reviews=2, rest_url=GERRIT_REST_URL)
+        reviews = [review for review in gerrit.fetch(from_date=None)]
+
+        self.assertIsInstance(gerrit.client, GerritRESTClient)
+        self.assertEqual(len(reviews), 3)
+
+        review = reviews[0]
+        self.assertEqual(review['origin'], GERRIT_REPO)
+        self.assertEqual(review['category'], CATEGORY_REVIEW)
+        self.assertEqual(review['updated_on'], 1520261099.0)
+        self.assertEqual(review['data']['number'], 416443)
+        self.assertEqual(review['data']['owner']['username'], 'gehel')
+        self.assertEqual(len(review['data']['comments']), 3)
+        self.assertEqual(len(review['data']['patchSets']), 2)
+        self.assertEqual(len(review['data']['patchSets'][1]['approvals']), 2)
+
+        # Only the last patch set has approvals and sizes are not available
+        self.assertNotIn('approvals', review['data']['patchSets'][0])
+        self.assertNotIn('sizeInsertions', review['data']['patchSets'][1])
+        self.assertNotIn('sizeDeletions', review['data']['patchSets'][1])
+
+        review = reviews[1]
+        self.assertEqual(review['data']['number'], 415887)
+        self.assertEqual(review['data']['status'], 'NEW')
+        self.assertTrue(review['data']['open'])
+
+        review = reviews[2]
+        self.assertEqual(review['data']['number'], 416224)
+        self.assertEqual(review['data']['topic'], 'T188633')
+        self.assertFalse(review['data']['open'])
+
+        # Reviews are requested by offset, with all their data
+        requests = [request for request in httpretty.latest_requests() if 'changes' in request.path]
+        self.assertEqual(len(requests), 2)
+
+        expected = {
+            'q': ['(status:open OR status:closed)'],
+            'n': ['2'],
+            'S': ['0'],
+            'o': ['DETAILED_ACCOUNTS', 'ALL_REVISIONS', 'ALL_COMMITS',
+                  'MESSAGES', 'DETAILED_LABELS']
+        }
+        self.assertDictEqual(requests[0].querystring, expected)
+        self.assertEqual(requests[1].querystring['S'], ['2'])
+
+        # Reviews are not returned once they are older than from_date
+        from_date = datetime.datetime(2018, 3, 5, 14, 40)
+        reviews = [review for review in gerrit.fetch(from_date=from_date)]
+
+        self.assertEqual(len(reviews), 1)
+        self.assertEqual(reviews[0]['data']['number'], 416443)
+
+    @httpretty.activate
+    def test_fetch_rest_fetch_workers(self):
+        """Test whether pages of changes are fetched concurrently using the REST API"""
+
+        setup_rest_server()
+
+        gerrit = Gerrit(GERRIT_REPO, max_reviews=2, rest_url=GERRIT_REST_URL)
+        expected = [review for review in gerrit.fetch(from_date=None)]
+        nrequests = len(httpretty.latest_requests())
+
+        gerrit = Gerrit(GERRIT_REPO, max_reviews=2, rest_url=GERRIT_REST_URL,
+                        fetch_workers=3)
+        reviews = [review for review in gerrit.fetch(from_date=None)]
+
+        self.assertListEqual([review['uuid'] for review in reviews],
+                             [review['uuid'] for review in expected])
+        self.assertListEqual([review['data'] for review in reviews],
+                             [review['data'] for review in expected])
+
+        starts = [request.querystring['S'][0] for request in httpretty.latest_requests()[nrequests:]
+                  if 'changes' in request.path]
+        self.assertEqual(len(starts), len(set(starts)))
+        self.assertTrue({'0', '2'} <= set(starts))
+
+    @httpretty.activate
+    def test_fetch_rest_fetch_workers_last_page(self):
+        """Test whether no more pages are requested after the last one"""
+
+        setup_rest_server()
+
+        last_page = threading.Event()
+        offsets = []
+
+        def _get_reviews(backend, offset, filter_=None):
+            offsets.append(offset)
+
+            # The second page is received after the last one
+            if offset == 1:
+                last_page.wait(10)
+                time.sleep(0.2)
+
+            reviews = [{'number': 3 - i, 'lastUpdated': 1520261000 - i}
+                       for i in range(offset, min(offset + 1, 3))]
+
+            if offset == 3:
+                last_page.set()
+
+            return reviews
+
+        gerrit = Gerrit(GERRIT_REPO, max_reviews=1, rest_url=GERRIT_REST_URL,
+                        fetch_workers=2)
+
+        with unittest.mock.patch.object(Gerrit, '_get_reviews', _get_reviews):
+            reviews = [review for review in gerrit.fetch(from_date=None)]
+
+        self.assertListEqual([review['data']['number'] for review in reviews], [3, 2, 1])
+        self.assertListEqual(sorted(offsets), [0, 1, 2, 3])
+
+    @httpretty.activate
+    def test_fetch_rest_fetch_workers_from_date(self):
+        """Test whether pages older than from_date are not requested concurrently"""
+
+        setup_rest_server()
+
+        offsets = []
+
+        def _get_reviews(backend, offset, filter_=None):
+            offsets.append(offset)
+            return [{'number': 10 - i, 'lastUpdated': 1520261000 - i}
+                    for i in range(offset, min(offset + 2, 10))]
+
+        gerrit = Gerrit(GERRIT_REPO, max_reviews=2, rest_url=GERRIT_REST_URL,
+                        fetch_workers=2)
+
+        # Only the first review was updated after from_date
+        from_date = datetime.datetime(2018, 3, 5, 14, 43, 19, 500000)
+
+        with unittest.mock.patch.object(Gerrit, '_get_reviews', _get_reviews):
+            reviews = [review for review in gerrit.fetch(from_date=from_date)]
+
+        self.assertListEqual([review['data']['number'] for review in reviews], [10])
+        self.assertListEqual(offsets, [0])
+
+        # The first page is within the range, so the next ones are
+        # requested concurrently until the one that reaches from_date
+        offsets.clear()
+        from_date = datetime.datetime(2018, 3, 5, 14, 43, 16, 500000)
+
+        with unittest.mock.patch.object(Gerrit, '_get_reviews', _get_reviews):
+            reviews = [review for review in gerrit.fetch(from_date=from_date)]
+
+        self.assertListEqual([review['data']['number'] for review in reviews], [10, 9, 8, 7])
+        self.assertEqual(offsets[0], 0)
+        self.assertIn(2, offsets)
+        self.assertLessEqual(max(offsets), 2 + 3 * 2)
+
     def test_parse_reviews(self):
         """Test parse reviews method"""
 
@@ -307,12 +606,29 @@ class TestGerritBackend(unittest.TestCase):
         self.assertEqual(review['owner']['username'], "lucaswerkmeister-wmde")
         self.assertEqual(len(review['patchSets']), 1)
 
+    def test_parse_reviews_line_separators(self):
+        """Test whether reviews are only split by new lines"""
+
+        review = {
+            'project': 'perceval',
+            'number': 1,
+            'comments': [{'message': 'a\x0cb\x1cc\x85d\u2028e\u2029f\x0bg'}]
+        }
+        stats = {'type': 'stats', 'rowCount': 1}
+        raw_reviews = json.dumps(review, ensure_ascii=False) + '\n' + json.dumps(stats) + '\n'
+
+        reviews = Gerrit.parse_reviews(raw_reviews)
+
+        self.assertEqual(len(reviews), 1)
+        self.assertDictEqual(reviews[0], review)
+
 
 class TestGerritBackendArchive(TestCaseBackendArchive):
     """Gerrit backend tests using an archive"""
 
     def setUp(self):
         super().setUp()
+        setup_fake_gerrit(self)
         self.backend_write_archive = Gerrit(GERRIT_REPO, user=GERRIT_USER, port=29418, max_reviews=2,
                                             archive=self.archive)
         self.backend_read_archive = Gerrit(GERRIT_REPO, user="another-user", port=29418, max_reviews=2,
@@ -321,39 +637,48 @@ class TestGerritBackendArchive(TestCaseBackendArchive):
     def tearDown(self):
         shutil.rmtree(self.test_path)
 
-    @unittest.mock.patch('subprocess.check_output', mock_check_ouput)
     def test_fetch_from_archive(self):
         """Test whether a list of reviews is returned from the archive"""
 
-        mock_check_ouput.side_effect = mock_check_ouput
         self.backend = Gerrit(GERRIT_REPO, user=GERRIT_USER, port=29418, max_reviews=2,
                               archive=self.archive)
         self._test_fetch_from_archive(from_date=None)
 
-    @unittest.mock.patch('subprocess.check_output', mock_check_ouput)
     def test_fetch_from_date_from_archive(self):
         """Test whether a list of reviews is returned from archive after a given date"""
 
-        mock_check_ouput.side_effect = mock_check_ouput
         self.backend = Gerrit(GERRIT_REPO, user=GERRIT_USER, max_reviews=2,
                               archive=self.archive)
         from_date = datetime.datetime(2018, 3, 5)
         self._test_fetch_from_archive(from_date=from_date)
 
-    @unittest.mock.patch('subprocess.check_output', mock_check_ouput)
     def test_fetch_from_empty_archive(self):
         """Test whether no reviews are returned when the archive is empty"""
 
-        mock_check_ouput.side_effect = mock_check_ouput
         self.backend = Gerrit(GERRIT_REPO, user=GERRIT_USER, max_reviews=2,
                               archive=self.archive)
         from_date = datetime.datetime(2100, 3, 5)
         self._test_fetch_from_archive(from_date=from_date)
 
+    @httpretty.activate
+    def test_fetch_rest_from_archive(self):
+        """Test whether a list of reviews fetched using the REST API is returned from the archive"""
+
+        setup_rest_server()
+
+        self.backend_write_archive = Gerrit(GERRIT_REPO, max_reviews=2, rest_url=GERRIT_REST_URL,
+                                            archive=self.archive)
+        self.backend_read_archive = Gerrit(GERRIT_REPO, max_reviews=2, rest_url=GERRIT_REST_URL,
+                                           archive=self.archive)
+        self._test_fetch_from_archive(from_date=None)
+
 
 class TestGerritClient(unittest.TestCase):
     """ Gerrit API client tests """
 
+    def setUp(self):
+        self.ssh_log = setup_fake_gerrit(self)
+
     def test_init(self):
         """Test init method"""
 
@@ -365,6 +690,8 @@ class TestGerritClient(unittest.TestCase):
         self.assertEqual(client.port, PORT)
         self.assertFalse(client.from_archive)
         self.assertIsNone(client.archive)
+        self.assertListEqual(client.ssh_args, ['ssh', '-p', PORT])
+        self.assertEqual(client.ssh_host, 'None@' + GERRIT_REPO)
 
         client = GerritClient(
             GERRIT_REPO, GERRIT_USER, port=1000, max_reviews=2,
@@ -379,68 +706,86 @@ class TestGerritClient(unittest.TestCase):
         self.assertEqual(client.id_filepath, '/tmp/.ssh-keys/id_rsa')
         self.assertFalse(client.from_archive)
         self.assertIsNone(client.archive)
+        self.assertListEqual(client.ssh_args, ['ssh', '-i', '/tmp/.ssh-keys/id_rsa', '-p', '1000'])
+        self.assertEqual(client.ssh_host, GERRIT_USER + '@' + GERRIT_REPO)
 
-    @unittest.mock.patch('subprocess.check_output', mock_check_ouput)
     def test_version(self):
         """Test version method"""
 
-        mock_check_ouput.side_effect = mock_check_ouput
         client = GerritClient(GERRIT_REPO, GERRIT_USER)
 
         result = client.version
         self.assertEqual(result[0], 2)
         self.assertEqual(result[1], 14)
 
-    @unittest.mock.patch('subprocess.check_output', mock_check_ouput_version_unknown)
+    @unittest.mock.patch.dict(os.environ, {'FAKE_GERRIT_VERSION': 'gerrit_version_unknown'})
     def test_unknown_version(self):
         """Test whether an exception is thrown when the gerrit version is unknown"""
 
-        mock_check_ouput_version_unknown.side_effect = mock_check_ouput_version_unknown
         client = GerritClient(GERRIT_REPO, GERRIT_USER)
 
         with self.assertRaises(BackendError):
             _ = client.version
 
-    @unittest.mock.patch('subprocess.check_output', mock_check_ouput)
     def test_reviews(self):
         """Test reviews method"""
 
-        mock_check_ouput.side_effect = mock_check_ouput
-
         expected_raw = read_file('data/gerrit/gerrit_reviews_page_1')
         client = GerritClient(GERRIT_REPO, GERRIT_USER, max_reviews=2)
         result_raw = client.reviews(0)
 
         self.assertEqual(result_raw, expected_raw)
 
-    @unittest.mock.patch('subprocess.check_output', mock_check_ouput_gerrit_3)
+    @unittest.mock.patch.dict(os.environ, {'FAKE_GERRIT_VERSION': 'gerrit_version_313'})
     def test_reviews_gerrit_3(self):
         """Test reviews method"""
 
-        mock_check_ouput_gerrit_3.side_effect = mock_check_ouput_gerrit_3
-
         expected_raw = read_file('data/gerrit/gerrit_reviews_page_1')
         client = GerritClient(GERRIT_REPO, GERRIT_USER, max_reviews=2)
         result_raw = client.reviews(0)
 
         self.assertEqual(result_raw, expected_raw)
 
-    @unittest.mock.patch('subprocess.check_output', mock_check_ouput_empty_review)
+    @unittest.mock.patch.object(GerritClient, 'RETRY_WAIT', 0)
     def test_empty_review(self):
-        """Test whether an excepti on is thrown when no data is returned"""
+        """Test whether an exception is thrown when the command fails"""
+
+        client = GerritClient(GERRIT_REPO, GERRIT_USER, max_reviews=2)
+        _ = client.version
+
+        with unittest.mock.patch.dict(os.environ, {'FAKE_GERRIT_FAIL': '1'}):
+            with self.assertRaisesRegex(RuntimeError, "failed 3 times"):
+                _ = client.reviews(0)
 
-        mock_check_ouput_empty_review.side_effect = mock_check_ouput_empty_review
+        client.close()
+
+        calls = read_ssh_calls(self.ssh_log)
+        self.assertEqual(len([call for call in calls if 'query' in call]), 3)
+
+    @unittest.mock.patch.object(GerritClient, 'RETRY_WAIT', 0)
+    def test_reviews_partial_output(self):
+        """Test whether the partial output of a failed command is discarded"""
+
+        fail_once = os.path.join(os.path.dirname(self.ssh_log), 'fail_once')
+        expected_raw = read_file('data/gerrit/gerrit_reviews_page_1')
 
         client = GerritClient(GERRIT_REPO, GERRIT_USER, max_reviews=2)
-        with self.assertRaises(RuntimeError):
-            _ = client.reviews(0)
+        _ = client.version
+
+        with unittest.mock.patch.dict(os.environ, {'FAKE_GERRIT_FAIL_ONCE': fail_once}):
+            result_raw = client.reviews(0)
+
+        client.close()
+
+        self.assertTrue(os.path.exists(fail_once))
+        self.assertEqual(result_raw, expected_raw)
+
+        calls = read_ssh_calls(self.ssh_log)
+        self.assertEqual(len([call for call in calls if 'query' in call]), 2)
 
-    @unittest.mock.patch('subprocess.check_output', mock_check_ouput)
     def test_next_retrieve_group_item(self):
         """Test next_retrieve_group_item method"""
 
-        mock_check_ouput.side_effect = mock_check_ouput
-
         client = GerritClient(GERRIT_REPO, GERRIT_USER)
         client.version
         # version 3.1
@@ -475,6 +820,21 @@ class TestGerritClient(unittest.TestCase):
         result = client.next_retrieve_group_item(entry={'sortKey': 'asc'})
         self.assertEqual(result, 'asc')
 
+    def test_gerrit_cmd(self):
+        """Test whether the commands stored in the archive do not change"""
+
+        client = GerritClient(GERRIT_REPO, GERRIT_USER, port=29418, max_reviews=2)
+        _ = client.version
+
+        self.assertEqual(client._get_gerrit_cmd(0), CMD_REVIEWS_1)
+        self.assertEqual(client._get_gerrit_cmd(2), CMD_REVIEWS_2)
+        self.assertEqual(client._get_gerrit_cmd(4), CMD_REVIEWS_3)
+
+        calls = read_ssh_calls(self.ssh_log)
+        self.assertListEqual(calls[1][-3:], CMD_VERSION.split()[-3:])
+
+        client.close()
+
     def test_sanitize_for_archive(self):
         """Test whether the sanitize method works properly"""
 
@@ -484,6 +844,184 @@ class TestGerritClient(unittest.TestCase):
         self.assertEqual("ssh -p 29418 xxxxx@example.org gerrit version", sanitized_cmd)
 
 
+class TestGerritRESTClient(unittest.TestCase):
+    """Gerrit REST API client tests"""
+
+    def test_init(self):
+        """Test init method"""
+
+        client = GerritRESTClient(GERRIT_REST_URL)
+        self.assertEqual(client.url, GERRIT_REST_URL)
+        self.assertEqual(client.base_url, GERRIT_REST_URL)
+        self.assertIsNone(client.gerrit_user)
+        self.assertIsNone(client.password)
+        self.assertEqual(client.max_reviews, MAX_REVIEWS)
+        self.assertEqual(client.blacklist_reviews, [])
+        self.assertIsNone(client.session.auth)
+        self.assertFalse(client.from_archive)
+        self.assertIsNone(client.archive)
+
+        # Authenticated requests go to the '/a/' endpoints
+        client = GerritRESTClient(GERRIT_REST_URL, GERRIT_USER, 'mypassword',
+                                  max_reviews=2, blacklist_reviews=['1', '2'])
+        self.assertEqual(client.url, GERRIT_REST_URL)
+        self.assertEqual(client.base_url, GERRIT_REST_URL + '/a')
+        self.assertEqual(client.gerrit_user, GERRIT_USER)
+        self.assertEqual(client.password, 'mypassword')
+        self.assertEqual(client.max_reviews, 2)
+        self.assertEqual(client.blacklist_reviews, ['1', '2'])
+        self.assertEqual(client.session.auth, (GERRIT_USER, 'mypassword'))
+
+    @httpretty.activate
+    def test_version(self):
+        """Test version method"""
+
+        setup_rest_server()
+
+        client = GerritRESTClient(GERRIT_REST_URL)
+        self.assertListEqual(client.version, [3, 1])
+
+    @httpretty.activate
+    def test_unknown_version(self):
+        """Test whether an exception is thrown when the gerrit version is unknown"""
+
+        httpretty.register_uri(httpretty.GET,
+                               GERRIT_REST_VERSION_URL,
+                               body=")]}'\n\"unknown\"\n",
+                               status=200)
+
+        client = GerritRESTClient(GERRIT_REST_URL)
+
+        with self.assertRaisesRegex(BackendError, "Invalid gerrit version unknown"):
+            _ = client.version
+
+    @httpretty.activate
+    def test_reviews(self):
+        """Test whether reviews are returned in the format of the SSH queries"""
+
+        setup_rest_server(url=GERRIT_REST_URL + '/a')
+
+        client = GerritRESTClient(GERRIT_REST_URL, GERRIT_USER, 'mypassword',
+                                  max_reviews=2, blacklist_reviews=['1', '2'])
+        raw_reviews = client.reviews(0)
+
+        lines = raw_reviews.splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertDictEqual(json.loads(lines[2]), {'type': 'stats', 'rowCount': 2})
+
+        reviews = Gerrit.parse_reviews(raw_reviews)
+        self.assertEqual(len(reviews), 2)
+        self.assertEqual(reviews[0]['number'], 416443)
+        self.assertEqual(reviews[1]['number'], 415887)
+
+        request = httpretty.last_request()
+        self.assertEqual(request.path.split('?')[0], '/r/a/changes/')
+        self.assertEqual(request.querystring['q'],
+                         ['(status:open OR status:closed) AND NOT (1 OR 2)'])
+        self.assertIn('Authorization', request.headers)
+
+        raw_reviews = client.reviews(4, filter_='status:open')
+        self.assertEqual(Gerrit.parse_reviews(raw_reviews), [])
+
+        request = httpretty.last_request()
+        self.assertEqual(request.querystring['q'], ['status:open AND NOT (1 OR 2)'])
+        self.assertEqual(request.querystring['S'], ['4'])
+
+        with self.assertRaises(BackendError):
+            _ = client.reviews(0, filter_='status:draft')
+
+    def test_next_retrieve_group_item(self):
+        """Test next_retrieve_group_item method"""
+
+        client = GerritRESTClient(GERRIT_REST_URL)
+
+        self.assertEqual(client.next_retrieve_group_item(), 0)
+        self.assertEqual(client.next_retrieve_group_item(4, {'number': 1}), 4)
+
+    def test_change_to_review(self):
+        """Test whether a change is converted to the format of the SSH queries"""
+
+        changes = json.loads(read_file('data/gerrit/gerrit_rest_changes_page_1')[4:])
+        review = GerritRESTClient.change_to_review(changes[0], GERRIT_REST_URL)
+
+        gehel = {
+            'name': 'Gehel',
+            'email': 'gehel@example.com',
+            'username': 'gehel'
+        }
+        expected = {
+            'project': 'operations/puppet',
+            'branch': 'production',
+            'id': 'I99a07b8e55560db3ddc00e0c8c30c62b65136556',
+            'number': 416443,
+            'subject': 'wdqs: wrong escaping of quotes in prometheus check',
+            'owner': gehel,
+            'url': 'https://example.org/r/416443',
+            'commitMessage': 'wdqs: wrong escaping of quotes in prometheus check\n\n'
+                             'Change-Id: I99a07b8e55560db3ddc00e0c8c30c62b65136556\n',
+            'createdOn': 1520260711,
+            'lastUpdated': 1520261099,
+            'open': False,
+            'status': 'MERGED',
+            'comments': [
+                {
+                    'timestamp': 1520260711,
+                    'reviewer': gehel,
+                    'message': 'Uploaded patch set 1.'
+                },
+                {
+                    'timestamp': 1520260931,
+                    'reviewer': gehel,
+                    'message': 'Uploaded patch set 2.'
+                },
+                {
+                    'timestamp': 1520261099,
+                    'message': 'Change has been successfully merged by Gehel'
+                }
+            ],
+            'patchSets': [
+                {
+                    'number': 1,
+                    'revision': 'fe68519e07022a2f061aa7aab675a0fdea91397d',
+                    'parents': ['b81ec8dcfae8e7018978f47d529791a901f65eff'],
+                    'ref': 'refs/changes/43/416443/1',
+                    'uploader': gehel,
+                    'createdOn': 1520260711,
+                    'author': {'name': 'Gehel', 'email': 'gehel@example.com'},
+                    'kind': 'REWORK'
+                },
+                {
+                    'number': 2,
+                    'revision': '3d8c03a0a8bca3d1e22b1dad1b97ec0f0e1bfa54',
+                    'parents': ['b81ec8dcfae8e7018978f47d529791a901f65eff'],
+                    'ref': 'refs/changes/43/416443/2',
+                    'uploader': gehel,
+                    'createdOn': 1520260931,
+                    'author': {'name': 'Gehel', 'email': 'gehel@example.com'},
+                    'kind': 'REWORK',
+                    'approvals': [
+                        {
+                            'type': 'Verified',
+                            'description': 'Verified',
+                            'value': '2',
+                            'grantedOn': 1520260754,
+                            'by': {'name': 'jenkins-bot', 'username': 'jenkins-bot'}
+                        },
+                        {
+                            'type': 'Code-Review',
+                            'description': 'Code-Review',
+                            'value': '2',
+                            'grantedOn': 1520261085,
+                            'by': gehel
+                        }
+                    ]
+                }
+            ]
+        }
+
+        self.assertDictEqual(review, expected)
+
+
 class TestGerritCommand(unittest.TestCase):
     """GerritCommand unit tests"""
 
@@ -516,6 +1054,9 @@ class TestGerritCommand(unittest.TestCase):
         self.assertEqual(parsed_args.no_archive, True)
         self.assertEqual(parsed_args.port, 1000)
         self.assertListEqual(parsed_args.blacklist_ids, [''])
+        self.assertIsNone(parsed_args.fetch_workers)
+        self.assertIsNone(parsed_args.rest_url)
+        self.assertIsNone(parsed_args.password)
 
         args = [GERRIT_REPO,
                 '--user', GERRIT_USER,
@@ -524,6 +1065,9 @@ class TestGerritCommand(unittest.TestCase):
                 '--disable-host-key-check',
                 '--ssh-port', '1000',
                 '--ssh-id-filepath', '/my/keys/id_rsa',
+                '--fetch-workers', '2',
+                '--rest-url', GERRIT_REST_URL,
+                '--password', 'mypassword',
                 '--tag', 'test', '--no-archive']
 
         parsed_args = parser.parse(*args)
@@ -536,6 +1080,9 @@ class TestGerritCommand(unittest.TestCase):
         self.assertEqual(parsed_args.port, 1000)
         self.assertEqual(parsed_args.id_filepath, '/my/keys/id_rsa')
         self.assertListEqual(parsed_args.blacklist_ids, ['willy', 'wolly', 'wally'])
+        self.assertEqual(parsed_args.fetch_workers, 2)
+        self.assertEqual(parsed_args.rest_url, GERRIT_REST_URL)
+        self.assertEqual(parsed_args.password, 'mypassword')
 
 
 if __name__ == "__main__":
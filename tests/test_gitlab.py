@@ -50,7 +50,11 @@ from perceval.backends.core.gitlab import (logger,
                                            CATEGORY_MERGE_REQUEST,
                                            MAX_RETRIES,
                                            DEFAULT_SLEEP_TIME,
-                                           DEFAULT_RETRY_AFTER_STATUS_CODES)
+                                           DEFAULT_RETRY_AFTER_STATUS_CODES,
+                                           NOTE_EMOJIS_ALL,
+                                           NOTE_EMOJIS_GRAPHQL,
+                                           NOTE_EMOJIS_USER,
+                                           NOTE_EMOJIS_NONE)
 from base import TestCaseBackendArchive
 
 GITLAB_URL = "https://gitlab.com"
@@ -461,6 +465,8 @@ class TestGitLabBackend(unittest.TestCase):
         self.assertEqual(gitlab.sleep_time, DEFAULT_SLEEP_TIME)
         self.assertListEqual(gitlab.extra_retry_after_status, DEFAULT_RETRY_AFTER_STATUS_CODES)
         self.assertTrue(gitlab.ssl_verify)
+        self.assertIsNone(gitlab.fetch_workers)
+        self.assertEqual(gitlab.note_emojis, NOTE_EMOJIS_ALL)
 
         # When tag is empty or None it will be set to
         # the value in originTestGitLabBackend
@@ -514,6 +520,15 @@ class TestGitLabBackend(unittest.TestCase):
         with self.assertRaises(BackendError):
             _ = GitLab('fdroid', 'fdroiddata', is_oauth_token=True, tag='test')
 
+    def test_initialization_note_emojis(self):
+        """Test whether the strategy to fetch note emojis is checked"""
+
+        gitlab = GitLab('fdroid', 'fdroiddata', api_token='aaa', note_emojis=NOTE_EMOJIS_NONE)
+        self.assertEqual(gitlab.note_emojis, NOTE_EMOJIS_NONE)
+
+        with self.assertRaisesRegex(BackendError, "unknown note emojis strategy: some"):
+            _ = GitLab('fdroid', 'fdroiddata', api_token='aaa', note_emojis='some')
+
     @httpretty.activate
     def test_initialization_selfmanaged(self):
         """Test whether attributes are initialized for the self-managed version"""
@@ -775,6 +790,158 @@ class TestGitLabBackend(unittest.TestCase):
         self.assertEqual(len(merge['data']['versions_data']), 1)
         self.assertTrue('diffs' not in merge['data']['versions_data'][0])
 
+    @httpretty.activate
+    def test_fetch_merges_note_emojis(self):
+        """Test whether note emojis are fetched according to the given strategy"""
+
+        setup_http_server(GITLAB_URL_PROJECT, GITLAB_ISSUES_URL, GITLAB_MERGES_URL)
+
+        expected = {
+            NOTE_EMOJIS_ALL: ['/1/notes/1/award_emoji', '/1/notes/2/award_emoji',
+                              '/2/notes/1/award_emoji', '/3/notes/1/award_emoji'],
+            NOTE_EMOJIS_USER: ['/1/notes/2/award_emoji', '/2/notes/1/award_emoji'],
+            NOTE_EMOJIS_NONE: []
+        }
+
+        for note_emojis in [NOTE_EMOJIS_ALL, NOTE_EMOJIS_USER, NOTE_EMOJIS_NONE]:
+            nrequests = len(httpretty.latest_requests())
+
+            gitlab = GitLab("fdroid", "fdroiddata", "your-token", note_emojis=note_emojis)
+            merges = [merges for merges in gitlab.fetch(category=CATEGORY_MERGE_REQUEST)]
+            self.assertEqual(len(merges), 3)
+
+            # Only the notes of the first MR have emojis and the first note
+            # is a system note
+            notes = merges[0]['data']['notes_data']
+            self.assertTrue(notes[0]['system'])
+            self.assertEqual(len(notes[1]['award_emoji_data']), 0)
+
+            if note_emojis == NOTE_EMOJIS_ALL:
+                self.assertEqual(len(notes[0]['award_emoji_data']), 2)
+            else:
+                self.assertEqual(len(notes[0]['award_emoji_data']), 0)
+
+            paths = [request.path.split('?')[0].replace(GITLAB_MERGES_URL[len(GITLAB_URL):], '')
+                     for request in httpretty.latest_requests()[nrequests:]]
+            paths = [path for path in paths if '/notes/' in path]
+            self.assertListEqual(paths, expected[note_emojis])
+
+    @httpretty.activate
+    def test_fetch_merges_note_emojis_graphql(self):
+        """Test whether only the emojis of the notes GraphQL reports with emojis are fetched"""
+
+        setup_http_server(GITLAB_URL_PROJECT, GITLAB_ISSUES_URL, GITLAB_MERGES_URL)
+
+        notes = {
+            '1': json.loads(read_file('data/gitlab/notes_1')),
+            '2': json.loads(read_file('data/gitlab/notes_2')),
+            '3': json.loads(read_file('data/gitlab/notes_3'))
+        }
+        queries = []
+
+        def request_callback(request, uri, headers):
+            query = json.loads(request.body)
+            queries.append(query)
+            iid = query['variables']['iid']
+
+            nodes = [
+                {
+                    'id': 'gid://gitlab/Note/{}'.format(note['id']),
+                    'awardEmoji': {
+                        'nodes': [{'name': 'thumbsup'}] if iid == '1' and note['id'] == 1 else []
+                    }
+                }
+                for note in notes[iid]
+            ]
+            body = {
+                'data': {
+                    'project': {
+                        'mergeRequest': {
+                            'notes': {
+                                'pageInfo': {'hasNextPage': False, 'endCursor': 'MQ'},
+                                'nodes': nodes
+                            }
+                        }
+                    }
+                }
+            }
+            return 200, headers, json.dumps(body)
+
+        httpretty.register_uri(httpretty.POST,
+                               GITLAB_URL + "/api/graphql",
+                               responses=[httpretty.Response(body=request_callback)])
+
+        gitlab = GitLab("fdroid", "fdroiddata", "your-token", note_emojis=NOTE_EMOJIS_ALL)
+        expected = [merge['data'] for merge in gitlab.fetch(category=CATEGORY_MERGE_REQUEST)]
+
+        nrequests = len(httpretty.latest_requests())
+
+        gitlab = GitLab("fdroid", "fdroiddata", "your-token", note_emojis=NOTE_EMOJIS_GRAPHQL)
+        merges = [merge['data'] for merge in gitlab.fetch(category=CATEGORY_MERGE_REQUEST)]
+
+        # The output is the same as fetching the emojis of every note
+        self.assertListEqual(merges, expected)
+
+        paths = [request.path.split('?')[0].replace(GITLAB_MERGES_URL[len(GITLAB_URL):], '')
+                 for request in httpretty.latest_requests()[nrequests:]]
+        paths = [path for path in paths if '/notes/' in path]
+        self.assertListEqual(paths, ['/1/notes/1/award_emoji'])
+
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(queries[0]['variables']['project'], 'fdroid/fdroiddata')
+        self.assertIn('mergeRequest(iid: $iid)', queries[0]['query'])
+
+    @httpretty.activate
+    def test_fetch_merges_note_emojis_graphql_error(self):
+        """Test whether the emojis of every note are fetched when GraphQL fails"""
+
+        setup_http_server(GITLAB_URL_PROJECT, GITLAB_ISSUES_URL, GITLAB_MERGES_URL)
+
+        body = json.dumps({'errors': [{'message': 'Field must have selections'}]})
+        httpretty.register_uri(httpretty.POST,
+                               GITLAB_URL + "/api/graphql",
+                               body=body,
+                               status=200)
+
+        nrequests = len(httpretty.latest_requests())
+
+        gitlab = GitLab("fdroid", "fdroiddata", "your-token", note_emojis=NOTE_EMOJIS_GRAPHQL)
+
+        with self.assertLogs(logger, level='WARNING') as cm:
+            merges = [merge for merge in gitlab.fetch(category=CATEGORY_MERGE_REQUEST)]
+
+        self.assertEqual(len(merges), 3)
+        self.assertRegex(cm.output[0], 'Field must have selections')
+
+        notes = merges[0]['data']['notes_data']
+        self.assertEqual(len(notes[0]['award_emoji_data']), 2)
+
+        paths = [request.path.split('?')[0].replace(GITLAB_MERGES_URL[len(GITLAB_URL):], '')
+                 for request in httpretty.latest_requests()[nrequests:]]
+        paths = [path for path in paths if '/notes/' in path]
+        self.assertListEqual(paths, ['/1/notes/1/award_emoji', '/1/notes/2/award_emoji',
+                                     '/2/notes/1/award_emoji', '/3/notes/1/award_emoji'])
+
+    @httpretty.activate
+    def test_fetch_merges_note_emojis_default(self):
+        """Test whether the emojis of every note are fetched by default"""
+
+        setup_http_server(GITLAB_URL_PROJECT, GITLAB_ISSUES_URL, GITLAB_MERGES_URL)
+
+        gitlab = GitLab("fdroid", "fdroiddata", "your-token")
+        merges = [merges for merges in gitlab.fetch(category=CATEGORY_MERGE_REQUEST)]
+        self.assertEqual(len(merges), 3)
+
+        # The emojis of system notes are included, as they always were
+        notes = merges[0]['data']['notes_data']
+        self.assertTrue(notes[0]['system'])
+        self.assertEqual(len(notes[0]['award_emoji_data']), 2)
+        self.assertEqual(len(notes[1]['award_emoji_data']), 0)
+
+        for merge in merges[1:]:
+            for note in merge['data']['notes_data']:
+                self.assertListEqual(note['award_emoji_data'], [])
+
     @httpretty.activate
     def test_search_fields_merges(self):
         """Test whether the search_fields is properly set"""
@@ -1140,6 +1307,56 @@ class TestGitLabBackend(unittest.TestCase):
 
             self.assertListEqual(paths, expected)
 
+    @httpretty.activate
+    def test_fetch_merges_outdated_list_cache(self):
+        """Test if the data of the outdated MRs is reused when the list is fetched again"""
+
+        for fetch_workers in [None, 2]:
+            httpretty.reset()
+            setup_gitlab_outdated_mrs_server(GITLAB_URL_PROJECT, GITLAB_MERGES_URL)
+
+            gitlab = GitLab("fdroid", "fdroiddata", "your-token",
+                            fetch_workers=fetch_workers)
+            merges = [merges for merges in gitlab.fetch(category=CATEGORY_MERGE_REQUEST)]
+
+            self.assertEqual(len(merges), 2)
+            self.assertEqual(merges[0]['data']['iid'], 1)
+            self.assertEqual(merges[0]['data']['updated_at'], '2014-04-03T16:50:32.000Z')
+            self.assertEqual(merges[1]['data']['iid'], 2)
+            self.assertEqual(merges[1]['data']['updated_at'], '2014-04-04T12:20:45.000Z')
+
+            # The full data of each MR is requested only once
+            paths = [request.path.split('?')[0] for request in httpretty.latest_requests()]
+            self.assertEqual(paths.count('/api/v4/projects/fdroid%2Ffdroiddata/merge_requests/1'), 1)
+            self.assertEqual(paths.count('/api/v4/projects/fdroid%2Ffdroiddata/merge_requests/2'), 1)
+            self.assertEqual(paths.count('/api/v4/projects/fdroid%2Ffdroiddata/merge_requests/1/notes'), 1)
+
+            # The cache is emptied once the fetch process ends
+            self.assertDictEqual(gitlab._merges, {})
+
+    @httpretty.activate
+    def test_fetch_merges_fetch_workers(self):
+        """Test whether merges fetched concurrently are the same as the sequential ones"""
+
+        setup_http_server(GITLAB_URL_PROJECT, GITLAB_ISSUES_URL, GITLAB_MERGES_URL)
+
+        gitlab = GitLab("fdroid", "fdroiddata", "your-token")
+        expected = [merge for merge in gitlab.fetch(category=CATEGORY_MERGE_REQUEST)]
+        nrequests = len(httpretty.latest_requests())
+        expected_requests = sorted(request.path for request in httpretty.latest_requests())
+
+        gitlab = GitLab("fdroid", "fdroiddata", "your-token", fetch_workers=3)
+        merges = [merge for merge in gitlab.fetch(category=CATEGORY_MERGE_REQUEST)]
+
+        self.assertEqual(len(merges), 3)
+        self.assertListEqual([merge['uuid'] for merge in merges],
+                             [merge['uuid'] for merge in expected])
+        self.assertListEqual([merge['data'] for merge in merges],
+                             [merge['data'] for merge in expected])
+
+        requests = sorted(request.path for request in httpretty.latest_requests()[nrequests:])
+        self.assertListEqual(requests, expected_requests)
+
     @httpretty.activate
     def test_fetch_issues_empty(self):
         """Test when return empty"""
@@ -1884,6 +2101,9 @@ class TestGitLabCommand(unittest.TestCase):
         self.assertEqual(parsed_args.sleep_time, DEFAULT_SLEEP_TIME)
         self.assertFalse(parsed_args.is_oauth_token)
         self.assertListEqual(parsed_args.extra_retry_after_status, DEFAULT_RETRY_AFTER_STATUS_CODES)
+        self.assertIsNone(parsed_args.rate_limit_db)
+        self.assertIsNone(parsed_args.fetch_workers)
+        self.assertEqual(parsed_args.note_emojis, NOTE_EMOJIS_ALL)
 
         args = ['--sleep-for-rate',
                 '--min-rate-to-sleep', '1',
@@ -1897,6 +2117,8 @@ class TestGitLabCommand(unittest.TestCase):
                 '--category', CATEGORY_MERGE_REQUEST,
                 '--extra-retry-status', '404', '410',
                 '--is-oauth-token', '--no-ssl-verify',
+                '--fetch-workers', '4',
+                '--note-emojis', 'none',
                 'zhquan_example', 'repo']
 
         parsed_args = parser.parse(*args)
@@ -1916,6 +2138,8 @@ class TestGitLabCommand(unittest.TestCase):
         self.assertTrue(parsed_args.is_oauth_token)
         self.assertFalse(parsed_args.ssl_verify)
         self.assertListEqual(parsed_args.extra_retry_after_status, [404, 410])
+        self.assertEqual(parsed_args.fetch_workers, 4)
+        self.assertEqual(parsed_args.note_emojis, NOTE_EMOJIS_NONE)
 
 
 if __name__ == "__main__":
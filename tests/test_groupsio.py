@@ -513,6 +513,8 @@ class TestGroupsioCommand(unittest.TestCase):
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
         self.assertTrue(parsed_args.ssl_verify)
+        self.assertIsNone(parsed_args.parse_workers)
+        self.assertIsNone(parsed_args.mbox_index)
         self.assertEqual(parsed_args.email, 'jsmith@example.com')
         self.assertEqual(parsed_args.password, 'aaaaa')
 
@@ -521,6 +523,8 @@ class TestGroupsioCommand(unittest.TestCase):
                 '--tag', 'test',
                 '--from-date', '1970-01-01',
                 '--no-ssl-verify',
+                '--parse-workers', '4',
+                '--mbox-index', '/tmp/perceval/index',
                 '--email', 'jsmith@example.com',
                 '--password', 'aaaaa']
 
@@ -530,6 +534,8 @@ class TestGroupsioCommand(unittest.TestCase):
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
         self.assertFalse(parsed_args.ssl_verify)
+        self.assertEqual(parsed_args.parse_workers, 4)
+        self.assertEqual(parsed_args.mbox_index, '/tmp/perceval/index')
         self.assertEqual(parsed_args.email, 'jsmith@example.com')
         self.assertEqual(parsed_args.password, 'aaaaa')
 
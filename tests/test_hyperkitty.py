@@ -123,6 +123,54 @@ class TestHyperKittyList(unittest.TestCase):
         mboxes = hkls.mboxes
         self.assertEqual(mboxes[0].filepath, os.path.join(self.tmp_path, '2016-03.mbox.gz'))
 
+    @httpretty.activate
+    @unittest.mock.patch('perceval.backends.core.hyperkitty.datetime_utcnow')
+    def test_fetch_download_workers(self, mock_utcnow):
+        """Test whether archives are downloaded by a pool of threads"""
+
+        mock_utcnow.return_value = datetime.datetime(2016, 4, 10,
+                                                     tzinfo=dateutil.tz.tzutc())
+
+        mbox_march = read_file('data/hyperkitty/hyperkitty_2016_march.mbox')
+        mbox_april = read_file('data/hyperkitty/hyperkitty_2016_april.mbox')
+
+        httpretty.register_uri(httpretty.GET,
+                               HYPERKITTY_URL,
+                               body="")
+        httpretty.register_uri(httpretty.GET,
+                               HYPERKITTY_URL + 'export/2016-03.mbox.gz',
+                               body=mbox_march)
+        httpretty.register_uri(httpretty.GET,
+                               HYPERKITTY_URL + 'export/2016-04.mbox.gz',
+                               body=mbox_april)
+
+        from_date = datetime.datetime(2016, 3, 10)
+
+        hkls = HyperKittyList('http://example.com/archives/list/test@example.com/',
+                              self.tmp_path, download_workers=2)
+        fetched = hkls.fetch(from_date=from_date)
+
+        self.assertEqual(len(fetched), 2)
+        self.assertEqual(fetched[0][1], os.path.join(self.tmp_path, '2016-03.mbox.gz'))
+        self.assertEqual(fetched[1][1], os.path.join(self.tmp_path, '2016-04.mbox.gz'))
+
+        mboxes = hkls.mboxes
+        self.assertEqual(len(mboxes), 2)
+        self.assertEqual(read_file(mboxes[0].filepath), mbox_march)
+        self.assertEqual(read_file(mboxes[1].filepath), mbox_april)
+
+        # Every archive is requested again, including past months
+        nrequests = len(httpretty.latest_requests())
+
+        fetched = hkls.fetch(from_date=from_date)
+        self.assertEqual(len(fetched), 2)
+
+        requests_ = httpretty.latest_requests()[nrequests:]
+        self.assertEqual(len(requests_), 3)
+        self.assertSetEqual({request.path for request in requests_[1:]},
+                            {'/archives/list/test@example.com/export/2016-03.mbox.gz?start=2016-03-01&end=2016-04-01',
+                             '/archives/list/test@example.com/export/2016-04.mbox.gz?start=2016-04-01&end=2016-05-01'})
+
     @httpretty.activate
     @unittest.mock.patch('perceval.backends.core.hyperkitty.datetime_utcnow')
     def test_fetch_from_date_after_current_day(self, mock_utcnow):
@@ -197,6 +245,10 @@ class TestHyperKittyBackend(unittest.TestCase):
         self.assertEqual(backend.origin, 'http://example.com/')
         self.assertEqual(backend.tag, 'test')
         self.assertTrue(backend.ssl_verify)
+        self.assertIsNone(backend.download_workers)
+
+        backend = HyperKitty('http://example.com/', self.tmp_path, download_workers=4)
+        self.assertEqual(backend.download_workers, 4)
 
         # When tag is empty or None it will be set to
         # the value in uri
@@ -418,10 +470,16 @@ class TestHyperKittyCommand(unittest.TestCase):
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
         self.assertIsNone(parsed_args.to_date)
         self.assertTrue(parsed_args.ssl_verify)
+        self.assertIsNone(parsed_args.parse_workers)
+        self.assertIsNone(parsed_args.mbox_index)
+        self.assertIsNone(parsed_args.download_workers)
 
         args = ['http://example.com/archives/list/test@example.com/',
                 '--mboxes-path', '/tmp/perceval/',
                 '--tag', 'test', '--no-ssl-verify',
+                '--parse-workers', '4',
+                '--mbox-index', '/tmp/perceval/index',
+                '--download-workers', '4',
                 '--from-date', '1970-01-01',
                 '--to-date', '2016-01-01']
 
@@ -433,6 +491,9 @@ class TestHyperKittyCommand(unittest.TestCase):
         self.assertEqual(parsed_args.to_date, datetime.datetime(2016, 1, 1, 0, 0, 0,
                                                                 tzinfo=dateutil.tz.tzutc()))
         self.assertFalse(parsed_args.ssl_verify)
+        self.assertEqual(parsed_args.parse_workers, 4)
+        self.assertEqual(parsed_args.mbox_index, '/tmp/perceval/index')
+        self.assertEqual(parsed_args.download_workers, 4)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from perceval.errors import ItemsIndexError
+from perceval.index import ItemsIndex
+
+
+def make_item(item_uuid, updated_on, data):
+    return {
+        'uuid': item_uuid,
+        'updated_on': updated_on,
+        'data': data
+    }
+
+
+class TestItemsIndex(unittest.TestCase):
+    """ItemsIndex tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_init(self):
+        """Test whether the index file is created"""
+
+        index_path = os.path.join(self.test_path, 'myindex')
+        index = ItemsIndex(index_path)
+
+        self.assertEqual(index.index_path, index_path)
+        self.assertTrue(os.path.exists(index_path))
+
+        conn = sqlite3.connect(index_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM items")
+        self.assertEqual(cursor.fetchone()[0], 0)
+        cursor.close()
+        conn.close()
+
+    def test_init_invalid_index(self):
+        """Test whether an exception is thrown when the index is not valid"""
+
+        index_path = os.path.join(self.test_path, 'myindex')
+
+        with open(index_path, 'w') as fd:
+            fd.write("Invalid index file")
+
+        with self.assertRaisesRegex(ItemsIndexError, "invalid items index"):
+            _ = ItemsIndex(index_path)
+
+    def test_is_updated(self):
+        """Test whether new and updated items are detected"""
+
+        index_path = os.path.join(self.test_path, 'myindex')
+        index = ItemsIndex(index_path)
+
+        item = make_item('0fa4ce047340780f08efca92f22027514263521d', 1483228800.0,
+                         {'id': 1, 'title': 'A'})
+
+        self.assertTrue(index.is_updated(item))
+        index.add(item)
+
+        # Pending items are also taken into account
+        self.assertFalse(index.is_updated(item))
+        index.flush()
+        self.assertFalse(index.is_updated(item))
+
+        # Changes on the date or on the data are detected
+        item = make_item('0fa4ce047340780f08efca92f22027514263521d', 1483228801.0,
+                         {'id': 1, 'title': 'A'})
+        self.assertTrue(index.is_updated(item))
+
+        item = make_item('0fa4ce047340780f08efca92f22027514263521d', 1483228800.0,
+                         {'id': 1, 'title': 'B'})
+        self.assertTrue(index.is_updated(item))
+
+        item = make_item('3879a6f12828b7ac3a88b7167333e86168f2f5d2', 1483228800.0,
+                         {'id': 1, 'title': 'A'})
+        self.assertTrue(index.is_updated(item))
+
+    def test_flush(self):
+        """Test whether items are written in batches and persisted"""
+
+        index_path = os.path.join(self.test_path, 'myindex')
+        index = ItemsIndex(index_path)
+        index.BATCH_SIZE = 2
+
+        items = [make_item('%040x' % x, 1483228800.0 + x, {'id': x}) for x in range(5)]
+
+        for item in items:
+            index.add(item)
+
+        self.assertEqual(len(index._pending), 1)
+        index.flush()
+        self.assertEqual(len(index._pending), 0)
+
+        index = ItemsIndex(index_path)
+
+        for item in items:
+            self.assertFalse(index.is_updated(item))
+
+        # Items are replaced when they are updated
+        item = make_item('%040x' % 0, 1583228800.0, {'id': 0})
+        self.assertTrue(index.is_updated(item))
+        index.add(item)
+        index.flush()
+
+        conn = sqlite3.connect(index_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM items")
+        self.assertEqual(cursor.fetchone()[0], 5)
+        cursor.close()
+        conn.close()
+
+        index = ItemsIndex(index_path)
+        self.assertFalse(index.is_updated(item))
+
+    def test_hash_data(self):
+        """Test whether the hash does not depend on the order of the keys"""
+
+        hash_a = ItemsIndex.hash_data({'a': 1, 'b': [1, 2], 'c': {'d': 'e'}})
+        hash_b = ItemsIndex.hash_data({'c': {'d': 'e'}, 'b': [1, 2], 'a': 1})
+        hash_c = ItemsIndex.hash_data({'c': {'d': 'e'}, 'b': [2, 1], 'a': 1})
+
+        self.assertEqual(len(hash_a), ItemsIndex.HASH_SIZE)
+        self.assertEqual(hash_a, hash_b)
+        self.assertNotEqual(hash_a, hash_c)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -28,6 +28,9 @@
 import json
 import os
 import requests
+import shutil
+import sqlite3
+import tempfile
 import time
 import unittest
 
@@ -38,6 +41,7 @@ from perceval.backends.core.jenkins import (logger,
                                             Jenkins,
                                             JenkinsCommand,
                                             JenkinsClient,
+                                            JenkinsBuildsIndex,
                                             SLEEP_TIME, DETAIL_DEPTH)
 from perceval.errors import BackendError
 from base import TestCaseBackendArchive
@@ -201,6 +205,66 @@ def configure_http_server(depth=1, builds_job=True):
                            ])
 
 
+def configure_builds_http_server(jobs_builds):
+    """Set up a mock HTTP server with the given builds.
+
+    `jobs_builds` is a dict with the builds of each job; each build
+    is a tuple with its number and whether it is running. The dict
+    can be updated to simulate new builds.
+    """
+    http_requests = []
+
+    def build_to_json(job_name, number, building):
+        return {
+            '_class': 'hudson.model.FreeStyleBuild',
+            'building': building,
+            'id': str(number),
+            'number': number,
+            'result': None if building else 'SUCCESS',
+            'timestamp': 1458874078582 + number * 1000,
+            'url': SERVER_URL + '/job/' + job_name + '/' + str(number) + '/'
+        }
+
+    def request_callback(request, uri, headers):
+        http_requests.append(request)
+
+        path = request.path.split('?')[0]
+
+        if path == '/ci/api/json':
+            jobs = [
+                {
+                    '_class': 'hudson.model.FreeStyleProject',
+                    'name': job_name,
+                    'url': SERVER_URL + '/job/' + job_name + '/'
+                }
+                for job_name in jobs_builds
+            ]
+            return 200, headers, json.dumps({'jobs': jobs})
+
+        job_name = path.split('/')[3]
+        builds = [build_to_json(job_name, number, building)
+                  for number, building in jobs_builds[job_name]]
+
+        if 'tree' in request.querystring:
+            last_build = {'number': builds[0]['number']} if builds else None
+            body = {'lastBuild': last_build}
+        else:
+            body = {'builds': builds}
+
+        return 200, headers, json.dumps(body)
+
+    httpretty.register_uri(httpretty.GET,
+                           JOBS_URL,
+                           body=request_callback)
+
+    for job_name in jobs_builds:
+        httpretty.register_uri(httpretty.GET,
+                               SERVER_URL + '/job/' + job_name + '/api/json',
+                               body=request_callback)
+
+    return http_requests
+
+
 class TestJenkinsBackend(unittest.TestCase):
     """Jenkins backend tests"""
 
@@ -218,6 +282,8 @@ class TestJenkinsBackend(unittest.TestCase):
         self.assertIsNone(jenkins.client)
         self.assertIsNone(jenkins.blacklist_ids)
         self.assertTrue(jenkins.ssl_verify)
+        self.assertIsNone(jenkins.fetch_workers)
+        self.assertIsNone(jenkins.builds_index)
 
         # When tag is empty or None it will be set to
         # the value in url
@@ -592,6 +658,106 @@ class TestJenkinsBackend(unittest.TestCase):
         # Builds from JOB_BUILDS_1 + JOB_BUILDS_2 except those 2 in blacklist
         self.assertEqual(len(builds), 67)
 
+    @httpretty.activate
+    def test_fetch_fetch_workers(self):
+        """Test whether the builds of the jobs are fetched concurrently"""
+
+        configure_http_server()
+
+        jenkins = Jenkins(SERVER_URL)
+        expected = [build for build in jenkins.fetch()]
+
+        jenkins = Jenkins(SERVER_URL, fetch_workers=3)
+        builds = [build for build in jenkins.fetch()]
+
+        self.assertListEqual([build['uuid'] for build in builds],
+                             [build['uuid'] for build in expected])
+        self.assertEqual(jenkins.summary.fetched, 69)
+        self.assertEqual(jenkins.summary.skipped, 2)
+
+    @httpretty.activate
+    def test_fetch_builds_index(self):
+        """Test whether only the builds newer than the last ones fetched are returned"""
+
+        jobs_builds = {
+            'job-a': [(3, False), (2, True), (1, False)],
+            'job-b': [(2, False), (1, False)]
+        }
+        http_requests = configure_builds_http_server(jobs_builds)
+
+        test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.addCleanup(shutil.rmtree, test_path)
+        index_path = os.path.join(test_path, 'builds_index')
+
+        jenkins = Jenkins(SERVER_URL, builds_index=index_path)
+        builds = [build['data']['url'] for build in jenkins.fetch()]
+
+        expected = [SERVER_URL + '/job/job-a/3/',
+                    SERVER_URL + '/job/job-a/2/',
+                    SERVER_URL + '/job/job-a/1/',
+                    SERVER_URL + '/job/job-b/2/',
+                    SERVER_URL + '/job/job-b/1/']
+        self.assertListEqual(builds, expected)
+
+        # Running builds are stored apart from the last one
+        index = JenkinsBuildsIndex(index_path)
+        expected = {
+            SERVER_URL + '/job/job-a/': (3, {2}),
+            SERVER_URL + '/job/job-b/': (2, set())
+        }
+        self.assertDictEqual(index.last_builds(), expected)
+
+        # Only new and running builds are returned; finished builds
+        # are not returned again. The builds of the jobs without new
+        # or running builds are not requested
+        jobs_builds['job-a'] = [(5, True), (4, False), (3, False), (2, False), (1, False)]
+        http_requests.clear()
+
+        jenkins = Jenkins(SERVER_URL, builds_index=index_path)
+        builds = [build['data']['url'] for build in jenkins.fetch()]
+
+        expected = [SERVER_URL + '/job/job-a/5/',
+                    SERVER_URL + '/job/job-a/4/',
+                    SERVER_URL + '/job/job-a/2/']
+        self.assertListEqual(builds, expected)
+
+        reqs = [(req.path.split('?')[0], req.querystring) for req in http_requests]
+        expected = [
+            ('/ci/api/json', {}),
+            ('/ci/job/job-a/api/json', {'depth': ['1']}),
+            ('/ci/job/job-b/api/json', {'tree': ['lastBuild[number]']})
+        ]
+        self.assertListEqual(reqs, expected)
+
+        index = JenkinsBuildsIndex(index_path)
+        expected = {
+            SERVER_URL + '/job/job-a/': (5, {5}),
+            SERVER_URL + '/job/job-b/': (2, set())
+        }
+        self.assertDictEqual(index.last_builds(), expected)
+
+        # Builds are returned until they finish
+        jobs_builds['job-a'] = [(5, False), (4, False), (3, False), (2, False), (1, False)]
+
+        jenkins = Jenkins(SERVER_URL, builds_index=index_path, fetch_workers=2)
+        builds = [build['data']['url'] for build in jenkins.fetch()]
+
+        self.assertListEqual(builds, [SERVER_URL + '/job/job-a/5/'])
+
+        # Nothing is returned when there are no new builds
+        jenkins = Jenkins(SERVER_URL, builds_index=index_path, fetch_workers=2)
+        builds = [build for build in jenkins.fetch()]
+
+        self.assertListEqual(builds, [])
+        self.assertEqual(jenkins.summary.skipped, 0)
+
+        index = JenkinsBuildsIndex(index_path)
+        expected = {
+            SERVER_URL + '/job/job-a/': (5, set()),
+            SERVER_URL + '/job/job-b/': (2, set())
+        }
+        self.assertDictEqual(index.last_builds(), expected)
+
 
 class TestJenkinsBackendArchive(TestCaseBackendArchive):
     """Jenkins backend tests using an archive"""
@@ -635,6 +801,45 @@ class TestJenkinsBackendArchive(TestCaseBackendArchive):
 
         self._test_fetch_from_archive()
 
+    @httpretty.activate
+    def test_fetch_builds_index_from_archive(self):
+        """Test whether the builds index is ignored when fetching from an archive"""
+
+        jobs_builds = {
+            'job-a': [(3, False), (2, True), (1, False)],
+            'job-b': [(2, False), (1, False)]
+        }
+        configure_builds_http_server(jobs_builds)
+
+        test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.addCleanup(shutil.rmtree, test_path)
+        index_path = os.path.join(test_path, 'builds_index')
+
+        self.backend_write_archive = Jenkins(SERVER_URL, builds_index=index_path,
+                                             archive=self.archive)
+        self.backend_read_archive = Jenkins(SERVER_URL, builds_index=index_path,
+                                            archive=self.archive)
+
+        # The index stores the builds fetched when the archive
+        # was written, but all of them are replayed
+        self._test_fetch_from_archive()
+
+        builds = [build['data']['url'] for build in self.backend_read_archive.fetch_from_archive()]
+
+        expected = [SERVER_URL + '/job/job-a/3/',
+                    SERVER_URL + '/job/job-a/2/',
+                    SERVER_URL + '/job/job-a/1/',
+                    SERVER_URL + '/job/job-b/2/',
+                    SERVER_URL + '/job/job-b/1/']
+        self.assertListEqual(builds, expected)
+
+        index = JenkinsBuildsIndex(index_path)
+        expected = {
+            SERVER_URL + '/job/job-a/': (3, {2}),
+            SERVER_URL + '/job/job-b/': (2, set())
+        }
+        self.assertDictEqual(index.last_builds(), expected)
+
     @httpretty.activate
     def test_fetch_blacklist_from_archive(self):
         """Test whether jobs in balcklist are not retrieved from archive"""
@@ -765,6 +970,30 @@ class TestJenkinsClient(unittest.TestCase):
 
         self.assertEqual(response, body)
 
+    @httpretty.activate
+    def test_get_last_build(self):
+        """Test get_last_build API call"""
+
+        # Set up a mock HTTP server
+        body = '{"lastBuild": {"number": 107}}'
+        httpretty.register_uri(httpretty.GET,
+                               SERVER_URL + '/job/' + JOB_BUILDS_1 + '/api/json',
+                               body=body, status=200)
+
+        client = JenkinsClient(SERVER_URL)
+        response = client.get_last_build(JOB_BUILDS_1, client.base_url)
+
+        self.assertEqual(response, body)
+
+        req = httpretty.last_request()
+        self.assertDictEqual(req.querystring, {'tree': ['lastBuild[number]']})
+
+        # Blacklisted jobs are not requested
+        client = JenkinsClient(SERVER_URL, blacklist_jobs=[JOB_BUILDS_1])
+        response = client.get_last_build(JOB_BUILDS_1, client.base_url)
+
+        self.assertIsNone(response)
+
     @httpretty.activate
     def test_get_builds_auth_api_token(self):
         """Test get_builds API call with username and API token"""
@@ -807,6 +1036,64 @@ class TestJenkinsClient(unittest.TestCase):
         self.assertGreater(end, expected)
 
 
+class TestJenkinsBuildsIndex(unittest.TestCase):
+    """JenkinsBuildsIndex tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_init(self):
+        """Test whether the index file is created"""
+
+        index_path = os.path.join(self.test_path, 'builds_index')
+        index = JenkinsBuildsIndex(index_path)
+
+        self.assertEqual(index.index_path, index_path)
+        self.assertTrue(os.path.exists(index_path))
+        self.assertDictEqual(index.last_builds(), {})
+
+        conn = sqlite3.connect(index_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM jobs")
+        self.assertEqual(cursor.fetchone()[0], 0)
+        cursor.execute("SELECT COUNT(*) FROM running")
+        self.assertEqual(cursor.fetchone()[0], 0)
+        cursor.close()
+        conn.close()
+
+    def test_init_invalid_index(self):
+        """Test whether an exception is thrown when the index is not valid"""
+
+        index_path = os.path.join(self.test_path, 'builds_index')
+
+        with open(index_path, 'w') as fd:
+            fd.write("Invalid index file")
+
+        with self.assertRaisesRegex(BackendError, "invalid builds index"):
+            _ = JenkinsBuildsIndex(index_path)
+
+    def test_store(self):
+        """Test whether the last builds are stored and replaced"""
+
+        index_path = os.path.join(self.test_path, 'builds_index')
+        index = JenkinsBuildsIndex(index_path)
+
+        index.store(SERVER_URL + '/job/job-a/', 10, [8, 10])
+        index.store(SERVER_URL + '/job/job-b/', 2)
+        index.store(SERVER_URL + '/job/job-a/', 12, [10])
+
+        index = JenkinsBuildsIndex(index_path)
+
+        expected = {
+            SERVER_URL + '/job/job-a/': (12, {10}),
+            SERVER_URL + '/job/job-b/': (2, set())
+        }
+        self.assertDictEqual(index.last_builds(), expected)
+
+
 class TestJenkinsCommand(unittest.TestCase):
     """JenkinsCommand unit tests"""
 
@@ -836,6 +1123,8 @@ class TestJenkinsCommand(unittest.TestCase):
         self.assertTrue(parsed_args.no_archive)
         self.assertTrue(parsed_args.ssl_verify)
         self.assertIsNone(parsed_args.blacklist_ids)
+        self.assertIsNone(parsed_args.fetch_workers)
+        self.assertIsNone(parsed_args.builds_index)
 
         args = ['--tag', 'test', '--no-archive', '--sleep-time', '60',
                 '--detail-depth', '2', '--no-ssl-verify',
@@ -856,6 +1145,8 @@ class TestJenkinsCommand(unittest.TestCase):
         args = ['--tag', 'test', '-u', USER, '-t', TOKEN,
                 '--no-archive', '--sleep-time', '60', '--detail-depth', '2',
                 '--blacklist-builds', 'job_1:123',
+                '--fetch-workers', '4',
+                '--builds-index', '/tmp/builds_index',
                 '--blacklist-ids', '1', '2', '3', '4', '--',
                 SERVER_URL]
 
@@ -869,6 +1160,8 @@ class TestJenkinsCommand(unittest.TestCase):
         self.assertTrue(parsed_args.no_archive)
         self.assertListEqual(parsed_args.blacklist_ids, ['1', '2', '3', '4'])
         self.assertListEqual(parsed_args.blacklist_builds, ['job_1:123'])
+        self.assertEqual(parsed_args.fetch_workers, 4)
+        self.assertEqual(parsed_args.builds_index, '/tmp/builds_index')
 
 
 if __name__ == "__main__":
@@ -148,6 +148,7 @@ class TestJiraBackend(unittest.TestCase):
         self.assertEqual(jira.max_results, 5)
         self.assertIsNone(jira.client)
         self.assertTrue(jira.ssl_verify)
+        self.assertIsNone(jira.fetch_workers)
 
         # When tag is empty or None it will be set to
         # the value in url
@@ -162,6 +163,9 @@ class TestJiraBackend(unittest.TestCase):
         self.assertEqual(jira.tag, JIRA_SERVER_URL)
         self.assertFalse(jira.ssl_verify)
 
+        jira = Jira(JIRA_SERVER_URL, fetch_workers=4)
+        self.assertEqual(jira.fetch_workers, 4)
+
     def test_has_archiving(self):
         """Test if it returns True when has_archiving is called"""
 
@@ -333,6 +337,55 @@ class TestJiraBackend(unittest.TestCase):
                          custom_fields['customfield_10603']['name'])
         self.assertEqual(issue['data']['comments_data'], [])
 
+    @httpretty.activate
+    def test_fetch_fetch_workers(self):
+        """Test whether issues and comments are fetched using several threads"""
+
+        bodies_json = {
+            '0': read_file('data/jira/jira_issues_page_1.json'),
+            '2': read_file('data/jira/jira_issues_page_2.json')
+        }
+
+        def request_callback(request, uri, headers):
+            body = bodies_json[request.querystring['startAt'][0]]
+            return 200, headers, body
+
+        httpretty.register_uri(httpretty.GET,
+                               JIRA_SEARCH_URL,
+                               body=request_callback)
+        httpretty.register_uri(httpretty.GET,
+                               JIRA_ISSUE_1_COMMENTS_URL,
+                               body=read_file('data/jira/jira_comments_issue_empty.json'),
+                               status=200)
+        httpretty.register_uri(httpretty.GET,
+                               JIRA_ISSUE_2_COMMENTS_URL,
+                               body=read_file('data/jira/jira_comments_issue_page_2.json'),
+                               status=200)
+        httpretty.register_uri(httpretty.GET,
+                               JIRA_ISSUE_3_COMMENTS_URL,
+                               body=read_file('data/jira/jira_comments_issue_empty.json'),
+                               status=200)
+        httpretty.register_uri(httpretty.GET,
+                               JIRA_FIELDS_URL,
+                               body=read_file('data/jira/jira_fields.json'),
+                               status=200)
+
+        jira = Jira(JIRA_SERVER_URL)
+        expected = [issue for issue in jira.fetch()]
+
+        jira = Jira(JIRA_SERVER_URL, fetch_workers=3)
+        issues = [issue for issue in jira.fetch()]
+
+        self.assertEqual(len(issues), 3)
+
+        for issue, expected_issue in zip(issues, expected):
+            self.assertEqual(issue['uuid'], expected_issue['uuid'])
+            self.assertDictEqual(issue['data'], expected_issue['data'])
+
+        self.assertEqual(issues[0]['data']['key'], 'HELP-6043')
+        self.assertEqual(len(issues[1]['data']['comments_data']), 2)
+        self.assertEqual(issues[2]['data']['key'], 'HELP-6041')
+
     @httpretty.activate
     def test_search_fields(self):
         """Test whether the search_fields is properly set"""
@@ -750,6 +803,46 @@ class TestJiraClient(unittest.TestCase):
         self.assertEqual(pages[0], bodies_json[0])
         self.assertEqual(pages[1], bodies_json[1])
 
+    @httpretty.activate
+    def test_get_issues_workers(self):
+        """Test whether the pages of issues are fetched concurrently using the total"""
+
+        from_date = str_to_datetime('2015-01-01')
+
+        def request_callback(request, uri, headers):
+            start_at = int(request.querystring['startAt'][0])
+            body = {
+                'startAt': start_at,
+                'maxResults': 2,
+                'total': 7,
+                'issues': [{'id': str(n)} for n in range(start_at, min(start_at + 2, 7))]
+            }
+            return 200, headers, json.dumps(body)
+
+        httpretty.register_uri(httpretty.GET,
+                               JIRA_SEARCH_URL,
+                               body=request_callback)
+
+        client = JiraClient(url='http://example.com', project='perceval',
+                            user='user', password='password',
+                            ssl_verify=False, cert=None, max_results=2,
+                            fetch_workers=3)
+
+        self.assertEqual(client.fetch_workers, 3)
+
+        pages = [json.loads(page) for page in client.get_issues(from_date)]
+
+        self.assertListEqual([page['startAt'] for page in pages], [0, 2, 4, 6])
+
+        issues = [issue['id'] for page in pages for issue in page['issues']]
+        self.assertListEqual(issues, ['0', '1', '2', '3', '4', '5', '6'])
+
+        requests = httpretty.latest_requests()
+        self.assertEqual(len(requests), 4)
+
+        start_ats = sorted(int(req.querystring['startAt'][0]) for req in requests)
+        self.assertListEqual(start_ats, [0, 2, 4, 6])
+
     @httpretty.activate
     def test_get_comments(self):
         """Test get comments API call"""
@@ -877,6 +970,7 @@ class TestJiraCommand(unittest.TestCase):
                 '--project', 'Perceval Jira',
                 '--cert', 'aaaa',
                 '--max-results', '1',
+                '--fetch-workers', '4',
                 '--tag', 'test',
                 '--no-archive',
                 '--from-date', '1970-01-01',
@@ -889,6 +983,7 @@ class TestJiraCommand(unittest.TestCase):
         self.assertTrue(parsed_args.ssl_verify)
         self.assertEqual(parsed_args.cert, 'aaaa')
         self.assertEqual(parsed_args.max_results, 1)
+        self.assertEqual(parsed_args.fetch_workers, 4)
         self.assertEqual(parsed_args.tag, 'test')
         self.assertTrue(parsed_args.no_archive)
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
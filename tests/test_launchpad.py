@@ -23,11 +23,13 @@
 #     Harshal Mittal <harshalmittal4@gmail.com>
 #
 
+import concurrent.futures
 import datetime
 import httpretty
 import json
 import os
 import requests
+import time
 import unittest
 
 from perceval.backend import BackendCommandArgumentParser
@@ -54,6 +56,125 @@ def read_file(filename, mode='r'):
     return content
 
 
+def setup_http_server():
+    """Set up a mock HTTP server with three issues in three pages"""
+
+    issues_page_1 = read_file('data/launchpad/launchpad_issues_page_1')
+    issues_page_2 = read_file('data/launchpad/launchpad_issues_page_2')
+    issues_page_3 = read_file('data/launchpad/launchpad_issues_page_3')
+
+    issue_1 = read_file('data/launchpad/launchpad_issue_1')
+    issue_2 = read_file('data/launchpad/launchpad_issue_2')
+    issue_3 = read_file('data/launchpad/launchpad_issue_3')
+
+    issue_1_comments = read_file('data/launchpad/launchpad_issue_1_comments')
+    issue_1_attachments = read_file('data/launchpad/launchpad_issue_1_attachments')
+    issue_1_activities = read_file('data/launchpad/launchpad_issue_1_activities')
+
+    issue_2_activities = read_file('data/launchpad/launchpad_issue_2_activities')
+    issue_2_comments = read_file('data/launchpad/launchpad_issue_2_comments')
+
+    user_1 = read_file('data/launchpad/launchpad_user_1')
+
+    empty_issue_comments = read_file('data/launchpad/launchpad_empty_issue_comments')
+    empty_issue_attachments = read_file('data/launchpad/launchpad_empty_issue_attachments')
+    empty_issue_activities = read_file('data/launchpad/launchpad_empty_issue_activities')
+
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_PACKAGE_PROJECT_URL +
+                           "?modified_since=1970-01-01T00%3A00%3A00%2B00%3A00&ws.op=searchTasks"
+                           "&omit_duplicates=false&order_by=date_last_updated&status=Confirmed&status=Expired"
+                           "&status=Fix+Committed&status=Fix+Released"
+                           "&status=In+Progress&status=Incomplete&status=Incomplete+%28with+response%29"
+                           "&status=Incomplete+%28without+response%29"
+                           "&status=Invalid&status=New&status=Opinion&status=Triaged"
+                           "&status=Won%27t+Fix"
+                           "&ws.size=1&memo=2&ws.start=2",
+                           body=issues_page_3,
+                           status=200)
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_PACKAGE_PROJECT_URL +
+                           "?modified_since=1970-01-01T00%3A00%3A00%2B00%3A00&ws.op=searchTasks"
+                           "&omit_duplicates=false&order_by=date_last_updated&status=Confirmed&status=Expired"
+                           "&status=Fix+Committed&status=Fix+Released"
+                           "&status=In+Progress&status=Incomplete&status=Incomplete+%28with+response%29"
+                           "&status=Incomplete+%28without+response%29"
+                           "&status=Invalid&status=New&status=Opinion&status=Triaged"
+                           "&status=Won%27t+Fix"
+                           "&ws.size=1&memo=1&ws.start=1",
+                           body=issues_page_2,
+                           status=200)
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_PACKAGE_PROJECT_URL +
+                           "?modified_since=1970-01-01T00%3A00%3A00%2B00%3A00&ws.op=searchTasks"
+                           "&omit_duplicates=false&order_by=date_last_updated&status=Confirmed&status=Expired"
+                           "&status=Fix+Committed&status=Fix+Released"
+                           "&status=In+Progress&status=Incomplete&status=Incomplete+%28with+response%29"
+                           "&status=Incomplete+%28without+response%29"
+                           "&status=Invalid&status=New&status=Opinion&status=Triaged"
+                           "&status=Won%27t+Fix"
+                           "&ws.size=1",
+                           body=issues_page_1,
+                           status=200)
+
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_API_URL + "/bugs/1",
+                           body=issue_1,
+                           status=200)
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_API_URL + "/bugs/2",
+                           body=issue_2,
+                           status=200)
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_API_URL + "/bugs/3",
+                           body=issue_3,
+                           status=200)
+
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_API_URL + "/bugs/1/messages",
+                           body=issue_1_comments,
+                           status=200)
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_API_URL + "/bugs/2/messages",
+                           body=issue_2_comments,
+                           status=200)
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_API_URL + "/bugs/3/messages",
+                           body=empty_issue_comments,
+                           status=200)
+
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_API_URL + "/bugs/1/attachments",
+                           body=issue_1_attachments,
+                           status=200)
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_API_URL + "/bugs/2/attachments",
+                           body=empty_issue_attachments,
+                           status=200)
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_API_URL + "/bugs/3/attachments",
+                           body=empty_issue_attachments,
+                           status=200)
+
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_API_URL + "/bugs/1/activity",
+                           body=issue_1_activities,
+                           status=200)
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_API_URL + "/bugs/2/activity",
+                           body=issue_2_activities,
+                           status=200)
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_API_URL + "/bugs/3/activity",
+                           body=empty_issue_activities,
+                           status=200)
+
+    httpretty.register_uri(httpretty.GET,
+                           LAUNCHPAD_API_URL + "/~user",
+                           body=user_1,
+                           status=200)
+
+
 class TestLaunchpadBackend(unittest.TestCase):
     """Launchpad backend tests"""
 
@@ -67,6 +188,7 @@ class TestLaunchpadBackend(unittest.TestCase):
         self.assertEqual(launchpad.tag, 'test')
         self.assertIsNone(launchpad.client)
         self.assertTrue(launchpad.ssl_verify)
+        self.assertIsNone(launchpad.fetch_workers)
 
         launchpad = Launchpad('mydistribution', tag='test', package="mypackage", ssl_verify=False)
         self.assertEqual(launchpad.distribution, 'mydistribution')
@@ -253,6 +375,28 @@ class TestLaunchpadBackend(unittest.TestCase):
         self.assertListEqual(issues[2]['data']['messages_data'], issue_3_expected['messages_data'])
         self.assertDictEqual(issues[2]['data'], issue_3_expected)
 
+    @httpretty.activate
+    def test_fetch_fetch_workers(self):
+        """Test whether the data of the issues is fetched concurrently"""
+
+        setup_http_server()
+
+        issues_expected = [
+            json.loads(read_file('data/launchpad/launchpad_issue_1_expected')),
+            json.loads(read_file('data/launchpad/launchpad_issue_2_expected')),
+            json.loads(read_file('data/launchpad/launchpad_issue_3_expected'))
+        ]
+
+        launchpad = Launchpad('mydistribution', package="mypackage",
+                              items_per_page=2, fetch_workers=3)
+        issues = [issue for issue in launchpad.fetch(from_date=None)]
+
+        self.assertListEqual([issue['data'] for issue in issues], issues_expected)
+
+        # Users are requested only once
+        users = [request for request in httpretty.latest_requests() if request.path == '/1.0/~user']
+        self.assertEqual(len(users), 1)
+
     @httpretty.activate
     def test_search_fields(self):
         """Test whether the search_fields is properly set"""
@@ -671,6 +815,20 @@ class TestLaunchpadBackendArchive(TestCaseBackendArchive):
 
         self._test_fetch_from_archive(from_date=None)
 
+    @httpretty.activate
+    def test_fetch_fetch_workers_from_archive(self):
+        """Test whether issues fetched concurrently are returned from archive"""
+
+        setup_http_server()
+
+        self.backend_write_archive = Launchpad('mydistribution', package="mypackage",
+                                               items_per_page=2, archive=self.archive,
+                                               fetch_workers=3)
+        self.backend_read_archive = Launchpad('mydistribution', package="mypackage",
+                                              items_per_page=2, archive=self.archive,
+                                              fetch_workers=3)
+        self._test_fetch_from_archive(from_date=None)
+
     @httpretty.activate
     def test_fetch_from_date_from_archive(self):
         """Test whether a list of issues is returned from archive after a given date"""
@@ -947,6 +1105,36 @@ class TestLaunchpadClient(unittest.TestCase):
 
         self.assertDictEqual(json.loads(user_retrieved), json.loads(user))
 
+    @httpretty.activate
+    def test_user_cache(self):
+        """Test whether users are requested only once by concurrent calls"""
+
+        user = read_file('data/launchpad/launchpad_user_1')
+
+        def request_callback(request, uri, headers):
+            time.sleep(0.1)
+            return 200, headers, user
+
+        httpretty.register_uri(httpretty.GET,
+                               LAUNCHPAD_API_URL + "/~user",
+                               body=request_callback)
+
+        client = LaunchpadClient("mydistribution", package="mypackage")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            users = list(executor.map(client.user, ["user"] * 8))
+
+        for user_retrieved in users:
+            self.assertDictEqual(json.loads(user_retrieved), json.loads(user))
+
+        self.assertEqual(len(httpretty.latest_requests()), 1)
+
+        # The cache is not shared among clients
+        client = LaunchpadClient("mydistribution", package="mypackage")
+        _ = client.user("user")
+
+        self.assertEqual(len(httpretty.latest_requests()), 2)
+
     @httpretty.activate
     def test_user_not_retrieved(self):
         """Test user API call"""
@@ -1019,6 +1207,7 @@ class TestLaunchpadCommand(unittest.TestCase):
         self.assertEqual(parsed_args.sleep_time, '600')
         self.assertEqual(parsed_args.package, 'mypackage')
         self.assertTrue(parsed_args.ssl_verify)
+        self.assertIsNone(parsed_args.fetch_workers)
 
         args = ['--tag', 'test', '--no-archive',
                 '--from-date', '1970-01-01',
@@ -1026,6 +1215,7 @@ class TestLaunchpadCommand(unittest.TestCase):
                 '--sleep-time', '600',
                 '--package', 'mypackage',
                 '--no-ssl-verify',
+                '--fetch-workers', '4',
                 'mydistribution']
 
         parsed_args = parser.parse(*args)
@@ -1037,6 +1227,7 @@ class TestLaunchpadCommand(unittest.TestCase):
         self.assertEqual(parsed_args.sleep_time, '600')
         self.assertEqual(parsed_args.package, 'mypackage')
         self.assertFalse(parsed_args.ssl_verify)
+        self.assertEqual(parsed_args.fetch_workers, 4)
 
 
 if __name__ == "__main__":
@@ -27,6 +27,7 @@
 import bz2
 import datetime
 import gzip
+import io
 import os
 import shutil
 import tempfile
@@ -35,12 +36,15 @@ import unittest.mock
 import zipfile
 
 from perceval.backend import BackendCommandArgumentParser
+from perceval.errors import BackendError
 from perceval.utils import DEFAULT_DATETIME
 from perceval.backends.core.mbox import (logger,
                                          MBox,
                                          MBoxCommand,
                                          MBoxArchive,
-                                         MailingList)
+                                         MBoxIndex,
+                                         MailingList,
+                                         _MBoxReader)
 
 
 class TestBaseMBox(unittest.TestCase):
@@ -252,6 +256,10 @@ class TestMBoxBackend(TestBaseMBox):
         self.assertEqual(backend.origin, 'http://example.com/')
         self.assertEqual(backend.tag, 'http://example.com/')
         self.assertFalse(backend.ssl_verify)
+        self.assertIsNone(backend.parse_workers)
+
+        backend = MBox('http://example.com/', self.tmp_path, parse_workers=4)
+        self.assertEqual(backend.parse_workers, 4)
 
     def test_has_archiving(self):
         """Test if it returns False when has_archiving is called"""
@@ -294,6 +302,40 @@ class TestMBoxBackend(TestBaseMBox):
             self.assertEqual(message['category'], 'message')
             self.assertEqual(message['tag'], 'http://example.com/')
 
+    def test_fetch_parallel(self):
+        """Test whether mbox files parsed in parallel return the same messages"""
+
+        backend = MBox('http://example.com/', self.tmp_path)
+        expected = [m for m in backend.fetch(from_date=None, to_date=None)]
+
+        backend = MBox('http://example.com/', self.tmp_path, parse_workers=3)
+        messages = [m for m in backend.fetch(from_date=None, to_date=None)]
+
+        self.assertEqual(len(messages), 11)
+        self.assertEqual(len(messages), len(expected))
+
+        for message, exp in zip(messages, expected):
+            self.assertEqual(message['uuid'], exp['uuid'])
+            self.assertEqual(message['updated_on'], exp['updated_on'])
+            self.assertDictEqual(message['data'], exp['data'])
+
+        # Messages are filtered by date too
+        from_date = datetime.datetime(2008, 1, 1)
+        to_date = datetime.datetime(2011, 1, 1)
+
+        backend = MBox('http://example.com/', self.tmp_path, parse_workers=2)
+        messages = [m for m in backend.fetch(from_date=from_date, to_date=to_date)]
+
+        expected = [
+            '<4CF64D10.9020206@domain.com>',
+            '<4CF64D10.9020206@domain.com>',
+            '<87iqzlofqu.fsf@avet.kvota.net>',
+            '<019801ca633f$f4376140$dca623c0$@yang@example.com>',
+            '<4CF64D10.9020206@domain.com>',
+            '<4CF64D10.9020206@domain.com>'
+        ]
+        self.assertListEqual([m['data']['Message-ID'] for m in messages], expected)
+
     def test_search_fields(self):
         """Test whether the search_fields is properly set"""
 
@@ -404,33 +446,28 @@ class TestMBoxBackend(TestBaseMBox):
 
         tmp_path_ign = tempfile.mkdtemp(prefix='perceval_')
 
-        def copy_mbox_side_effect(*args, **kwargs):
-            """Copy a mbox archive or raise IO error for 'mbox_multipart.mbox' archive"""
+        def parse_mbox_archive_side_effect(mbox):
+            """Parse a mbox archive or raise IO error for 'mbox_multipart.mbox' archive"""
 
             error_file = os.path.join(tmp_path_ign, 'mbox_multipart.mbox')
-            mbox = args[0]
 
             if mbox.filepath == error_file:
                 raise OSError('Mock error')
 
-            tmp_path = tempfile.mktemp(prefix='perceval_')
-
             with mbox.container as f_in:
-                with open(tmp_path, mode='wb') as f_out:
-                    for line in f_in:
-                        f_out.write(line)
-            return tmp_path
+                for message in MBox.parse_mbox_stream(f_in):
+                    yield message
 
         shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/mbox/mbox_single.mbox'),
                     tmp_path_ign)
         shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/mbox/mbox_multipart.mbox'),
                     tmp_path_ign)
 
-        # Mock 'copy_mbox' method for forcing to raise an OSError
+        # Mock '_parse_mbox_archive' method for forcing to raise an OSError
         # with file 'data/mbox/mbox_multipart.mbox' to check if
         # the code ignores this file
-        with unittest.mock.patch('perceval.backends.core.mbox.MBox._copy_mbox') as mock_copy_mbox:
-            mock_copy_mbox.side_effect = copy_mbox_side_effect
+        with unittest.mock.patch('perceval.backends.core.mbox.MBox._parse_mbox_archive') as mock_parse_mbox:
+            mock_parse_mbox.side_effect = parse_mbox_archive_side_effect
 
             backend = MBox('http://example.com/', tmp_path_ign)
             messages = [m for m in backend.fetch()]
@@ -467,6 +504,164 @@ class TestMBoxBackend(TestBaseMBox):
 
         self.assertDictEqual(message, expected)
 
+    def test_ignore_corrupted_compressed_file(self):
+        """Compressed files with errors should be ignored"""
+
+        tmp_path_ign = tempfile.mkdtemp(prefix='perceval_')
+
+        shutil.copy(self.cfiles['bz2'], os.path.join(tmp_path_ign, 'a.bz2'))
+
+        # Truncate a gzip file so it cannot be decompressed
+        with open(self.cfiles['gz'], 'rb') as f_in:
+            data = f_in.read()
+        with open(os.path.join(tmp_path_ign, 'b.gz'), 'wb') as f_out:
+            f_out.write(data[:len(data) // 2])
+
+        with self.assertLogs(logger, level='WARNING') as cm:
+            backend = MBox('http://example.com/', tmp_path_ign)
+            messages = [m for m in backend.fetch()]
+
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0]['data']['Message-ID'], '<4CF64D10.9020206@domain.com>')
+        self.assertRegex(cm.output[0], "Ignoring .*b.gz mbox")
+
+        shutil.rmtree(tmp_path_ign)
+
+    def test_ignore_corrupted_compressed_file_parallel(self):
+        """Compressed files with errors should be ignored when parsing in parallel"""
+
+        tmp_path_ign = tempfile.mkdtemp(prefix='perceval_')
+
+        shutil.copy(self.cfiles['bz2'], os.path.join(tmp_path_ign, 'a.bz2'))
+        shutil.copy(self.cfiles['zip'], os.path.join(tmp_path_ign, 'c.zip'))
+
+        with open(self.cfiles['gz'], 'rb') as f_in:
+            data = f_in.read()
+        with open(os.path.join(tmp_path_ign, 'b.gz'), 'wb') as f_out:
+            f_out.write(data[:len(data) // 2])
+
+        backend = MBox('http://example.com/', tmp_path_ign, parse_workers=2)
+        messages = [m for m in backend.fetch()]
+
+        self.assertEqual(len(messages), 2)
+
+        for message in messages:
+            self.assertEqual(message['data']['Message-ID'], '<4CF64D10.9020206@domain.com>')
+
+        shutil.rmtree(tmp_path_ign)
+
+    def test_fetch_mbox_index(self):
+        """Test whether indexed mboxes return the same messages"""
+
+        tmp_path_idx = tempfile.mkdtemp(prefix='perceval_')
+        index_path = os.path.join(tmp_path_idx, 'index')
+
+        backend = MBox('http://example.com/', self.tmp_path)
+        expected = [m for m in backend.fetch()]
+
+        # First, mboxes are indexed
+        backend = MBox('http://example.com/', self.tmp_path, mbox_index=index_path)
+        messages = [m for m in backend.fetch()]
+
+        self.assertEqual(len(messages), 11)
+        self.assertListEqual([m['data'] for m in messages], [m['data'] for m in expected])
+
+        # Then, the index is used
+        messages = [m for m in backend.fetch()]
+        self.assertListEqual([m['data'] for m in messages], [m['data'] for m in expected])
+
+        # Only the messages between the dates are read
+        from_date = datetime.datetime(2011, 1, 1)
+
+        backend = MBox('http://example.com/', self.tmp_path)
+        expected = [m for m in backend.fetch(from_date=from_date)]
+
+        backend = MBox('http://example.com/', self.tmp_path, mbox_index=index_path)
+
+        with self.assertLogs(logger, level='DEBUG') as cm:
+            messages = [m for m in backend.fetch(from_date=from_date)]
+
+        self.assertEqual(len(messages), 2)
+        self.assertListEqual([m['data'] for m in messages], [m['data'] for m in expected])
+
+        skipped = [line for line in cm.output if 'No messages to parse in indexed mbox' in line]
+        self.assertEqual(len(skipped), 7)
+
+        # Updated files are indexed again
+        filepath = self.files['complex']
+        stat = os.stat(filepath)
+        os.utime(filepath, (stat.st_atime, stat.st_mtime + 10))
+
+        with self.assertLogs(logger, level='DEBUG') as cm:
+            messages = [m for m in backend.fetch(from_date=from_date)]
+
+        self.assertEqual(len(messages), 2)
+        self.assertIn("DEBUG:perceval.backends.core.mbox:2 messages of mbox %s indexed" % filepath,
+                      cm.output)
+
+        os.utime(filepath, (stat.st_atime, stat.st_mtime))
+        shutil.rmtree(tmp_path_idx)
+
+    def test_fetch_mbox_index_ignored(self):
+        """Test whether invalid messages are counted as ignored using the index"""
+
+        tmp_path_idx = tempfile.mkdtemp(prefix='perceval_')
+        index_path = os.path.join(tmp_path_idx, 'index')
+
+        def fetch_stats(backend):
+            with self.assertLogs(logger, level='INFO') as cm:
+                messages = [m for m in backend.fetch()]
+            done = [line for line in cm.output if 'Done.' in line]
+            return len(messages), done
+
+        backend = MBox('http://example.com/', self.tmp_error_path)
+        expected = fetch_stats(backend)
+        self.assertEqual(expected[0], 2)
+
+        for parse_workers in [None, 2]:
+            backend = MBox('http://example.com/', self.tmp_error_path,
+                           mbox_index=index_path, parse_workers=parse_workers)
+
+            # First, the mbox is indexed; then, the index is used
+            self.assertEqual(fetch_stats(backend), expected)
+            self.assertEqual(fetch_stats(backend), expected)
+
+        # The index is opened once per fetch
+        backend = MBox('http://example.com/', self.tmp_path, mbox_index=index_path)
+
+        with unittest.mock.patch('perceval.backends.core.mbox.MBoxIndex',
+                                 wraps=MBoxIndex) as mocked:
+            messages = [m for m in backend.fetch()]
+
+        self.assertEqual(len(messages), 11)
+        self.assertEqual(mocked.call_count, 1)
+
+        shutil.rmtree(tmp_path_idx)
+
+    def test_parse_mbox_stream(self):
+        """Test whether parsing a stream returns the same messages than parsing a file"""
+
+        for filepath in self.files.values():
+            expected = [msg for msg in MBox.parse_mbox(filepath)]
+
+            with open(filepath, 'rb') as f_in:
+                messages = [msg for msg in MBox.parse_mbox_stream(f_in)]
+
+            self.assertEqual(len(messages), len(expected))
+
+            for message, exp in zip(messages, expected):
+                self.assertDictEqual(dict(message), dict(exp))
+
+        # Compressed files are parsed in place
+        expected = [msg for msg in MBox.parse_mbox(self.files['single'])]
+
+        for filepath in self.cfiles.values():
+            with MBoxArchive(filepath).container as f_in:
+                messages = [msg for msg in MBox.parse_mbox_stream(f_in)]
+
+            self.assertEqual(len(messages), 1)
+            self.assertDictEqual(dict(messages[0]), dict(expected[0]))
+
     def test_parse_complex_mbox(self):
         """Test whether it parses a complex mbox file"""
 
@@ -579,6 +774,100 @@ class TestMBoxBackend(TestBaseMBox):
         _ = [msg for msg in messages]
 
 
+class TestMBoxReader(TestBaseMBox):
+    """Tests for _MBoxReader class"""
+
+    def test_messages_with_offsets(self):
+        """Test whether messages can be read again using their offsets"""
+
+        for filepath in list(self.files.values()) + list(self.cfiles.values()):
+            with MBoxArchive(filepath).container as f_in:
+                entries = [entry for entry in _MBoxReader(f_in).messages_with_offsets()]
+
+            with MBoxArchive(filepath).container as f_in:
+                data = f_in.read()
+
+            self.assertGreater(len(entries), 0)
+            self.assertEqual(entries[0][0], 0)
+            self.assertEqual(entries[-1][0] + entries[-1][1], len(data))
+
+            for offset, length, msg in entries:
+                chunk = data[offset:offset + length]
+                self.assertTrue(chunk.startswith(b'From '))
+
+                msgs = [m for m in _MBoxReader(io.BytesIO(chunk))]
+                self.assertEqual(len(msgs), 1)
+                self.assertEqual(msgs[0].get_from(), msg.get_from())
+                self.assertEqual(msgs[0].as_bytes(), msg.as_bytes())
+
+
+class TestMBoxIndex(unittest.TestCase):
+    """Tests for MBoxIndex class"""
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='perceval_')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_search(self):
+        """Test whether the messages between two dates are found"""
+
+        index_path = os.path.join(self.tmp_path, 'index')
+        index = MBoxIndex(index_path)
+
+        self.assertIsNone(index.search('/tmp/mbox', 100, 1.5, 0, 1000))
+
+        entries = [(0, 10, 100.0), (10, 20, None), (30, 50, 300.0), (80, 20, 200.0)]
+        index.store('/tmp/mbox', 100, 1.5, entries)
+
+        index = MBoxIndex(index_path)
+
+        # Invalid messages, without date, are always returned
+        offsets = index.search('/tmp/mbox', 100, 1.5, 0, 1000)
+        self.assertListEqual(offsets, [(0, 10), (10, 20), (30, 50), (80, 20)])
+
+        offsets = index.search('/tmp/mbox', 100, 1.5, 150, 300)
+        self.assertListEqual(offsets, [(10, 20), (30, 50), (80, 20)])
+
+        offsets = index.search('/tmp/mbox', 100, 1.5, 500, 1000)
+        self.assertListEqual(offsets, [(10, 20)])
+
+        # Changes on the size or on the modification time
+        self.assertIsNone(index.search('/tmp/mbox', 101, 1.5, 0, 1000))
+        self.assertIsNone(index.search('/tmp/mbox', 100, 2.5, 0, 1000))
+        self.assertIsNone(index.search('/tmp/other', 100, 1.5, 0, 1000))
+
+    def test_store(self):
+        """Test whether the entries of a mbox are replaced"""
+
+        index_path = os.path.join(self.tmp_path, 'index')
+        index = MBoxIndex(index_path)
+
+        index.store('/tmp/mbox', 100, 1.5, [(0, 10, 100.0), (10, 90, 200.0)])
+        index.store('/tmp/mbox2', 10, 1.5, [(0, 10, 100.0)])
+        index.store('/tmp/mbox', 120, 2.5, [(0, 120, 300.0)])
+
+        self.assertIsNone(index.search('/tmp/mbox', 100, 1.5, 0, 1000))
+
+        offsets = index.search('/tmp/mbox', 120, 2.5, 0, 1000)
+        self.assertListEqual(offsets, [(0, 120)])
+
+        offsets = index.search('/tmp/mbox2', 10, 1.5, 0, 1000)
+        self.assertListEqual(offsets, [(0, 10)])
+
+    def test_invalid_index(self):
+        """Test whether an exception is thrown when the index is not valid"""
+
+        index_path = os.path.join(self.tmp_path, 'index')
+
+        with open(index_path, 'w') as fd:
+            fd.write("Invalid index file")
+
+        with self.assertRaisesRegex(BackendError, "invalid mbox index"):
+            _ = MBoxIndex(index_path)
+
+
 class TestMBoxCommand(unittest.TestCase):
     """MBoxCommand unit tests"""
 
@@ -604,11 +893,15 @@ class TestMBoxCommand(unittest.TestCase):
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
         self.assertTrue(parsed_args.ssl_verify)
+        self.assertIsNone(parsed_args.parse_workers)
+        self.assertIsNone(parsed_args.mbox_index)
 
         args = ['http://example.com/', '/tmp/perceval/',
                 '--tag', 'test',
                 '--from-date', '1970-01-01',
-                '--no-ssl-verify']
+                '--no-ssl-verify',
+                '--parse-workers', '4',
+                '--mbox-index', '/tmp/perceval/index']
 
         parsed_args = parser.parse(*args)
         self.assertEqual(parsed_args.uri, 'http://example.com/')
@@ -616,6 +909,8 @@ class TestMBoxCommand(unittest.TestCase):
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
         self.assertFalse(parsed_args.ssl_verify)
+        self.assertEqual(parsed_args.parse_workers, 4)
+        self.assertEqual(parsed_args.mbox_index, '/tmp/perceval/index')
 
 
 if __name__ == "__main__":
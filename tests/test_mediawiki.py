@@ -161,6 +161,7 @@ class TestMediaWikiBackend(unittest.TestCase):
         self.assertEqual(mediawiki.tag, 'test')
         self.assertIsNone(mediawiki.client)
         self.assertTrue(mediawiki.ssl_verify)
+        self.assertIsNone(mediawiki.fetch_workers)
 
         # When tag is empty or None it will be set to
         # the value in url
@@ -175,6 +176,9 @@ class TestMediaWikiBackend(unittest.TestCase):
         self.assertEqual(mediawiki.origin, MEDIAWIKI_SERVER_URL)
         self.assertEqual(mediawiki.tag, MEDIAWIKI_SERVER_URL)
 
+        mediawiki = MediaWiki(MEDIAWIKI_SERVER_URL, fetch_workers=4)
+        self.assertEqual(mediawiki.fetch_workers, 4)
+
     def test_has_archiving(self):
         """Test if it returns True when has_archiving is called"""
 
@@ -252,6 +256,36 @@ class TestMediaWikiBackend(unittest.TestCase):
 
         HTTPServer.check_pages_contents(self, pages)
 
+    @httpretty.activate
+    def _test_fetch_workers(self, version, reviews_api=False):
+        """Test whether the revisions of the pages are fetched using several threads"""
+
+        HTTPServer.routes(version)
+
+        mediawiki = MediaWiki(MEDIAWIKI_SERVER_URL)
+        expected = [page for page in mediawiki.fetch(reviews_api=reviews_api)]
+        expected_requests = sorted(str(sorted(req.querystring.items()))
+                                   for req in httpretty.latest_requests())
+
+        httpretty.reset()
+        HTTPServer.routes(version)
+
+        mediawiki = MediaWiki(MEDIAWIKI_SERVER_URL, fetch_workers=3)
+        pages = [page for page in mediawiki.fetch(reviews_api=reviews_api)]
+
+        self.assertEqual(len(pages), len(expected))
+
+        for page, expected_page in zip(pages, expected):
+            self.assertEqual(page['uuid'], expected_page['uuid'])
+            self.assertDictEqual(page['data'], expected_page['data'])
+
+        HTTPServer.check_pages_contents(self, pages)
+
+        # Each page is requested only once
+        requests = sorted(str(sorted(req.querystring.items()))
+                          for req in httpretty.latest_requests())
+        self.assertListEqual(requests, expected_requests)
+
 
 class TestMediaWikiBackend_1_23(TestMediaWikiBackend):
     """MediaWiki backend tests for MediaWiki 1.23 version"""
@@ -271,6 +305,9 @@ class TestMediaWikiBackend_1_23(TestMediaWikiBackend):
 
         self._test_search_fields("1.23")
 
+    def test_fetch_fetch_workers(self):
+        self._test_fetch_workers("1.23")
+
     @httpretty.activate
     def test_fetch_from_date(self):
         from_date = dateutil.parser.parse("2016-06-23 15:35")
@@ -312,6 +349,10 @@ class TestMediaWikiBackend_1_28(TestMediaWikiBackend):
 
         self._test_search_fields("1.28")
 
+    def test_fetch_fetch_workers(self):
+        self._test_fetch_workers("1.28")
+        self._test_fetch_workers("1.28", reviews_api=True)
+
     @httpretty.activate
     def test_fetch_from_date(self):
         from_date = dateutil.parser.parse("2016-06-23 15:35")
@@ -697,6 +738,7 @@ class TestMediaWikiCommand(unittest.TestCase):
 
         args = ['--tag', 'test',
                 '--no-archive', '--from-date', '1970-01-01',
+                '--fetch-workers', '4',
                 MEDIAWIKI_SERVER_URL]
 
         parsed_args = parser.parse(*args)
@@ -705,6 +747,7 @@ class TestMediaWikiCommand(unittest.TestCase):
         self.assertTrue(parsed_args.no_archive)
         self.assertTrue(parsed_args.ssl_verify)
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
+        self.assertEqual(parsed_args.fetch_workers, 4)
 
         args = ['--tag', 'test', '--no-ssl-verify',
                 '--no-archive', '--from-date', '1970-01-01',
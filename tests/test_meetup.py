@@ -29,6 +29,8 @@ import datetime
 import dateutil.tz
 import httpretty
 import os
+import shutil
+import tempfile
 import time
 import unittest
 import unittest.mock
@@ -984,6 +986,45 @@ class TestMeetupClient(unittest.TestCase):
         self.assertIn((MeetupClient.PKEY_OAUTH2, 'Bearer aaaa'), req.headers._headers)
         self.assertDictEqual(req.querystring, expected)
 
+    def test_shared_rate_limit(self):
+        """Test whether the relative reset times are shared as absolute ones"""
+
+        tmp_path = tempfile.mkdtemp(prefix='perceval_')
+        db_path = os.path.join(tmp_path, 'rate_limit.db')
+
+        client_a = MeetupClient('aaaa', max_items=2, rate_limit_db=db_path)
+        client_b = MeetupClient('aaaa', max_items=2, rate_limit_db=db_path)
+
+        response_a = requests.Response()
+        response_a.headers['X-RateLimit-Remaining'] = '20'
+        response_a.headers['X-RateLimit-Reset'] = '10'
+
+        response_b = requests.Response()
+        response_b.headers['X-RateLimit-Remaining'] = '25'
+        response_b.headers['X-RateLimit-Reset'] = '9'
+
+        before = time.time()
+        client_a.update_rate_limit(response_a)
+        client_b.update_rate_limit(response_b)
+
+        # Both responses belong to the same window, so the lowest
+        # remaining value and the first reset time are kept
+        self.assertEqual(client_a.rate_limit, 20)
+        self.assertEqual(client_b.rate_limit, 20)
+        self.assertEqual(client_b.rate_limit_reset_ts, client_a.rate_limit_reset_ts)
+        self.assertGreaterEqual(client_a.rate_limit_reset_ts, before + 10)
+
+        # Other clients get the time left to reset, not the countdown
+        # sent by the server when the rate limit was stored
+        client_c = MeetupClient('aaaa', max_items=2, rate_limit_db=db_path)
+        client_c.sleep_for_rate_limit()
+
+        self.assertEqual(client_c.rate_limit, 20)
+        self.assertEqual(client_c.rate_limit_reset_ts, client_a.rate_limit_reset_ts)
+        self.assertLessEqual(client_c.calculate_time_to_reset(), 11)
+
+        shutil.rmtree(tmp_path)
+
     @httpretty.activate
     def test_too_many_requests(self):
         """Test if a Retry error is raised"""
@@ -31,6 +31,7 @@ import json
 import os
 import requests
 import unittest
+import unittest.mock
 
 from perceval.backend import BackendCommandArgumentParser
 from perceval.utils import DEFAULT_DATETIME
@@ -68,13 +69,11 @@ def setup_http_server():
     tasks_empty_body = read_file('data/phabricator/phabricator_tasks_empty.json')
     tasks_trans_body = read_file('data/phabricator/phabricator_transactions.json', 'rb')
     tasks_trans_next_body = read_file('data/phabricator/phabricator_transactions_next.json', 'rb')
-    users_body = read_file('data/phabricator/phabricator_users.json', 'rb')
     jane_body = read_file('data/phabricator/phabricator_user_jane.json', 'rb')
     janes_body = read_file('data/phabricator/phabricator_user_janesmith.json', 'rb')
     jdoe_body = read_file('data/phabricator/phabricator_user_jdoe.json', 'rb')
     jrae_body = read_file('data/phabricator/phabricator_user_jrae.json', 'rb')
     jsmith_body = read_file('data/phabricator/phabricator_user_jsmith.json', 'rb')
-    phids_body = read_file('data/phabricator/phabricator_phids.json', 'rb')
     herald_body = read_file('data/phabricator/phabricator_phid_herald.json', 'rb')
     bugreport_body = read_file('data/phabricator/phabricator_project_bugreport.json', 'rb')
     teamdevel_body = read_file('data/phabricator/phabricator_project_devel.json', 'rb')
@@ -112,15 +111,15 @@ def setup_http_server():
             else:
                 body = tasks_trans_next_body
         elif uri == PHABRICATOR_USERS_URL:
-            if len(params['phids']) == 4:
-                body = users_body
-            else:
-                body = phids_users[params['phids'][0]]
+            users = [user for phid in params['phids'] if phid in phids_users
+                     for user in json.loads(phids_users[phid])['result']]
+            body = json.dumps({'error_code': None, 'error_info': None, 'result': users})
         elif uri == PHABRICATOR_PHIDS_URL:
-            if len(params['phids']) == 2:
-                body = phids_body
-            else:
-                body = phids[params['phids'][0]]
+            result = {}
+            for phid in params['phids']:
+                if phid in phids:
+                    result.update(json.loads(phids[phid])['result'])
+            body = json.dumps({'error_code': None, 'error_info': None, 'result': result or []})
         elif uri == PHABRICATOR_API_ERROR_URL:
             body = error_body
         else:
@@ -343,39 +342,10 @@ class TestPhabricatorBackend(unittest.TestCase):
                 'output': ['json'],
                 'params': {
                     '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-USER-2uk52xorcqb6sjvp467y']
-                }
-            },
-            {
-                '__conduit__': ['True'],
-                'output': ['json'],
-                'params': {
-                    '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-PROJ-zi2ndtoy3fh5pnbqzfdo']
-                }
-            },
-            {
-                '__conduit__': ['True'],
-                'output': ['json'],
-                'params': {
-                    '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-PROJ-2qnt6thbrd7qnx5bitzy']
-                }
-            },
-            {
-                '__conduit__': ['True'],
-                'output': ['json'],
-                'params': {
-                    '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-USER-bjxhrstz5fb5gkrojmev']
-                }
-            },
-            {
-                '__conduit__': ['True'],
-                'output': ['json'],
-                'params': {
-                    '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-USER-mjr7pnwpg6slsnjcqki7']
+                    'after': '335',
+                    'attachments': {'projects': True},
+                    'constraints': {'modifiedStart': 1},
+                    'order': 'outdated'
                 }
             },
             {
@@ -383,10 +353,7 @@ class TestPhabricatorBackend(unittest.TestCase):
                 'output': ['json'],
                 'params': {
                     '__conduit__': {'token': 'AAAA'},
-                    'after': '335',
-                    'attachments': {'projects': True},
-                    'constraints': {'modifiedStart': 1},
-                    'order': 'outdated'
+                    'ids': [296]
                 }
             },
             {
@@ -394,7 +361,12 @@ class TestPhabricatorBackend(unittest.TestCase):
                 'output': ['json'],
                 'params': {
                     '__conduit__': {'token': 'AAAA'},
-                    'ids': [296]
+                    'phids': [
+                        'PHID-USER-2uk52xorcqb6sjvp467y',
+                        'PHID-USER-bjxhrstz5fb5gkrojmev',
+                        'PHID-USER-mjr7pnwpg6slsnjcqki7',
+                        'PHID-USER-ojtcpympsmwenszuef7p'
+                    ]
                 }
             },
             {
@@ -402,7 +374,10 @@ class TestPhabricatorBackend(unittest.TestCase):
                 'output': ['json'],
                 'params': {
                     '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-USER-pr5fcxy4xk5ofqsfqcfc']
+                    'phids': [
+                        'PHID-PROJ-2qnt6thbrd7qnx5bitzy',
+                        'PHID-PROJ-zi2ndtoy3fh5pnbqzfdo'
+                    ]
                 }
             },
             {
@@ -410,7 +385,9 @@ class TestPhabricatorBackend(unittest.TestCase):
                 'output': ['json'],
                 'params': {
                     '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-USER-ojtcpympsmwenszuef7p']
+                    'phids': [
+                        'PHID-USER-pr5fcxy4xk5ofqsfqcfc'
+                    ]
                 }
             },
             {
@@ -418,7 +395,9 @@ class TestPhabricatorBackend(unittest.TestCase):
                 'output': ['json'],
                 'params': {
                     '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-APPS-PhabricatorHeraldApplication']
+                    'phids': [
+                        'PHID-APPS-PhabricatorHeraldApplication'
+                    ]
                 }
             }
         ]
@@ -430,6 +409,37 @@ class TestPhabricatorBackend(unittest.TestCase):
             rparams['params'] = json.loads(rparams['params'][0])
             self.assertIn(rparams, expected)
 
+    @httpretty.activate
+    @unittest.mock.patch('perceval.backends.core.phabricator.MAX_PHIDS', 2)
+    def test_fetch_phids_in_batches(self):
+        """Test whether users and projects are fetched in batches"""
+
+        http_requests = setup_http_server()
+
+        phab = Phabricator(PHABRICATOR_URL, 'AAAA')
+        tasks = [task for task in phab.fetch(from_date=None)]
+
+        self.assertEqual(len(tasks), 4)
+        self.assertEqual(tasks[0]['data']['fields']['authorData']['userName'], 'jdoe')
+        self.assertEqual(tasks[1]['data']['fields']['ownerData']['userName'], 'janesmith')
+        self.assertEqual(tasks[3]['data']['fields']['ownerData']['userName'], 'jrae')
+
+        phids = []
+        for req in http_requests:
+            if req.path.endswith('/user.query') or req.path.endswith('/phid.query'):
+                params = json.loads(req.parsed_body['params'][0])
+                phids.append(params['phids'])
+
+        # Each PHID is requested once, in queries of two at most
+        expected = [
+            ['PHID-USER-2uk52xorcqb6sjvp467y', 'PHID-USER-bjxhrstz5fb5gkrojmev'],
+            ['PHID-USER-mjr7pnwpg6slsnjcqki7', 'PHID-USER-ojtcpympsmwenszuef7p'],
+            ['PHID-PROJ-2qnt6thbrd7qnx5bitzy', 'PHID-PROJ-zi2ndtoy3fh5pnbqzfdo'],
+            ['PHID-USER-pr5fcxy4xk5ofqsfqcfc'],
+            ['PHID-APPS-PhabricatorHeraldApplication']
+        ]
+        self.assertListEqual(phids, expected)
+
     @httpretty.activate
     def test_search_fields(self):
         """Test whether the search_fields is properly set"""
@@ -508,31 +518,11 @@ class TestPhabricatorBackend(unittest.TestCase):
                 'output': ['json'],
                 'params': {
                     '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-USER-2uk52xorcqb6sjvp467y']
-                }
-            },
-            {
-                '__conduit__': ['True'],
-                'output': ['json'],
-                'params': {
-                    '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-PROJ-zi2ndtoy3fh5pnbqzfdo']
-                }
-            },
-            {
-                '__conduit__': ['True'],
-                'output': ['json'],
-                'params': {
-                    '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-USER-ojtcpympsmwenszuef7p']
-                }
-            },
-            {
-                '__conduit__': ['True'],
-                'output': ['json'],
-                'params': {
-                    '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-APPS-PhabricatorHeraldApplication']
+                    'phids': [
+                        'PHID-USER-2uk52xorcqb6sjvp467y',
+                        'PHID-USER-ojtcpympsmwenszuef7p',
+                        'PHID-USER-pr5fcxy4xk5ofqsfqcfc'
+                    ]
                 }
             },
             {
@@ -540,15 +530,11 @@ class TestPhabricatorBackend(unittest.TestCase):
                 'output': ['json'],
                 'params': {
                     '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-USER-pr5fcxy4xk5ofqsfqcfc']
-                }
-            },
-            {
-                '__conduit__': ['True'],
-                'output': ['json'],
-                'params': {
-                    "__conduit__": {"token": "AAAA"},
-                    "phids": ["PHID-PROJ-2qnt6thbrd7qnx5bitzy"]
+                    'phids': [
+                        'PHID-APPS-PhabricatorHeraldApplication',
+                        'PHID-PROJ-2qnt6thbrd7qnx5bitzy',
+                        'PHID-PROJ-zi2ndtoy3fh5pnbqzfdo'
+                    ]
                 }
             }
         ]
@@ -662,39 +648,10 @@ class TestPhabricatorBackend(unittest.TestCase):
                 'output': ['json'],
                 'params': {
                     '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-USER-2uk52xorcqb6sjvp467y']
-                }
-            },
-            {
-                '__conduit__': ['True'],
-                'output': ['json'],
-                'params': {
-                    '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-PROJ-zi2ndtoy3fh5pnbqzfdo']
-                }
-            },
-            {
-                '__conduit__': ['True'],
-                'output': ['json'],
-                'params': {
-                    '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-PROJ-2qnt6thbrd7qnx5bitzy']
-                }
-            },
-            {
-                '__conduit__': ['True'],
-                'output': ['json'],
-                'params': {
-                    '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-USER-bjxhrstz5fb5gkrojmev']
-                }
-            },
-            {
-                '__conduit__': ['True'],
-                'output': ['json'],
-                'params': {
-                    '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-USER-mjr7pnwpg6slsnjcqki7']
+                    'after': '335',
+                    'attachments': {'projects': True},
+                    'constraints': {'modifiedStart': 1},
+                    'order': 'outdated'
                 }
             },
             {
@@ -702,10 +659,12 @@ class TestPhabricatorBackend(unittest.TestCase):
                 'output': ['json'],
                 'params': {
                     '__conduit__': {'token': 'AAAA'},
-                    'after': '335',
-                    'attachments': {'projects': True},
-                    'constraints': {'modifiedStart': 1},
-                    'order': 'outdated'
+                    'phids': [
+                        'PHID-USER-2uk52xorcqb6sjvp467y',
+                        'PHID-USER-bjxhrstz5fb5gkrojmev',
+                        'PHID-USER-mjr7pnwpg6slsnjcqki7',
+                        'PHID-USER-ojtcpympsmwenszuef7p'
+                    ]
                 }
             },
             {
@@ -713,7 +672,10 @@ class TestPhabricatorBackend(unittest.TestCase):
                 'output': ['json'],
                 'params': {
                     '__conduit__': {'token': 'AAAA'},
-                    'phids': ['PHID-USER-ojtcpympsmwenszuef7p']
+                    'phids': [
+                        'PHID-PROJ-2qnt6thbrd7qnx5bitzy',
+                        'PHID-PROJ-zi2ndtoy3fh5pnbqzfdo'
+                    ]
                 }
             }
         ]
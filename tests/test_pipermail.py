@@ -267,6 +267,133 @@ class TestPipermailList(unittest.TestCase):
         self.assertEqual(mboxes[0].filepath, os.path.join(self.tmp_path, '2016-March.txt'))
         self.assertEqual(mboxes[1].filepath, os.path.join(self.tmp_path, '2016-April.txt'))
 
+    @httpretty.activate
+    def test_fetch_unchanged_archives(self):
+        """Test whether unchanged archives are not downloaded again"""
+
+        pipermail_index = read_file('data/pipermail/pipermail_index.html')
+        mbox_nov = read_file('data/pipermail/pipermail_2015_november.mbox')
+        mbox_march = read_file('data/pipermail/pipermail_2016_march.mbox')
+        mbox_april = read_file('data/pipermail/pipermail_2016_april.mbox')
+
+        def request_april(request, uri, response_headers):
+            response_headers['ETag'] = '"april"'
+            response_headers['Last-Modified'] = 'Sun, 10 Apr 2016 00:00:00 GMT'
+
+            if request.headers.get('If-None-Match', None) == '"april"':
+                return [304, response_headers, ""]
+            else:
+                return [200, response_headers, mbox_april]
+
+        def request_march(request, uri, response_headers):
+            response_headers['ETag'] = '"march"'
+
+            if request.headers.get('If-None-Match', None) == '"march"':
+                return [304, response_headers, ""]
+            else:
+                return [200, response_headers, mbox_march]
+
+        httpretty.register_uri(httpretty.GET,
+                               PIPERMAIL_URL,
+                               body=pipermail_index)
+        httpretty.register_uri(httpretty.GET,
+                               PIPERMAIL_URL + '2015-November.txt.gz',
+                               body=mbox_nov)
+        httpretty.register_uri(httpretty.GET,
+                               PIPERMAIL_URL + '2016-March.txt',
+                               body=request_march)
+        httpretty.register_uri(httpretty.GET,
+                               PIPERMAIL_URL + '2016-April.txt',
+                               body=request_april)
+
+        pmls = PipermailList('http://example.com/', self.tmp_path)
+        links = pmls.fetch()
+
+        self.assertEqual(len(links), 3)
+        self.assertEqual(len(httpretty.latest_requests()), 4)
+
+        # Archives are requested again including their validators
+        nrequests = len(httpretty.latest_requests())
+
+        pmls = PipermailList('http://example.com/', self.tmp_path)
+        links = pmls.fetch()
+
+        self.assertEqual(len(links), 3)
+        self.assertEqual(links[0][1], os.path.join(self.tmp_path, '2016-April.txt'))
+        self.assertEqual(links[1][1], os.path.join(self.tmp_path, '2016-March.txt'))
+        self.assertEqual(links[2][1], os.path.join(self.tmp_path, '2015-November.txt.gz'))
+
+        requests_ = httpretty.latest_requests()[nrequests:]
+        self.assertEqual(len(requests_), 4)
+        self.assertEqual(requests_[1].path, '/2016-April.txt')
+        self.assertEqual(requests_[1].headers['If-None-Match'], '"april"')
+        self.assertEqual(requests_[1].headers['If-Modified-Since'], 'Sun, 10 Apr 2016 00:00:00 GMT')
+        self.assertEqual(requests_[2].path, '/2016-March.txt')
+        self.assertEqual(requests_[2].headers['If-None-Match'], '"march"')
+        self.assertEqual(requests_[3].path, '/2015-November.txt.gz')
+        self.assertNotIn('If-None-Match', requests_[3].headers)
+
+        # The archive is not modified by the 304 response
+        mboxes = pmls.mboxes
+        self.assertEqual(len(mboxes), 3)
+        self.assertEqual(read_file(mboxes[2].filepath), mbox_april)
+
+        # Archives modified locally are downloaded again
+        nrequests = len(httpretty.latest_requests())
+
+        with open(os.path.join(self.tmp_path, '2016-March.txt'), 'a') as fd:
+            fd.write('\n')
+
+        pmls = PipermailList('http://example.com/', self.tmp_path)
+        links = pmls.fetch()
+
+        self.assertEqual(len(links), 3)
+
+        requests_ = httpretty.latest_requests()[nrequests:]
+        self.assertEqual(len(requests_), 4)
+        self.assertEqual(requests_[1].path, '/2016-April.txt')
+        self.assertEqual(requests_[1].headers['If-None-Match'], '"april"')
+        self.assertEqual(requests_[2].path, '/2016-March.txt')
+        self.assertNotIn('If-None-Match', requests_[2].headers)
+        self.assertEqual(read_file(mboxes[1].filepath), mbox_march)
+
+    @httpretty.activate
+    def test_fetch_download_workers(self):
+        """Test whether archives are downloaded by a pool of threads"""
+
+        pipermail_index = read_file('data/pipermail/pipermail_index.html')
+        mbox_nov = read_file('data/pipermail/pipermail_2015_november.mbox')
+        mbox_march = read_file('data/pipermail/pipermail_2016_march.mbox')
+        mbox_april = read_file('data/pipermail/pipermail_2016_april.mbox')
+
+        httpretty.register_uri(httpretty.GET,
+                               PIPERMAIL_URL,
+                               body=pipermail_index)
+        httpretty.register_uri(httpretty.GET,
+                               PIPERMAIL_URL + '2015-November.txt.gz',
+                               body=mbox_nov)
+        httpretty.register_uri(httpretty.GET,
+                               PIPERMAIL_URL + '2016-March.txt',
+                               body=mbox_march)
+        httpretty.register_uri(httpretty.GET,
+                               PIPERMAIL_URL + '2016-April.txt',
+                               body=mbox_april)
+
+        pmls = PipermailList('http://example.com/', self.tmp_path, download_workers=3)
+        links = pmls.fetch()
+
+        self.assertEqual(len(links), 3)
+
+        self.assertEqual(links[0][0], PIPERMAIL_URL + '2016-April.txt')
+        self.assertEqual(links[1][0], PIPERMAIL_URL + '2016-March.txt')
+        self.assertEqual(links[2][0], PIPERMAIL_URL + '2015-November.txt.gz')
+
+        mboxes = pmls.mboxes
+        self.assertEqual(len(mboxes), 3)
+        self.assertEqual(read_file(mboxes[0].filepath), mbox_nov)
+        self.assertEqual(read_file(mboxes[1].filepath), mbox_march)
+        self.assertEqual(read_file(mboxes[2].filepath), mbox_april)
+
     def test_mboxes(self):
         """Test whether it returns the mboxes ordered by the date on their filenames"""
 
@@ -309,6 +436,10 @@ class TestPipermailBackend(unittest.TestCase):
         self.assertEqual(backend.origin, 'http://example.com/')
         self.assertEqual(backend.tag, 'test')
         self.assertTrue(backend.ssl_verify)
+        self.assertIsNone(backend.download_workers)
+
+        backend = Pipermail('http://example.com/', self.tmp_path, download_workers=4)
+        self.assertEqual(backend.download_workers, 4)
 
         # When tag is empty or None it will be set to
         # the value in uri
@@ -468,7 +599,8 @@ class TestPipermailBackend(unittest.TestCase):
         backend = Pipermail('http://example.com/', self.tmp_path)
         messages = [m for m in backend.fetch(from_date=from_date)]
 
-        # For this test, mboxes from March and April should be downloaded.
+        # For this test, mboxes from March and April should be downloaded
+        # together with the state of the archives.
         expected_downloads = []
 
         for root, _, files in os.walk(self.tmp_path):
@@ -477,7 +609,8 @@ class TestPipermailBackend(unittest.TestCase):
                 expected_downloads.append(location)
 
         self.assertListEqual(expected_downloads,
-                             [os.path.join(self.tmp_path, '2016-April.txt'),
+                             [os.path.join(self.tmp_path, MailingList.ARCHIVES_STATE_FILE),
+                              os.path.join(self.tmp_path, '2016-April.txt'),
                               os.path.join(self.tmp_path, '2016-March.txt')])
 
         # Although there is a message in the mbox from March, this message
@@ -610,12 +743,18 @@ class TestPipermailCommand(unittest.TestCase):
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
         self.assertTrue(parsed_args.ssl_verify)
+        self.assertIsNone(parsed_args.parse_workers)
+        self.assertIsNone(parsed_args.mbox_index)
+        self.assertIsNone(parsed_args.download_workers)
 
         args = ['http://example.com/',
                 '--mboxes-path', '/tmp/perceval/',
                 '--tag', 'test',
                 '--from-date', '1970-01-01',
-                '--no-ssl-verify']
+                '--no-ssl-verify',
+                '--parse-workers', '4',
+                '--mbox-index', '/tmp/perceval/index',
+                '--download-workers', '4']
 
         parsed_args = parser.parse(*args)
         self.assertEqual(parsed_args.url, 'http://example.com/')
@@ -623,6 +762,9 @@ class TestPipermailCommand(unittest.TestCase):
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
         self.assertFalse(parsed_args.ssl_verify)
+        self.assertEqual(parsed_args.parse_workers, 4)
+        self.assertEqual(parsed_args.mbox_index, '/tmp/perceval/index')
+        self.assertEqual(parsed_args.download_workers, 4)
 
 
 if __name__ == "__main__":
@@ -30,11 +30,15 @@ import gzip
 import os
 import shutil
 import tempfile
+import threading
+import time
 import unittest
 import zipfile
 
 from perceval.errors import ParseError
 from perceval.utils import (check_compressed_file_type,
+                            iter_xml_to_dict,
+                            map_concurrently,
                             message_to_dict,
                             months_range,
                             remove_invalid_xml_chars,
@@ -143,6 +147,51 @@ class TestMonthsRange(unittest.TestCase):
         self.assertListEqual(result, [])
 
 
+class TestMapConcurrently(unittest.TestCase):
+    """Unit tests for map_concurrently"""
+
+    def test_map(self):
+        """Check whether the results are returned in order"""
+
+        def square(n):
+            # Delay the first elements so they finish the last
+            time.sleep(0.01 * (10 - n))
+            return n * n
+
+        results = [r for r in map_concurrently(square, range(10), workers=4)]
+        self.assertListEqual(results, [n * n for n in range(10)])
+
+    def test_map_sequential(self):
+        """Check whether calls run in the current thread when there are not workers"""
+
+        def thread_id(_):
+            return threading.get_ident()
+
+        current = threading.get_ident()
+
+        for workers in (None, 0, 1):
+            results = [r for r in map_concurrently(thread_id, range(3), workers=workers)]
+            self.assertListEqual(results, [current] * 3)
+
+        results = [r for r in map_concurrently(thread_id, range(3), workers=2)]
+        self.assertNotIn(current, results)
+
+    def test_map_exception(self):
+        """Check whether exceptions are raised when their results are consumed"""
+
+        def check(n):
+            if n == 3:
+                raise ValueError("invalid value %s" % n)
+            return n
+
+        results = map_concurrently(check, range(10), workers=2)
+
+        self.assertListEqual([next(results) for _ in range(3)], [0, 1, 2])
+
+        with self.assertRaisesRegex(ValueError, "invalid value 3"):
+            next(results)
+
+
 class TestMessagetoDict(unittest.TestCase):
     """Unit tests for message_to_dict"""
 
@@ -218,6 +267,73 @@ class TestMessagetoDict(unittest.TestCase):
                                      'Thanks,\n\nDaniel Nehren\n\n')
         self.assertEqual(len(html_body), 1557)
 
+    def test_convert_encoded_headers(self):
+        """Test whether encoded and plain headers are decoded"""
+
+        raw_email = "From: =?utf-8?q?G=C3=B6ran_Lastname?= <goran@example.com>\n" \
+                    "Subject: =?iso-8859-1?q?Caf=E9?= =?utf-8?b?Y2Fmw6k=?=\n" \
+                    "To: Göran <goran@example.com>\n" \
+                    "X-Empty: \n" \
+                    "\n" \
+                    "body\n"
+        msg = email.message_from_string(raw_email)
+
+        message = message_to_dict(msg)
+
+        self.assertEqual(message['From'], 'Göran Lastname  <goran@example.com>')
+        self.assertEqual(message['Subject'], 'Café café')
+        self.assertEqual(message['To'], 'Göran <goran@example.com>')
+        self.assertIsNone(message['X-Empty'])
+
+    def test_convert_duplicated_headers(self):
+        """Test whether the values of duplicated headers are kept"""
+
+        raw_email = "From: goran@example.com\n" \
+                    "X-Header: 1\n" \
+                    "x-header: 2\n" \
+                    "X-Header: 3\n" \
+                    "Received: A\n" \
+                    "Received: B\n" \
+                    "\n" \
+                    "body\n"
+        msg = email.message_from_string(raw_email)
+
+        message = message_to_dict(msg)
+
+        expected = [
+            ('unixfrom', None),
+            ('From', 'goran@example.com'),
+            ('x-header', '2'),
+            ('Received', 'B'),
+            ('body', {'plain': 'body\n'})
+        ]
+        self.assertListEqual(list(message.items()), expected)
+
+    def test_convert_allowed_headers(self):
+        """Test whether only the given headers are stored"""
+
+        raw_email = read_file('data/utils/email_single.txt')
+        msg = email.message_from_string(raw_email)
+
+        message = message_to_dict(msg, headers=['message-id', 'DATE'])
+        message = {k: v for k, v in message.items()}
+
+        expected = {
+            'Date': 'Wed, 01 Dec 2010 14:26:40 +0100',
+            'Message-ID': '<4CF64D10.9020206@domain.com>',
+            'unixfrom': None,
+            'body': {
+                'plain': "Hi!\n\nA message in English, with a signature "
+                         "with a different encoding.\n\nregards, G?ran"
+                         "\n\n\n",
+            }
+        }
+
+        self.assertDictEqual(message, expected)
+
+        message = message_to_dict(msg, headers=[])
+        self.assertListEqual(list(message.keys()), ['unixfrom', 'body'])
+
 
 class TestRemoveInvalidXMLChars(unittest.TestCase):
     """Unit tests for remove_invalid_xml_characters"""
@@ -229,6 +345,14 @@ class TestRemoveInvalidXMLChars(unittest.TestCase):
         self.assertNotEqual(purged_xml, raw_xml)
         self.assertEqual(len(purged_xml), len(raw_xml))
 
+    def test_replaced_chars(self):
+        """Check whether only control and invalid characters are replaced"""
+
+        raw_xml = '<a>\x00\x08\t\n\x0b\x1f \x7e\x7f\x84\x85\x86\x9f\xa0ñ</a>'
+        purged_xml = remove_invalid_xml_chars(raw_xml)
+
+        self.assertEqual(purged_xml, '<a>  \t\n   \x7e  \x85  \xa0ñ</a>')
+
 
 class TestXMLtoDict(unittest.TestCase):
     """Unit tests for xml_to_dict"""
@@ -277,5 +401,47 @@ class TestXMLtoDict(unittest.TestCase):
         self.assertRaises(ParseError, xml_to_dict, raw_xml)
 
 
+class TestIterXMLtoDict(unittest.TestCase):
+    """Unit tests for iter_xml_to_dict"""
+
+    def test_iter_xml_to_dict(self):
+        """Check whether it converts the elements as xml_to_dict does"""
+
+        for filename in ['data/utils/bugzilla_bug.xml',
+                         'data/utils/bugzilla_bugs_invalid_chars.xml',
+                         'data/bugzilla/bugzilla_bugs_details.xml']:
+            raw_xml = read_file(filename)
+
+            expected = xml_to_dict(raw_xml)['bug']
+            bugs = [bug for bug in iter_xml_to_dict(raw_xml, 'bug')]
+
+            self.assertListEqual(bugs, expected)
+
+    def test_nested_elements(self):
+        """Check whether only the children of the root element are converted"""
+
+        raw_xml = '<root version="1">' \
+                  '<bug id="1"><bug id="2"/></bug>' \
+                  '<other><bug id="3"/></other>' \
+                  '<bug id="4">text</bug>' \
+                  '</root>'
+
+        bugs = [bug for bug in iter_xml_to_dict(raw_xml, 'bug')]
+
+        expected = [
+            {'id': '1', 'bug': [{'id': '2'}]},
+            {'id': '4', '__text__': 'text'}
+        ]
+        self.assertListEqual(bugs, expected)
+
+    def test_invalid_xml(self):
+        """Check whether it raises an exception when the XML is invalid"""
+
+        raw_xml = read_file('data/utils/xml_invalid.xml')
+
+        with self.assertRaises(ParseError):
+            _ = [bug for bug in iter_xml_to_dict(raw_xml, 'bug')]
+
+
 if __name__ == "__main__":
     unittest.main()